@@ -1,17 +1,126 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from simple_chatbot import SimpleChatbot
-from chatbot import ChatBot
-from pinecone_processor import get_vector_store_instance
+from metrics import REQUEST_SECONDS, REQUESTS, CONTENT_TYPE, render_metrics
+from tracing import start_trace
+from usage_tracker import usage_scope, get_usage_tracker
+from slow_request_log import capture_request
+from query_log import log_query
+from warmup import start_warmup, is_ready, get_cache_warmer
 import uvicorn
 import logging
+import threading
+import time
+import uuid
+from typing import Any, NamedTuple, Optional
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Regierungsprogramm Chatbot API")
+# The chatbots (LangChain, spaCy, Pinecone client) are imported and connected after the server is up,
+# so Cloud Run sees the port open within a second; /api/ready reports when they and the caches are ready
+_chatbots = None
+_chatbots_lock = threading.Lock()
+# Conversation state (history, follow-up chunks) per client session; retrievers and LLM clients are shared
+_sessions = None
+_sessions_lock = threading.Lock()
+_startup = {"status": "pending", "seconds": None, "error": None}
+
+class SessionChatbots(NamedTuple):
+    """The chatbots of one conversation and the lock serializing its requests."""
+    simple_chatbot: Any
+    chatbot: Any
+    # get_response swaps the retriever and updates history and follow-up chunks; two tabs or a client
+    # retry with the same session_id must not interleave
+    lock: threading.Lock
+
+def get_chatbots():
+    """
+    Get or create the startup chatbots; the first call imports them, connects to the vector store
+    and creates the resources shared by all sessions (see get_session_chatbots).
+
+    Returns:
+        SessionChatbots (simple_chatbot, efficient_chatbot, lock)
+    """
+    global _chatbots
+
+    with _chatbots_lock:
+        if _chatbots is None:
+            from chat_resources import ChatResources
+            from pinecone_processor import get_vector_store_instance
+
+            # Get vector store instance
+            vector_store = get_vector_store_instance()
+
+            # Initialize both chatbots with one set of retrievers and LLM clients for all sessions
+            resources = ChatResources(vector_store=vector_store)
+            _chatbots = new_chatbots(resources)
+            # Read today's cost from the usage log now rather than in the first request
+            get_usage_tracker()
+            logger.info("API initialized with efficient ChatBot")
+
+            # Warm the caches in the background now that the retriever can be used
+            start_warmup(resources)
+    return _chatbots
+
+def new_chatbots(resources):
+    """A pair of chatbots with their own conversation state on top of the shared resources."""
+    from simple_chatbot import SimpleChatbot
+    from chatbot import ChatBot
+
+    return SessionChatbots(SimpleChatbot(resources=resources),
+                           ChatBot(resources.vector_store, use_efficient_retriever=True, resources=resources),
+                           threading.Lock())
+
+def get_session_chatbots(session_id: Optional[str] = None):
+    """
+    Get the chatbots holding the conversation of a client session.
+
+    Args:
+        session_id: Client session; without one, every request starts a new conversation so that
+                    follow-ups never reuse another client's history or chunks
+
+    Returns:
+        SessionChatbots (simple_chatbot, efficient_chatbot, lock); hold the lock while using the chatbots
+    """
+    global _sessions
+
+    resources = get_chatbots()[1].resources
+    if not session_id:
+        return new_chatbots(resources)
+
+    with _sessions_lock:
+        if _sessions is None:
+            from caches import TTLCache
+            _sessions = TTLCache("api_session", resources.settings.api_max_sessions,
+                                 resources.settings.api_session_ttl_seconds)
+        chatbots = _sessions.get(session_id) or new_chatbots(resources)
+        # Storing again renews the expiry, so only idle sessions are dropped
+        _sessions.put(session_id, chatbots)
+    return chatbots
+
+def initialize():
+    """Create the chatbots once after startup and record the outcome for /api/ready."""
+    start = time.perf_counter()
+    _startup["status"] = "initializing"
+    try:
+        get_chatbots()
+        _startup["status"] = "done"
+    except Exception as e:
+        # Requests retry the initialization through get_chatbots()
+        logger.error(f"Error initializing the chatbots: {str(e)}")
+        _startup.update(status="failed", error=str(e))
+    _startup["seconds"] = round(time.perf_counter() - start, 3)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    threading.Thread(target=initialize, name="api-startup", daemon=True).start()
+    yield
+
+app = FastAPI(title="Regierungsprogramm Chatbot API", lifespan=lifespan)
 
 # CORS für die API aktivieren (wichtig für Web-Integration)
 app.add_middleware(
@@ -22,43 +131,81 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Get vector store instance
-vector_store = get_vector_store_instance()
-
-# Initialize both chatbots
-simple_chatbot = SimpleChatbot()
-efficient_chatbot = ChatBot(vector_store, use_efficient_retriever=True)
-
-logger.info("API initialized with efficient ChatBot")
-
 class QueryRequest(BaseModel):
     query: str
     simple_language: bool = False
     use_efficient_retriever: bool = True  # Default to using efficient retriever
+    fast_mode: bool = False  # Extractive answer from the best matching sentences, without the LLM
+    session_id: Optional[str] = None  # Client session for the conversation history, token usage and budgets
 
+# A plain def: FastAPI runs the handler in its threadpool, so retrieval and LLM calls
+# do not block the event loop and /api/live stays responsive under load
 @app.post("/api/chat")
-async def get_chatbot_response(request: QueryRequest):
-    try:
-        logger.info(f"Received query: '{request.query}', simple_language: {request.simple_language}, use_efficient_retriever: {request.use_efficient_retriever}")
-        
-        if request.use_efficient_retriever:
-            # Use the efficient retriever-based ChatBot
-            response = efficient_chatbot.get_response(request.query, simple_language=request.simple_language)
-            logger.info(f"Generated response using efficient retriever")
-        else:
-            # Use SimpleChatbot with standard retrieval
-            prompt_to_use = f"Bitte erkläre in einfacher Sprache: {request.query}" if request.simple_language else request.query
-            response = simple_chatbot.get_response(prompt_to_use)
-            logger.info(f"Generated response using standard method")
-        
-        return response
-    except Exception as e:
-        logger.error(f"Error generating response: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+def get_chatbot_response(request: QueryRequest, http_response: Response):
+    start_time = time.perf_counter()
+    if _chatbots is None and _startup["status"] in ("pending", "initializing"):
+        # Do not queue behind the startup thread, which holds _chatbots_lock while connecting
+        REQUESTS.inc(endpoint="chat", status="unavailable")
+        raise HTTPException(status_code=503, detail="Der Dienst startet noch. Bitte gleich erneut versuchen.",
+                            headers={"Retry-After": "5"})
+    with start_trace("POST /api/chat", simple_language=request.simple_language, fast_mode=request.fast_mode,
+                     use_efficient_retriever=request.use_efficient_retriever) as trace_span, \
+            usage_scope(session_id=request.session_id, request_id=trace_span.trace_id or uuid.uuid4().hex), \
+            capture_request("POST /api/chat"), \
+            log_query("api", request.query, simple_language=request.simple_language, fast_mode=request.fast_mode,
+                      use_efficient_retriever=request.use_efficient_retriever, session_id=request.session_id):
+        # The trace ID lets a slow answer be looked up with trace_collector.py show --trace-id
+        trace_headers = {"X-Trace-Id": trace_span.trace_id} if trace_span.trace_id else {}
+        http_response.headers.update(trace_headers)
+        try:
+            logger.info(f"Received query: '{request.query}', simple_language: {request.simple_language}, use_efficient_retriever: {request.use_efficient_retriever}, fast_mode: {request.fast_mode}")
+            session = get_session_chatbots(request.session_id)
+            
+            # Requests of one session run one after another; other sessions are not blocked
+            with session.lock:
+                if request.use_efficient_retriever:
+                    # Use the efficient retriever-based ChatBot
+                    response = session.chatbot.get_response(request.query, simple_language=request.simple_language,
+                                                            extractive=request.fast_mode)
+                    logger.info(f"Generated response using efficient retriever")
+                else:
+                    # Use SimpleChatbot with standard retrieval
+                    prompt_to_use = f"Bitte erkläre in einfacher Sprache: {request.query}" if request.simple_language else request.query
+                    response = session.simple_chatbot.get_response(prompt_to_use, extractive=request.fast_mode)
+                    logger.info(f"Generated response using standard method")
+            
+            REQUESTS.inc(endpoint="chat", status="ok")
+            return response
+        except Exception as e:
+            REQUESTS.inc(endpoint="chat", status="error")
+            logger.error(f"Error generating response: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e), headers=trace_headers)
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - start_time, endpoint="chat")
 
 @app.get("/api/health")
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/api/live")
+async def liveness_check():
+    """The process is up and serving; does not touch the vector store or the LLM."""
+    return {"status": "ok"}
+
+@app.get("/api/ready")
+async def readiness_check():
+    """Ready once the chatbots are created and the startup cache warm-up is finished (or out of time)."""
+    content = {"startup": dict(_startup), "warmup": get_cache_warmer().summary()}
+    if _chatbots is None:
+        return JSONResponse(status_code=503, content={"status": "initializing", **content})
+    if not is_ready():
+        return JSONResponse(status_code=503, content={"status": "warming_up", **content})
+    return {"status": "ready", **content}
+
+@app.get("/metrics")
+async def get_metrics():
+    """Stage latencies, token usage and cache hits in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -5,8 +5,15 @@ from PIL import Image
 from pinecone_processor import get_vector_store_instance, PineconeConnectionError
 from simple_chatbot import SimpleChatbot
 from chatbot import ChatBot
+from chat_resources import ChatResources
 import traceback
-import hashlib
+import uuid
+from chat_history import generate_message_hash, deduplicate_history
+from tracing import start_trace
+from usage_tracker import usage_scope, get_usage_tracker
+from slow_request_log import capture_request
+from query_log import log_query
+from warmup import start_warmup
 
 # Konfiguration der Streamlit-App
 st.set_page_config(
@@ -20,6 +27,13 @@ st.set_page_config(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@st.cache_resource(show_spinner=False)
+def get_shared_resources():
+    """Retriever, LLM-Clients und Prompts einmal pro Prozess; die Sitzungen halten nur ihren Gesprächsverlauf."""
+    # Die heutigen Kosten aus dem Usage-Log einmal hier lesen statt in der ersten Anfrage
+    get_usage_tracker()
+    return ChatResources()
+
 def initialize_session_state():
     """Initialisiert die Session-Variablen, wenn sie noch nicht existieren."""
     if "chat_history" not in st.session_state:
@@ -43,7 +57,8 @@ def initialize_session_state():
                 ensure_vectorstore_exists()
             
             if "vector_store" in st.session_state and st.session_state.vector_store is not None:
-                st.session_state.chatbot = ChatBot(st.session_state.vector_store, use_efficient_retriever=True)
+                st.session_state.chatbot = ChatBot(st.session_state.vector_store, use_efficient_retriever=True,
+                                                   resources=get_shared_resources())
                 logger.info("ChatBot with efficient retriever initialized successfully")
             else:
                 raise ValueError("Vector store initialization failed")
@@ -71,7 +86,8 @@ toml
             # Fall back to standard retriever if efficient retriever fails
             try:
                 logger.info("Trying to initialize ChatBot with standard retriever")
-                st.session_state.chatbot = ChatBot(st.session_state.vector_store, use_efficient_retriever=False)
+                st.session_state.chatbot = ChatBot(st.session_state.vector_store, use_efficient_retriever=False,
+                                                   resources=get_shared_resources())
                 logger.info("ChatBot with standard retriever initialized successfully")
             except Exception as fallback_error:
                 logger.error(f"Error initializing ChatBot with standard retriever: {str(fallback_error)}")
@@ -84,7 +100,7 @@ toml
     
     if "simple_chatbot" not in st.session_state:
         try:
-            st.session_state.simple_chatbot = SimpleChatbot()
+            st.session_state.simple_chatbot = SimpleChatbot(resources=get_shared_resources())
         except ValueError as e:
             st.error(f"Fehler bei der Initialisierung des einfachen Chatbots: {str(e)}")
             st.warning("""
@@ -111,10 +127,6 @@ toml
     if "active_tab" not in st.session_state:
         st.session_state.active_tab = "standard"
 
-def generate_message_hash(content):
-    """Generate a unique hash based on message content."""
-    return hashlib.md5(content.encode('utf-8')).hexdigest()
-
 def render_chat_interface(simple_language=False):
     """Rendert das Chat-Interface je nach ausgewähltem Modus"""
     
@@ -148,8 +160,31 @@ def render_chat_interface(simple_language=False):
         message_placeholder = st.empty()
                 
         try:
-            # Antwort vom Chatbot
-            response = chatbot.get_response(user_input, simple_language=simple_language)
+            fast_mode = st.session_state.get("fast_mode", False)
+            # Ein Trace pro Frage, von der Vorschau bis zur fertigen Antwort
+            with start_trace("streamlit.chat", simple_language=simple_language, fast_mode=fast_mode) as trace_span, \
+                    usage_scope(session_id=st.session_state.get("session_id"),
+                                request_id=trace_span.trace_id or uuid.uuid4().hex), \
+                    capture_request("streamlit.chat"), \
+                    log_query("streamlit", user_input, simple_language=simple_language, fast_mode=fast_mode,
+                              session_id=st.session_state.get("session_id")):
+                preview_documents = None
+                if not fast_mode:
+                    # Sofortige Vorschau aus den passendsten Textstellen, während die KI-Antwort erstellt wird
+                    # (FAQ- und Seitenfragen werden ohnehin sofort beantwortet und bekommen keine Vorschau)
+                    preview = chatbot.get_preview(user_input, simple_language=simple_language)
+                    if preview:
+                        preview_text, preview_documents = preview
+                        with message_placeholder.container():
+                            with st.chat_message("user"):
+                                st.markdown(user_input)
+                            with st.chat_message("assistant"):
+                                st.markdown(preview_text)
+                                st.caption("⏳ Die ausformulierte Antwort wird erstellt...")
+                
+                # Antwort vom Chatbot; die Textstellen der Vorschau werden nicht erneut gesucht
+                response = chatbot.get_response(user_input, simple_language=simple_language, extractive=fast_mode,
+                                                documents=preview_documents)
             
             # Generiere Hash-Werte für Nachrichten
             user_hash = generate_message_hash(user_input)
@@ -182,17 +217,7 @@ def render_chat_interface(simple_language=False):
         st.rerun()
     
     # Dedupliziere die Chat-Historie basierend auf Hash-Werten
-    deduplicated_history = []
-    seen_hashes = set()
-    
-    for message in chat_history:
-        # Wenn es ältere Nachrichten ohne Hash gibt, füge einen hinzu
-        if "hash" not in message:
-            message["hash"] = generate_message_hash(message["content"])
-            
-        if message["hash"] not in seen_hashes:
-            seen_hashes.add(message["hash"])
-            deduplicated_history.append(message)
+    deduplicated_history = deduplicate_history(chat_history)
     
     # Zeige die deduplizierte Chat-Historie im Container
     with chat_container:
@@ -301,21 +326,31 @@ def main():
     if "active_tab" not in st.session_state:
         st.session_state.active_tab = "standard"
     
+    # Sitzungs-ID für Token-Verbrauch und Sitzungsbudget
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    
     # Ensure the vector store exists - must happen before chatbot initialization
     vector_store = ensure_vectorstore_exists()
     
+    # Caches einmal pro Prozess im Hintergrund mit den häufigsten Fragen vorwärmen
+    if vector_store is not None:
+        start_warmup(get_shared_resources())
+    
     # Initialize chatbot only if vector store is available
     if "chatbot" not in st.session_state:
         if vector_store is not None:
             try:
                 logger.info("Initializing ChatBot with efficient retriever")
-                st.session_state.chatbot = ChatBot(vector_store, use_efficient_retriever=True)
+                st.session_state.chatbot = ChatBot(vector_store, use_efficient_retriever=True,
+                                                   resources=get_shared_resources())
                 logger.info("ChatBot with efficient retriever initialized successfully")
             except Exception as e:
                 logger.error(f"Error initializing ChatBot with efficient retriever: {str(e)}")
                 try:
                     logger.info("Falling back to standard retriever")
-                    st.session_state.chatbot = ChatBot(vector_store, use_efficient_retriever=False)
+                    st.session_state.chatbot = ChatBot(vector_store, use_efficient_retriever=False,
+                                                       resources=get_shared_resources())
                     logger.info("ChatBot with standard retriever initialized successfully")
                 except Exception as fallback_error:
                     logger.error(f"Error initializing ChatBot with standard retriever: {str(fallback_error)}")
@@ -327,7 +362,7 @@ def main():
     # Initialize simple chatbot if needed
     if "simple_chatbot" not in st.session_state:
         try:
-            st.session_state.simple_chatbot = SimpleChatbot()
+            st.session_state.simple_chatbot = SimpleChatbot(resources=get_shared_resources())
             logger.info("SimpleChatbot initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing SimpleChatbot: {str(e)}")
@@ -350,6 +385,9 @@ def main():
             st.session_state.active_tab = "simple"
             st.rerun()
     
+    # Schnellmodus: Antworten aus wörtlichen Auszügen, ohne KI-Formulierung
+    st.toggle("⚡ Schnellmodus (wörtliche Auszüge statt KI-Antwort)", key="fast_mode")
+    
     # Hinweis zum aktiven Modus
     if st.session_state.active_tab == "standard":
         st.caption("Sie sind im Standard-Modus")
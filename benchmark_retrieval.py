@@ -0,0 +1,246 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from config import PINECONE_NAMESPACE, LOCAL_INDEX_PATH, PAGE_INDEX_PATH
+from perf_stats import summarize, format_summary
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# A backend factory takes top_k and returns a search function query -> list of Documents
+BackendFactory = Callable[[int], Callable[[str], List]]
+
+BACKENDS: Dict[str, BackendFactory] = {}
+
+# Latency statistics compared against the baseline
+REGRESSION_METRICS = ("p50", "p95")
+DEFAULT_TOLERANCE = 0.2
+
+
+def uncached_settings():
+    """Current settings without the retrieval cache, so repeated queries are timed against the index."""
+    from dataclasses import replace
+    from settings import get_settings
+    return replace(get_settings(), retrieval_cache_size=0)
+
+
+def register_backend(name: str):
+    """Register a retrieval backend factory under a name usable with --backends."""
+    def decorator(factory: BackendFactory) -> BackendFactory:
+        BACKENDS[name] = factory
+        return factory
+    return decorator
+
+
+@register_backend("efficient")
+def efficient_backend(top_k: int):
+    """EfficientPineconeRetriever with the configured index backend and retrieval settings."""
+    from pinecone_processor import get_efficient_retriever_instance
+    retriever = get_efficient_retriever_instance(top_k=top_k, settings=uncached_settings())
+    return retriever.invoke
+
+
+@register_backend("langchain")
+def langchain_backend(top_k: int):
+    """LangChain PineconeVectorStore similarity search."""
+    from pinecone_processor import get_vector_store_instance
+    vector_store = get_vector_store_instance()
+    return lambda query: vector_store.similarity_search(query, k=top_k)
+
+
+@register_backend("local")
+def local_backend(top_k: int):
+    """EfficientPineconeRetriever over the in-process local index, seeded from the page index if empty."""
+    from efficient_retriever import EfficientPineconeRetriever
+    from local_pinecone import LocalIndex, seed_from_page_index
+    index = LocalIndex("benchmark", path=LOCAL_INDEX_PATH if os.path.exists(LOCAL_INDEX_PATH) else None)
+    if not index.describe_index_stats()["total_vector_count"]:
+        if not os.path.exists(PAGE_INDEX_PATH):
+            raise ValueError(f"Neither {LOCAL_INDEX_PATH} nor {PAGE_INDEX_PATH} exists. Run create_vectorstore.py first.")
+        from page_index import PageIndex
+        seed_from_page_index(index, PageIndex.load(PAGE_INDEX_PATH), PINECONE_NAMESPACE)
+    retriever = EfficientPineconeRetriever(index=index, namespace=PINECONE_NAMESPACE, top_k=top_k)
+    return retriever.invoke
+
+
+@register_backend("hybrid")
+def hybrid_backend(top_k: int):
+    """Dense retrieval with three fused query variants and local BM25 reranking of the overfetched candidates."""
+    from pinecone_processor import get_efficient_retriever_instance
+    retriever = get_efficient_retriever_instance(top_k=top_k, query_variants=3, rerank_scorer="bm25",
+                                                 settings=uncached_settings())
+    return retriever.invoke
+
+
+def benchmark_backend(name: str, queries: List[str], top_k: int = 3, warmup: int = 1,
+                      repetitions: int = 5, factory: Optional[BackendFactory] = None) -> Dict:
+    """
+    Benchmark one backend.
+
+    Args:
+        name: Backend name
+        queries: Queries to run
+        top_k: Number of results per query
+        warmup: Unmeasured passes over all queries (connection setup, caches, lazy imports)
+        repetitions: Measured passes over all queries
+        factory: Backend factory; looked up in BACKENDS by name if omitted
+
+    Returns:
+        Result with setup time, latency summary, per-query p50, errors and empty results
+    """
+    factory = factory or BACKENDS[name]
+    start = time.perf_counter()
+    search = factory(top_k)
+    setup_seconds = time.perf_counter() - start
+
+    for _ in range(warmup):
+        for query in queries:
+            try:
+                search(query)
+            except Exception as e:
+                logger.warning(f"[{name}] warmup query failed: {str(e)}")
+
+    latencies = []
+    per_query = {query: [] for query in queries}
+    errors = 0
+    empty = 0
+    result_counts = []
+    for _ in range(repetitions):
+        for query in queries:
+            start = time.perf_counter()
+            try:
+                documents = search(query)
+            except Exception as e:
+                errors += 1
+                logger.warning(f"[{name}] query failed: {str(e)}")
+                continue
+            latency = time.perf_counter() - start
+            latencies.append(latency)
+            per_query[query].append(latency)
+            result_counts.append(len(documents))
+            empty += not documents
+
+    return {
+        "setup_seconds": setup_seconds,
+        "latency": summarize(latencies),
+        "per_query_p50": {query: summarize(values).get("p50") for query, values in per_query.items()},
+        "errors": errors,
+        "empty_results": empty,
+        "mean_results": sum(result_counts) / len(result_counts) if result_counts else 0.0,
+    }
+
+
+def compare_to_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict],
+                        tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Find latency regressions against a stored baseline.
+
+    Args:
+        results: Backend results of this run
+        baseline: Backend results of the baseline run
+        tolerance: Allowed relative slowdown, e.g. 0.2 for 20 %
+
+    Returns:
+        Human-readable regression messages, empty if there are none
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in REGRESSION_METRICS:
+            current = result["latency"].get(metric)
+            previous = baseline[name]["latency"].get(metric)
+            if current is None or not previous:
+                continue
+            if current > previous * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {current * 1000:.1f} ms vs. baseline {previous * 1000:.1f} ms "
+                                   f"(+{(current / previous - 1):.0%}, tolerance {tolerance:.0%})")
+        if result["errors"] > baseline[name].get("errors", 0):
+            regressions.append(f"{name} errors: {result['errors']} vs. baseline {baseline[name].get('errors', 0)}")
+    return regressions
+
+
+def load_queries(path: Optional[str]) -> List[str]:
+    """Queries from a text file (one per line), or the default test queries."""
+    if path is None:
+        from comparison_test import TEST_QUERIES
+        return list(TEST_QUERIES)
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main(argv: Optional[List[str]] = None):
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Benchmark retrieval backends with warmup, repetitions and percentiles")
+    parser.add_argument("query", nargs="?", default="", help="Single query (default: the built-in test queries)")
+    parser.add_argument("--queries", default=None, help="Text file with one query per line")
+    parser.add_argument("--backends", default="efficient", help=f"Comma-separated backends: {', '.join(BACKENDS)}")
+    parser.add_argument("--top_k", type=int, default=3, help="Number of results to return")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured passes over the queries")
+    parser.add_argument("--repetitions", type=int, default=5, help="Measured passes over the queries")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    queries = [args.query] if args.query else load_queries(args.queries)
+    names = [name.strip() for name in args.backends.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BACKENDS]
+    if unknown:
+        parser.error(f"Unknown backends: {', '.join(unknown)}. Available: {', '.join(BACKENDS)}")
+
+    results = {}
+    for name in names:
+        logger.info(f"Benchmarking backend '{name}' with {len(queries)} queries x {args.repetitions} repetitions")
+        try:
+            results[name] = benchmark_backend(name, queries, args.top_k, args.warmup, args.repetitions)
+        except Exception as e:
+            logger.error(f"Backend '{name}' could not be benchmarked: {str(e)}")
+            continue
+        result = results[name]
+        print(f"\n=== {name} ===")
+        print(f"Setup: {result['setup_seconds']:.3f}s, errors: {result['errors']}, "
+              f"empty results: {result['empty_results']}, mean results: {result['mean_results']:.1f}")
+        print(f"Latency: {format_summary(result['latency'], unit='ms', scale=1000)}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "queries": queries,
+            "top_k": args.top_k,
+            "warmup": args.warmup,
+            "repetitions": args.repetitions,
+        },
+        "backends": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"Wrote results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["backends"]
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\n===== REGRESSIONS =====")
+            for message in regressions:
+                print(message)
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+
+from config import FAQ_STORE_PATH, FAQ_MAX_WORKERS
+from faq_store import BOTS, FAQStore, compute_corpus_version, normalize_question, split_response
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Responses that must never be stored as FAQ answers
+REJECTED_ANSWER_PREFIXES = (
+    "Ein Fehler ist aufgetreten",
+    "Ich konnte leider keine relevanten Informationen",
+)
+
+# Each worker thread keeps its own chatbots, since they hold conversation state
+_thread_state = threading.local()
+
+
+def load_questions(path: str, min_count: int = 1, limit: Optional[int] = None) -> List[str]:
+    """
+    Load the questions to answer.
+
+    Plain text files hold one curated question per line ('#' starts a comment).
+    JSONL files are treated as query logs: every line with a "query" field counts
+    as one occurrence, and questions are ranked by frequency.
+
+    Args:
+        path: Path to a .txt question list or a .jsonl query log
+        min_count: Minimum number of occurrences for log-derived questions
+        limit: Maximum number of questions
+
+    Returns:
+        List of distinct questions, most frequent first for logs
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+
+    if path.endswith(".jsonl"):
+        counts = Counter()
+        first_seen = {}
+        for line in lines:
+            query = json.loads(line).get("query", "").strip()
+            if query:
+                normalized = normalize_question(query)
+                counts[normalized] += 1
+                first_seen.setdefault(normalized, query)
+        questions = [first_seen[normalized] for normalized, count in counts.most_common() if count >= min_count]
+    else:
+        seen = set()
+        questions = []
+        for line in lines:
+            if line.startswith("#") or normalize_question(line) in seen:
+                continue
+            seen.add(normalize_question(line))
+            questions.append(line)
+
+    return questions[:limit] if limit else questions
+
+
+def get_thread_chatbot(bot: str):
+    """Get the calling thread's chatbot, with the FAQ store bypassed."""
+    chatbots = getattr(_thread_state, "chatbots", None)
+    if chatbots is None:
+        chatbots = _thread_state.chatbots = {}
+
+    if bot not in chatbots:
+        if bot == "chatbot":
+            from chatbot import ChatBot
+            from pinecone_processor import get_vector_store_instance
+            chatbots[bot] = ChatBot(get_vector_store_instance(), use_efficient_retriever=True, use_faq_store=False)
+        else:
+            from simple_chatbot import SimpleChatbot
+            chatbots[bot] = SimpleChatbot(use_faq_store=False)
+
+    return chatbots[bot]
+
+
+def answer_question(bot: str, question: str, simple_language: bool):
+    """Answer one question in a fresh conversation and time it."""
+    chatbot = get_thread_chatbot(bot)
+    chatbot.clear_history()
+    start_time = time.perf_counter()
+    response = chatbot.get_response(question, simple_language=simple_language)
+    return response, time.perf_counter() - start_time
+
+
+def build_store(questions: List[str], bots: List[str], modes: List[bool], workers: int,
+                store: FAQStore, approve: bool = False) -> int:
+    """
+    Generate answers for all questions with bounded concurrency and add them to the store.
+
+    Args:
+        questions: Questions to answer
+        bots: Chatbots to generate answers with
+        modes: Language modes (False = standard, True = simple)
+        workers: Maximum number of questions answered at the same time
+        store: Store to add the answers to
+        approve: Mark generated answers as vetted right away
+
+    Returns:
+        Number of stored answers
+    """
+    jobs = [(bot, question, simple_language) for bot in bots for simple_language in modes for question in questions]
+    logger.info(f"Generating {len(jobs)} answers with {workers} workers")
+
+    stored = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="faq-build") as executor:
+        futures = {executor.submit(answer_question, *job): job for job in jobs}
+        for future in as_completed(futures):
+            bot, question, simple_language = futures[future]
+            try:
+                response, seconds = future.result()
+            except Exception as e:
+                logger.error(f"Error answering '{question}' with {bot}: {str(e)}")
+                continue
+
+            if not response or split_response(response).startswith(REJECTED_ANSWER_PREFIXES):
+                logger.warning(f"Skipping unusable answer to '{question}' from {bot}")
+                continue
+
+            store.add(bot, simple_language, question, response, vetted=approve, seconds=seconds)
+            stored += 1
+            logger.info(f"[{stored}/{len(jobs)}] {bot} answered '{question}' in {seconds:.2f} seconds")
+
+    return stored
+
+
+def load_or_create_store(path: str, corpus_version: str) -> FAQStore:
+    """Load the existing store, or start a new one if it is missing or stale."""
+    try:
+        store = FAQStore.load(path)
+    except FileNotFoundError:
+        return FAQStore(corpus_version)
+    if store.corpus_version != corpus_version:
+        logger.info(f"Corpus changed ({store.corpus_version} -> {corpus_version}), regenerating all answers")
+        return FAQStore(corpus_version)
+    return store
+
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Build and maintain the pre-generated FAQ answer store")
+    parser.add_argument("--store", default=FAQ_STORE_PATH, help="Path of the FAQ store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Answer a question list and store the answers")
+    build_parser.add_argument("questions", help="Curated question list (.txt) or query log (.jsonl)")
+    build_parser.add_argument("--bots", nargs="+", choices=BOTS, default=list(BOTS), help="Chatbots to generate answers with")
+    build_parser.add_argument("--modes", nargs="+", choices=["standard", "simple"], default=["standard", "simple"],
+                              help="Language modes to generate answers for")
+    build_parser.add_argument("--workers", type=int, default=FAQ_MAX_WORKERS, help="Concurrent questions")
+    build_parser.add_argument("--min-count", type=int, default=2, help="Minimum occurrences for questions from a query log")
+    build_parser.add_argument("--limit", type=int, default=None, help="Maximum number of questions")
+    build_parser.add_argument("--approve", action="store_true", help="Mark generated answers as vetted")
+    build_parser.add_argument("--if-stale", action="store_true", help="Only build if the corpus version changed")
+
+    list_parser = subparsers.add_parser("list", help="List stored answers")
+    list_parser.add_argument("--pending", action="store_true", help="Only list answers that are not vetted yet")
+
+    approve_parser = subparsers.add_parser("approve", help="Mark stored answers as vetted")
+    approve_parser.add_argument("questions", nargs="*", help="Questions to approve")
+    approve_parser.add_argument("--all", action="store_true", help="Approve all stored answers")
+    args = parser.parse_args()
+
+    corpus_version = compute_corpus_version()
+
+    if args.command == "build":
+        store = load_or_create_store(args.store, corpus_version)
+        if args.if_stale and len(store):
+            print(f"FAQ store is up to date for corpus {corpus_version}, nothing to do")
+            return
+        questions = load_questions(args.questions, min_count=args.min_count, limit=args.limit)
+        modes = [mode == "simple" for mode in args.modes]
+        start_time = time.perf_counter()
+        stored = build_store(questions, args.bots, modes, args.workers, store, approve=args.approve)
+        store.save(args.store)
+        print(f"Stored {stored} answers for {len(questions)} questions in {time.perf_counter() - start_time:.1f} seconds")
+        return
+
+    store = FAQStore.load(args.store)
+    if store.corpus_version != corpus_version:
+        print(f"Warning: store was built for corpus {store.corpus_version}, current corpus is {corpus_version}")
+
+    if args.command == "list":
+        for key, answers in sorted(store.entries.items()):
+            for entry in answers.values():
+                if args.pending and entry["vetted"]:
+                    continue
+                status = "vetted" if entry["vetted"] else "pending"
+                print(f"[{key}] [{status}] {entry['question']}")
+                print(f"    {entry['answer'][:200]}")
+    elif args.command == "approve":
+        if not args.all and not args.questions:
+            parser.error("approve needs questions or --all")
+        approved = store.approve(None if args.all else args.questions)
+        store.save(args.store)
+        print(f"Approved {approved} answers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from metrics import record_cache_lookup
+from settings import get_settings
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ttl_seconds; lookups are counted in the metrics."""
+
+    def __init__(self, name: str, maxsize: int, ttl_seconds: float):
+        """
+        Initialize the cache.
+
+        Args:
+            name: Cache label in the cache_lookups_total metric and in traces
+            maxsize: Maximum number of entries; the least recently used entry is evicted first
+            ttl_seconds: Seconds after which an entry is treated as missing
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """The cached value, or None if it is missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        record_cache_lookup(self.name, entry is not None)
+        return entry[1] if entry is not None else None
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# Global cache instance
+_retrieval_cache_instance = None
+_retrieval_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache() -> TTLCache:
+    """Get or create the process-wide search_records result cache."""
+    global _retrieval_cache_instance
+
+    with _retrieval_cache_lock:
+        if _retrieval_cache_instance is None:
+            settings = get_settings()
+            _retrieval_cache_instance = TTLCache("retrieval", settings.retrieval_cache_size,
+                                                 settings.retrieval_cache_ttl_seconds)
+
+    return _retrieval_cache_instance
@@ -0,0 +1,34 @@
+import hashlib
+from typing import Dict, List
+
+
+def generate_message_hash(content: str) -> str:
+    """Generate a unique hash based on message content."""
+    return hashlib.md5(content.encode('utf-8')).hexdigest()
+
+
+def deduplicate_history(chat_history: List[Dict]) -> List[Dict]:
+    """
+    Drop repeated messages from a chat history, keeping the first occurrence.
+    
+    Messages stored before hashes were introduced get their hash added in place.
+    
+    Args:
+        chat_history: Messages with "role", "content" and optionally "hash"
+        
+    Returns:
+        Messages in their original order without duplicates
+    """
+    deduplicated_history = []
+    seen_hashes = set()
+    
+    for message in chat_history:
+        # Wenn es ältere Nachrichten ohne Hash gibt, füge einen hinzu
+        if "hash" not in message:
+            message["hash"] = generate_message_hash(message["content"])
+            
+        if message["hash"] not in seen_hashes:
+            seen_hashes.add(message["hash"])
+            deduplicated_history.append(message)
+    
+    return deduplicated_history
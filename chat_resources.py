@@ -0,0 +1,160 @@
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+from config import SYSTEM_PROMPT, PRESIMPLIFIED_SYSTEM_PROMPT
+from settings import Settings, get_settings
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def build_chat_prompts() -> Dict[str, ChatPromptTemplate]:
+    """The ChatBot prompt templates by name (regular/simple, condense and single-call variants)."""
+    regular_system = f"{SYSTEM_PROMPT}\n\nContext:\n{{context}}"
+    simple_system = f"{SYSTEM_PROMPT}\n\nVerwende einfache Sprache ohne Fremdwörter oder Fachbegriffe. Erkläre komplexe Konzepte in einfachen Worten und verwende kurze Sätze.\n\nContext:\n{{context}}"
+    return {
+        "regular": ChatPromptTemplate.from_messages([
+            ("system", regular_system),
+            ("human", "{question}")
+        ]),
+        "simple": ChatPromptTemplate.from_messages([
+            ("system", simple_system),
+            ("human", "{question}")
+        ]),
+        # Single-call prompts pass the recent chat history directly to the LLM
+        # instead of condensing it into a standalone question first
+        "regular_single_call": ChatPromptTemplate.from_messages([
+            ("system", regular_system),
+            MessagesPlaceholder("chat_history"),
+            ("human", "{question}")
+        ]),
+        "simple_single_call": ChatPromptTemplate.from_messages([
+            ("system", simple_system),
+            MessagesPlaceholder("chat_history"),
+            ("human", "{question}")
+        ]),
+        # Pre-simplified chunks need no translation into plain language, so simple
+        # mode gets by with a short prompt and a short completion
+        "presimplified_single_call": ChatPromptTemplate.from_messages([
+            ("system", f"{PRESIMPLIFIED_SYSTEM_PROMPT}\n\nContext:\n{{context}}"),
+            MessagesPlaceholder("chat_history"),
+            ("human", "{question}")
+        ]),
+    }
+
+
+class ChatResources:
+    """
+    Heavy, stateless chatbot components: retrievers (with their index handles), LLM clients and
+    compiled prompts. One instance is shared by all sessions of a process (see app.py); the
+    chatbots themselves only keep the conversation state of their session.
+    """
+
+    def __init__(self, settings: Settings = None, vector_store=None):
+        """
+        Initialize the resources; components are created on first use and then reused.
+
+        Args:
+            settings: Settings for all components (default: get_settings())
+            vector_store: LangChain vector store for the standard retriever (default: get_vector_store_instance())
+        """
+        self.settings = settings or get_settings()
+        self._vector_store = vector_store
+        self._prompts = None
+        self._retrievers: Dict[Tuple, object] = {}
+        self._llms: Dict[int, object] = {}
+        self._openai_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def vector_store(self):
+        if self._vector_store is None:
+            from pinecone_processor import get_vector_store_instance
+            self._vector_store = get_vector_store_instance()
+        return self._vector_store
+
+    @property
+    def prompts(self) -> Dict[str, ChatPromptTemplate]:
+        if self._prompts is None:
+            self._prompts = build_chat_prompts()
+        return self._prompts
+
+    def namespace(self, simple_language: bool = False) -> str:
+        """The namespace searched in a language mode (see pinecone_processor.get_retrieval_namespace)."""
+        from pinecone_processor import get_retrieval_namespace
+
+        return get_retrieval_namespace(simple_language, self.settings)
+
+    def retriever(self, top_k: int, simple_language: bool = False, efficient: bool = True):
+        """
+        The retriever for a top_k and language mode.
+
+        Args:
+            top_k: Number of chunks to return
+            simple_language: Search the namespace of the simple language mode
+            efficient: EfficientPineconeRetriever (integrated embedding), else the LangChain vector store retriever
+
+        Returns:
+            A retriever, created once per combination
+        """
+        from pinecone_processor import get_efficient_retriever_instance
+
+        namespace = self.namespace(simple_language)
+        key = (efficient, top_k, namespace if efficient else None)
+        with self._lock:
+            if key not in self._retrievers:
+                if efficient:
+                    self._retrievers[key] = get_efficient_retriever_instance(top_k=top_k, namespace=namespace,
+                                                                             settings=self.settings)
+                else:
+                    self._retrievers[key] = self.vector_store.as_retriever(search_kwargs={"k": top_k})
+            return self._retrievers[key]
+
+    def llm(self, max_tokens: int, default_headers: Optional[Dict[str, str]] = None):
+        """
+        LangChain ChatOpenAI client for the configured endpoint, model and timeouts.
+
+        Args:
+            max_tokens: Completion limit; one shared client is kept per value
+            default_headers: Headers sent with every call, e.g. the trace context; such clients
+                             belong to one request and are not shared
+
+        Returns:
+            A ChatOpenAI instance
+        """
+        from langchain_openai import ChatOpenAI
+
+        def create():
+            return ChatOpenAI(
+                model_name=self.settings.model_name,
+                temperature=self.settings.temperature,
+                max_tokens=max_tokens,
+                openai_api_key=self.settings.openai_api_key,
+                openai_api_base=self.settings.openai_base_url,
+                request_timeout=self.settings.llm_timeout_seconds,
+                max_retries=self.settings.llm_max_retries,
+                default_headers=default_headers
+            )
+
+        if default_headers:
+            return create()
+        with self._lock:
+            if max_tokens not in self._llms:
+                self._llms[max_tokens] = create()
+            return self._llms[max_tokens]
+
+    def openai_client(self):
+        """OpenAI client (with its connection pool) for SimpleChatbot."""
+        import openai
+
+        with self._lock:
+            if self._openai_client is None:
+                self._openai_client = openai.OpenAI(api_key=self.settings.openai_api_key,
+                                                    base_url=self.settings.openai_base_url,
+                                                    timeout=self.settings.llm_timeout_seconds,
+                                                    max_retries=self.settings.llm_max_retries)
+            return self._openai_client
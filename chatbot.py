@@ -1,35 +1,64 @@
 from typing import List, Dict
-from langchain_openai import ChatOpenAI
 from langchain.memory import ConversationBufferMemory
 from langchain.chains import ConversationalRetrievalChain
-from config import (OPENAI_API_KEY, MODEL_NAME, TEMPERATURE, MAX_TOKENS, 
-                   STANDARD_MAX_TOKENS, SIMPLE_MAX_TOKENS, 
-                   STANDARD_TOP_K, SIMPLE_TOP_K,
-                   SYSTEM_PROMPT, PINECONE_INDEX_NAME, PINECONE_NAMESPACE)
+from settings import Settings, get_settings
 import os
 import logging
 import re
-from langchain_core.prompts import ChatPromptTemplate
-from pinecone_processor import get_efficient_retriever_instance
+import time
+from langchain_core.messages import HumanMessage
+from chat_resources import ChatResources
+from query_rewriter import rewrite_query
+from retrieval_context import RetrievalContext
+from query_router import direct_lookup
+from faq_store import lookup_faq
+from extractive_answer import build_extractive_answer
+from llm_guard import llm_slot, LLM_FALLBACK_ERRORS
+from langchain_community.callbacks import get_openai_callback
+from metrics import timed, record_cache_lookup
+from usage_tracker import get_usage_tracker
+from tracing import span, current_span, traceparent_headers
+from slow_request_log import record_inputs, record_documents, HISTORY_MESSAGES
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+GENERATION_MODES = ("single_call", "condense")
+
 class ChatBot:
-    def __init__(self, vector_store, use_efficient_retriever=True):
+    def __init__(self, vector_store, use_efficient_retriever=True, generation_mode=None,
+                 use_faq_store=None, settings: Settings = None, resources: ChatResources = None):
         """Initialize ChatBot with the vector store instance.
         
         Args:
             vector_store: Vector store instance
             use_efficient_retriever: Whether to use the efficient Pinecone retriever
                                      that uses integrated embedding API
+            generation_mode: "single_call" to answer with exactly one completion call,
+                             "condense" to let LangChain rewrite follow-ups with an extra LLM call
+                             (default: settings.generation_mode)
+            use_faq_store: Whether to answer frequent questions from the pre-generated FAQ store
+                           (default: settings.faq_enabled)
+            settings: Model, token, top_k, timeout and retrieval settings
+                      (default: those of resources, else get_settings())
+            resources: Retrievers, LLM clients and prompts shared across sessions
+                       (default: a private ChatResources for this chatbot)
         """
+        self.settings = settings = settings or (resources.settings if resources else get_settings())
+        self.resources = resources or ChatResources(settings=settings, vector_store=vector_store)
+        generation_mode = generation_mode or settings.generation_mode
+        use_faq_store = settings.faq_enabled if use_faq_store is None else use_faq_store
+        if generation_mode not in GENERATION_MODES:
+            raise ValueError(f"Unknown generation mode: {generation_mode}. Expected one of {GENERATION_MODES}")
+        
         self.vector_store = vector_store
         self.use_efficient_retriever = use_efficient_retriever
+        self.generation_mode = generation_mode
+        self.use_faq_store = use_faq_store
         
         # Check if OpenAI API key is available
-        if not OPENAI_API_KEY:
+        if not settings.openai_api_key:
             logger.error("OpenAI API key is missing")
             raise ValueError(
                 "OpenAI API key is missing. Please make sure you have configured a valid "
@@ -37,8 +66,8 @@ class ChatBot:
             )
         
         # Configure OpenAI settings
-        os.environ["OPENAI_API_BASE"] = "https://oai.hconeai.com/v1"
-        os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
+        os.environ["OPENAI_API_BASE"] = settings.openai_base_url
+        os.environ["OPENAI_API_KEY"] = settings.openai_api_key
         
         # Initialize conversation memory
         self.memory = ConversationBufferMemory(
@@ -47,51 +76,36 @@ class ChatBot:
             output_key="answer"
         )
         
+        # Chunks of the previous turn, reused for follow-up questions in single-call mode
+        self.retrieval_context = RetrievalContext(delta_top_k=settings.follow_up_delta_k,
+                                                 max_new_terms=settings.follow_up_max_new_terms)
+        
         try:
-            # Initialize language model
-            llm = ChatOpenAI(
-                model_name=MODEL_NAME,
-                temperature=TEMPERATURE,
-                max_tokens=MAX_TOKENS
-            )
-            
-            # Create prompt template with system prompt from config
-            # We'll create two different prompt templates - one for regular and one for simple language
-            # We'll choose the appropriate one in the get_response method
-            self.regular_prompt = ChatPromptTemplate.from_messages([
-                ("system", f"{SYSTEM_PROMPT}\n\nContext:\n{{context}}"),
-                ("human", "{question}")
-            ])
-            
-            self.simple_prompt = ChatPromptTemplate.from_messages([
-                ("system", f"{SYSTEM_PROMPT}\n\nVerwende einfache Sprache ohne Fremdwörter oder Fachbegriffe. Erkläre komplexe Konzepte in einfachen Worten und verwende kurze Sätze.\n\nContext:\n{{context}}"),
-                ("human", "{question}")
-            ])
+            # Prompt templates and retrievers are shared with the other sessions of the process
+            prompts = self.resources.prompts
+            self.regular_prompt = prompts["regular"]
+            self.simple_prompt = prompts["simple"]
+            self.regular_single_call_prompt = prompts["regular_single_call"]
+            self.simple_single_call_prompt = prompts["simple_single_call"]
+            self.presimplified_single_call_prompt = prompts["presimplified_single_call"]
             
             # Select retriever based on configuration
             if use_efficient_retriever:
                 logger.info("Using efficient retriever with integrated embedding")
-                self.retriever = get_efficient_retriever_instance()
             else:
                 logger.info("Using standard LangChain retriever")
-                self.retriever = vector_store.as_retriever()
+            self.retriever = self.resources.retriever(settings.standard_top_k, efficient=use_efficient_retriever)
+            self.top_k = settings.standard_top_k
             
-            # Create conversational retrieval chain with default prompt (will be changed as needed)
-            self.chain = ConversationalRetrievalChain.from_llm(
-                llm=llm,
-                retriever=self.retriever,
-                memory=self.memory,
-                return_source_documents=True,
-                verbose=True,
-                chain_type="stuff",
-                output_key="answer",
-                combine_docs_chain_kwargs={"prompt": self.regular_prompt}
-            )
+            # The condense-mode chain holds this session's memory; it is built per request in _condense_response
+            self.chain = None
             logger.info("ChatBot initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing ChatBot: {str(e)}")
             raise ValueError(f"Error initializing ChatBot: {str(e)}")
         
+    @timed("format_response")
+    @span("format_response")
     def format_response(self, answer, sources):
         """Format the response with answer and sources in proper markdown."""
         # Format the main answer
@@ -136,81 +150,270 @@ class ChatBot:
                 
         return formatted_response
         
-    def get_response(self, query, simple_language=False):
-        """Get response for a user query."""
+    def _condense_response(self, query, tokens_limit, simple_language=False):
+        """Answer via ConversationalRetrievalChain (condense-question call on follow-ups)."""
+        # Recreate the chain with the appropriate prompt based on the simple_language parameter
+        if simple_language:
+            logger.info("Using simple language prompt")
+            prompt = self.simple_prompt
+        else:
+            logger.info("Using regular prompt")
+            prompt = self.regular_prompt
+        
+        self.chain = ConversationalRetrievalChain.from_llm(
+            llm=self.resources.llm(tokens_limit, default_headers=traceparent_headers()),
+            retriever=self.retriever,
+            memory=self.memory,
+            return_source_documents=True,
+            verbose=True,
+            chain_type="stuff",
+            output_key="answer",
+            combine_docs_chain_kwargs={"prompt": prompt}
+        )
+            
+        # Send query to the chain and get response
+        logger.info(f"Getting response for query: {query}")
+        with llm_slot(self.settings), timed("chain"), span("chain", model=self.settings.model_name, max_tokens=tokens_limit), \
+                get_openai_callback() as usage:
+            result = self.chain({"question": query})
+            get_usage_tracker().record(usage.prompt_tokens, usage.completion_tokens,
+                                       mode="simple" if simple_language else "standard")
+        
+        return result.get("answer", ""), result.get("source_documents", [])
+    
+    def _select_retriever(self, top_k, simple_language=False):
+        """Point self.retriever at a retriever with the top_k of the language mode."""
+        logger.info(f"Setting up {'efficient' if self.use_efficient_retriever else 'standard LangChain'} retriever with top_k={top_k}")
+        self.retriever = self.resources.retriever(top_k, simple_language, efficient=self.use_efficient_retriever)
+        self.top_k = top_k
+    
+    def _retrieval_scope(self, simple_language=False):
+        """Namespace and top_k of this turn's retrieval, which reused chunks must match."""
+        return {"namespace": self.resources.namespace(simple_language), "top_k": self.top_k}
+    
+    def _single_call_response(self, query, tokens_limit, simple_language=False, documents=None):
+        """Answer with exactly one completion call.
+        
+        Follow-ups are turned into a standalone retrieval query by a local heuristic
+        rewrite instead of an LLM condense call; the recent history is passed to the
+        LLM directly so it can still resolve references like "das" or "dazu".
+        """
+        chat_history = self.memory.load_memory_variables({})["chat_history"]
+        source_documents = documents if documents is not None else \
+            self._retrieve_documents(query, chat_history, simple_language)
+        answer = self._generate_answer(query, source_documents, chat_history, tokens_limit, simple_language)
+        return answer, source_documents
+    
+    @timed("retrieval")
+    @span("retrieval")
+    def _retrieve_documents(self, query, chat_history, simple_language=False):
+        """Retrieve chunks for a query, rewriting follow-ups and reusing the previous turn's chunks."""
+        previous_questions = [message.content for message in chat_history if isinstance(message, HumanMessage)]
+        retrieval_query = rewrite_query(query, previous_questions[-1] if previous_questions else None)
+        if retrieval_query != query:
+            logger.info(f"Rewrote follow-up query for retrieval: '{retrieval_query}'")
+        
+        if self.settings.session_reuse:
+            delta_retriever = self.resources.retriever(self.settings.follow_up_delta_k, simple_language,
+                                                       efficient=self.use_efficient_retriever)
+            delta_search = delta_retriever.get_relevant_documents
+            source_documents = self.retrieval_context.retrieve(
+                query,
+                self.retriever.get_relevant_documents,
+                delta_search=delta_search,
+                search_query=retrieval_query,
+                **self._retrieval_scope(simple_language)
+            )
+        else:
+            source_documents = self.retriever.get_relevant_documents(retrieval_query)
+        current_span().set_attributes(rewritten=retrieval_query != query, hits=len(source_documents))
+        return source_documents
+    
+    def _generate_answer(self, query, source_documents, chat_history, tokens_limit, simple_language=False):
+        """Generate an answer from given context chunks with a single completion call."""
+        context = "\n\n".join([doc.page_content for doc in source_documents])
+        
+        prompt = self.simple_single_call_prompt if simple_language else self.regular_single_call_prompt
+        if simple_language and any(doc.metadata.get("original_text") for doc in source_documents):
+            logger.info("Context is pre-simplified, using the short simple language prompt")
+            prompt = self.presimplified_single_call_prompt
+            tokens_limit = min(tokens_limit, self.settings.presimplified_max_tokens)
+        messages = prompt.format_messages(
+            context=context,
+            question=query,
+            chat_history=chat_history[-self.settings.single_call_history_messages:]
+        )
+        
+        llm = self.resources.llm(tokens_limit)
+        logger.info(f"Getting single-call response for query: {query}")
         try:
+            with llm_slot(self.settings), timed("completion"), span("llm.completion", model=self.settings.model_name, max_tokens=tokens_limit):
+                message = llm.invoke(messages, extra_headers=traceparent_headers())
+                usage = getattr(message, "usage_metadata", None) or {}
+                get_usage_tracker().record(usage.get("input_tokens", 0), usage.get("output_tokens", 0),
+                                           mode="simple" if simple_language else "standard")
+            answer = message.content
+        except LLM_FALLBACK_ERRORS as e:
+            if not self.settings.extractive_fallback:
+                raise
+            logger.warning(f"LLM unavailable ({type(e).__name__}: {str(e)}), falling back to extractive answer")
+            answer = build_extractive_answer(query, source_documents, simple_language=simple_language, degraded=True,
+                                             max_sentences=self.settings.extractive_max_sentences)
+        
+        self.memory.save_context({"question": query}, {"answer": answer})
+        return answer
+    
+    def _direct_lookup_response(self, query, tokens_limit, simple_language=False):
+        """Answer page and section questions from the local page index, without vector search.
+        
+        Returns:
+            Tuple of (answer, source documents), or None if the query needs regular retrieval
+        """
+        lookup = direct_lookup(query)
+        record_cache_lookup("page_index", lookup is not None)
+        if lookup is None:
+            return None
+        
+        intro, source_documents = lookup
+        logger.info(f"Serving query by direct page index lookup ({len(source_documents)} chunks)")
+        if source_documents and self.settings.page_lookup_use_llm:
+            chat_history = self.memory.load_memory_variables({})["chat_history"]
+            answer = self._generate_answer(query, source_documents, chat_history, tokens_limit, simple_language)
+        else:
+            answer = intro
+            self.memory.save_context({"question": query}, {"answer": answer})
+        
+        # Follow-ups like "Und ab wann gilt das?" can reuse the page's chunks
+        self.retrieval_context.remember(query, source_documents, **self._retrieval_scope(simple_language))
+        return answer, source_documents
+        
+    def get_preview(self, query, simple_language=False):
+        """Build an instant extractive answer for a query without calling the LLM.
+        
+        FAQ and page/section questions are answered instantly by get_response, so they
+        get no preview and no vector search. Pass the returned chunks to get_response
+        as documents so the query is not searched twice.
+        
+        Returns:
+            Tuple of (formatted extractive response, source documents), or None if there
+            is no preview for the query or retrieval failed
+        """
+        try:
+            if self.use_faq_store and lookup_faq(query, "chatbot", simple_language) is not None:
+                return None
+            if direct_lookup(query) is not None:
+                return None
+            
+            top_k = self.settings.simple_top_k if simple_language else self.settings.standard_top_k
+            self._select_retriever(top_k, simple_language)
+            chat_history = self.memory.load_memory_variables({})["chat_history"]
+            source_documents = self._retrieve_documents(query, chat_history, simple_language)
+            answer = build_extractive_answer(query, source_documents, simple_language=simple_language,
+                                             max_sentences=self.settings.extractive_max_sentences)
+            return self.format_response(answer, self._build_sources(source_documents)), source_documents
+        except Exception as e:
+            logger.error(f"Error building preview: {str(e)}")
+            return None
+    
+    def _build_sources(self, source_documents):
+        """Turn retrieved documents into source entries for format_response."""
+        sources = []
+        for doc in source_documents:
+            # Extract metadata
+            metadata = doc.metadata
+            page = metadata.get("page", None)
+            
+            # Create source object
+            source = {
+                "page": page,
+                # Pre-simplified chunks are cited with their original wording
+                "content": metadata.get("original_text", doc.page_content),
+                "source": metadata.get("source", None)
+            }
+            sources.append(source)
+        return sources
+    
+    @span("chatbot.get_response")
+    def get_response(self, query, simple_language=False, extractive=False, documents=None):
+        """Get response for a user query.
+        
+        Args:
+            query: The user question
+            simple_language: Whether to answer in simple language
+            extractive: Fast mode; answer with the best matching sentences instead of the LLM
+            documents: Chunks already retrieved for this query by get_preview, used instead of a new search
+        """
+        try:
+            start_time = time.perf_counter()
+            history = self.memory.chat_memory.messages[-HISTORY_MESSAGES:]
+            record_inputs(chatbot="chatbot", query=query, simple_language=simple_language, extractive=extractive,
+                          use_efficient_retriever=self.use_efficient_retriever,
+                          history=[{"role": "user" if m.type == "human" else "assistant", "content": m.content} for m in history])
+            
+            # Frequent questions are answered from the pre-generated FAQ store
+            if self.use_faq_store:
+                faq_entry = lookup_faq(query, "chatbot", simple_language)
+                record_cache_lookup("faq", faq_entry is not None)
+                if faq_entry is not None:
+                    logger.info(f"Serving query from FAQ store: '{faq_entry['question']}'")
+                    # FAQ answers carry no chunks; a follow-up must not reuse those of an earlier topic
+                    self.retrieval_context.clear()
+                    self.memory.save_context({"question": query}, {"answer": faq_entry["answer"]})
+                    return faq_entry["response"]
+            
             # Select appropriate parameters based on language mode
-            tokens_limit = SIMPLE_MAX_TOKENS if simple_language else STANDARD_MAX_TOKENS
-            top_k = SIMPLE_TOP_K if simple_language else STANDARD_TOP_K
+            tokens_limit = self.settings.simple_max_tokens if simple_language else self.settings.standard_max_tokens
+            top_k = self.settings.simple_top_k if simple_language else self.settings.standard_top_k
+            
+            # Answer more cheaply when the session or daily budget is nearly used up
+            budget = get_usage_tracker().plan(tokens_limit, top_k)
+            tokens_limit, top_k = budget["max_tokens"], budget["top_k"]
+            extractive = extractive or budget["extractive"]
             
             logger.info(f"Using max_tokens={tokens_limit} and top_k={top_k} for {'simple' if simple_language else 'standard'} language mode")
+            current_span().set_attributes(generation_mode=self.generation_mode, simple_language=simple_language,
+                                          extractive=extractive, top_k=top_k, max_tokens=tokens_limit)
             
             # Select the appropriate retriever based on configuration
-            if self.use_efficient_retriever:
-                logger.info(f"Setting up efficient retriever with top_k={top_k}")
-                self.retriever = get_efficient_retriever_instance(top_k=top_k)
-            else:
-                logger.info("Setting up standard LangChain retriever")
-                self.retriever = self.vector_store.as_retriever(search_kwargs={"k": top_k})
+            self._select_retriever(top_k, simple_language)
+            if documents is not None:
+                documents = documents[:top_k]
             
-            # Recreate the chain with the appropriate prompt based on the simple_language parameter
-            if simple_language:
-                logger.info("Using simple language prompt")
-                # Recreate the chain with the simple language prompt
-                self.chain = ConversationalRetrievalChain.from_llm(
-                    llm=ChatOpenAI(
-                        model_name=MODEL_NAME,
-                        temperature=TEMPERATURE,
-                        max_tokens=tokens_limit
-                    ),
-                    retriever=self.retriever,
-                    memory=self.memory,
-                    return_source_documents=True,
-                    verbose=True,
-                    chain_type="stuff",
-                    output_key="answer",
-                    combine_docs_chain_kwargs={"prompt": self.simple_prompt}
-                )
+            # Page and section questions are served from the page index when possible
+            # (get_preview only returns chunks for queries that are not)
+            direct_response = None if documents is not None else \
+                self._direct_lookup_response(query, tokens_limit, simple_language)
+            if direct_response is not None:
+                answer, source_documents = direct_response
+            elif extractive:
+                chat_history = self.memory.load_memory_variables({})["chat_history"]
+                source_documents = documents if documents is not None else \
+                    self._retrieve_documents(query, chat_history, simple_language)
+                answer = build_extractive_answer(query, source_documents, simple_language=simple_language,
+                                                 max_sentences=self.settings.extractive_max_sentences)
+                self.memory.save_context({"question": query}, {"answer": answer})
+            elif self.generation_mode == "condense" and documents is None:
+                try:
+                    answer, source_documents = self._condense_response(query, tokens_limit, simple_language)
+                except LLM_FALLBACK_ERRORS as e:
+                    if not self.settings.extractive_fallback:
+                        raise
+                    logger.warning(f"LLM unavailable ({type(e).__name__}: {str(e)}), falling back to extractive answer")
+                    source_documents = self.retriever.get_relevant_documents(query)
+                    answer = build_extractive_answer(query, source_documents, simple_language=simple_language, degraded=True,
+                                                     max_sentences=self.settings.extractive_max_sentences)
+                    self.memory.save_context({"question": query}, {"answer": answer})
             else:
-                logger.info("Using regular prompt")
-                # Recreate the chain with the regular prompt
-                self.chain = ConversationalRetrievalChain.from_llm(
-                    llm=ChatOpenAI(
-                        model_name=MODEL_NAME,
-                        temperature=TEMPERATURE,
-                        max_tokens=tokens_limit
-                    ),
-                    retriever=self.retriever,
-                    memory=self.memory,
-                    return_source_documents=True,
-                    verbose=True,
-                    chain_type="stuff",
-                    output_key="answer",
-                    combine_docs_chain_kwargs={"prompt": self.regular_prompt}
-                )
-                
-            # Send query to the chain and get response
-            logger.info(f"Getting response for query: {query}")
-            result = self.chain({"question": query})
-            
-            # Extract answer and source documents
-            answer = result.get("answer", "")
-            source_documents = result.get("source_documents", [])
+                # With chunks from get_preview the condense step is skipped too: its rewritten
+                # question would only be used for a search that is not made
+                answer, source_documents = self._single_call_response(query, tokens_limit, simple_language, documents)
             
             # Extract source information
-            sources = []
-            for doc in source_documents:
-                # Extract metadata
-                metadata = doc.metadata
-                page = metadata.get("page", None)
-                
-                # Create source object
-                source = {
-                    "page": page,
-                    "content": doc.page_content,
-                    "source": metadata.get("source", None)
-                }
-                sources.append(source)
+            record_documents(source_documents)
+            sources = self._build_sources(source_documents)
+            
+            elapsed = time.perf_counter() - start_time
+            logger.info(f"Generated response in {elapsed:.2f} seconds (generation_mode={self.generation_mode})")
             
             # Instead of returning a dictionary, return a formatted markdown string
             return self.format_response(answer, sources)
@@ -221,4 +424,5 @@ class ChatBot:
     def clear_history(self):
         """Clear conversation history."""
         self.memory.clear()
+        self.retrieval_context.clear()
         logger.info("Conversation history cleared") 
\ No newline at end of file
@@ -0,0 +1,173 @@
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from config import PDF_PATH, CHUNK_SIZE, CHUNK_OVERLAP, STANDARD_TOP_K, SYSTEM_PROMPT
+from document_structure import extract_structure, tag_chunks
+from evaluate_retrieval import GOLDEN_SET_PATH, load_golden_set, evaluate
+from local_pinecone import LocalIndex, MAX_UPSERT_BATCH
+from text_processor import TextProcessor, SPLITTERS
+from token_counter import count_tokens
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = "500,750,1000,1500"
+DEFAULT_OVERLAPS = "0,100,150,300"
+# Settings within this recall of the best one count as equally good for the recommendation
+RECALL_TOLERANCE = 0.02
+SWEEP_NAMESPACE = "sweep"
+
+
+def load_pages(pdf_path: str = PDF_PATH):
+    """Load the PDF pages and extract the chapter/section structure once for all variants."""
+    from langchain_community.document_loaders import PyPDFLoader
+
+    pages = PyPDFLoader(pdf_path).load()
+    text_processor = TextProcessor()
+    for page in pages:
+        page.metadata["headings"] = text_processor.extract_headings(page.page_content)
+    return pages, extract_structure(pages, pdf_path)
+
+
+def run_variant(pages: List[Document], structure, golden: Dict, chunk_size: int, chunk_overlap: int,
+                splitter: str, top_k: int = STANDARD_TOP_K, system_prompt_tokens: int = 0) -> Dict:
+    """
+    Chunk, index and evaluate one chunking setting.
+
+    Args:
+        pages: Loaded PDF pages (not modified)
+        structure: Structure entries from extract_structure
+        golden: Golden question set
+        chunk_size: Chunk size in characters
+        chunk_overlap: Chunk overlap in characters
+        splitter: Splitter engine (see text_processor.SPLITTERS)
+        top_k: Chunks per answer, as in the chatbot
+        system_prompt_tokens: Tokens of the system prompt, added to the prompt estimate
+
+    Returns:
+        Index size, ingestion time, recall@k, MRR and average prompt tokens per answer
+    """
+    # TextProcessor cleans documents in place, so every variant gets fresh copies
+    copies = [Document(page_content=page.page_content, metadata=dict(page.metadata)) for page in pages]
+
+    start = time.perf_counter()
+    chunks = TextProcessor(chunk_size, chunk_overlap, splitter).process_documents(copies)
+    chunks = tag_chunks(chunks, structure)
+    chunking_seconds = time.perf_counter() - start
+
+    from pinecone_processor import document_to_record
+    from efficient_retriever import EfficientPineconeRetriever
+
+    index = LocalIndex(f"sweep-{splitter}-{chunk_size}-{chunk_overlap}")
+    records = [document_to_record(f"doc_{i}", chunk) for i, chunk in enumerate(chunks)]
+    start = time.perf_counter()
+    for batch_start in range(0, len(records), MAX_UPSERT_BATCH):
+        index.upsert_records(SWEEP_NAMESPACE, records[batch_start:batch_start + MAX_UPSERT_BATCH])
+    indexing_seconds = time.perf_counter() - start
+
+    retriever = EfficientPineconeRetriever(index=index, namespace=SWEEP_NAMESPACE, top_k=top_k)
+    evaluation = evaluate(retriever.invoke, golden, top_k)
+    question_tokens = sum(count_tokens(q["question"]) for q in golden["questions"]) / len(golden["questions"])
+
+    return {
+        "splitter": splitter,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "chunks": len(chunks),
+        "index_characters": sum(len(chunk.page_content) for chunk in chunks),
+        "chunking_seconds": chunking_seconds,
+        "ingestion_seconds": chunking_seconds + indexing_seconds,
+        "recall_at_k": evaluation["recall_at_k"],
+        "mrr": evaluation["mrr"],
+        "prompt_tokens": system_prompt_tokens + evaluation["mean_context_tokens"] + question_tokens,
+        "search_p50_ms": evaluation["latency"]["p50"] * 1000,
+    }
+
+
+def pareto_front(results: List[Dict]) -> List[Dict]:
+    """Settings not dominated in (higher recall@k, higher MRR, fewer prompt tokens, smaller index)."""
+    def dominates(a, b):
+        better_or_equal = (a["recall_at_k"] >= b["recall_at_k"] and a["mrr"] >= b["mrr"]
+                           and a["prompt_tokens"] <= b["prompt_tokens"] and a["index_characters"] <= b["index_characters"])
+        strictly_better = (a["recall_at_k"] > b["recall_at_k"] or a["mrr"] > b["mrr"]
+                           or a["prompt_tokens"] < b["prompt_tokens"] or a["index_characters"] < b["index_characters"])
+        return better_or_equal and strictly_better
+
+    return [r for r in results if not any(dominates(other, r) for other in results if other is not r)]
+
+
+def recommend(results: List[Dict], tolerance: float = RECALL_TOLERANCE) -> Optional[Dict]:
+    """The Pareto-optimal setting with the fewest prompt tokens among those within tolerance of the best recall."""
+    front = pareto_front(results)
+    if not front:
+        return None
+    best_recall = max(r["recall_at_k"] for r in front)
+    candidates = [r for r in front if r["recall_at_k"] >= best_recall - tolerance]
+    return min(candidates, key=lambda r: (r["prompt_tokens"], -r["mrr"]))
+
+
+def parse_ints(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Sweep chunk size, overlap and splitter against the golden questions")
+    parser.add_argument("--pdf", default=PDF_PATH, help="PDF to chunk")
+    parser.add_argument("--golden", default=GOLDEN_SET_PATH, help="Golden question set (JSON)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated chunk sizes in characters")
+    parser.add_argument("--overlaps", default=DEFAULT_OVERLAPS, help="Comma-separated chunk overlaps in characters")
+    parser.add_argument("--splitters", default=",".join(SPLITTERS), help="Comma-separated splitter engines")
+    parser.add_argument("--top_k", type=int, default=STANDARD_TOP_K, help="Chunks per answer")
+    parser.add_argument("--output", default=None, help="Write all results as JSON to this file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pdf):
+        parser.error(f"PDF not found at {args.pdf}")
+    golden = load_golden_set(args.golden)
+    pages, structure = load_pages(args.pdf)
+    system_prompt_tokens = count_tokens(SYSTEM_PROMPT)
+
+    results = []
+    grid = itertools.product([s.strip() for s in args.splitters.split(",") if s.strip()],
+                             parse_ints(args.sizes), parse_ints(args.overlaps))
+    for splitter, size, overlap in grid:
+        if overlap >= size:
+            continue
+        logger.info(f"Evaluating splitter={splitter} size={size} overlap={overlap}")
+        results.append(run_variant(pages, structure, golden, size, overlap, splitter, args.top_k, system_prompt_tokens))
+
+    front = pareto_front(results)
+    best = recommend(results)
+    print(f"\n{'splitter':>9} {'size':>5} {'overlap':>7} {'chunks':>6} {'ingest s':>8} "
+          f"{'recall':>6} {'MRR':>5} {'prompt tok':>10}")
+    for r in sorted(results, key=lambda r: (r["splitter"], r["chunk_size"], r["chunk_overlap"])):
+        marker = " *" if r in front else ""
+        marker += "  <- recommended" if r is best else ""
+        current = " (current)" if (r["splitter"], r["chunk_size"], r["chunk_overlap"]) == ("spacy", CHUNK_SIZE, CHUNK_OVERLAP) else ""
+        print(f"{r['splitter']:>9} {r['chunk_size']:>5} {r['chunk_overlap']:>7} {r['chunks']:>6} "
+              f"{r['ingestion_seconds']:>8.1f} {r['recall_at_k']:>6.3f} {r['mrr']:>5.3f} {r['prompt_tokens']:>10.0f}"
+              f"{marker}{current}")
+    print("\n* Pareto-optimal. Recall is measured with the local hashing embedder; confirm the "
+          "recommended setting against Pinecone with evaluate_retrieval.py before changing config.py.")
+    if best:
+        print(f"Recommendation: splitter={best['splitter']} CHUNK_SIZE={best['chunk_size']} "
+              f"CHUNK_OVERLAP={best['chunk_overlap']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "pareto_front": front, "recommendation": best}, f, ensure_ascii=False, indent=2)
+        logger.info(f"Wrote results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
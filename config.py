@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
-import streamlit as st
 import logging
+from settings import get_settings, lookup
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -15,49 +15,27 @@ def get_config(key, default=None, section=None):
     """
     Get configuration value from different sources:
     1. First try environment variables (preferred for deployment)
-    2. Then try Streamlit Secrets (for local dev with secrets.toml)
+    2. Then try Streamlit Secrets (for local dev with secrets.toml, read without importing Streamlit)
     3. Finally use default value if provided
-    """
-    # Log access attempt
-    logger.info(f"Accessing config: section={section}, key={key}")
-    
-    # 1. Try environment variables first (preferred for deployment)
-    env_key = f"{section.upper()}_{key.upper()}" if section else key.upper()
-    env_value = os.getenv(env_key)
-    if env_value:
-        logger.info(f"Found {env_key} in environment variables")
-        return env_value
     
-    # 2. Try Streamlit Secrets as fallback (for local development)
-    if section and hasattr(st, "secrets"):
-        # Check if section exists in secrets
-        try:
-            if section in st.secrets:
-                # Check if key exists in section
-                if key in st.secrets[section]:
-                    logger.info(f"Found {key} in st.secrets[{section}]")
-                    return st.secrets[section][key]
-                else:
-                    logger.warning(f"Key {key} not found in st.secrets[{section}]")
-            else:
-                logger.warning(f"Section {section} not found in st.secrets")
-                
-                # Try flat structure (non-sectioned) if section not found
-                flat_key = f"{section}_{key}".lower()
-                if flat_key in st.secrets:
-                    logger.info(f"Found {flat_key} in flat st.secrets structure")
-                    return st.secrets[flat_key]
-        except Exception as e:
-            logger.warning(f"Error accessing streamlit secrets: {str(e)}")
-    
-    # 3. Use default value
-    logger.warning(f"Using default value for {section}.{key}: {default}")
-    return default
+    The tunables of chatbots, retrievers and caches are resolved once into settings.Settings instead.
+    """
+    value = lookup(key, section)
+    if value is None:
+        logger.debug(f"Using default value for {section}.{key}: {default}")
+        return default
+    logger.debug(f"Found {section}.{key} in environment variables or secrets")
+    return value
+
+# Resolved tunables (see settings.Settings); the constants below mirror them for existing imports
+SETTINGS = get_settings()
 
 # OpenAI Configuration
-OPENAI_API_KEY = get_config("api_key", section="openai")
+OPENAI_API_KEY = SETTINGS.openai_api_key
 if not OPENAI_API_KEY:
     logger.warning("OpenAI API key is missing! Application will not function correctly.")
+# OpenAI-compatible endpoint; point it to local_openai_server.py for offline tests and load tests
+OPENAI_BASE_URL = SETTINGS.openai_base_url
 
 # PDF and Database Paths
 PDF_PATH = "data/Regierungsprogramm_2025.pdf"
@@ -73,10 +51,19 @@ CHUNK_OVERLAP = 150
 #     raise FileNotFoundError(f"PDF file not found at {PDF_PATH}")
 
 # Pinecone Configuration
-PINECONE_API_KEY = get_config("api_key", section="pinecone")
-PINECONE_ENVIRONMENT = get_config("environment", section="pinecone")
-PINECONE_INDEX_NAME = get_config("index_name", "koalitionskompass", section="pinecone")
-PINECONE_NAMESPACE = get_config("namespace", "default", section="pinecone")
+PINECONE_API_KEY = SETTINGS.pinecone_api_key
+PINECONE_ENVIRONMENT = SETTINGS.pinecone_environment
+PINECONE_INDEX_NAME = SETTINGS.pinecone_index_name
+PINECONE_NAMESPACE = SETTINGS.pinecone_namespace
+
+# Vector index backend: "pinecone" (the hosted index), "local" (in-process stand-in from
+# local_pinecone.py) or "http" (local_pinecone_server.py at PINECONE_HOST). The local
+# backends need no API key and allow retrieval tests and benchmarks without network access.
+PINECONE_BACKEND = SETTINGS.pinecone_backend
+PINECONE_HOST = SETTINGS.pinecone_host
+LOCAL_INDEX_PATH = SETTINGS.local_index_path
+LOCAL_INDEX_LATENCY_MS = SETTINGS.local_index_latency_ms  # Injected latency per call
+LOCAL_INDEX_ERROR_RATE = SETTINGS.local_index_error_rate  # Share of calls that fail
 
 # Log Pinecone configuration (without exposing API key)
 logger.info(f"Pinecone configuration loaded: env={PINECONE_ENVIRONMENT}, index={PINECONE_INDEX_NAME}, namespace={PINECONE_NAMESPACE}")
@@ -86,16 +73,143 @@ if not PINECONE_ENVIRONMENT:
     logger.warning("Pinecone environment is missing! Application will not function correctly.")
 
 # OpenAI Configuration
-MODEL_NAME = "gpt-4o-mini-2024-07-18"
-TEMPERATURE = 0.7
+MODEL_NAME = SETTINGS.model_name
+TEMPERATURE = SETTINGS.temperature
 # Different max token settings for different modes
-STANDARD_MAX_TOKENS = 1500  # Standard mode gets more tokens
-SIMPLE_MAX_TOKENS = 1000    # Simple mode keeps the original amount
+STANDARD_MAX_TOKENS = SETTINGS.standard_max_tokens  # Standard mode gets more tokens
+SIMPLE_MAX_TOKENS = SETTINGS.simple_max_tokens      # Simple mode keeps the original amount
 MAX_TOKENS = STANDARD_MAX_TOKENS  # For backward compatibility
 
 # Retrieval parameters
-STANDARD_TOP_K = 5  # Standard mode retrieves more context chunks
-SIMPLE_TOP_K = 3    # Simple mode retrieves fewer chunks
+STANDARD_TOP_K = SETTINGS.standard_top_k  # Standard mode retrieves more context chunks
+SIMPLE_TOP_K = SETTINGS.simple_top_k      # Simple mode retrieves fewer chunks
+
+# Generation mode for ChatBot:
+# "single_call" - exactly one completion call per answer; follow-ups are rewritten locally
+# "condense"    - LangChain's condense-question LLM call before retrieval on follow-ups
+GENERATION_MODE = SETTINGS.generation_mode
+SINGLE_CALL_HISTORY_MESSAGES = SETTINGS.single_call_history_messages  # Previous messages passed to the LLM in single-call mode
+
+# Multi-query retrieval: number of query variants (original query included) searched
+# concurrently and fused with Reciprocal Rank Fusion. 1 disables multi-query retrieval.
+MULTI_QUERY_VARIANTS = SETTINGS.multi_query_variants
+MULTI_QUERY_MAX_WORKERS = SETTINGS.multi_query_max_workers  # Size of the shared search thread pool
+RRF_K = SETTINGS.rrf_k  # Reciprocal Rank Fusion damping constant
+
+# Two-stage retrieval: overfetch candidates from Pinecone and rerank them locally on CPU.
+# Scorers: "none" (disabled), "lexical", "bm25" or "cross_encoder" (local weights required)
+RERANK_SCORER = SETTINGS.rerank_scorer
+RERANK_OVERFETCH = SETTINGS.rerank_overfetch
+RERANK_BATCH_SIZE = SETTINGS.rerank_batch_size
+CROSS_ENCODER_MODEL_PATH = SETTINGS.cross_encoder_model_path
+
+# Metadata-filtered retrieval: questions with a clear topic area only search chunks tagged
+# with that topic at ingestion. Requires an index built with chapter/section/topic fields.
+TOPIC_FILTER_ENABLED = SETTINGS.topic_filter
+
+# Session-scoped retrieval reuse: follow-ups are answered from the previous turn's chunks
+SESSION_RETRIEVAL_REUSE = SETTINGS.session_reuse
+FOLLOW_UP_DELTA_K = SETTINGS.follow_up_delta_k              # Chunks a delta search may add to the reused context
+FOLLOW_UP_MAX_NEW_TERMS = SETTINGS.follow_up_max_new_terms  # New terms a follow-up may introduce and still reuse the context
+
+# Process-wide cache of search_records results (query, namespace, top_k, filter), shared by all
+# sessions. Entries expire after the TTL so a re-ingested index is picked up. 0 disables the cache.
+RETRIEVAL_CACHE_SIZE = SETTINGS.retrieval_cache_size
+RETRIEVAL_CACHE_TTL_SECONDS = SETTINGS.retrieval_cache_ttl_seconds
+
+# Direct page/section lookup ("Was steht auf Seite 42?") from an index built at ingestion.
+# Without the LLM the chunks of the page are returned as is.
+PAGE_INDEX_PATH = "data/page_index.json"
+PAGE_LOOKUP_USE_LLM = SETTINGS.page_lookup_use_llm
+
+# Pre-generated FAQ answers, served without retrieval or LLM calls (built with build_faq.py).
+# The store is ignored when the corpus version it was built for no longer matches.
+FAQ_STORE_PATH = "data/faq_store.json"
+FAQ_ENABLED = SETTINGS.faq_enabled
+FAQ_MATCH_THRESHOLD = SETTINGS.faq_match_threshold  # Minimum term overlap (Jaccard) for a non-exact FAQ match
+FAQ_MAX_WORKERS = 4        # Concurrent questions when building the store
+FAQ_QUESTIONS_PATH = "faq_questions.txt"
+
+# Startup warm-up: the most frequent questions of the query log (or the FAQ list) are retrieved
+# once in both language modes, and the FAQ store and page index are loaded, before /api/ready
+# reports ready. Bounded by a time budget; whatever is not warm by then is filled on demand.
+WARMUP_ENABLED = SETTINGS.warmup_enabled
+WARMUP_QUERIES_PATH = SETTINGS.warmup_queries_path  # Empty: query log if present, else FAQ list
+WARMUP_TOP_N = SETTINGS.warmup_top_n
+WARMUP_TIME_BUDGET_SECONDS = SETTINGS.warmup_time_budget_seconds
+WARMUP_CONCURRENCY = SETTINGS.warmup_concurrency
+
+# Offline "Einfache Sprache" chunk variants, built with simplify_chunks.py into a separate
+# namespace. When enabled, simple mode retrieves the pre-simplified chunks and only needs
+# a short prompt and a short completion.
+SIMPLE_CHUNKS_ENABLED = SETTINGS.simple_chunks
+SIMPLE_NAMESPACE = SETTINGS.simple_namespace
+SIMPLE_CHUNKS_PATH = "data/simplified_chunks.jsonl"  # Resumable checkpoint of the rewrite
+SIMPLIFY_BATCH_SIZE = 16       # Chunks rewritten per checkpointed batch
+SIMPLIFY_MAX_WORKERS = 4       # Concurrent rewrite requests within a batch
+PRESIMPLIFIED_MAX_TOKENS = SETTINGS.presimplified_max_tokens  # Completion limit when the context is already simplified
+
+# Extractive answers are built locally from the best matching sentences, without the LLM.
+# They serve as user-selectable fast mode, as instant preview and as fallback when the
+# LLM is rate-limited, times out or too many requests are already waiting for it.
+EXTRACTIVE_MAX_SENTENCES = SETTINGS.extractive_max_sentences
+EXTRACTIVE_FALLBACK_ENABLED = SETTINGS.extractive_fallback
+LLM_TIMEOUT_SECONDS = SETTINGS.llm_timeout_seconds
+LLM_MAX_RETRIES = SETTINGS.llm_max_retries
+LLM_MAX_CONCURRENT_REQUESTS = SETTINGS.llm_max_concurrent_requests
+LLM_QUEUE_TIMEOUT_SECONDS = SETTINGS.llm_queue_timeout_seconds  # Wait for a free LLM slot before falling back
+
+# In-process latency histograms and counters, exposed by api.py on /metrics (Prometheus text format)
+METRICS_ENABLED = SETTINGS.metrics_enabled
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Request tracing: spans for retrieval, chain and LLM calls per request. All traces are recorded
+# in memory; only a sample plus every slow or failed request is exported, so the cost stays bounded.
+# Exporters: "file" (OTLP/JSON lines in TRACING_FILE_PATH) or "otlp" (OTLP/HTTP JSON to TRACING_OTLP_ENDPOINT)
+TRACING_ENABLED = SETTINGS.tracing_enabled
+TRACING_SAMPLE_RATE = SETTINGS.tracing_sample_rate
+TRACING_SLOW_SECONDS = SETTINGS.tracing_slow_seconds
+TRACING_EXPORTER = SETTINGS.tracing_exporter
+TRACING_FILE_PATH = SETTINGS.tracing_file_path
+TRACING_OTLP_ENDPOINT = SETTINGS.tracing_otlp_endpoint
+TRACING_QUEUE_SIZE = SETTINGS.tracing_queue_size  # Finished traces waiting for export; further traces are dropped
+TRACING_SERVICE_NAME = "koalitionskompass"
+
+# Token and cost accounting per request, session and mode (standard/simple), logged to USAGE_LOG_PATH.
+# Prices are USD per million tokens; 0 uses the list price of MODEL_NAME from usage_tracker.MODEL_PRICES.
+# Budgets in USD (0 disables): as a session or the whole day approaches its budget, answers get
+# fewer completion tokens, then fewer chunks, and finally only extractive answers.
+USAGE_LOG_PATH = SETTINGS.usage_log_path
+USAGE_LOG_QUEUE_SIZE = SETTINGS.usage_log_queue_size  # Calls waiting to be written; further calls are not logged
+USAGE_LOG_MAX_BYTES = SETTINGS.usage_log_max_bytes  # Rotate the usage log at this size, keeping one previous file
+USAGE_INPUT_PRICE_PER_MILLION = SETTINGS.usage_input_price_per_million
+USAGE_OUTPUT_PRICE_PER_MILLION = SETTINGS.usage_output_price_per_million
+USAGE_SESSION_BUDGET_USD = SETTINGS.usage_session_budget_usd
+USAGE_DAILY_BUDGET_USD = SETTINGS.usage_daily_budget_usd
+BUDGET_REDUCE_THRESHOLD = 0.75   # Budget share from which max_tokens is reduced
+BUDGET_MINIMAL_THRESHOLD = 0.9   # Budget share from which top_k is reduced as well
+BUDGET_MAX_TOKENS_FACTOR = 0.5   # max_tokens multiplier when reduced
+BUDGET_MIN_TOP_K = 2             # top_k when minimal
+USAGE_MAX_SESSIONS = 10000       # Sessions kept in memory for per-session budgets
+
+# Slow-request log: every chat request slower than SLOW_REQUEST_SECONDS (or failing) is appended with
+# its inputs, stage timings, retrieved record IDs and token counts, for offline inspection and replay.
+# Entries are written by a background thread; the log is rotated once it exceeds SLOW_REQUEST_LOG_MAX_BYTES,
+# keeping one previous file.
+SLOW_REQUEST_LOG_ENABLED = SETTINGS.slow_request_log_enabled
+SLOW_REQUEST_SECONDS = SETTINGS.slow_request_seconds
+SLOW_REQUEST_LOG_PATH = SETTINGS.slow_request_log_path
+SLOW_REQUEST_LOG_MAX_BYTES = SETTINGS.slow_request_log_max_bytes
+SLOW_REQUEST_LOG_QUEUE_SIZE = SETTINGS.slow_request_log_queue_size  # Entries waiting to be written; further entries are dropped
+
+# Query log: one compact JSON line per chat request (time, query, modes, hashed session, latency, status),
+# written by a background thread off the request path. Off by default because it stores user questions.
+# replay_traffic.py re-drives the log against a deployment; build_faq.py and load_test.py read it as well.
+QUERY_LOG_ENABLED = SETTINGS.query_log_enabled
+QUERY_LOG_PATH = SETTINGS.query_log_path
+QUERY_LOG_MAX_BYTES = SETTINGS.query_log_max_bytes
+QUERY_LOG_QUEUE_SIZE = SETTINGS.query_log_queue_size  # Entries waiting to be written; further entries are dropped
+QUERY_LOG_MAX_QUERY_CHARS = 500   # Longer queries are truncated
 
 # Streamlit UI Configuration
 APP_TITLE = "Regierungsprogramm Chatbot"
@@ -240,4 +354,12 @@ Antwort:
 Gib immer klare, genaue und überprüfte Antworten.  
 Prüfe jede Antwort neu im Originaldokument.  
 Beantworte auch Rückfragen immer durch erneute Suche im Dokument.
-"""
\ No newline at end of file
+"""
+
+# Short prompt for simple mode when the retrieved chunks are already in plain language
+PRESIMPLIFIED_SYSTEM_PROMPT = """
+Du beantwortest Fragen zum österreichischen Regierungsprogramm 2025-2029 von ÖVP, SPÖ und NEOS in einfacher Sprache.
+Die Informationen unten sind schon in einfacher Sprache geschrieben. Übernimm ihre Sätze, wo es passt.
+Antworte kurz und neutral. Nutze nur Fakten aus den Informationen und erfinde nichts.
+Wenn die Informationen keine Antwort enthalten, sag das direkt.
+"""
@@ -0,0 +1,203 @@
+import logging
+import re
+import statistics
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from topic_classifier import classify_text
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# A structure entry: (level, title, 0-based page index); level 1 = chapter, 2 = section
+StructureEntry = Tuple[int, str, int]
+
+# Table of contents lines: optional numbering, title, dot leaders or spaces, page number
+TOC_LINE_PATTERN = re.compile(r"^(?P<number>\d+(?:\.\d+)*\.?\s+)?(?P<title>\D.*?)\s*(?:[.·…_]{2,}\s*|\s+)(?P<page>\d{1,3})$")
+# Minimum number of TOC lines on a page for it to count as a table of contents page
+TOC_MIN_LINES = 5
+# Only the first pages of the document are searched for a table of contents
+TOC_MAX_PAGE = 10
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and reduce to words so titles match cleaned chunk text."""
+    return " ".join(re.sub(r"[^\wäöüß]+", " ", text.lower()).split())
+
+
+def read_pdf_outline(pdf_path: str) -> List[StructureEntry]:
+    """
+    Read the bookmark outline of a PDF.
+
+    Args:
+        pdf_path: Path to the PDF file
+
+    Returns:
+        Structure entries in document order; empty if the PDF has no outline
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        logger.warning("pypdf is not installed, skipping PDF outline")
+        return []
+
+    try:
+        reader = PdfReader(pdf_path)
+        entries = []
+
+        def walk(items, level):
+            for item in items:
+                # Nested lists hold the children of the preceding item
+                if isinstance(item, list):
+                    walk(item, level + 1)
+                else:
+                    entries.append((level, item.title.strip(), reader.get_destination_page_number(item)))
+
+        walk(reader.outline, 1)
+        return entries
+    except Exception as e:
+        logger.error(f"Error reading PDF outline: {str(e)}")
+        return []
+
+
+def parse_toc(pages: List[Document]) -> Tuple[List[Tuple[int, str, int]], List[int]]:
+    """
+    Parse a printed table of contents from the first pages.
+
+    Args:
+        pages: Raw PDF pages (one Document per page, line breaks intact)
+
+    Returns:
+        Tuple of (entries with printed page numbers, indices of the TOC pages)
+    """
+    entries = []
+    toc_pages = []
+    for page_index, page in enumerate(pages[:TOC_MAX_PAGE]):
+        page_entries = []
+        for raw_line in page.page_content.split("\n"):
+            match = TOC_LINE_PATTERN.match(raw_line.strip())
+            if not match:
+                continue
+            number = (match.group("number") or "").strip().rstrip(".")
+            level = min(number.count(".") + 1, 2) if number else 1
+            page_entries.append((level, match.group("title").strip(), int(match.group("page"))))
+        if len(page_entries) >= TOC_MIN_LINES:
+            entries.extend(page_entries)
+            toc_pages.append(page_index)
+    return entries, toc_pages
+
+
+def resolve_toc_pages(entries: List[Tuple[int, str, int]], pages: List[Document],
+                      toc_pages: List[int]) -> List[StructureEntry]:
+    """
+    Map printed page numbers to PDF page indices.
+
+    The offset between printed numbers and page indices (cover, front matter)
+    is estimated as the median over all titles found in the page text.
+
+    Args:
+        entries: TOC entries with printed page numbers
+        pages: Raw PDF pages
+        toc_pages: Indices of the TOC pages, which are not searched
+
+    Returns:
+        Structure entries with 0-based page indices
+    """
+    page_texts = [_normalize(page.page_content) for page in pages]
+    offsets = []
+    for _, title, printed_page in entries:
+        key = _normalize(title)
+        for page_index, text in enumerate(page_texts):
+            if page_index not in toc_pages and key and key in text:
+                offsets.append(page_index - printed_page)
+                break
+
+    offset = int(statistics.median(offsets)) if offsets else -1
+    last_page = max(len(pages) - 1, 0)
+    return [(level, title, min(max(printed_page + offset, 0), last_page)) for level, title, printed_page in entries]
+
+
+def headings_structure(pages: List[Document]) -> List[StructureEntry]:
+    """Fall back to the headings detected per page by the TextProcessor, as sections."""
+    entries = []
+    for page_index, page in enumerate(pages):
+        page_number = page.metadata.get("page", page_index)
+        for heading in page.metadata.get("headings", []):
+            entries.append((2, heading, page_number))
+    return entries
+
+
+def extract_structure(pages: List[Document], pdf_path: Optional[str] = None) -> List[StructureEntry]:
+    """
+    Extract the chapter/section hierarchy of a document.
+
+    Uses the PDF outline if there is one, otherwise the printed table of
+    contents, otherwise the detected page headings.
+
+    Args:
+        pages: Raw PDF pages, before cleaning
+        pdf_path: Path to the PDF for reading the outline
+
+    Returns:
+        Structure entries sorted by page
+    """
+    entries = read_pdf_outline(pdf_path) if pdf_path else []
+    source = "PDF outline"
+
+    if not entries:
+        toc_entries, toc_pages = parse_toc(pages)
+        entries = resolve_toc_pages(toc_entries, pages, toc_pages) if toc_entries else []
+        source = "table of contents"
+
+    if not entries:
+        entries = headings_structure(pages)
+        source = "page headings"
+
+    logger.info(f"Extracted {len(entries)} structure entries from {source}")
+    return sorted(entries, key=lambda entry: entry[2])
+
+
+def tag_chunks(chunks: List[Document], entries: List[StructureEntry]) -> List[Document]:
+    """
+    Tag chunks with their chapter, section and topic area.
+
+    Chunks are walked in document order. An entry applies from the chunk in
+    which its title appears on its page, or from the next page if the title
+    cannot be found in the chunk text.
+
+    Args:
+        chunks: Chunks in document order, with a "page" metadata field
+        entries: Structure entries sorted by page
+
+    Returns:
+        The same chunks with "chapter", "section" and "topic" metadata set
+    """
+    chapter = ""
+    section = ""
+    position = 0
+
+    for chunk in chunks:
+        try:
+            page = int(chunk.metadata.get("page", 0))
+        except (ValueError, TypeError):
+            page = 0
+        text = _normalize(chunk.page_content)
+
+        while position < len(entries):
+            level, title, entry_page = entries[position]
+            if entry_page < page or (entry_page == page and _normalize(title) in text):
+                if level <= 1:
+                    chapter, section = title, ""
+                elif level == 2:
+                    section = title
+                position += 1
+            else:
+                break
+
+        chunk.metadata["chapter"] = chapter
+        chunk.metadata["section"] = section
+        chunk.metadata["topic"] = classify_text(chunk.page_content, title=f"{chapter} {section}") or ""
+
+    return chunks
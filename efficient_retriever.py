@@ -1,41 +1,178 @@
+import hashlib
+import json
 import logging
-from typing import List, Optional, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any, Callable
 from langchain_core.callbacks.manager import CallbackManagerForRetrieverRun
 from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever
 
-from config import PINECONE_NAMESPACE, PINECONE_INDEX_NAME
+from config import RRF_K
+from settings import Settings, get_settings
 from pinecone_processor import get_pinecone_instance, PassthroughEmbeddings
+from query_rewriter import generate_query_variants
+from topic_classifier import classify_query
+from metrics import timed
+from caches import get_retrieval_cache
+from tracing import span, current_span, propagate_context
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared thread pools for issuing query variants concurrently, one per configured size
+_search_executors: Dict[int, ThreadPoolExecutor] = {}
+_search_executor_lock = threading.Lock()
+
+def _get_search_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Get or create the shared thread pool of the given size used for concurrent searches."""
+    # Concurrent first requests must not each start a pool
+    with _search_executor_lock:
+        if max_workers not in _search_executors:
+            _search_executors[max_workers] = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="pinecone-search"
+            )
+    
+    return _search_executors[max_workers]
+
+# Record ID of hits that carry none (see hit_to_document)
+UNKNOWN_ID = "Unknown"
+
+def document_key(doc: Document) -> str:
+    """
+    Identity of a chunk for fusion and deduplication.
+    
+    Returns:
+        The record ID, or for chunks without one a hash of source, page and text, so that
+        different chunks lacking an ID are not merged into one
+    """
+    record_id = doc.metadata.get("id")
+    if record_id and record_id != UNKNOWN_ID:
+        return str(record_id)
+    content = f"{doc.metadata.get('source')}\x1f{doc.metadata.get('page')}\x1f{doc.page_content}"
+    return "sha1:" + hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int = RRF_K) -> List[Document]:
+    """
+    Fuse several ranked result lists with Reciprocal Rank Fusion.
+    
+    Each document scores sum(1 / (k + rank)) over the lists it appears in;
+    documents are identified by document_key (record ID, else content hash).
+    
+    Args:
+        result_lists: Ranked lists of documents, best first
+        k: RRF damping constant
+        
+    Returns:
+        Fused list of documents, best first, with "rrf_score" added to the metadata
+    """
+    scores = {}
+    documents = {}
+    
+    for results in result_lists:
+        for rank, doc in enumerate(results, 1):
+            doc_id = document_key(doc)
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(doc_id, doc)
+    
+    fused = []
+    for doc_id in sorted(scores, key=scores.get, reverse=True):
+        doc = documents[doc_id]
+        doc.metadata["rrf_score"] = scores[doc_id]
+        fused.append(doc)
+    
+    return fused
+
+def hit_to_document(hit) -> Document:
+    """
+    Convert one search_records hit into a Document.
+    
+    Args:
+        hit: Hit from a Pinecone v6.x search response (_id, _score, fields)
+        
+    Returns:
+        Document with the chunk text and its score, ID and structure metadata
+    """
+    # Extract metadata and score safely
+    record_id = hit._id if hasattr(hit, '_id') else UNKNOWN_ID
+    score = hit._score if hasattr(hit, '_score') else 0
+    fields = hit.fields if hasattr(hit, 'fields') else {}
+    
+    # Create metadata dictionary for the document
+    doc_metadata = {
+        "score": score,
+        "id": record_id,
+        "source": fields.get("source", "Unknown"),
+        "page": fields.get("page", "N/A"),
+        "chapter": fields.get("chapter", ""),
+        "section": fields.get("section", ""),
+        "topic": fields.get("topic", "")
+    }
+    # Pre-simplified chunks keep the original wording for the sources
+    if fields.get("original_text"):
+        doc_metadata["original_text"] = fields["original_text"]
+    
+    # The text content should be in the fields
+    return Document(page_content=fields.get("text", ""), metadata=doc_metadata)
+
+def copy_documents(documents: List[Document]) -> List[Document]:
+    """Copies with their own metadata, so cached results are not changed by fusion or reranking."""
+    return [Document(page_content=doc.page_content, metadata=dict(doc.metadata)) for doc in documents]
+
 class EfficientPineconeRetriever(BaseRetriever):
     """
     Custom retriever that uses Pinecone's integrated embedding API for efficient retrieval.
     This bypasses the need for local embeddings and directly uses Pinecone's text API.
     """
     
-    def __init__(self, index_name=PINECONE_INDEX_NAME, namespace=PINECONE_NAMESPACE, top_k=3):
+    def __init__(self, index_name=None, namespace=None, top_k=3,
+                 query_variants=1, variant_generator: Optional[Callable[[str, int], List[str]]] = None,
+                 reranker=None, rerank_overfetch=20, topic_filter=False, index=None, settings: Settings = None):
         """
         Initialize the efficient retriever.
         
         Args:
-            index_name: Name of the Pinecone index to query
-            namespace: Namespace within the index (optional)
+            index_name: Name of the Pinecone index to query (default: settings.pinecone_index_name)
+            namespace: Namespace within the index (default: settings.pinecone_namespace)
             top_k: Number of results to return
+            query_variants: Number of query variants to search concurrently and fuse
+                            with RRF (1 disables multi-query retrieval)
+            variant_generator: Callable (query, max_variants) -> list of queries; defaults
+                               to the local synonym/lemma table in query_rewriter
+            reranker: Optional local Reranker; when set, rerank_overfetch candidates are
+                      fetched and only the best top_k are returned
+            rerank_overfetch: Number of candidates fetched for reranking
+            topic_filter: Restrict the search to the topic area of the question when
+                          the local topic classifier is confident; missing slots are
+                          filled from an unfiltered search
+            index: Index object to query instead of the one from get_pinecone_instance,
+                   e.g. a local_pinecone.LocalIndex in tests and benchmarks; its results
+                   are not put into the process-wide retrieval cache
+            settings: Index, RRF and cache settings (default: get_settings())
         """
         super().__init__()
-        self._index_name = index_name
-        self._namespace = namespace
+        settings = settings or get_settings()
+        self._index_name = index_name or settings.pinecone_index_name
+        self._namespace = settings.pinecone_namespace if namespace is None else namespace
         self._top_k = top_k
+        self._query_variants = query_variants
+        self._variant_generator = variant_generator or generate_query_variants
+        self._reranker = reranker
+        self._rerank_overfetch = rerank_overfetch
+        self._topic_filter = topic_filter
         self._pinecone_client = None
-        self._index = None
+        self._index = index
         self._embeddings = PassthroughEmbeddings(dimension=1024)
+        self._rrf_k = settings.rrf_k
+        self._max_workers = settings.multi_query_max_workers
+        self._cache = get_retrieval_cache() if index is None and settings.retrieval_cache_size > 0 else None
         
         # Initialize Pinecone client
-        self._init_pinecone()
+        if self._index is None:
+            self._init_pinecone()
     
     def _init_pinecone(self):
         """Initialize the Pinecone client and index."""
@@ -47,6 +184,7 @@ class EfficientPineconeRetriever(BaseRetriever):
             logger.error(f"Error initializing Pinecone in EfficientPineconeRetriever: {str(e)}")
             raise
     
+    @span("retriever")
     def _get_relevant_documents(
         self, query: str, *, run_manager: CallbackManagerForRetrieverRun
     ) -> List[Document]:
@@ -57,21 +195,126 @@ class EfficientPineconeRetriever(BaseRetriever):
             query: Query text
             run_manager: Callback manager
             
+        Returns:
+            List of relevant Document objects
+        """
+        # Overfetch candidates when a local reranker picks the final top_k
+        fetch_k = max(self._rerank_overfetch, self._top_k) if self._reranker else self._top_k
+        
+        topic = classify_query(query)[0] if self._topic_filter else None
+        
+        current_span().set_attributes(top_k=self._top_k, fetch_k=fetch_k, topic=topic,
+                                      query_variants=self._query_variants)
+        start_time = time.perf_counter()
+        if topic:
+            documents = self._topic_search(query, fetch_k, topic)
+        else:
+            documents = self._run_search(query, fetch_k)
+        timings = {"search": time.perf_counter() - start_time}
+        
+        if self._reranker:
+            rerank_start = time.perf_counter()
+            documents = self._reranker.rerank(query, documents, self._top_k)
+            timings["rerank"] = time.perf_counter() - rerank_start
+        
+        # Timings go to this call's span and log line; the retriever is shared across sessions
+        current_span().set_attributes(hits=len(documents),
+                                      **{f"{stage}_ms": round(seconds * 1000, 1) for stage, seconds in timings.items()})
+        logger.info("Retrieval stage timings: " + ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items()))
+        return documents
+    
+    def _run_search(self, query: str, top_k: int, metadata_filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Run a single or multi-query search depending on the configured variants."""
+        if self._query_variants > 1:
+            return self._multi_query_search(query, top_k, metadata_filter)
+        return self._search(query, top_k, metadata_filter)
+    
+    def _topic_search(self, query: str, top_k: int, topic: str) -> List[Document]:
+        """
+        Search within one topic area and fill missing slots without the filter.
+        
+        Args:
+            query: Query text
+            top_k: Number of results to return
+            topic: Topic area of the question, matched against the "topic" chunk field
+            
+        Returns:
+            List of up to top_k Document objects, on-topic chunks first
+        """
+        documents = self._run_search(query, top_k, {"topic": {"$eq": topic}})
+        logger.info(f"Topic filter '{topic}' returned {len(documents)} of {top_k} chunks")
+        
+        if len(documents) < top_k:
+            known_keys = {document_key(doc) for doc in documents}
+            fallback = [doc for doc in self._run_search(query, top_k) if document_key(doc) not in known_keys]
+            documents.extend(fallback[:top_k - len(documents)])
+        return documents
+    
+    def _multi_query_search(self, query: str, top_k: int,
+                            metadata_filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Search several query variants concurrently and fuse the results with RRF.
+        
+        Args:
+            query: Query text
+            top_k: Number of results to return
+            metadata_filter: Optional Pinecone metadata filter applied to every variant
+            
+        Returns:
+            List of the top_k fused Document objects
+        """
+        variants = self._variant_generator(query, self._query_variants)
+        if len(variants) <= 1:
+            return self._search(query, top_k, metadata_filter)
+        
+        start_time = time.perf_counter()
+        executor = _get_search_executor(self._max_workers)
+        search = propagate_context(lambda variant: self._search(variant, top_k, metadata_filter))
+        result_lists = list(executor.map(search, variants))
+        fused = reciprocal_rank_fusion(result_lists, k=self._rrf_k)[:top_k]
+        
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"Multi-query retrieval with {len(variants)} variants took {elapsed:.3f} seconds")
+        return fused
+    
+    def _search(self, query: str, top_k: int, metadata_filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Run a single search_records call.
+        
+        Args:
+            query: Query text
+            top_k: Number of results to return
+            metadata_filter: Optional Pinecone metadata filter, e.g. {"topic": {"$eq": "Umwelt & Klima"}}
+            
         Returns:
             List of relevant Document objects
         """
         logger.info(f"Retrieving documents for query: '{query}' using efficient method")
         
+        cache_key = None
+        if self._cache is not None:
+            cache_key = (self._index_name, self._namespace, query, top_k,
+                         json.dumps(metadata_filter, sort_keys=True) if metadata_filter else None)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return copy_documents(cached)
+        
         try:
+            search_query = {
+                "inputs": {"text": query},  # The text query for integrated embedding
+                "top_k": top_k
+            }
+            if metadata_filter:
+                search_query["filter"] = metadata_filter
+            
             # Use search_records for integrated embedding as per Pinecone documentation
-            search_response = self._index.search_records(
-                namespace=self._namespace,
-                query={
-                    "inputs": {"text": query},  # The text query for integrated embedding
-                    "top_k": self._top_k
-                },
-                fields=["text", "source", "page"]  # Specify fields to return
-            )
+            with timed("search_records"), span("pinecone.search_records", top_k=top_k, namespace=self._namespace,
+                                               filtered=bool(metadata_filter)) as search_span:
+                search_response = self._index.search_records(
+                    namespace=self._namespace,
+                    query=search_query,
+                    fields=["text", "source", "page", "chapter", "section", "topic", "original_text"]  # Specify fields to return
+                )
             
             # Process the response based on Pinecone v6.x response format
             documents = []
@@ -80,30 +323,10 @@ class EfficientPineconeRetriever(BaseRetriever):
             if hasattr(search_response, 'result') and hasattr(search_response.result, 'hits') and search_response.result.hits:
                 hits = search_response.result.hits
                 logger.info(f"Found {len(hits)} hits with efficient query")
-                
-                for hit in hits:
-                    # Extract metadata and score safely
-                    record_id = hit._id if hasattr(hit, '_id') else "Unknown"
-                    score = hit._score if hasattr(hit, '_score') else 0
-                    fields = hit.fields if hasattr(hit, 'fields') else {}
-                    
-                    # Create metadata dictionary for the document
-                    doc_metadata = {
-                        "score": score,
-                        "id": record_id,
-                        "source": fields.get("source", "Unknown"),
-                        "page": fields.get("page", "N/A")
-                    }
-                    
-                    # The text content should be in the fields
-                    page_content = fields.get("text", "")
-                    
-                    # Create Document object
-                    doc = Document(
-                        page_content=page_content,
-                        metadata=doc_metadata
-                    )
-                    documents.append(doc)
+                documents = [hit_to_document(hit) for hit in hits]
+                search_span.set_attribute("hits", len(documents))
+                if cache_key is not None:
+                    self._cache.put(cache_key, copy_documents(documents))
             else:
                 logger.warning("No hits found in the search response")
             
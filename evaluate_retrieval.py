@@ -0,0 +1,204 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from perf_stats import summarize, format_summary
+from token_counter import count_tokens
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GOLDEN_SET_PATH = "tests/golden_questions_v1.json"
+# Terms up to this length only match whole words ("ki" must not match "Kinder")
+WHOLE_WORD_MAX_LENGTH = 3
+# Allowed absolute drop of recall@k or MRR before a baseline comparison fails
+DEFAULT_QUALITY_TOLERANCE = 0.02
+
+
+def load_golden_set(path: str = GOLDEN_SET_PATH) -> Dict:
+    """Load a versioned golden question set."""
+    with open(path, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    if "version" not in golden or not golden.get("questions"):
+        raise ValueError(f"{path} is not a golden question set (version and questions required)")
+    return golden
+
+
+def _contains_term(text: str, term: str) -> bool:
+    if len(term) <= WHOLE_WORD_MAX_LENGTH:
+        return re.search(rf"\b{re.escape(term)}\b", text) is not None
+    return term in text
+
+
+def is_relevant(document, question: Dict) -> bool:
+    """
+    Whether a retrieved chunk answers a golden question.
+
+    Expected chunk IDs or pages take precedence; otherwise the chunk must contain
+    all terms of at least one expected term group.
+    """
+    if question.get("expected_chunks"):
+        return document.metadata.get("id") in question["expected_chunks"]
+    if question.get("expected_pages"):
+        try:
+            return int(document.metadata.get("page")) in question["expected_pages"]
+        except (ValueError, TypeError):
+            return False
+    text = document.metadata.get("original_text", document.page_content).lower()
+    return any(all(_contains_term(text, term.lower()) for term in group) for group in question.get("expected_terms", []))
+
+
+def score_ranking(documents: List, question: Dict, k: int) -> Dict:
+    """
+    Recall@k and reciprocal rank of one ranked result list.
+
+    With expected chunks or pages recall is the share of them found in the top k;
+    with term groups only it is 1 if any relevant chunk is in the top k (hit rate).
+    """
+    top = documents[:k]
+    relevant_ranks = [rank for rank, doc in enumerate(top, 1) if is_relevant(doc, question)]
+    if question.get("expected_chunks"):
+        found = {doc.metadata.get("id") for doc in top} & set(question["expected_chunks"])
+        recall = len(found) / len(question["expected_chunks"])
+    elif question.get("expected_pages"):
+        found = set()
+        for doc in top:
+            try:
+                found.add(int(doc.metadata.get("page")))
+            except (ValueError, TypeError):
+                pass
+        recall = len(found & set(question["expected_pages"])) / len(question["expected_pages"])
+    else:
+        recall = 1.0 if relevant_ranks else 0.0
+    return {
+        "recall": recall,
+        "reciprocal_rank": 1.0 / relevant_ranks[0] if relevant_ranks else 0.0,
+        "relevant_ranks": relevant_ranks,
+    }
+
+
+def evaluate(search: Callable[[str], List], golden: Dict, k: int) -> Dict:
+    """
+    Evaluate one retriever configuration on a golden set.
+
+    Args:
+        search: Function query -> ranked list of Documents (at least k)
+        golden: Golden set from load_golden_set
+        k: Cut-off for recall@k and MRR
+
+    Returns:
+        Mean recall@k, MRR, mean context tokens, latency summary and per-question results
+    """
+    per_question = []
+    latencies = []
+    for question in golden["questions"]:
+        start = time.perf_counter()
+        try:
+            documents = search(question["question"])
+        except Exception as e:
+            logger.warning(f"Search failed for {question['id']}: {str(e)}")
+            documents = []
+        latency = time.perf_counter() - start
+        latencies.append(latency)
+        scores = score_ranking(documents, question, k)
+        per_question.append({
+            "id": question["id"],
+            "question": question["question"],
+            **scores,
+            "context_tokens": sum(count_tokens(doc.page_content) for doc in documents[:k]),
+            "retrieved": [doc.metadata.get("id") for doc in documents[:k]],
+            "latency": latency,
+        })
+
+    count = len(per_question)
+    return {
+        "golden_version": golden["version"],
+        "k": k,
+        "questions": count,
+        "recall_at_k": sum(q["recall"] for q in per_question) / count,
+        "mrr": sum(q["reciprocal_rank"] for q in per_question) / count,
+        "mean_context_tokens": sum(q["context_tokens"] for q in per_question) / count,
+        "latency": summarize(latencies),
+        "misses": [q["id"] for q in per_question if not q["relevant_ranks"]],
+        "per_question": per_question,
+    }
+
+
+def compare_quality(results: Dict[str, Dict], baseline: Dict[str, Dict],
+                    tolerance: float = DEFAULT_QUALITY_TOLERANCE) -> List[str]:
+    """Configurations whose recall@k or MRR dropped by more than the tolerance against the baseline."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if previous.get("golden_version") != result["golden_version"]:
+            logger.warning(f"{name}: baseline uses golden set v{previous.get('golden_version')}, skipping comparison")
+            continue
+        for metric in ("recall_at_k", "mrr"):
+            if result[metric] < previous[metric] - tolerance:
+                regressions.append(f"{name} {metric}: {result[metric]:.3f} vs. baseline {previous[metric]:.3f}")
+    return regressions
+
+
+def print_results(name: str, result: Dict):
+    print(f"\n=== {name} (golden set v{result['golden_version']}, {result['questions']} questions) ===")
+    print(f"Recall@{result['k']}: {result['recall_at_k']:.3f}  MRR: {result['mrr']:.3f}  "
+          f"context tokens: {result['mean_context_tokens']:.0f}")
+    print(f"Latency: {format_summary(result['latency'], unit='ms', scale=1000)}")
+    if result["misses"]:
+        print(f"No relevant chunk for: {', '.join(result['misses'])}")
+
+
+def main(argv: Optional[List[str]] = None):
+    from benchmark_retrieval import BACKENDS
+
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency on the golden question set")
+    parser.add_argument("--golden", default=GOLDEN_SET_PATH, help="Golden question set (JSON)")
+    parser.add_argument("--backends", default="efficient", help=f"Comma-separated backends: {', '.join(BACKENDS)}")
+    parser.add_argument("--top-k", default="3,5", help="Comma-separated cut-offs; each is its own configuration")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_QUALITY_TOLERANCE,
+                        help="Allowed absolute drop of recall@k and MRR")
+    args = parser.parse_args(argv)
+
+    golden = load_golden_set(args.golden)
+    results = {}
+    for backend in [name.strip() for name in args.backends.split(",") if name.strip()]:
+        if backend not in BACKENDS:
+            parser.error(f"Unknown backend: {backend}. Available: {', '.join(BACKENDS)}")
+        for k in [int(value) for value in args.top_k.split(",") if value.strip()]:
+            name = f"{backend}@{k}"
+            search = BACKENDS[backend](k)
+            results[name] = evaluate(search, golden, k)
+            print_results(name, results[name])
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"golden": args.golden, "configurations": results}, f, ensure_ascii=False, indent=2)
+        logger.info(f"Wrote results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["configurations"]
+        regressions = compare_quality(results, baseline, args.tolerance)
+        if regressions:
+            print("\n===== QUALITY REGRESSIONS =====")
+            for message in regressions:
+                print(message)
+            sys.exit(1)
+        print("\nNo quality regressions against the baseline.")
+    return results
+
+
+if __name__ == "__main__":
+    main()
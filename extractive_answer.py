@@ -0,0 +1,118 @@
+import re
+from typing import List, Optional, Tuple
+
+from reranker import LexicalScorer, tokenize
+from settings import get_settings
+
+# Abbreviations that end in a period without ending the sentence
+ABBREVIATIONS = ("z.B.", "bzw.", "u.a.", "d.h.", "ca.", "inkl.", "insb.", "vgl.", "Nr.", "Abs.", "Art.", "etc.", "usw.", "Mio.", "Mrd.")
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[A-ZÄÖÜ0-9„\"-])")
+
+# Sentences shorter than this are headings or fragments
+MIN_SENTENCE_LENGTH = 30
+# Sentences sharing this share of their terms with a selected one are overlap duplicates
+DUPLICATE_OVERLAP = 0.7
+
+NO_RESULTS_ANSWER = "Ich konnte leider keine relevanten Informationen zu Ihrer Anfrage finden."
+EXTRACTIVE_INTRO = "Diese Stellen im Regierungsprogramm passen am besten zu Ihrer Frage:"
+SIMPLE_EXTRACTIVE_INTRO = "Das steht dazu im Regierungsprogramm:"
+EXTRACTIVE_NOTE = "*Schnellantwort: wörtliche Auszüge aus dem Regierungsprogramm, ohne KI-Zusammenfassung.*"
+DEGRADED_NOTE = ("*Der KI-Dienst ist gerade stark ausgelastet. Hier sind die passenden Auszüge aus dem "
+                 "Regierungsprogramm; bitte versuchen Sie es später erneut für eine ausformulierte Antwort.*")
+
+_scorer = LexicalScorer()
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split chunk text into sentences, keeping common German abbreviations intact."""
+    protected = text
+    for i, abbreviation in enumerate(ABBREVIATIONS):
+        protected = protected.replace(abbreviation, f"\x00{i}\x00")
+    sentences = []
+    for sentence in _SENTENCE_BOUNDARY.split(protected):
+        for i, abbreviation in enumerate(ABBREVIATIONS):
+            sentence = sentence.replace(f"\x00{i}\x00", abbreviation)
+        sentence = sentence.strip()
+        if sentence:
+            sentences.append(sentence)
+    return sentences
+
+
+def select_sentences(query: str, documents: List, max_sentences: int) -> List[Tuple[str, object]]:
+    """
+    Pick the sentences of the retrieved chunks that best match the query.
+
+    Args:
+        query: The user question
+        documents: Retrieved Document objects, best first
+        max_sentences: Maximum number of sentences
+
+    Returns:
+        List of (sentence, page) tuples, best first
+    """
+    candidates = []
+    for doc_rank, doc in enumerate(documents):
+        text = doc.metadata.get("original_text", doc.page_content)
+        page = doc.metadata.get("page", "N/A")
+        try:
+            page = int(page)
+        except (ValueError, TypeError):
+            pass  # Keep as is if not convertible
+        for sentence in split_sentences(text):
+            if len(sentence) >= MIN_SENTENCE_LENGTH:
+                candidates.append((sentence, page, doc_rank))
+    if not candidates:
+        return []
+
+    scores = _scorer.score(query, [sentence for sentence, _, _ in candidates])
+    # Better retrieved chunks win ties
+    ranked = sorted(range(len(candidates)), key=lambda i: (-scores[i], candidates[i][2], i))
+
+    selected = []
+    selected_terms = []
+    for i in ranked:
+        if scores[i] <= 0 and selected:
+            break
+        sentence, page, _ = candidates[i]
+        terms = set(tokenize(sentence))
+        # Overlapping chunks repeat sentences, keep each only once
+        if any(terms and len(terms & other) / len(terms) >= DUPLICATE_OVERLAP for other in selected_terms):
+            continue
+        selected.append((sentence, page))
+        selected_terms.append(terms)
+        if len(selected) == max_sentences:
+            break
+    return selected
+
+
+def build_extractive_answer(query: str, documents: List, simple_language: bool = False, degraded: bool = False,
+                            max_sentences: Optional[int] = None) -> str:
+    """
+    Build a structured answer from the best matching sentences, without an LLM.
+
+    Args:
+        query: The user question
+        documents: Retrieved Document objects, best first
+        simple_language: Use the simple language intro and fewer sentences
+        degraded: Explain that the LLM is currently unavailable
+        max_sentences: Maximum number of quoted sentences (default: settings.extractive_max_sentences)
+
+    Returns:
+        Markdown answer with a page citation per sentence; the sources block is
+        added by the chatbot's format_response
+    """
+    if max_sentences is None:
+        max_sentences = get_settings().extractive_max_sentences
+    if simple_language:
+        max_sentences = min(max_sentences, 3)
+    sentences = select_sentences(query, documents, max_sentences)
+    if not sentences:
+        return NO_RESULTS_ANSWER
+
+    lines = [SIMPLE_EXTRACTIVE_INTRO if simple_language else EXTRACTIVE_INTRO, ""]
+    for sentence, page in sentences:
+        lines.append(f"- {sentence} (Seite {page})")
+    lines.append("")
+    lines.append(DEGRADED_NOTE if degraded else EXTRACTIVE_NOTE)
+    return "\n".join(lines)
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, List, Optional
+
+from config import (PDF_PATH, CHUNK_SIZE, CHUNK_OVERLAP, MODEL_NAME, SYSTEM_PROMPT, SIMPLE_SYSTEM_PROMPT,
+                    FAQ_STORE_PATH, FAQ_MATCH_THRESHOLD)
+from reranker import tokenize
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Chatbot implementations an answer can be generated with
+BOTS = ("chatbot", "simple_chatbot")
+
+# Marker separating the answer from the sources block in formatted responses
+SOURCES_MARKER = "\n\n---\n\n### 📚 Quellen"
+
+# Global singleton instance
+_faq_store_instance = None
+_faq_store_checked = False
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for exact lookups (lowercase, no punctuation, single spaces)."""
+    return " ".join(re.sub(r"[^\wäöüß]+", " ", question.lower()).split())
+
+
+def split_response(response: str) -> str:
+    """Return the answer part of a formatted response, without the sources block."""
+    return response.split(SOURCES_MARKER, 1)[0].strip()
+
+
+def compute_corpus_version(pdf_path: str = PDF_PATH) -> str:
+    """
+    Fingerprint everything a stored answer depends on.
+
+    Covers the PDF, the chunking parameters, the model and the system prompts,
+    so the store is invalidated whenever any of them changes.
+
+    Returns:
+        Short hex digest
+    """
+    digest = hashlib.sha256()
+    if os.path.exists(pdf_path):
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    else:
+        digest.update(b"no-pdf")
+    for part in (CHUNK_SIZE, CHUNK_OVERLAP, MODEL_NAME, SYSTEM_PROMPT, SIMPLE_SYSTEM_PROMPT):
+        digest.update(str(part).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def mode_key(bot: str, simple_language: bool) -> str:
+    """Key of the answer set for a chatbot and language mode."""
+    return f"{bot}:{'simple' if simple_language else 'standard'}"
+
+
+class FAQStore:
+    """Local store of pre-generated answers to frequent questions.
+
+    Answers are kept per chatbot and language mode as the fully formatted
+    response. Lookups are exact on the normalized question, then by overlap
+    of lemmatized content terms; only vetted entries are served.
+    """
+
+    def __init__(self, corpus_version: str, entries: Optional[Dict[str, Dict[str, Dict]]] = None):
+        self.corpus_version = corpus_version
+        self.entries = entries or {}
+        self._terms = {}
+        for key, answers in self.entries.items():
+            self._terms[key] = {question: frozenset(tokenize(question)) for question in answers}
+
+    def add(self, bot: str, simple_language: bool, question: str, response: str,
+            vetted: bool = False, seconds: Optional[float] = None):
+        """
+        Add or replace an answer.
+
+        Args:
+            bot: One of BOTS
+            simple_language: Whether the answer was generated in simple language mode
+            question: The question as asked
+            response: Formatted response returned by the chatbot
+            vetted: Whether the answer has been approved for serving
+            seconds: Generation time, kept for reference
+        """
+        key = mode_key(bot, simple_language)
+        normalized = normalize_question(question)
+        self.entries.setdefault(key, {})[normalized] = {
+            "question": question,
+            "response": response,
+            "answer": split_response(response),
+            "vetted": vetted,
+            "seconds": round(seconds, 2) if seconds is not None else None,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self._terms.setdefault(key, {})[normalized] = frozenset(tokenize(normalized))
+
+    def lookup(self, question: str, bot: str, simple_language: bool = False,
+               threshold: float = FAQ_MATCH_THRESHOLD) -> Optional[Dict]:
+        """
+        Find a vetted answer for a question.
+
+        Args:
+            question: The user question
+            bot: Chatbot the answer should come from
+            simple_language: Language mode of the request
+            threshold: Minimum Jaccard overlap of content terms for a non-exact match
+
+        Returns:
+            The stored entry, or None
+        """
+        key = mode_key(bot, simple_language)
+        answers = self.entries.get(key)
+        if not answers:
+            return None
+
+        normalized = normalize_question(question)
+        entry = answers.get(normalized)
+        if entry is not None:
+            return entry if entry["vetted"] else None
+
+        terms = frozenset(tokenize(normalized))
+        if not terms:
+            return None
+
+        best_entry = None
+        best_score = threshold
+        for stored_question, stored_terms in self._terms.get(key, {}).items():
+            if not stored_terms:
+                continue
+            score = len(terms & stored_terms) / len(terms | stored_terms)
+            candidate = answers[stored_question]
+            if score >= best_score and candidate["vetted"]:
+                best_entry, best_score = candidate, score
+        return best_entry
+
+    def approve(self, questions: Optional[List[str]] = None) -> int:
+        """
+        Mark entries as vetted.
+
+        Args:
+            questions: Questions to approve; all entries if None
+
+        Returns:
+            Number of newly approved entries
+        """
+        wanted = {normalize_question(question) for question in questions} if questions is not None else None
+        approved = 0
+        for answers in self.entries.values():
+            for normalized, entry in answers.items():
+                if (wanted is None or normalized in wanted) and not entry["vetted"]:
+                    entry["vetted"] = True
+                    approved += 1
+        return approved
+
+    def __len__(self):
+        return sum(len(answers) for answers in self.entries.values())
+
+    def save(self, path: str = FAQ_STORE_PATH):
+        """Write the store to a JSON file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"corpus_version": self.corpus_version, "entries": self.entries}, f, ensure_ascii=False, indent=1)
+        logger.info(f"Saved {len(self)} FAQ answers to {path}")
+
+    @classmethod
+    def load(cls, path: str = FAQ_STORE_PATH) -> "FAQStore":
+        """Read a store written by save()."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("corpus_version", ""), data.get("entries", {}))
+
+
+def get_faq_store_instance() -> Optional[FAQStore]:
+    """Get or load the FAQ store singleton; None if it is missing or built for another corpus."""
+    global _faq_store_instance, _faq_store_checked
+
+    if not _faq_store_checked:
+        _faq_store_checked = True
+        if not os.path.exists(FAQ_STORE_PATH):
+            logger.info(f"No FAQ store at {FAQ_STORE_PATH}, all questions go through retrieval")
+            return None
+        try:
+            store = FAQStore.load(FAQ_STORE_PATH)
+            corpus_version = compute_corpus_version()
+            if store.corpus_version != corpus_version:
+                logger.warning(f"FAQ store was built for corpus {store.corpus_version}, current corpus is "
+                               f"{corpus_version}. Regenerate it with 'python build_faq.py build'.")
+                return None
+            _faq_store_instance = store
+            logger.info(f"Loaded {len(store)} FAQ answers from {FAQ_STORE_PATH}")
+        except Exception as e:
+            logger.error(f"Error loading FAQ store: {str(e)}")
+            return None
+
+    return _faq_store_instance
+
+
+def lookup_faq(question: str, bot: str, simple_language: bool = False) -> Optional[Dict]:
+    """Look up a vetted pre-generated answer; None if there is none."""
+    store = get_faq_store_instance()
+    if store is None:
+        return None
+    return store.lookup(question, bot, simple_language)
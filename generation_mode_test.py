@@ -0,0 +1,73 @@
+import argparse
+import logging
+import time
+from pinecone_processor import get_vector_store_instance
+from chatbot import ChatBot, GENERATION_MODES
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def measure_mode(generation_mode, questions, simple_language=False):
+    """Run a conversation through ChatBot in the given generation mode and time each turn.
+
+    Args:
+        generation_mode: One of GENERATION_MODES
+        questions: List of questions, asked in order within one conversation
+        simple_language: Whether to use simple language mode
+
+    Returns:
+        List of per-turn latencies in seconds
+    """
+    logger.info(f"Testing generation mode '{generation_mode}'")
+
+    vector_store = get_vector_store_instance()
+    chatbot = ChatBot(vector_store, use_efficient_retriever=True, generation_mode=generation_mode)
+
+    latencies = []
+    for question in questions:
+        start_time = time.perf_counter()
+        chatbot.get_response(question, simple_language=simple_language)
+        latency = time.perf_counter() - start_time
+        logger.info(f"[{generation_mode}] '{question}' answered in {latency:.4f} seconds")
+        latencies.append(latency)
+
+    return latencies
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Compare ChatBot latency per generation mode")
+    parser.add_argument("questions", nargs="*", help="Conversation to run (first question plus follow-ups)")
+    parser.add_argument("--modes", nargs="+", choices=GENERATION_MODES, default=list(GENERATION_MODES),
+                        help="Generation modes to compare")
+    parser.add_argument("--simple", action="store_true", help="Use simple language mode")
+    args = parser.parse_args()
+
+    # If no conversation provided, use a default first question with follow-ups
+    questions = args.questions or [
+        "Welche Maßnahmen gibt es gegen die Teuerung?",
+        "Und ab wann gilt die Mietpreisbremse?",
+        "Welche Seite?"
+    ]
+
+    results = {}
+    for mode in args.modes:
+        print(f"\n=== TESTING GENERATION MODE: {mode} ===\n")
+        results[mode] = measure_mode(mode, questions, simple_language=args.simple)
+
+    print("\n===== LATENCY PER TURN (seconds) =====")
+    header = f"{'Turn':<6}" + "".join(f"{mode:>14}" for mode in args.modes)
+    print(header)
+    for turn in range(len(questions)):
+        row = f"{turn + 1:<6}" + "".join(f"{results[mode][turn]:>14.4f}" for mode in args.modes)
+        print(row)
+
+    print("\n===== AVERAGES =====")
+    for mode in args.modes:
+        first_turn = results[mode][0]
+        follow_ups = results[mode][1:]
+        avg_follow_up = sum(follow_ups) / len(follow_ups) if follow_ups else 0.0
+        print(f"{mode}: first turn {first_turn:.4f}s, follow-ups {avg_follow_up:.4f}s on average")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import openai
+
+from settings import Settings, get_settings
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class LLMOverloadedError(Exception):
+    """Raised when no LLM slot becomes free within the queue timeout."""
+    pass
+
+
+# Errors after which an answer is built extractively instead of failing the request
+LLM_FALLBACK_ERRORS = (
+    LLMOverloadedError,
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+# Process-wide limit on concurrent completion calls, one semaphore per configured limit
+_llm_semaphores: Dict[int, threading.BoundedSemaphore] = {}
+_llm_semaphores_lock = threading.Lock()
+
+
+def get_llm_semaphore(max_concurrent_requests: int) -> threading.BoundedSemaphore:
+    """Get or create the process-wide semaphore for a concurrency limit."""
+    with _llm_semaphores_lock:
+        if max_concurrent_requests not in _llm_semaphores:
+            _llm_semaphores[max_concurrent_requests] = threading.BoundedSemaphore(max_concurrent_requests)
+        return _llm_semaphores[max_concurrent_requests]
+
+
+@contextmanager
+def llm_slot(settings: Settings = None, timeout: Optional[float] = None):
+    """
+    Hold one of the process-wide LLM request slots for the duration of a call.
+
+    Args:
+        settings: Settings providing the slot count and queue timeout, defaults to get_settings()
+        timeout: Seconds to wait for a free slot (default: settings.llm_queue_timeout_seconds)
+
+    Raises:
+        LLMOverloadedError: If all slots stay busy for longer than the timeout
+    """
+    settings = settings or get_settings()
+    if timeout is None:
+        timeout = settings.llm_queue_timeout_seconds
+    semaphore = get_llm_semaphore(settings.llm_max_concurrent_requests)
+    if not semaphore.acquire(timeout=timeout):
+        logger.warning(f"All {settings.llm_max_concurrent_requests} LLM slots busy for {timeout} seconds")
+        raise LLMOverloadedError("Too many concurrent LLM requests")
+    try:
+        yield
+    finally:
+        semaphore.release()
@@ -0,0 +1,323 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from typing import List, Dict, Optional, Tuple
+
+import httpx
+
+from perf_stats import summarize, format_summary
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "http://localhost:8000"
+DEFAULT_CHAT_PATH = "/api/chat"
+# The chatbots catch their own exceptions and answer with this text and HTTP 200
+APP_ERROR_PREFIX = "Ein Fehler ist aufgetreten"
+# Marker of extractive answers given because the LLM was overloaded
+DEGRADED_MARKER = "Der KI-Dienst ist gerade stark ausgelastet"
+# Throughput within this share of the maximum counts as saturated
+SATURATION_THRESHOLD = 0.95
+
+
+def load_query_mix(path: Optional[str] = None) -> List[Tuple[str, float]]:
+    """
+    Load the weighted query mix.
+
+    Args:
+        path: Text file with one query per line, or JSONL with "query" and an optional
+              "weight" (e.g. a query log); None uses the test queries of comparison_test.py
+
+    Returns:
+        List of (query, weight) tuples
+    """
+    if path is None:
+        from comparison_test import TEST_QUERIES
+        return [(query, 1.0) for query in TEST_QUERIES]
+
+    mix = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if path.endswith(".jsonl"):
+                entry = json.loads(line)
+                mix.append((entry["query"], float(entry.get("weight", 1.0))))
+            else:
+                mix.append((line, 1.0))
+    if not mix:
+        raise ValueError(f"No queries found in {path}")
+    return mix
+
+
+class LoadTester:
+    """Sends chat requests to the API in closed-loop (fixed concurrency) or open-loop (fixed arrival rate) mode.
+
+    Every request is read as a stream, so the time to the first body byte is
+    measured as well; for streaming endpoints this is the time to first token.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, path: str = DEFAULT_CHAT_PATH,
+                 queries: Optional[List[Tuple[str, float]]] = None, simple_share: float = 0.0,
+                 fast_share: float = 0.0, timeout: float = 120.0, seed: Optional[int] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize the load tester.
+
+        Args:
+            base_url: API base URL
+            path: Chat endpoint path, e.g. /api/chat or a streaming endpoint
+            queries: Weighted query mix; defaults to load_query_mix()
+            simple_share: Share of requests in simple language mode
+            fast_share: Share of requests in fast (extractive) mode
+            timeout: Request timeout in seconds
+            seed: Random seed for the query mix, modes and arrivals
+            transport: Optional httpx transport, e.g. an ASGITransport in tests
+        """
+        self.base_url = base_url.rstrip("/")
+        self.path = path
+        self.queries = queries or load_query_mix()
+        self.simple_share = simple_share
+        self.fast_share = fast_share
+        self.timeout = timeout
+        self.transport = transport
+        self._random = random.Random(seed)
+
+    def _client(self, connections: int) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        return httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits, transport=self.transport)
+
+    def next_payload(self) -> Dict:
+        """Draw the next request from the query mix."""
+        queries = [query for query, _ in self.queries]
+        weights = [weight for _, weight in self.queries]
+        return {
+            "query": self._random.choices(queries, weights=weights)[0],
+            "simple_language": self._random.random() < self.simple_share,
+            "fast_mode": self._random.random() < self.fast_share,
+        }
+
+    async def send(self, client: httpx.AsyncClient, payload: Dict) -> Dict:
+        """Send one request and measure latency and time to first byte."""
+        start = time.perf_counter()
+        result = {"query": payload["query"], "ttft": None, "error": None, "degraded": False}
+        try:
+            body = b""
+            async with client.stream("POST", self.path, json=payload) as response:
+                async for chunk in response.aiter_bytes():
+                    if chunk and result["ttft"] is None:
+                        result["ttft"] = time.perf_counter() - start
+                    body += chunk
+            result["status"] = response.status_code
+            text = body.decode("utf-8", errors="replace")
+            if response.status_code >= 400:
+                result["error"] = f"HTTP {response.status_code}"
+            elif APP_ERROR_PREFIX in text[:200]:
+                result["error"] = "app_error"
+            result["degraded"] = DEGRADED_MARKER in text
+        except httpx.HTTPError as e:
+            result["status"] = None
+            result["error"] = type(e).__name__
+        result["latency"] = time.perf_counter() - start
+        return result
+
+    async def run_closed_loop(self, concurrency: int, duration: Optional[float] = None,
+                              max_requests: Optional[int] = None) -> Tuple[List[Dict], float]:
+        """
+        Keep a fixed number of requests in flight; each worker sends the next one when its last one finished.
+
+        Args:
+            concurrency: Number of concurrent virtual users
+            duration: Seconds to run
+            max_requests: Total number of requests; the run ends at whichever limit comes first
+
+        Returns:
+            Tuple of (results, wall time in seconds)
+        """
+        results = []
+        started = 0
+        start = time.perf_counter()
+
+        async def worker(client):
+            nonlocal started
+            while True:
+                if duration is not None and time.perf_counter() - start >= duration:
+                    return
+                if max_requests is not None and started >= max_requests:
+                    return
+                started += 1
+                results.append(await self.send(client, self.next_payload()))
+
+        async with self._client(concurrency) as client:
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        return results, time.perf_counter() - start
+
+    async def run_open_loop(self, rate: float, duration: Optional[float] = None,
+                            max_requests: Optional[int] = None, max_in_flight: int = 1000) -> Tuple[List[Dict], float]:
+        """
+        Send requests with Poisson arrivals at a fixed rate, regardless of how fast they complete.
+
+        Unlike the closed loop, a slow server does not slow down the arrivals, so
+        queueing delay shows up in the latencies instead of being hidden.
+
+        Args:
+            rate: Mean arrivals per second
+            duration: Seconds to send new requests
+            max_requests: Total number of requests
+            max_in_flight: Connection pool size
+
+        Returns:
+            Tuple of (results, wall time in seconds)
+        """
+        tasks = []
+        start = time.perf_counter()
+        next_arrival = 0.0
+        async with self._client(max_in_flight) as client:
+            while True:
+                if duration is not None and next_arrival >= duration:
+                    break
+                if max_requests is not None and len(tasks) >= max_requests:
+                    break
+                delay = start + next_arrival - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(self.send(client, self.next_payload())))
+                next_arrival += self._random.expovariate(rate)
+            results = await asyncio.gather(*tasks)
+        return list(results), time.perf_counter() - start
+
+
+def build_report(results: List[Dict], wall_time: float, mode: str, level: float) -> Dict:
+    """
+    Aggregate the results of one load level.
+
+    Args:
+        results: Per-request results from LoadTester
+        wall_time: Duration of the run in seconds
+        mode: "closed" or "open"
+        level: Concurrency (closed loop) or arrival rate (open loop)
+
+    Returns:
+        Report with latency and TTFT percentiles of successful requests, error rate and throughput
+    """
+    successful = [r for r in results if not r["error"]]
+    error_types = {}
+    for result in results:
+        if result["error"]:
+            error_types[result["error"]] = error_types.get(result["error"], 0) + 1
+    return {
+        "mode": mode,
+        "concurrency" if mode == "closed" else "rate": level,
+        "requests": len(results),
+        "errors": len(results) - len(successful),
+        "error_rate": (len(results) - len(successful)) / len(results) if results else 0.0,
+        "error_types": error_types,
+        "degraded": sum(r["degraded"] for r in results),
+        "wall_time": wall_time,
+        "throughput_rps": len(successful) / wall_time if wall_time > 0 else 0.0,
+        "latency": summarize([r["latency"] for r in successful]),
+        "ttft": summarize([r["ttft"] for r in successful if r["ttft"] is not None]),
+    }
+
+
+def find_saturation(reports: List[Dict]) -> Optional[Dict]:
+    """The lowest load level whose throughput is within SATURATION_THRESHOLD of the maximum."""
+    if not reports:
+        return None
+    best = max(report["throughput_rps"] for report in reports)
+    return next(report for report in reports if report["throughput_rps"] >= SATURATION_THRESHOLD * best)
+
+
+def print_report(report: Dict):
+    level = f"concurrency={report['concurrency']}" if report["mode"] == "closed" else f"rate={report['rate']}/s"
+    print(f"\n=== {level} ===")
+    error_types = ", ".join(f"{name}: {count}" for name, count in report["error_types"].items())
+    print(f"Requests: {report['requests']}, errors: {report['errors']} ({report['error_rate']:.1%})"
+          f"{f' [{error_types}]' if error_types else ''}, degraded answers: {report['degraded']}")
+    print(f"Throughput: {report['throughput_rps']:.2f} req/s")
+    print(f"Latency: {format_summary(report['latency'])}")
+    print(f"TTFT:    {format_summary(report['ttft'])}")
+
+
+def print_saturation_curve(reports: List[Dict]):
+    key = "concurrency" if reports[0]["mode"] == "closed" else "rate"
+    saturation = find_saturation(reports)
+    print("\n===== SATURATION CURVE =====")
+    print(f"{key:>12} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'ttft p50':>9} {'errors':>7}")
+    for report in reports:
+        latency = report["latency"]
+        ttft = report["ttft"]
+        marker = "  <- saturation" if report is saturation else ""
+        print(f"{report[key]:>12} {report['throughput_rps']:>8.2f} {latency.get('p50', float('nan')):>8.3f} "
+              f"{latency.get('p95', float('nan')):>8.3f} {latency.get('p99', float('nan')):>8.3f} "
+              f"{ttft.get('p50', float('nan')):>9.3f} {report['error_rate']:>7.1%}{marker}")
+
+
+def parse_levels(value: str) -> List[float]:
+    return [float(level) for level in value.split(",") if level.strip()]
+
+
+async def run_levels(tester: LoadTester, args) -> List[Dict]:
+    if args.warmup:
+        logger.info(f"Sending {args.warmup} warmup requests")
+        await tester.run_closed_loop(1, max_requests=args.warmup)
+
+    reports = []
+    open_loop = args.rate is not None
+    for level in parse_levels(args.rate if open_loop else args.concurrency):
+        if open_loop:
+            logger.info(f"Open loop at {level} requests/s")
+            results, wall_time = await tester.run_open_loop(level, duration=args.duration, max_requests=args.requests)
+        else:
+            logger.info(f"Closed loop with {int(level)} concurrent users")
+            results, wall_time = await tester.run_closed_loop(int(level), duration=args.duration,
+                                                              max_requests=args.requests)
+        report = build_report(results, wall_time, "open" if open_loop else "closed", level if open_loop else int(level))
+        print_report(report)
+        reports.append(report)
+    return reports
+
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Load test the chat API with latency percentiles and saturation curves")
+    parser.add_argument("--url", default=DEFAULT_BASE_URL, help="API base URL")
+    parser.add_argument("--path", default=DEFAULT_CHAT_PATH, help="Endpoint path, e.g. a streaming chat endpoint")
+    parser.add_argument("--queries", default=None, help="Query mix: .txt (one per line) or .jsonl with query/weight")
+    parser.add_argument("--concurrency", default="4",
+                        help="Closed loop: concurrent users, a comma-separated list runs a sweep (e.g. 1,2,4,8,16)")
+    parser.add_argument("--rate", default=None,
+                        help="Open loop instead: arrivals per second, comma-separated for a sweep")
+    parser.add_argument("--duration", type=float, default=None, help="Seconds per load level")
+    parser.add_argument("--requests", type=int, default=None, help="Requests per load level")
+    parser.add_argument("--warmup", type=int, default=2, help="Sequential warmup requests before measuring")
+    parser.add_argument("--simple-share", type=float, default=0.0, help="Share of simple language requests")
+    parser.add_argument("--fast-share", type=float, default=0.0, help="Share of fast mode (extractive) requests")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for the query mix and arrivals")
+    parser.add_argument("--output", default=None, help="Write the reports as JSON to this file")
+    args = parser.parse_args()
+    if args.duration is None and args.requests is None:
+        args.requests = 50
+
+    tester = LoadTester(args.url, args.path, load_query_mix(args.queries), simple_share=args.simple_share,
+                        fast_share=args.fast_share, timeout=args.timeout, seed=args.seed)
+    reports = asyncio.run(run_levels(tester, args))
+    if len(reports) > 1:
+        print_saturation_curve(reports)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "levels": reports}, f, ensure_ascii=False, indent=2)
+        logger.info(f"Wrote report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
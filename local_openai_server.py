@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from typing import List, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+from config import MODEL_NAME
+from token_counter import split_tokens, count_message_tokens
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Filler the simulated answers are built from after the opening sentence
+ANSWER_FILLER = ("Das Regierungsprogramm sieht dazu konkrete Maßnahmen vor, die schrittweise umgesetzt "
+                 "werden sollen. Die Details finden sich in den angegebenen Abschnitten. ")
+
+ERROR_TYPES = {
+    429: ("rate_limit_exceeded", "Rate limit reached (injected by the local test server)"),
+    500: ("server_error", "The server had an error (injected by the local test server)"),
+    503: ("server_overloaded", "The server is overloaded (injected by the local test server)"),
+}
+
+
+class CompletionSimulator:
+    """Timing, error injection and usage accounting of the local completion server."""
+
+    def __init__(self, ttft_ms: float = 300.0, tokens_per_second: float = 80.0, completion_tokens: int = 200,
+                 error_rate: float = 0.0, error_status: int = 429, jitter: float = 0.2, seed: Optional[int] = None):
+        """
+        Initialize the simulator.
+
+        Args:
+            ttft_ms: Time to first token in milliseconds
+            tokens_per_second: Generation speed after the first token
+            completion_tokens: Length of the simulated answers, capped by max_tokens
+            error_rate: Share of requests answered with error_status
+            error_status: HTTP status of injected errors (429, 500 or 503)
+            jitter: Relative random variation of TTFT and generation speed
+            seed: Random seed for jitter and error injection
+        """
+        if error_status not in ERROR_TYPES:
+            raise ValueError(f"Unsupported error status: {error_status}. Use one of {sorted(ERROR_TYPES)}")
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        # Also loads the tokenizer up front, so the first request's TTFT is not skewed
+        self._filler_tokens = split_tokens(ANSWER_FILLER)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"requests": 0, "stream_requests": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def _vary(self, value: float) -> float:
+        return value * self._random.uniform(1 - self.jitter, 1 + self.jitter) if self.jitter else value
+
+    def should_fail(self) -> bool:
+        return self._random.random() < self.error_rate
+
+    def timings(self):
+        """Draw TTFT and the per-token interval (both in seconds) for one request."""
+        ttft = self._vary(self.ttft_ms) / 1000
+        interval = 1.0 / self._vary(self.tokens_per_second) if self.tokens_per_second > 0 else 0.0
+        return ttft, interval
+
+    def answer_tokens(self, messages: List[Dict], max_tokens: Optional[int]):
+        """Deterministic answer pieces for the last user question and the finish reason."""
+        question = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        text = f"Zur Frage „{question.strip()}“ enthält das Regierungsprogramm folgende Punkte. "
+        limit = min(self.completion_tokens, max_tokens) if max_tokens else self.completion_tokens
+        tokens = split_tokens(text)
+        while len(tokens) < limit:
+            tokens.extend(self._filler_tokens)
+        finish_reason = "length" if max_tokens and max_tokens < self.completion_tokens else "stop"
+        return tokens[:limit], finish_reason
+
+    def record(self, prompt_tokens: int, completion_tokens: int, stream: bool):
+        self.stats["requests"] += 1
+        self.stats["stream_requests"] += int(stream)
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += completion_tokens
+
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> Dict:
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+def create_app(simulator: CompletionSimulator) -> FastAPI:
+    """
+    Create an OpenAI-compatible chat completions server backed by a simulator.
+
+    Args:
+        simulator: Timing, error and usage settings
+
+    Returns:
+        FastAPI application
+    """
+    app = FastAPI(title="Lokaler OpenAI-Ersatz")
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": MODEL_NAME, "object": "model", "owned_by": "local"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        model = body.get("model", MODEL_NAME)
+        stream = bool(body.get("stream"))
+        include_usage = stream and bool((body.get("stream_options") or {}).get("include_usage"))
+        max_tokens = body.get("max_completion_tokens") or body.get("max_tokens")
+
+        ttft, interval = simulator.timings()
+        if simulator.should_fail():
+            simulator.stats["errors"] += 1
+            # Failures are reported after a short delay, like a rejected request upstream
+            await asyncio.sleep(ttft / 4)
+            error_type, message = ERROR_TYPES[simulator.error_status]
+            return JSONResponse(status_code=simulator.error_status,
+                                content={"error": {"message": message, "type": error_type, "code": error_type}})
+
+        prompt_tokens = count_message_tokens(messages)
+        tokens, finish_reason = simulator.answer_tokens(messages, max_tokens)
+        simulator.record(prompt_tokens, len(tokens), stream)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if not stream:
+            await asyncio.sleep(ttft + interval * max(len(tokens) - 1, 0))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                             "finish_reason": finish_reason}],
+                "usage": _usage(prompt_tokens, len(tokens)),
+            }
+
+        def chunk(delta: Dict, finish: Optional[str] = None, usage: Optional[Dict] = None) -> str:
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                       "choices": [] if usage else [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            if usage:
+                payload["usage"] = usage
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def events():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            yield chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                # Absolute schedule, so sleep overhead does not accumulate over long answers
+                delay = start + ttft + i * interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield chunk({"content": token})
+            yield chunk({}, finish=finish_reason)
+            if include_usage:
+                yield chunk({}, usage=_usage(prompt_tokens, len(tokens)))
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return simulator.stats
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        simulator.reset_stats()
+        return simulator.stats
+
+    return app
+
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Serve a local OpenAI-compatible chat completions stand-in")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=8081, help="Port to listen on")
+    parser.add_argument("--ttft-ms", type=float, default=300.0, help="Time to first token in milliseconds")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="Generation speed after the first token")
+    parser.add_argument("--completion-tokens", type=int, default=200, help="Answer length, capped by max_tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with an error")
+    parser.add_argument("--error-status", type=int, default=429, choices=sorted(ERROR_TYPES), help="HTTP status of injected errors")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Relative random variation of TTFT and speed")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed")
+    args = parser.parse_args()
+
+    simulator = CompletionSimulator(ttft_ms=args.ttft_ms, tokens_per_second=args.tokens_per_second,
+                                    completion_tokens=args.completion_tokens, error_rate=args.error_rate,
+                                    error_status=args.error_status, jitter=args.jitter, seed=args.seed)
+    logger.info(f"Serving OpenAI stand-in on http://{args.host}:{args.port}/v1 "
+                f"(TTFT {args.ttft_ms} ms, {args.tokens_per_second} tokens/s, error rate {args.error_rate})")
+    uvicorn.run(create_app(simulator), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+import atexit
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import List, Dict, Optional, Any
+
+from config import LOCAL_INDEX_PATH, LOCAL_INDEX_LATENCY_MS, LOCAL_INDEX_ERROR_RATE
+from reranker import tokenize
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Dimension of the hashed local embedding
+LOCAL_EMBEDDING_DIMENSION = 512
+# Character n-grams let compound parts match ("miete" in "Mietpreisbremse")
+NGRAM_SIZE = 4
+NGRAM_WEIGHT = 0.3
+# Maximum records per upsert_records call, as in Pinecone
+MAX_UPSERT_BATCH = 96
+# The text field that is embedded, as in the index' field_map
+TEXT_FIELD = "text"
+
+
+class LocalPineconeError(Exception):
+    """Injected or request error of the local index stand-in."""
+    pass
+
+
+class LocalEmbedder:
+    """Deterministic hashing embedder for the local index.
+
+    Lemmatized terms and their character n-grams are hashed into a fixed
+    number of dimensions and the vector is L2-normalized, so cosine
+    similarity behaves like a soft term overlap. It implements
+    embed_query/embed_documents, so it can also back a PineconeVectorStore.
+    """
+
+    def __init__(self, dimension: int = LOCAL_EMBEDDING_DIMENSION):
+        self.dimension = dimension
+
+    def _bucket(self, feature: str):
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "big")
+        return value % self.dimension, 1.0 if value >> 63 else -1.0
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for term in tokenize(text):
+            index, sign = self._bucket(term)
+            vector[index] += sign
+            padded = f"#{term}#"
+            for start in range(len(padded) - NGRAM_SIZE + 1):
+                index, sign = self._bucket(padded[start:start + NGRAM_SIZE])
+                vector[index] += sign * NGRAM_WEIGHT
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def matches_filter(fields: Dict[str, Any], metadata_filter: Optional[Dict]) -> bool:
+    """Evaluate the subset of Pinecone's metadata filter language used here ($eq, $ne, $in, $nin, $and, $or)."""
+    if not metadata_filter:
+        return True
+    for key, condition in metadata_filter.items():
+        if key == "$and":
+            if not all(matches_filter(fields, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(fields, sub) for sub in condition):
+                return False
+            continue
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        value = fields.get(key)
+        for operator, operand in condition.items():
+            if operator == "$eq" and value != operand:
+                return False
+            if operator == "$ne" and value == operand:
+                return False
+            if operator == "$in" and value not in operand:
+                return False
+            if operator == "$nin" and value in operand:
+                return False
+            if operator not in ("$eq", "$ne", "$in", "$nin"):
+                raise LocalPineconeError(f"Unsupported filter operator: {operator}")
+    return True
+
+
+def search_response(hits: List[Dict]) -> SimpleNamespace:
+    """Wrap hit dicts in an object shaped like Pinecone's SearchRecordsResponse."""
+    return SimpleNamespace(result=SimpleNamespace(hits=[
+        SimpleNamespace(_id=hit["_id"], _score=hit["_score"], fields=hit["fields"]) for hit in hits
+    ]))
+
+
+class LocalIndex:
+    """In-process stand-in for a Pinecone index with integrated embedding.
+
+    Implements search_records, upsert_records, delete, describe_index_stats and
+    the vector query used by PineconeVectorStore. Latency and errors can be
+    injected per call to reproduce a slow or flaky index in benchmarks.
+    Upserts are written to the file by flush(), once per bulk load rather
+    than once per batch, and at exit.
+    """
+
+    def __init__(self, name: str = "local", path: Optional[str] = None, embedder: Optional[LocalEmbedder] = None,
+                 latency_ms: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Initialize the local index.
+
+        Args:
+            name: Index name
+            path: Optional JSON file the records are loaded from and saved to
+            embedder: Embedder for record texts and queries
+            latency_ms: Mean latency added to every call; the actual delay is
+                        drawn uniformly between half and one and a half times it
+            error_rate: Share of calls that raise LocalPineconeError
+            seed: Seed for the latency and error injection
+        """
+        self.name = name
+        self.path = path
+        self.embedder = embedder or LocalEmbedder()
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # namespace -> record id -> (fields, sparse vector as {dimension: value})
+        self._namespaces: Dict[str, Dict[str, tuple]] = {}
+        # PineconeVectorStore reads the host and API key from the index config
+        self.config = SimpleNamespace(host=f"local://{name}", api_key="")
+        self._dirty = False
+        if path and os.path.exists(path):
+            self.load(path)
+        if path:
+            atexit.register(self.flush)
+
+    def _inject(self, operation: str):
+        """Apply the configured latency and error rate to one call."""
+        with self._lock:
+            delay = self._random.uniform(0.5, 1.5) * self.latency_ms / 1000 if self.latency_ms else 0.0
+            failed = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise LocalPineconeError(f"Injected error in {operation}")
+
+    def _sparse_embedding(self, text: str) -> Dict[int, float]:
+        # Chunk vectors have only a few hundred non-zero dimensions
+        return {i: value for i, value in enumerate(self.embedder.embed_query(text)) if value}
+
+    def upsert_records(self, namespace: str, records: List[Dict]):
+        """Embed and store records; each needs an "_id" (or "id") and a "text" field."""
+        self._inject("upsert_records")
+        if len(records) > MAX_UPSERT_BATCH:
+            raise LocalPineconeError(f"At most {MAX_UPSERT_BATCH} records per upsert, got {len(records)}")
+        prepared = []
+        for record in records:
+            fields = dict(record)
+            record_id = fields.pop("_id", None) or fields.pop("id", None)
+            if not record_id or TEXT_FIELD not in fields:
+                raise LocalPineconeError(f"Record needs an _id and a {TEXT_FIELD} field")
+            prepared.append((record_id, fields, self._sparse_embedding(fields[TEXT_FIELD])))
+        with self._lock:
+            records_by_id = self._namespaces.setdefault(namespace, {})
+            for record_id, fields, vector in prepared:
+                records_by_id[record_id] = (fields, vector)
+            self._dirty = True
+
+    def delete(self, ids: List[str], namespace: str = "", **kwargs):
+        """Delete records by ID; unknown IDs are ignored, as in Pinecone."""
+        self._inject("delete")
+        with self._lock:
+            records_by_id = self._namespaces.get(namespace, {})
+            for record_id in ids:
+                if records_by_id.pop(record_id, None) is not None:
+                    self._dirty = True
+        return {}
+
+    def flush(self):
+        """Save upserted and deleted records to the index file, if there are unsaved changes."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, False
+        if self.path and dirty:
+            self.save(self.path)
+
+    def _rank(self, namespace: str, vector: List[float], top_k: int, metadata_filter: Optional[Dict]):
+        with self._lock:
+            records = list(self._namespaces.get(namespace, {}).items())
+        scored = []
+        for record_id, (fields, record_vector) in records:
+            if matches_filter(fields, metadata_filter):
+                score = sum(vector[i] * value for i, value in record_vector.items())
+                scored.append((score, record_id, fields))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored[:top_k]
+
+    def search_records(self, namespace: str, query: Dict, fields: Optional[List[str]] = None, rerank=None):
+        """
+        Search by text, as with Pinecone's integrated embedding.
+
+        Args:
+            namespace: Namespace to search
+            query: {"inputs": {"text": ...}, "top_k": ..., "filter": {...}}
+            fields: Record fields to return; all fields if omitted
+            rerank: Accepted for signature compatibility and ignored
+
+        Returns:
+            Object with result.hits, each hit having _id, _score and fields
+        """
+        self._inject("search_records")
+        text = query.get("inputs", {}).get("text", "")
+        top_k = int(query.get("top_k", 10))
+        ranked = self._rank(namespace, self.embedder.embed_query(text), top_k, query.get("filter"))
+        hits = []
+        for score, record_id, record_fields in ranked:
+            selected = record_fields if fields is None else {key: record_fields[key] for key in fields if key in record_fields}
+            hits.append({"_id": record_id, "_score": score, "fields": dict(selected)})
+        return search_response(hits)
+
+    def query(self, vector: List[float], top_k: int = 10, namespace: str = "", filter: Optional[Dict] = None,
+              include_metadata: bool = True, include_values: bool = False, **kwargs) -> Dict:
+        """Vector query in the dict format PineconeVectorStore expects."""
+        self._inject("query")
+        if len(vector) != self.embedder.dimension:
+            raise LocalPineconeError(f"Vector dimension {len(vector)} does not match {self.embedder.dimension}")
+        matches = []
+        for score, record_id, fields in self._rank(namespace, vector, top_k, filter):
+            match = {"id": record_id, "score": score}
+            if include_metadata:
+                match["metadata"] = dict(fields)
+            matches.append(match)
+        return {"matches": matches, "namespace": namespace}
+
+    def describe_index_stats(self, **kwargs) -> Dict:
+        """Record counts per namespace, in Pinecone's response format."""
+        self._inject("describe_index_stats")
+        with self._lock:
+            namespaces = {name: {"vector_count": len(records)} for name, records in self._namespaces.items()}
+        return {
+            "dimension": self.embedder.dimension,
+            "namespaces": namespaces,
+            "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values()),
+        }
+
+    def save(self, path: str):
+        """Save the records; vectors are recomputed on load since the embedder is deterministic."""
+        with self._lock:
+            data = {namespace: {record_id: fields for record_id, (fields, _) in records.items()}
+                    for namespace, records in self._namespaces.items()}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"name": self.name, "namespaces": data}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Load records saved with save()."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            self._namespaces = {
+                namespace: {record_id: (fields, self._sparse_embedding(fields.get(TEXT_FIELD, "")))
+                            for record_id, fields in records.items()}
+                for namespace, records in data.get("namespaces", {}).items()
+            }
+        logger.info(f"Loaded local index from {path} with {sum(len(r) for r in self._namespaces.values())} records")
+
+
+class _IndexList(list):
+    def names(self) -> List[str]:
+        return list(self)
+
+
+class LocalPinecone:
+    """Client stand-in exposing Index() and list_indexes() like pinecone.Pinecone."""
+
+    def __init__(self, path: Optional[str] = LOCAL_INDEX_PATH, latency_ms: float = LOCAL_INDEX_LATENCY_MS,
+                 error_rate: float = LOCAL_INDEX_ERROR_RATE, seed: Optional[int] = None):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.seed = seed
+        self._indexes: Dict[str, LocalIndex] = {}
+
+    def Index(self, name: str) -> LocalIndex:
+        if name not in self._indexes:
+            # Every index is backed by the configured file; there is only one index in this app
+            self._indexes[name] = LocalIndex(name, path=self.path, latency_ms=self.latency_ms,
+                                             error_rate=self.error_rate, seed=self.seed)
+        return self._indexes[name]
+
+    def list_indexes(self) -> _IndexList:
+        # Any index name can be opened, so report the configured one as existing
+        from config import PINECONE_INDEX_NAME
+        return _IndexList(sorted(set(self._indexes) | {PINECONE_INDEX_NAME}))
+
+
+def flush_index(index):
+    """Persist the upserts of a bulk load on local indexes; Pinecone indexes persist every upsert themselves."""
+    flush = getattr(index, "flush", None)
+    if flush is not None:
+        flush()
+
+
+def seed_from_page_index(index, page_index, namespace: str) -> int:
+    """
+    Fill a (local) index with the chunks of a PageIndex, using the same record IDs.
+
+    Args:
+        index: Index with upsert_records
+        page_index: PageIndex built by create_vectorstore.py
+        namespace: Target namespace
+
+    Returns:
+        Number of upserted records
+    """
+    records = [{"_id": record_id, **chunk} for record_id, chunk in page_index.chunks.items()]
+    for start in range(0, len(records), MAX_UPSERT_BATCH):
+        index.upsert_records(namespace, records[start:start + MAX_UPSERT_BATCH])
+    flush_index(index)
+    logger.info(f"Seeded {len(records)} records into namespace {namespace}")
+    return len(records)
+
+
+class HTTPIndex:
+    """Index client for local_pinecone_server.py, speaking the Pinecone data plane REST paths."""
+
+    def __init__(self, host: str, name: str = "local", timeout: float = 30.0):
+        import requests
+
+        self.name = name
+        self.host = host.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+        self.config = SimpleNamespace(host=self.host, api_key="")
+
+    def _post(self, path: str, payload=None, data: Optional[str] = None, content_type: str = "application/json") -> Dict:
+        response = self._session.post(f"{self.host}{path}", json=payload, data=data, timeout=self.timeout,
+                                      headers={"Content-Type": content_type})
+        if response.status_code >= 400:
+            raise LocalPineconeError(f"HTTP {response.status_code} from {path}: {response.text}")
+        return response.json() if response.content else {}
+
+    def upsert_records(self, namespace: str, records: List[Dict]):
+        # The records endpoint takes newline-delimited JSON
+        body = "\n".join(json.dumps(record, ensure_ascii=False) for record in records)
+        self._post(f"/records/namespaces/{namespace}/upsert", data=body.encode("utf-8"),
+                   content_type="application/x-ndjson")
+
+    def delete(self, ids: List[str], namespace: str = "", **kwargs):
+        return self._post("/vectors/delete", {"ids": ids, "namespace": namespace})
+
+    def flush(self):
+        # The server saves its index file on request
+        self._post("/flush")
+
+    def search_records(self, namespace: str, query: Dict, fields: Optional[List[str]] = None, rerank=None):
+        payload = {"query": query}
+        if fields is not None:
+            payload["fields"] = fields
+        data = self._post(f"/records/namespaces/{namespace}/search", payload)
+        return search_response(data.get("result", {}).get("hits", []))
+
+    def query(self, vector: List[float], top_k: int = 10, namespace: str = "", filter: Optional[Dict] = None,
+              include_metadata: bool = True, include_values: bool = False, **kwargs) -> Dict:
+        payload = {"vector": vector, "topK": top_k, "namespace": namespace, "includeMetadata": include_metadata}
+        if filter:
+            payload["filter"] = filter
+        return self._post("/query", payload)
+
+    def describe_index_stats(self, **kwargs) -> Dict:
+        data = self._post("/describe_index_stats", {})
+        namespaces = {name: {"vector_count": ns.get("vectorCount", 0)} for name, ns in data.get("namespaces", {}).items()}
+        return {
+            "dimension": data.get("dimension"),
+            "namespaces": namespaces,
+            "total_vector_count": data.get("totalVectorCount", 0),
+        }
+
+
+class HTTPPinecone:
+    """Client stand-in whose indexes all point to one local_pinecone_server.py host."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self._indexes: Dict[str, HTTPIndex] = {}
+
+    def Index(self, name: str) -> HTTPIndex:
+        if name not in self._indexes:
+            self._indexes[name] = HTTPIndex(self.host, name)
+        return self._indexes[name]
+
+    def list_indexes(self) -> _IndexList:
+        from config import PINECONE_INDEX_NAME
+        return _IndexList(sorted(set(self._indexes) | {PINECONE_INDEX_NAME}))
@@ -0,0 +1,112 @@
+import argparse
+import json
+import logging
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+import uvicorn
+
+from config import (PINECONE_INDEX_NAME, PINECONE_NAMESPACE, PAGE_INDEX_PATH, LOCAL_INDEX_PATH,
+                    LOCAL_INDEX_LATENCY_MS, LOCAL_INDEX_ERROR_RATE)
+from local_pinecone import LocalIndex, LocalPineconeError, seed_from_page_index
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def create_app(index: LocalIndex) -> FastAPI:
+    """
+    Create an HTTP server for a local index with the Pinecone data plane paths.
+
+    Index calls run in the thread pool, so injected latency of concurrent requests
+    overlaps like it would against a real index.
+
+    Args:
+        index: The local index to serve
+
+    Returns:
+        FastAPI application
+    """
+    app = FastAPI(title="Lokaler Pinecone-Ersatz")
+
+    @app.exception_handler(LocalPineconeError)
+    def handle_index_error(request: Request, exc: LocalPineconeError):
+        return JSONResponse(status_code=503, content={"error": {"code": "UNAVAILABLE", "message": str(exc)}})
+
+    @app.post("/records/namespaces/{namespace}/upsert", status_code=201)
+    async def upsert_records(namespace: str, request: Request):
+        # Newline-delimited JSON, one record per line
+        body = await request.body()
+        records = [json.loads(line) for line in body.decode("utf-8").splitlines() if line.strip()]
+        await run_in_threadpool(index.upsert_records, namespace, records)
+        return None
+
+    @app.post("/vectors/delete")
+    def delete(payload: dict):
+        return index.delete(payload.get("ids", []), namespace=payload.get("namespace", ""))
+
+    @app.post("/flush")
+    def flush():
+        # Not part of the Pinecone API: saves the upserts to the index file after a bulk load
+        index.flush()
+        return None
+
+    @app.post("/records/namespaces/{namespace}/search")
+    def search_records(namespace: str, payload: dict):
+        response = index.search_records(namespace, payload.get("query", {}), fields=payload.get("fields"))
+        hits = [{"_id": hit._id, "_score": hit._score, "fields": hit.fields} for hit in response.result.hits]
+        return {"result": {"hits": hits}, "usage": {"read_units": 1}}
+
+    @app.post("/query")
+    def query(payload: dict):
+        return index.query(payload["vector"], top_k=payload.get("topK", 10), namespace=payload.get("namespace", ""),
+                           filter=payload.get("filter"), include_metadata=payload.get("includeMetadata", True))
+
+    @app.post("/describe_index_stats")
+    def describe_index_stats(payload: dict = None):
+        stats = index.describe_index_stats()
+        return {
+            "dimension": stats["dimension"],
+            "namespaces": {name: {"vectorCount": ns["vector_count"]} for name, ns in stats["namespaces"].items()},
+            "totalVectorCount": stats["total_vector_count"],
+        }
+
+    return app
+
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Serve a local Pinecone stand-in over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=5081, help="Port to listen on")
+    parser.add_argument("--path", default=LOCAL_INDEX_PATH, help="JSON file with the index records")
+    parser.add_argument("--latency-ms", type=float, default=LOCAL_INDEX_LATENCY_MS, help="Mean injected latency per call")
+    parser.add_argument("--error-rate", type=float, default=LOCAL_INDEX_ERROR_RATE, help="Share of calls answered with HTTP 503")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for latency and error injection")
+    parser.add_argument("--seed-from-page-index", action="store_true",
+                        help=f"Load the chunks from {PAGE_INDEX_PATH} into the default namespace first")
+    args = parser.parse_args()
+
+    index = LocalIndex(PINECONE_INDEX_NAME, path=args.path, latency_ms=args.latency_ms,
+                       error_rate=args.error_rate, seed=args.seed)
+    if args.seed_from_page_index:
+        if not os.path.exists(PAGE_INDEX_PATH):
+            parser.error(f"Page index not found at {PAGE_INDEX_PATH}. Run create_vectorstore.py first.")
+        from page_index import PageIndex
+        # Seed without injected failures
+        latency_ms, error_rate = index.latency_ms, index.error_rate
+        index.latency_ms, index.error_rate = 0.0, 0.0
+        seed_from_page_index(index, PageIndex.load(PAGE_INDEX_PATH), PINECONE_NAMESPACE)
+        index.latency_ms, index.error_rate = latency_ms, error_rate
+
+    logger.info(f"Serving local index {PINECONE_INDEX_NAME} on http://{args.host}:{args.port} "
+                f"(latency {args.latency_ms} ms, error rate {args.error_rate})")
+    uvicorn.run(create_app(index), host=args.host, port=args.port)
+    index.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import bisect
+import functools
+import logging
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from config import METRICS_ENABLED, METRICS_LATENCY_BUCKETS
+from tracing import current_span
+from slow_request_log import record_stage, record_usage
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "koalitionskompass"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# All metrics in creation order, rendered by render_metrics()
+_registry: List["_Metric"] = []
+
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{str(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """Base for labelled metrics; one lock per metric keeps the hot path uncontended."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = f"{METRIC_PREFIX}_{name}"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple, object] = {}
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+            lines.extend(self._render_series(key, value) for key, value in series)
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests, tokens or cache hits."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._series.get(self._key(labels), 0.0)
+
+    def _render_series(self, key, value) -> str:
+        return f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, e.g. latencies in seconds."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = METRICS_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels) -> "Timer":
+        """Time a block or function into this histogram."""
+        return Timer(self, labels)
+
+    def snapshot(self, **labels) -> Dict[str, float]:
+        """Count and sum of one series."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return {"count": series[2], "sum": series[1]} if series else {"count": 0, "sum": 0.0}
+
+    def _render_series(self, key, series) -> str:
+        counts, total, count = series
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return "\n".join(lines)
+
+
+class Timer:
+    """Context manager and decorator that observes the elapsed wall time in seconds."""
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self._start = None
+        self.elapsed = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with type(self)(self.histogram, self.labels):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class StageTimer(Timer):
+    """Timer of a request stage that also adds the time to the slow-request record of the request."""
+
+    def __exit__(self, exc_type, exc, tb):
+        super().__exit__(exc_type, exc, tb)
+        record_stage(self.labels["stage"], self.elapsed)
+        return False
+
+
+# Stages: retrieval (incl. rewrite, reuse and rerank), search_records (one index call),
+# chain (ConversationalRetrievalChain incl. condense call), completion (one LLM call),
+# format_response (markdown with sources)
+STAGE_SECONDS = Histogram("stage_seconds", "Latency of one request stage in seconds", ["stage"])
+REQUEST_SECONDS = Histogram("request_seconds", "End-to-end latency of API requests in seconds", ["endpoint"])
+REQUESTS = Counter("requests_total", "API requests by endpoint and outcome", ["endpoint", "status"])
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by the completion API", ["kind", "mode"])
+LLM_COST = Counter("llm_cost_usd_total", "Estimated completion API cost in USD", ["mode"])
+BUDGET_DEGRADATIONS = Counter("budget_degradations_total", "Answers made cheaper because a budget was nearly used up", ["level"])
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Lookups in the FAQ store, page index and retrieval context", ["cache", "result"])
+
+
+def timed(stage: str) -> StageTimer:
+    """Time a request stage, as `with timed("completion"):` or `@timed("format_response")`."""
+    return StageTimer(STAGE_SECONDS, {"stage": stage})
+
+
+def record_token_usage(prompt_tokens: int, completion_tokens: int, mode: str = "standard", cost_usd: float = 0.0):
+    """Count the tokens and cost of one LLM call and add them to the active span and slow-request record."""
+    current_span().set_attributes(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost_usd=cost_usd)
+    LLM_TOKENS.inc(prompt_tokens or 0, kind="prompt", mode=mode)
+    LLM_TOKENS.inc(completion_tokens or 0, kind="completion", mode=mode)
+    LLM_COST.inc(cost_usd, mode=mode)
+    record_usage(prompt_tokens, completion_tokens)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Count a hit or miss of one of the answer caches and add the cache status to the active span."""
+    current_span().set_attribute(f"cache.{cache}", "hit" if hit else "miss")
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics():
+    """Clear all recorded values (for tests and benchmarks)."""
+    for metric in _registry:
+        metric.reset()
@@ -0,0 +1,184 @@
+import difflib
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from config import PAGE_INDEX_PATH
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Minimum similarity for a fuzzy section name match
+SECTION_MATCH_CUTOFF = 0.75
+
+# Global singleton instance
+_page_index_instance = None
+_page_index_missing_logged = False
+
+
+def normalize_heading(heading: str) -> str:
+    """Normalize a heading for lookups (lowercase, no punctuation, single spaces)."""
+    heading = re.sub(r"^[\d.\s]+", "", heading.lower())
+    heading = re.sub(r"[^\wäöüß&]+", " ", heading)
+    return " ".join(heading.split())
+
+
+class PageIndex:
+    """Local index from page numbers and section headings to chunk IDs.
+
+    Built at ingestion from the chunk metadata, so "Was steht auf Seite 42?"
+    or "Was steht im Kapitel Bildung?" can be served by direct lookup
+    instead of an embedding search.
+    """
+
+    def __init__(self, pages: Optional[Dict[int, List[str]]] = None,
+                 sections: Optional[Dict[str, List[str]]] = None,
+                 section_titles: Optional[Dict[str, str]] = None,
+                 chunks: Optional[Dict[str, Dict]] = None):
+        self.pages = pages or {}
+        self.sections = sections or {}
+        self.section_titles = section_titles or {}
+        self.chunks = chunks or {}
+
+    @classmethod
+    def build(cls, documents: List[Document], record_ids: List[str]) -> "PageIndex":
+        """
+        Build the index from processed chunks.
+
+        Args:
+            documents: Chunks as produced by TextProcessor.process_documents
+            record_ids: Pinecone record IDs of the chunks, in the same order
+
+        Returns:
+            A populated PageIndex
+        """
+        index = cls()
+        for record_id, doc in zip(record_ids, documents):
+            index.add_chunk(record_id, doc)
+        logger.info(f"Built page index with {len(index.pages)} pages and {len(index.sections)} sections")
+        return index
+
+    def add_chunk(self, record_id: str, document: Document):
+        """Add a single chunk to the index."""
+        metadata = document.metadata
+        try:
+            page = int(metadata.get("page", 0))
+        except (ValueError, TypeError):
+            page = 0
+
+        self.chunks[record_id] = {
+            "text": document.page_content,
+            "page": page,
+            "source": metadata.get("source", "unknown"),
+            "chapter": metadata.get("chapter", ""),
+            "section": metadata.get("section", ""),
+            "topic": metadata.get("topic", ""),
+        }
+        self.pages.setdefault(page, []).append(record_id)
+
+        # Detected page headings plus the chapter/section the chunk belongs to
+        headings = list(metadata.get("headings", []))
+        headings += [metadata[key] for key in ("chapter", "section") if metadata.get(key)]
+        for heading in headings:
+            key = normalize_heading(heading)
+            if not key:
+                continue
+            self.section_titles.setdefault(key, heading)
+            chunk_ids = self.sections.setdefault(key, [])
+            if record_id not in chunk_ids:
+                chunk_ids.append(record_id)
+
+    def get_documents(self, record_ids: List[str]) -> List[Document]:
+        """Materialize chunk IDs as Document objects."""
+        documents = []
+        for record_id in record_ids:
+            chunk = self.chunks.get(record_id)
+            if chunk is None:
+                continue
+            documents.append(Document(
+                page_content=chunk["text"],
+                metadata={"id": record_id, "page": chunk["page"], "source": chunk["source"]}
+            ))
+        return documents
+
+    def lookup_page(self, page: int) -> List[Document]:
+        """Return all chunks of a page, in document order."""
+        return self.get_documents(self.pages.get(page, []))
+
+    def find_section(self, name: str) -> Tuple[Optional[str], List[Document]]:
+        """
+        Find a section by (partial or approximate) name.
+
+        Args:
+            name: Section name as written by the user
+
+        Returns:
+            Tuple of (section title, chunks); (None, []) if nothing matches
+        """
+        key = normalize_heading(name)
+        if not key:
+            return None, []
+
+        if key in self.sections:
+            match = key
+        else:
+            # Prefer headings containing the requested name, then fuzzy matches
+            containing = [heading for heading in self.sections if key in heading]
+            if containing:
+                match = min(containing, key=len)
+            else:
+                close = difflib.get_close_matches(key, list(self.sections), n=1, cutoff=SECTION_MATCH_CUTOFF)
+                if not close:
+                    return None, []
+                match = close[0]
+
+        return self.section_titles.get(match, match), self.get_documents(self.sections[match])
+
+    def save(self, path: str = PAGE_INDEX_PATH):
+        """Write the index to a JSON file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "pages": {str(page): ids for page, ids in self.pages.items()},
+                "sections": self.sections,
+                "section_titles": self.section_titles,
+                "chunks": self.chunks,
+            }, f, ensure_ascii=False)
+        logger.info(f"Saved page index to {path}")
+
+    @classmethod
+    def load(cls, path: str = PAGE_INDEX_PATH) -> "PageIndex":
+        """Read an index written by save()."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            pages={int(page): ids for page, ids in data.get("pages", {}).items()},
+            sections=data.get("sections", {}),
+            section_titles=data.get("section_titles", {}),
+            chunks=data.get("chunks", {}),
+        )
+
+
+def get_page_index_instance() -> Optional[PageIndex]:
+    """Get or load the page index singleton; None if no index has been built yet."""
+    global _page_index_instance, _page_index_missing_logged
+
+    if _page_index_instance is None:
+        if not os.path.exists(PAGE_INDEX_PATH):
+            if not _page_index_missing_logged:
+                logger.warning(f"Page index not found at {PAGE_INDEX_PATH}. Run create_vectorstore.py to build it.")
+                _page_index_missing_logged = True
+            return None
+        try:
+            _page_index_instance = PageIndex.load(PAGE_INDEX_PATH)
+            logger.info(f"Loaded page index with {len(_page_index_instance.pages)} pages from {PAGE_INDEX_PATH}")
+        except Exception as e:
+            logger.error(f"Error loading page index: {str(e)}")
+            return None
+
+    return _page_index_instance
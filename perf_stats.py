@@ -0,0 +1,50 @@
+import math
+from typing import List, Dict, Iterable
+
+# Percentiles reported by the load test and the benchmarks
+REPORTED_PERCENTILES = (50, 95, 99)
+
+
+def percentile(values: Iterable[float], p: float) -> float:
+    """
+    Percentile with linear interpolation between the closest ranks.
+
+    Args:
+        values: Sample values
+        p: Percentile between 0 and 100
+
+    Returns:
+        The percentile, or NaN for an empty sample
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return math.nan
+    rank = (len(ordered) - 1) * p / 100
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Count, mean, min, max and the reported percentiles of a sample."""
+    if not values:
+        return {"count": 0}
+    summary = {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "min": min(values),
+        "max": max(values),
+    }
+    for p in REPORTED_PERCENTILES:
+        summary[f"p{p}"] = percentile(values, p)
+    return summary
+
+
+def format_summary(summary: Dict[str, float], unit: str = "s", scale: float = 1.0) -> str:
+    """One-line rendering of a summary, e.g. for console reports."""
+    if not summary.get("count"):
+        return "no samples"
+    parts = [f"n={summary['count']}", f"mean={summary['mean'] * scale:.3f}{unit}"]
+    parts += [f"p{p}={summary[f'p{p}'] * scale:.3f}{unit}" for p in REPORTED_PERCENTILES]
+    parts.append(f"max={summary['max'] * scale:.3f}{unit}")
+    return " ".join(parts)
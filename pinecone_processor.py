@@ -1,15 +1,17 @@
-from typing import List, Optional, Dict, Any
+from typing import TYPE_CHECKING, List, Optional, Dict, Any
 # import warnings
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_pinecone import PineconeVectorStore
 # from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.embeddings import Embeddings
-from config import PDF_PATH, PINECONE_API_KEY, PINECONE_ENVIRONMENT, PINECONE_INDEX_NAME, PINECONE_NAMESPACE
-from text_processor import TextProcessor
-from pinecone import Pinecone, PodSpec
+from config import (PDF_PATH, PINECONE_API_KEY, PINECONE_ENVIRONMENT, PINECONE_INDEX_NAME, PINECONE_NAMESPACE,
+                    PAGE_INDEX_PATH, PINECONE_BACKEND, PINECONE_HOST)
+from settings import Settings, get_settings
+# The PDF loader, spaCy splitter, Pinecone client and LangChain vector store are imported where they are
+# first used, so importing this module (and the API) stays fast; see startup_profile.py
 # import os
 import logging
-import streamlit as st
+
+if TYPE_CHECKING:
+    from langchain_pinecone import PineconeVectorStore
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -56,6 +58,16 @@ def get_pinecone_instance():
     """Get or create the Pinecone singleton instance."""
     global _pinecone_instance
     
+    if _pinecone_instance is None and PINECONE_BACKEND != "pinecone":
+        # Local stand-ins for tests and benchmarks without network access or API key
+        from local_pinecone import LocalPinecone, HTTPPinecone
+        if PINECONE_BACKEND == "local":
+            logger.info("Using the in-process local index instead of Pinecone")
+            _pinecone_instance = LocalPinecone()
+        else:
+            logger.info(f"Using the local index server at {PINECONE_HOST} instead of Pinecone")
+            _pinecone_instance = HTTPPinecone(PINECONE_HOST)
+
     if _pinecone_instance is None:
         logger.info("Initializing Pinecone instance")
         pinecone_api_key = PINECONE_API_KEY
@@ -69,6 +81,8 @@ def get_pinecone_instance():
         logger.info(f"Initializing Pinecone with environment {pinecone_environment}")
         
         try:
+            from pinecone import Pinecone
+
             # Create Pinecone instance
             _pinecone_instance = Pinecone(api_key=pinecone_api_key)
             
@@ -85,6 +99,13 @@ def get_pinecone_instance():
     
     return _pinecone_instance
 
+def get_vector_store_embeddings():
+    """Query embeddings for PineconeVectorStore: placeholders for Pinecone, the local embedder otherwise."""
+    if PINECONE_BACKEND != "pinecone":
+        from local_pinecone import LocalEmbedder
+        return LocalEmbedder()
+    return PassthroughEmbeddings()
+
 def get_vector_store_instance():
     """Get or create the vector store singleton instance.
     This now uses Pinecone's integrated embedding API."""
@@ -92,6 +113,8 @@ def get_vector_store_instance():
     
     if _vector_store_instance is None:
         try:
+            from langchain_pinecone import PineconeVectorStore
+
             logger.info("Creating vector store instance with Pinecone's integrated embedding")
             pc = get_pinecone_instance()
             
@@ -101,7 +124,7 @@ def get_vector_store_instance():
             # Create a PineconeVectorStore instance configured for integrated embedding
             _vector_store_instance = PineconeVectorStore(
                 index=index,
-                embedding=PassthroughEmbeddings(),  # Use our dummy embeddings class
+                embedding=get_vector_store_embeddings(),
                 namespace=PINECONE_NAMESPACE
             )
             
@@ -112,6 +135,25 @@ def get_vector_store_instance():
     
     return _vector_store_instance
 
+def document_to_record(record_id: str, doc) -> Dict[str, Any]:
+    """Convert a chunk into an upsert_records record with flattened metadata fields."""
+    # Create a base record with _id and text field
+    record = {
+        "_id": record_id,
+        "text": doc.page_content,  # Field that contains the text to be embedded
+    }
+    
+    # Add flattened metadata fields as top-level fields
+    # Only add fields that are of supported types
+    for key, value in doc.metadata.items():
+        if isinstance(value, (str, int, float, bool)) or (isinstance(value, list) and all(isinstance(x, str) for x in value)):
+            # Use key as is for simple types
+            record[key] = value
+        else:
+            # Convert complex types to strings
+            record[key] = str(value)
+    return record
+
 class PineconePDFProcessor:
     """Class to process PDF documents and create/load a Pinecone vector store.
     Modified to use Pinecone's integrated embedding API."""
@@ -120,6 +162,8 @@ class PineconePDFProcessor:
         """Initialize the processor."""
         logger.info("Initializing PineconePDFProcessor")
         try:
+            from text_processor import TextProcessor
+
             # Initialize Pinecone (using singleton pattern)
             self.pc = get_pinecone_instance()
             # Initialize the text processor
@@ -133,13 +177,24 @@ class PineconePDFProcessor:
         """Load and process a PDF document."""
         logger.info(f"Loading PDF from {PDF_PATH}")
         try:
+            from langchain_community.document_loaders import PyPDFLoader
+            from document_structure import extract_structure, tag_chunks
+
             # Load the PDF
             loader = PyPDFLoader(PDF_PATH)
             documents = loader.load()
             
+            # Extract the chapter/section hierarchy while the pages still have their line structure
+            for doc in documents:
+                doc.metadata['headings'] = self.text_processor.extract_headings(doc.page_content)
+            structure = extract_structure(documents, PDF_PATH)
+            
             # Use the TextProcessor to clean and split documents at sentence boundaries
             logger.info("Processing documents with TextProcessor")
-            return self.text_processor.process_documents(documents)
+            chunks = self.text_processor.process_documents(documents)
+            
+            # Tag chunks with chapter, section and topic area for filtered retrieval
+            return tag_chunks(chunks, structure)
         except Exception as e:
             logger.error(f"Error processing PDF: {str(e)}")
             raise
@@ -155,10 +210,14 @@ class PineconePDFProcessor:
             logger.error(error_msg)
             raise PineconeConnectionError(error_msg)
 
-    def create_vector_store(self, documents: List) -> PineconeVectorStore:
+    def create_vector_store(self, documents: List) -> "PineconeVectorStore":
         """Create a vector store from documents using Pinecone's integrated embedding."""
         logger.info("Creating vector store with Pinecone's integrated embedding")
         try:
+            from langchain_pinecone import PineconeVectorStore
+            from local_pinecone import flush_index
+            from page_index import PageIndex
+
             # Get the Pinecone index
             index = self.pc.Index(PINECONE_INDEX_NAME)
             
@@ -176,25 +235,7 @@ class PineconePDFProcessor:
                 # Create records for this batch
                 records = []
                 for i, doc in enumerate(batch_docs):
-                    record_id = f"doc_{start_idx + i}"
-                    
-                    # Create a base record with _id and text field
-                    record = {
-                        "_id": record_id,
-                        "text": doc.page_content,  # Field that contains the text to be embedded
-                    }
-                    
-                    # Add flattened metadata fields as top-level fields
-                    # Only add fields that are of supported types
-                    for key, value in doc.metadata.items():
-                        if isinstance(value, (str, int, float, bool)) or (isinstance(value, list) and all(isinstance(x, str) for x in value)):
-                            # Use key as is for simple types
-                            record[key] = value
-                        else:
-                            # Convert complex types to strings
-                            record[key] = str(value)
-                    
-                    records.append(record)
+                    records.append(document_to_record(f"doc_{start_idx + i}", doc))
                 
                 logger.info(f"Upserting batch {batch_idx + 1}/{total_batches} ({len(records)} records)")
                 # Use upsert_records for integrated embedding
@@ -202,13 +243,18 @@ class PineconePDFProcessor:
                     PINECONE_NAMESPACE,
                     records
                 )
+            flush_index(index)
+            
+            # Build the local page/section lookup index with the same record IDs
+            page_index = PageIndex.build(documents, [f"doc_{i}" for i in range(total_records)])
+            page_index.save(PAGE_INDEX_PATH)
             
             # Create and return the vector store interface
             # Use the correct initialization parameters for PineconeVectorStore
             # Remove the text_field parameter as it's not supported
             vector_store = PineconeVectorStore(
                 index=index,
-                embedding=PassthroughEmbeddings(),
+                embedding=get_vector_store_embeddings(),
                 namespace=PINECONE_NAMESPACE
             )
             
@@ -219,12 +265,12 @@ class PineconePDFProcessor:
             logger.error(error_msg)
             raise e
 
-    def load_vector_store(self) -> PineconeVectorStore:
+    def load_vector_store(self) -> "PineconeVectorStore":
         """Load an existing vector store."""
         logger.info("Loading existing vector store")
         return get_vector_store_instance()
 
-    def process_pdf(self) -> PineconeVectorStore:
+    def process_pdf(self) -> "PineconeVectorStore":
         """Process a PDF document and create or load a vector store."""
         try:
             documents = self.load_and_process_pdf()
@@ -254,13 +300,25 @@ def count_documents():
         logger.error(f"Error counting documents: {str(e)}")
         return 0
 
-def get_efficient_retriever_instance(top_k=3):
+def get_retrieval_namespace(simple_language=False, settings: Settings = None):
+    """Namespace to search: the pre-simplified chunks for simple mode if they are enabled."""
+    settings = settings or get_settings()
+    return settings.simple_namespace if simple_language and settings.simple_chunks else settings.pinecone_namespace
+
+def get_efficient_retriever_instance(top_k=3, query_variants=None, rerank_scorer=None,
+                                     topic_filter=None, namespace=None, settings: Settings = None):
     """
     Create an efficient retriever instance.
     This uses Pinecone's integrated embedding API for more efficient retrieval.
     
     Args:
         top_k: Number of results to return from each query
+        query_variants: Number of query variants fused with RRF (1 = single literal query)
+        rerank_scorer: Local rerank scorer name, or "none" to keep the embedding ranking
+        topic_filter: Restrict searches to the question's topic area when it is unambiguous
+        namespace: Pinecone namespace to search (see get_retrieval_namespace)
+        settings: Defaults for the arguments above and the index, RRF and cache settings
+                  (default: get_settings())
         
     Returns:
         An instance of EfficientPineconeRetriever
@@ -268,12 +326,19 @@ def get_efficient_retriever_instance(top_k=3):
     try:
         # Import here to avoid circular imports
         from efficient_retriever import EfficientPineconeRetriever
+        from reranker import get_reranker_instance
         
+        settings = settings or get_settings()
         logger.info(f"Creating efficient retriever instance with top_k={top_k}")
         retriever_instance = EfficientPineconeRetriever(
-            index_name=PINECONE_INDEX_NAME,
-            namespace=PINECONE_NAMESPACE,
-            top_k=top_k
+            index_name=settings.pinecone_index_name,
+            namespace=settings.pinecone_namespace if namespace is None else namespace,
+            top_k=top_k,
+            query_variants=settings.multi_query_variants if query_variants is None else query_variants,
+            reranker=get_reranker_instance(rerank_scorer or settings.rerank_scorer, settings),
+            rerank_overfetch=settings.rerank_overfetch,
+            topic_filter=settings.topic_filter if topic_filter is None else topic_filter,
+            settings=settings
         )
         logger.info(f"Efficient retriever instance created successfully with top_k={top_k}")
         return retriever_instance
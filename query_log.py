@@ -0,0 +1,215 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from config import (QUERY_LOG_ENABLED, QUERY_LOG_PATH, QUERY_LOG_MAX_BYTES, QUERY_LOG_QUEUE_SIZE,
+                    QUERY_LOG_MAX_QUERY_CHARS)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Entries written with one file operation
+WRITE_BATCH_SIZE = 500
+
+
+def normalize_query(query: str) -> str:
+    """Trim, collapse whitespace and truncate a query; case and punctuation are kept for a faithful replay."""
+    return " ".join(query.split())[:QUERY_LOG_MAX_QUERY_CHARS]
+
+
+def hash_session(session_id: Optional[str]) -> Optional[str]:
+    """Short pseudonym of a session ID, enough to group the requests of one session."""
+    if not session_id:
+        return None
+    return hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:12]
+
+
+class JsonlWriter:
+    """Append-only JSON lines file, written in batches by a background thread.
+
+    Callers only put the entry into a bounded queue; when it is full the entry is
+    dropped and counted instead of slowing the request down. With max_bytes the
+    file is rotated, keeping one previous file. Entries still queued at interpreter
+    exit are written before the process ends.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 0, queue_size: int = QUERY_LOG_QUEUE_SIZE,
+                 name: str = "jsonl-writer"):
+        """
+        Initialize the writer and start its thread.
+
+        Args:
+            path: JSON lines file the entries are appended to
+            max_bytes: Rotate the file at this size (0 never rotates)
+            queue_size: Entries waiting to be written before further entries are dropped
+            name: Name of the writer thread
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, entry: Dict):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Block until all submitted entries are written."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                logger.warning(f"Could not write {len(batch)} entries to {self.path}: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch: List[Dict]):
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch)
+        if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) + len(data) > self.max_bytes:
+            os.replace(self.path, self.path + ".1")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+
+
+class QueryLog(JsonlWriter):
+    """The query log: one compact entry per chat request, rotated at max_bytes."""
+
+    def __init__(self, path: str = QUERY_LOG_PATH, max_bytes: int = QUERY_LOG_MAX_BYTES,
+                 queue_size: int = QUERY_LOG_QUEUE_SIZE):
+        super().__init__(path, max_bytes=max_bytes, queue_size=queue_size, name="query-log-writer")
+
+
+# Global query log instance
+_query_log_instance = None
+_query_log_lock = threading.Lock()
+
+
+def get_query_log() -> QueryLog:
+    """Get or create the query log."""
+    global _query_log_instance
+
+    # Two writer threads appending to the same file would interleave their batches
+    with _query_log_lock:
+        if _query_log_instance is None:
+            _query_log_instance = QueryLog()
+            logger.info(f"Query log enabled, writing to {_query_log_instance.path}")
+
+    return _query_log_instance
+
+
+@contextmanager
+def log_query(source: str, query: str, simple_language: bool = False, fast_mode: bool = False,
+              use_efficient_retriever: bool = True, session_id: Optional[str] = None):
+    """
+    Time the block and add one entry for it to the query log (a no-op when the log is disabled).
+
+    Args:
+        source: Where the request came from, "api" or "streamlit"
+        query: The user question
+        simple_language: Whether simple language mode was requested
+        fast_mode: Whether fast (extractive) mode was requested
+        use_efficient_retriever: Retriever flag of the API request
+        session_id: Client session, stored only as a hash
+    """
+    if not QUERY_LOG_ENABLED:
+        yield
+        return
+
+    timestamp = time.time()
+    start = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        get_query_log().submit({
+            "ts": round(timestamp, 3),
+            "query": normalize_query(query),
+            "simple_language": simple_language,
+            "fast_mode": fast_mode,
+            "use_efficient_retriever": use_efficient_retriever,
+            "session": hash_session(session_id),
+            "source": source,
+            "latency": round(time.perf_counter() - start, 3),
+            "status": status,
+        })
+
+
+def load_jsonl(path: str) -> List[Dict]:
+    """Read a JsonlWriter file, including the rotated previous file; oldest first, unreadable lines skipped."""
+    entries = []
+    for file_path in (path + ".1", path):
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return entries
+
+
+def iter_jsonl_reversed(path: str, block_size: int = 1 << 16) -> Iterator[Dict]:
+    """
+    Entries of a JsonlWriter file and its rotated previous file, newest first.
+
+    Reads backwards in blocks, so callers that only need the latest entries stop
+    without reading the whole log.
+    """
+    for file_path in (path, path + ".1"):
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, "rb") as f:
+            position = f.seek(0, os.SEEK_END)
+            rest = b""
+            while position > 0:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                lines = (f.read(step) + rest).split(b"\n")
+                # The first piece may be the end of a line that starts in the previous block
+                rest = lines.pop(0)
+                for line in reversed(lines):
+                    entry = _parse_line(line)
+                    if entry is not None:
+                        yield entry
+            entry = _parse_line(rest)
+            if entry is not None:
+                yield entry
+
+
+def _parse_line(line: bytes) -> Optional[Dict]:
+    try:
+        return json.loads(line) if line.strip() else None
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+
+def load_query_log(path: str = QUERY_LOG_PATH) -> List[Dict]:
+    """Read the query log, including the rotated previous file, ordered by time."""
+    return sorted(load_jsonl(path), key=lambda entry: entry["ts"])
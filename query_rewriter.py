@@ -0,0 +1,218 @@
+import re
+from typing import List, Optional
+
+# Common German function words that carry no retrieval signal
+GERMAN_STOPWORDS = frozenset({
+    "aber", "alle", "allem", "allen", "aller", "alles", "also", "auch", "auf", "aus", "bei", "beim",
+    "bereits", "bitte", "bis", "dabei", "dadurch", "dafür", "damit", "dann", "darauf", "darin",
+    "darum", "darüber", "das", "dass", "davon", "dazu", "dem", "den", "denn", "der", "des", "dessen",
+    "die", "dies", "diese", "diesem", "diesen", "dieser", "dieses", "doch", "dort", "durch", "eine",
+    "einem", "einen", "einer", "eines", "etwa", "etwas", "für", "gegen", "geben", "gibt", "haben",
+    "hat", "hier", "ihre", "ihren", "ihrer", "immer", "jetzt", "kann", "keine", "können", "mehr",
+    "mich", "mir", "mit", "nach", "nicht", "noch", "nur", "oder", "ohne", "seit", "sein", "seine",
+    "sich", "sie", "sind", "soll", "sollen", "sowie", "über", "um", "und", "uns", "unter", "viel",
+    "vom", "von", "vor", "war", "was", "weil", "welche", "welchem", "welchen", "welcher", "welches",
+    "wenn", "werden", "wie", "wieder", "wird", "wo", "wurde", "zum", "zur", "zwischen",
+    "regierung", "regierungsprogramm", "programm", "plant", "planen", "geplant", "geplante",
+    "geplanten", "gilt", "steht", "stehen",
+    "genau", "genauer", "erkläre", "erklären", "einfach", "einfacher", "sprache", "wann", "warum",
+    "wieso", "weshalb", "wer", "wem", "wen", "wessen", "seite", "seiten", "seitenzahl", "quelle",
+    "details", "eigentlich", "konkret", "überhaupt",
+})
+
+_TOKEN_PATTERN = re.compile(r"[A-Za-zÄÖÜäöüß][\wÄÖÜäöüß-]*")
+
+# Phrases that mark a question as referring back to the previous turn
+FOLLOW_UP_PATTERNS = [
+    re.compile(r"^\s*(und|aber|also|oder|auch|noch)\b", re.IGNORECASE),
+    re.compile(r"\b(welche|welcher|auf welcher|die) seite\b|\bseitenzahl\b|\bquelle\b", re.IGNORECASE),
+    re.compile(r"\b(ab|seit|bis) wann\b|\bwann genau\b|\bwie lange\b", re.IGNORECASE),
+    re.compile(r"\b(das|dies|dazu|davon|darüber|damit|dafür|dabei|dort)\s*[?.!]*\s*$", re.IGNORECASE),
+    re.compile(r"\b(mehr details|genauer|erkläre|zusammenfassen|zusammenfassung)\b", re.IGNORECASE),
+]
+
+
+def extract_salient_terms(text: str, max_terms: int = 5) -> List[str]:
+    """Extract the most informative terms from a piece of text.
+
+    Capitalized words (German nouns) are preferred over other content words;
+    within each group the original order is kept.
+
+    Args:
+        text: Text to extract terms from
+        max_terms: Maximum number of terms to return
+
+    Returns:
+        List of salient terms
+    """
+    nouns = []
+    others = []
+    seen = set()
+    for token in _TOKEN_PATTERN.findall(text or ""):
+        lowered = token.lower()
+        if len(token) < 4 or lowered in GERMAN_STOPWORDS or lowered in seen:
+            continue
+        seen.add(lowered)
+        if token[0].isupper():
+            nouns.append(token)
+        else:
+            others.append(token)
+    return (nouns + others)[:max_terms]
+
+
+def is_follow_up_question(query: str) -> bool:
+    """Whether a question refers back to the previous turn.
+
+    True if it uses a follow-up phrase ("Und ...", "ab wann", "... dazu?") or
+    has no salient terms of its own ("Ab 2027?").
+    """
+    return any(pattern.search(query) for pattern in FOLLOW_UP_PATTERNS) or not extract_salient_terms(query)
+
+
+def rewrite_query(query: str, previous_query: Optional[str], max_terms: int = 5) -> str:
+    """Rewrite a follow-up question into a standalone retrieval query without an LLM call.
+
+    Salient terms of the previous user turn that are not already part of the
+    follow-up are appended, so "Und ab wann gilt das?" after a question about
+    the Mietpreisbremse retrieves Mietpreisbremse chunks. Self-contained questions
+    (see is_follow_up_question) are left alone, so a change of topic does not
+    search with the old topic mixed in.
+
+    Args:
+        query: The current user question
+        previous_query: The previous user question, if any
+        max_terms: Maximum number of terms to carry over
+
+    Returns:
+        The rewritten query (unchanged if there is nothing to carry over)
+    """
+    if not previous_query or not is_follow_up_question(query):
+        return query
+
+    query_lower = query.lower()
+    carried_terms = [
+        term for term in extract_salient_terms(previous_query, max_terms=max_terms * 2)
+        if term.lower() not in query_lower
+    ][:max_terms]
+
+    if not carried_terms:
+        return query
+    return f"{query} {' '.join(carried_terms)}"
+
+
+# Small local synonym table for terms that are phrased differently in the
+# Regierungsprogramm than in typical user questions
+GERMAN_SYNONYMS = {
+    "teuerung": ["Inflation", "Preissteigerung"],
+    "inflation": ["Teuerung", "Preissteigerung"],
+    "miete": ["Mietpreise", "Wohnkosten"],
+    "mieten": ["Mietpreise", "Wohnkosten"],
+    "wohnen": ["Wohnbau", "Mieten"],
+    "steuern": ["Abgaben", "Steuerreform"],
+    "steuer": ["Abgabe", "Steuerreform"],
+    "pension": ["Rente", "Alterssicherung"],
+    "pensionen": ["Renten", "Alterssicherung"],
+    "rente": ["Pension", "Alterssicherung"],
+    "pflege": ["Pflegevorsorge", "Betreuung"],
+    "angehörige": ["Familienangehörige", "Verwandte"],
+    "gesundheit": ["Gesundheitsversorgung", "Gesundheitssystem"],
+    "arzt": ["Ärztinnen und Ärzte", "Gesundheitsversorgung"],
+    "schule": ["Bildung", "Schulen"],
+    "schulen": ["Bildung", "Schule"],
+    "bildung": ["Schule", "Ausbildung"],
+    "kinderbetreuung": ["Kindergarten", "Elementarpädagogik"],
+    "kindergarten": ["Kinderbetreuung", "Elementarpädagogik"],
+    "migration": ["Zuwanderung", "Asyl"],
+    "asyl": ["Asylwesen", "Migration"],
+    "zuwanderung": ["Migration", "Einwanderung"],
+    "integration": ["Integrationsmaßnahmen", "Deutschkurse"],
+    "klima": ["Klimaschutz", "Umwelt"],
+    "klimaschutz": ["Klima", "Emissionen"],
+    "umwelt": ["Umweltschutz", "Klima"],
+    "energie": ["Strom", "Energieversorgung"],
+    "strom": ["Energie", "Stromversorgung"],
+    "arbeitslosigkeit": ["Arbeitsmarkt", "Arbeitslose"],
+    "arbeitsmarkt": ["Beschäftigung", "Arbeitslosigkeit"],
+    "wirtschaft": ["Wirtschaftsstandort", "Unternehmen"],
+    "unternehmen": ["Betriebe", "Wirtschaft"],
+    "digitalisierung": ["Digitales", "E-Government"],
+    "sicherheit": ["Polizei", "innere Sicherheit"],
+    "polizei": ["Exekutive", "Sicherheit"],
+    "justiz": ["Rechtsstaat", "Gerichte"],
+    "verkehr": ["Mobilität", "öffentlicher Verkehr"],
+    "öffis": ["öffentlicher Verkehr", "Mobilität"],
+    "bundesheer": ["Landesverteidigung", "Verteidigung"],
+    "eu": ["Europäische Union", "Europa"],
+    "frauen": ["Gleichstellung", "Frauenpolitik"],
+    "familie": ["Familien", "Familienleistungen"],
+    "landwirtschaft": ["Bauern", "Agrarpolitik"],
+}
+
+# Inflected forms mapped to the base form used in the synonym table
+GERMAN_LEMMAS = {
+    "teuerungen": "teuerung",
+    "mietpreise": "miete",
+    "mietpreisen": "miete",
+    "steuerlichen": "steuern",
+    "steuerliche": "steuern",
+    "pensionisten": "pension",
+    "pflegekräfte": "pflege",
+    "pflegenden": "pflege",
+    "schülerinnen": "schule",
+    "schüler": "schule",
+    "migranten": "migration",
+    "asylwerber": "asyl",
+    "klimaschutzes": "klimaschutz",
+    "energiepreise": "energie",
+    "strompreise": "strom",
+    "arbeitslose": "arbeitslosigkeit",
+    "familien": "familie",
+    "bauern": "landwirtschaft",
+}
+
+
+def lemmatize_term(term: str) -> str:
+    """Map a term to its lowercase base form using the local lemma table."""
+    lowered = term.lower()
+    return GERMAN_LEMMAS.get(lowered, lowered)
+
+
+def generate_query_variants(query: str, max_variants: int = 3) -> List[str]:
+    """Generate retrieval query variants from the local synonym/lemma table.
+
+    The original query always comes first. Further variants replace known
+    terms with their synonyms; the last variant is a compact keyword query.
+
+    Args:
+        query: The user query
+        max_variants: Maximum number of variants, including the original query
+
+    Returns:
+        List of distinct query variants
+    """
+    variants = [query]
+    if max_variants <= 1:
+        return variants
+
+    tokens = _TOKEN_PATTERN.findall(query)
+    replaceable = [(token, GERMAN_SYNONYMS[lemmatize_term(token)])
+                   for token in tokens if lemmatize_term(token) in GERMAN_SYNONYMS]
+
+    # One variant per synonym position: replace every known term with its n-th synonym
+    synonym_positions = max((len(synonyms) for _, synonyms in replaceable), default=0)
+    for position in range(synonym_positions):
+        variant = query
+        for token, synonyms in replaceable:
+            if position < len(synonyms):
+                variant = re.sub(rf"\b{re.escape(token)}\b", synonyms[position], variant)
+        if variant not in variants:
+            variants.append(variant)
+
+    # Compact keyword variant: salient terms plus the first synonym of each known term
+    keywords = extract_salient_terms(query, max_terms=6)
+    keywords += [synonyms[0] for _, synonyms in replaceable if synonyms[0] not in keywords]
+    keyword_variant = " ".join(keywords)
+    if keyword_variant and keyword_variant not in variants:
+        variants.append(keyword_variant)
+
+    return variants[:max_variants]
@@ -0,0 +1,99 @@
+import re
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from page_index import get_page_index_instance
+
+# "Seite 42", "S. 42", "auf Seite 42"
+PAGE_PATTERN = re.compile(r"\b(?:seite|s\.)\s*(\d{1,3})\b", re.IGNORECASE)
+
+# "Kapitel Bildung", "im Abschnitt „Wohnen & Infrastruktur“"
+SECTION_PATTERN = re.compile(
+    r"\b(?:kapitel|abschnitt)\s+(?:über\s+|zu\s+|zum\s+|zur\s+|zu den\s+)?[\"„“']?([^\"“”'?!.]+)",
+    re.IGNORECASE
+)
+
+# Phrasings asking for the content of a page or section rather than a specific fact
+CONTENT_REQUEST_PATTERN = re.compile(
+    r"\b(was steht|was findet|was gibt es|zeig|zeige|inhalt|worum geht|was enthält|fasse|zusammenfassung)\b",
+    re.IGNORECASE
+)
+
+# Questions up to this length that mention a page are routed even without a content phrasing
+SHORT_QUERY_WORDS = 5
+
+
+def route_query(query: str) -> Optional[Tuple[str, object]]:
+    """
+    Decide whether a query can be served by direct page or section lookup.
+
+    Args:
+        query: The user question
+
+    Returns:
+        ("page", page_number), ("section", section_name) or None for regular retrieval
+    """
+    is_content_request = bool(CONTENT_REQUEST_PATTERN.search(query)) or len(query.split()) <= SHORT_QUERY_WORDS
+
+    page_match = PAGE_PATTERN.search(query)
+    if page_match and is_content_request:
+        return "page", int(page_match.group(1))
+
+    section_match = SECTION_PATTERN.search(query)
+    if section_match and is_content_request:
+        section_name = section_match.group(1).strip()
+        if section_name:
+            return "section", section_name
+
+    return None
+
+
+def lookup_route(route: Tuple[str, object], page_index) -> Optional[Tuple[str, List[Document]]]:
+    """
+    Serve a routed query from the page index.
+
+    Args:
+        route: Result of route_query
+        page_index: PageIndex instance
+
+    Returns:
+        Tuple of (introductory answer text, chunks), or None if the page or section has no chunks,
+        so the caller falls back to regular retrieval (e.g. "Kapitel Bildung" is not a heading
+        but the topic is still covered)
+    """
+    kind, value = route
+    if kind == "page":
+        documents = page_index.lookup_page(value)
+        if not documents:
+            return None
+        return f"Auf Seite {value} des Regierungsprogramms 2025-2029 stehen folgende Inhalte:", documents
+
+    title, documents = page_index.find_section(value)
+    if not documents:
+        return None
+    pages = sorted({doc.metadata["page"] for doc in documents})
+    page_list = ", ".join(str(page) for page in pages)
+    return f"Der Abschnitt „{title}“ steht auf Seite {page_list}. Er enthält folgende Inhalte:", documents
+
+
+def direct_lookup(query: str) -> Optional[Tuple[str, List[Document]]]:
+    """
+    Serve a page or section question from the local page index, if possible.
+
+    Args:
+        query: The user question
+
+    Returns:
+        Tuple of (introductory answer text, chunks), or None if the query needs regular retrieval
+        (no page or section question, or nothing found for it)
+    """
+    route = route_query(query)
+    if route is None:
+        return None
+
+    page_index = get_page_index_instance()
+    if page_index is None:
+        return None
+
+    return lookup_route(route, page_index)
@@ -0,0 +1,205 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from config import QUERY_LOG_PATH
+from faq_store import normalize_question
+from load_test import LoadTester, DEFAULT_BASE_URL, DEFAULT_CHAT_PATH, build_report
+from perf_stats import summarize, format_summary
+from query_log import load_query_log
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+METRICS_PATH = "/metrics"
+# One line of the cache lookup counter in the Prometheus text format
+CACHE_LINE_PATTERN = re.compile(r'_cache_lookups_total\{cache="([^"]+)",result="(hit|miss)"\} ([0-9.e+-]+)')
+
+
+def build_schedule(entries: List[Dict], speed: float = 1.0, max_gap: Optional[float] = None) -> List[float]:
+    """
+    Send offsets in seconds that reproduce the recorded arrivals.
+
+    Args:
+        entries: Query log entries ordered by time
+        speed: Rate multiplier; 2.0 replays twice as fast as recorded
+        max_gap: Idle periods longer than this many recorded seconds are shortened to it (e.g. nights)
+
+    Returns:
+        One offset per entry, relative to the start of the replay
+    """
+    offsets = []
+    elapsed = 0.0
+    for previous, entry in zip([None] + entries[:-1], entries):
+        if previous is not None:
+            gap = entry["ts"] - previous["ts"]
+            elapsed += min(gap, max_gap) if max_gap is not None else gap
+        offsets.append(elapsed / speed)
+    return offsets
+
+
+def payload_for(entry: Dict) -> Dict:
+    """API request body of a logged query."""
+    return {
+        "query": entry["query"],
+        "simple_language": entry.get("simple_language", False),
+        "fast_mode": entry.get("fast_mode", False),
+        "use_efficient_retriever": entry.get("use_efficient_retriever", True),
+        "session_id": entry.get("session"),
+    }
+
+
+def traffic_profile(entries: List[Dict]) -> Dict:
+    """Shape of the recorded traffic: rates, mode shares, sessions and how often questions repeat."""
+    if not entries:
+        return {"requests": 0}
+    duration = entries[-1]["ts"] - entries[0]["ts"]
+    per_minute = {}
+    seen = set()
+    repeats = 0
+    for entry in entries:
+        minute = int(entry["ts"] // 60)
+        per_minute[minute] = per_minute.get(minute, 0) + 1
+        key = normalize_question(entry["query"])
+        repeats += key in seen
+        seen.add(key)
+    return {
+        "requests": len(entries),
+        "duration_seconds": duration,
+        "mean_rps": len(entries) / duration if duration > 0 else 0.0,
+        "peak_rpm": max(per_minute.values()),
+        "distinct_queries": len(seen),
+        "repeat_share": repeats / len(entries),
+        "simple_share": sum(bool(entry.get("simple_language")) for entry in entries) / len(entries),
+        "fast_share": sum(bool(entry.get("fast_mode")) for entry in entries) / len(entries),
+        "sessions": len({entry["session"] for entry in entries if entry.get("session")}),
+        "recorded_latency": summarize([entry["latency"] for entry in entries if entry.get("status") == "ok"]),
+    }
+
+
+async def fetch_cache_counts(client: httpx.AsyncClient) -> Dict[Tuple[str, str], float]:
+    """Cache hit and miss counters from the deployment's /metrics endpoint (empty if unavailable)."""
+    try:
+        response = await client.get(METRICS_PATH)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning(f"Could not read cache metrics: {str(e)}")
+        return {}
+    return {(cache, result): float(value) for cache, result, value in CACHE_LINE_PATTERN.findall(response.text)}
+
+
+def cache_hit_rates(before: Dict[Tuple[str, str], float], after: Dict[Tuple[str, str], float]) -> Dict[str, Dict]:
+    """Hits, misses and hit rate per cache during the replay."""
+    rates = {}
+    for cache in sorted({cache for cache, _ in after}):
+        hits = after.get((cache, "hit"), 0.0) - before.get((cache, "hit"), 0.0)
+        misses = after.get((cache, "miss"), 0.0) - before.get((cache, "miss"), 0.0)
+        if hits + misses > 0:
+            rates[cache] = {"hits": int(hits), "misses": int(misses), "hit_rate": hits / (hits + misses)}
+    return rates
+
+
+async def replay(tester: LoadTester, entries: List[Dict], schedule: List[float],
+                 max_in_flight: int = 100) -> Tuple[List[Dict], float, Dict[str, Dict]]:
+    """
+    Send the logged queries at their scheduled offsets, regardless of how fast they complete.
+
+    Args:
+        tester: Load tester pointing at the deployment
+        entries: Query log entries
+        schedule: Send offsets from build_schedule()
+        max_in_flight: Connection pool size
+
+    Returns:
+        Tuple of (results, wall time in seconds, cache hit rates)
+    """
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    async with httpx.AsyncClient(base_url=tester.base_url, timeout=tester.timeout, limits=limits,
+                                 transport=tester.transport) as client:
+        before = await fetch_cache_counts(client)
+        tasks = []
+        start = time.perf_counter()
+        for entry, offset in zip(entries, schedule):
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(tester.send(client, payload_for(entry))))
+        results = await asyncio.gather(*tasks)
+        wall_time = time.perf_counter() - start
+        after = await fetch_cache_counts(client)
+    return list(results), wall_time, cache_hit_rates(before, after)
+
+
+def print_profile(profile: Dict):
+    print("\n=== Recorded traffic ===")
+    print(f"Requests: {profile['requests']} over {profile['duration_seconds']:.0f} s "
+          f"(mean {profile['mean_rps']:.2f} req/s, peak {profile['peak_rpm']} req/min)")
+    print(f"Distinct queries: {profile['distinct_queries']}, repeated: {profile['repeat_share']:.1%}, "
+          f"sessions: {profile['sessions']}")
+    print(f"Simple language: {profile['simple_share']:.1%}, fast mode: {profile['fast_share']:.1%}")
+    print(f"Recorded latency: {format_summary(profile['recorded_latency'])}")
+
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Replay the recorded query log against a deployment")
+    parser.add_argument("--log", default=QUERY_LOG_PATH, help="Query log (JSON lines)")
+    parser.add_argument("--url", default=DEFAULT_BASE_URL, help="API base URL")
+    parser.add_argument("--path", default=DEFAULT_CHAT_PATH, help="Chat endpoint path")
+    parser.add_argument("--speed", type=float, default=1.0, help="Rate multiplier (2 = twice the recorded rate)")
+    parser.add_argument("--max-gap", type=float, default=None, help="Shorten recorded idle periods to this many seconds")
+    parser.add_argument("--since", default=None, help="Only queries from this date on (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N queries")
+    parser.add_argument("--max-in-flight", type=int, default=100, help="Connection pool size")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Request timeout in seconds")
+    parser.add_argument("--profile-only", action="store_true", help="Only describe the recorded traffic")
+    parser.add_argument("--output", default=None, help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    entries = load_query_log(args.log)
+    if args.since:
+        since = datetime.fromisoformat(args.since).timestamp()
+        entries = [entry for entry in entries if entry["ts"] >= since]
+    entries = entries[:args.limit] if args.limit else entries
+    if not entries:
+        print(f"No queries found in {args.log}")
+        return
+
+    profile = traffic_profile(entries)
+    print_profile(profile)
+    if args.profile_only:
+        return
+
+    schedule = build_schedule(entries, args.speed, args.max_gap)
+    logger.info(f"Replaying {len(entries)} queries over {schedule[-1]:.0f} s at {args.speed}x")
+    tester = LoadTester(args.url, args.path, queries=[(entry["query"], 1.0) for entry in entries], timeout=args.timeout)
+    results, wall_time, cache_rates = asyncio.run(replay(tester, entries, schedule, args.max_in_flight))
+    report = build_report(results, wall_time, "replay", args.speed)
+
+    print(f"\n=== Replay at {args.speed}x ===")
+    print(f"Requests: {report['requests']}, errors: {report['errors']} ({report['error_rate']:.1%}), "
+          f"degraded answers: {report['degraded']}")
+    print(f"Throughput: {report['throughput_rps']:.2f} req/s")
+    print(f"Latency: {format_summary(report['latency'])}")
+    for cache, rate in cache_rates.items():
+        print(f"Cache {cache}: {rate['hit_rate']:.1%} hits ({rate['hits']} hits, {rate['misses']} misses)")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "profile": profile, "replay": report, "cache_hit_rates": cache_rates},
+                      f, ensure_ascii=False, indent=2)
+        logger.info(f"Wrote report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
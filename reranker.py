@@ -0,0 +1,206 @@
+import logging
+import math
+import re
+import time
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
+
+from query_rewriter import GERMAN_STOPWORDS, lemmatize_term
+from settings import Settings, get_settings
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"[\wÄÖÜäöüß]+")
+
+# Minimum length for a query term to also match inside German compounds
+# (e.g. "miete" in "Mietpreisbremse")
+COMPOUND_MATCH_MIN_LENGTH = 5
+
+# Pairs per cross-encoder call when the reranker does not set a batch size
+CROSS_ENCODER_DEFAULT_BATCH_SIZE = 32
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, lemmatize and drop stopwords and very short tokens."""
+    return [
+        lemmatize_term(token) for token in _WORD_PATTERN.findall(text.lower())
+        if len(token) >= 3 and token not in GERMAN_STOPWORDS
+    ]
+
+
+class LexicalScorer:
+    """Scores chunks by how many distinct query terms they cover.
+
+    Query terms also match inside compounds, which matters for German
+    ("Pflege" in "Pflegegeld"). Term frequency adds a small density bonus.
+    """
+
+    name = "lexical"
+
+    def score(self, query: str, texts: List[str], batch_size: Optional[int] = None) -> List[float]:
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return [0.0] * len(texts)
+
+        scores = []
+        for text in texts:
+            token_counts = Counter(tokenize(text))
+            matched_terms = 0
+            total_matches = 0
+            for term in query_terms:
+                matches = token_counts.get(term, 0)
+                if not matches and len(term) >= COMPOUND_MATCH_MIN_LENGTH:
+                    matches = sum(count for token, count in token_counts.items() if term in token)
+                if matches:
+                    matched_terms += 1
+                    total_matches += matches
+            coverage = matched_terms / len(query_terms)
+            scores.append(coverage + 0.1 * math.log1p(total_matches))
+        return scores
+
+
+class BM25Scorer:
+    """Okapi BM25 with document statistics taken from the candidate set."""
+
+    name = "bm25"
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def score(self, query: str, texts: List[str], batch_size: Optional[int] = None) -> List[float]:
+        query_terms = tokenize(query)
+        tokenized_texts = [tokenize(text) for text in texts]
+        if not query_terms or not tokenized_texts:
+            return [0.0] * len(texts)
+
+        num_docs = len(tokenized_texts)
+        avg_length = sum(len(tokens) for tokens in tokenized_texts) / num_docs or 1.0
+        document_frequency = Counter()
+        for tokens in tokenized_texts:
+            document_frequency.update(set(tokens))
+
+        scores = []
+        for tokens in tokenized_texts:
+            term_counts = Counter(tokens)
+            length_norm = self.k1 * (1 - self.b + self.b * len(tokens) / avg_length)
+            score = 0.0
+            for term in query_terms:
+                frequency = term_counts.get(term, 0)
+                if not frequency:
+                    continue
+                df = document_frequency[term]
+                idf = math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+                score += idf * frequency * (self.k1 + 1) / (frequency + length_norm)
+            scores.append(score)
+        return scores
+
+
+class CrossEncoderScorer:
+    """Scores (query, chunk) pairs with a small cross-encoder loaded from local weights.
+
+    Requires the optional sentence-transformers package; the model is read from
+    disk only, so no network access happens at request time.
+    """
+
+    name = "cross_encoder"
+
+    def __init__(self, model_path: str):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ValueError(
+                "The cross_encoder rerank scorer requires the sentence-transformers package. "
+                "Install it with 'pip install sentence-transformers' or choose the lexical or bm25 scorer."
+            )
+
+        logger.info(f"Loading cross-encoder from {model_path}")
+        self.model = CrossEncoder(model_path, device="cpu", local_files_only=True)
+
+    def score(self, query: str, texts: List[str], batch_size: Optional[int] = None) -> List[float]:
+        if not texts:
+            return []
+        pairs = [(query, text) for text in texts]
+        batch_size = batch_size or CROSS_ENCODER_DEFAULT_BATCH_SIZE
+        return [float(score) for score in self.model.predict(pairs, batch_size=batch_size)]
+
+
+SCORERS = {
+    LexicalScorer.name: LexicalScorer,
+    BM25Scorer.name: BM25Scorer,
+    CrossEncoderScorer.name: CrossEncoderScorer,
+}
+
+
+class Reranker:
+    """Reorders retrieved documents with a local scorer and keeps the best few."""
+
+    def __init__(self, scorer, batch_size: Optional[int] = None):
+        """
+        Initialize the reranker.
+
+        Args:
+            scorer: Scorer instance with a score(query, texts, batch_size) method
+            batch_size: Number of (query, chunk) pairs scored per model call, None for the scorer default
+        """
+        self.scorer = scorer
+        self.batch_size = batch_size
+
+    def rerank(self, query: str, documents: List, top_n: int) -> List:
+        """
+        Rerank documents for a query.
+
+        Args:
+            query: Query text
+            documents: Candidate Document objects
+            top_n: Number of documents to keep
+
+        Returns:
+            The top_n documents, best first, with "rerank_score" added to the metadata
+        """
+        if not documents:
+            return []
+
+        scores = self.scorer.score(query, [doc.page_content for doc in documents], batch_size=self.batch_size)
+
+        # Sort by score; ties keep the embedding order from the first stage
+        ranked = sorted(range(len(documents)), key=lambda i: (-scores[i], i))
+        reranked = []
+        for i in ranked[:top_n]:
+            documents[i].metadata["rerank_score"] = scores[i]
+            reranked.append(documents[i])
+        return reranked
+
+
+# Rerankers are cached per scorer and its settings since loading a cross-encoder is expensive
+_reranker_instances: Dict[Tuple[str, int, Optional[str]], Reranker] = {}
+
+def get_reranker_instance(scorer_name: str, settings: Settings = None) -> Optional[Reranker]:
+    """
+    Get or create the reranker for a scorer name.
+
+    Args:
+        scorer_name: One of SCORERS, or "none" to disable reranking
+        settings: Settings providing the batch size and cross-encoder path, defaults to get_settings()
+
+    Returns:
+        A Reranker instance, or None if reranking is disabled
+    """
+    if not scorer_name or scorer_name == "none":
+        return None
+
+    if scorer_name not in SCORERS:
+        raise ValueError(f"Unknown rerank scorer: {scorer_name}. Expected one of {sorted(SCORERS)} or 'none'")
+
+    settings = settings or get_settings()
+    model_path = settings.cross_encoder_model_path if scorer_name == CrossEncoderScorer.name else None
+    key = (scorer_name, settings.rerank_batch_size, model_path)
+    if key not in _reranker_instances:
+        start_time = time.perf_counter()
+        scorer = CrossEncoderScorer(model_path) if model_path else SCORERS[scorer_name]()
+        _reranker_instances[key] = Reranker(scorer, batch_size=settings.rerank_batch_size)
+        logger.info(f"Created {scorer_name} reranker in {time.perf_counter() - start_time:.3f} seconds")
+
+    return _reranker_instances[key]
@@ -0,0 +1,173 @@
+import logging
+from typing import Callable, List, Optional
+
+from metrics import record_cache_lookup
+from query_rewriter import extract_salient_terms, is_follow_up_question, rewrite_query
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Follow-ups longer than this are only reused when they add no new terms
+SHORT_FOLLOW_UP_WORDS = 7
+
+# Chunk metadata naming the part of the programme a chunk belongs to
+TOPIC_METADATA_KEYS = ("topic", "chapter", "section")
+
+
+def page_number(document) -> Optional[int]:
+    """The page of a chunk as a number, or None for missing or placeholder values such as "N/A"."""
+    page = document.metadata.get("page")
+    if isinstance(page, bool):
+        return None
+    if isinstance(page, int):
+        return page
+    if isinstance(page, str) and page.strip().isdigit():
+        return int(page)
+    return None
+
+
+def shares_topic(document, documents: List) -> bool:
+    """
+    Whether a chunk belongs to the same part of the programme as any of the given chunks.
+
+    Chunks match on the same chunk (see efficient_retriever.document_key), the same topic area,
+    chapter or section, or a page at most one apart. Chunks without a page number or topic metadata
+    cannot be compared and count as matching.
+    """
+    from efficient_retriever import document_key
+
+    metadata = document.metadata
+    page = page_number(document)
+    if page is None and not any(metadata.get(key) for key in TOPIC_METADATA_KEYS):
+        return True
+    key = document_key(document)
+    for other in documents:
+        if key == document_key(other):
+            return True
+        if any(metadata.get(key) and metadata.get(key) == other.metadata.get(key) for key in TOPIC_METADATA_KEYS):
+            return True
+        other_page = page_number(other)
+        if page is not None and other_page is not None and abs(page - other_page) <= 1:
+            return True
+    return False
+
+
+class RetrievalContext:
+    """Per-conversation retrieval state that keeps the chunks of the last turn.
+
+    Follow-up questions such as "Und ab wann gilt das?" or "Welche Seite?" are
+    usually answered by the chunks already retrieved for the previous turn.
+    A cheap local classifier decides whether they can be reused; follow-ups
+    that introduce a few new terms are topped up with a small delta search.
+    Chunks are only reused for the namespace and top_k they were retrieved with.
+    """
+
+    def __init__(self, delta_top_k: int = 1, max_new_terms: int = 1):
+        """
+        Initialize the retrieval context.
+
+        Args:
+            delta_top_k: Number of chunks a delta search may add to the reused ones
+            max_new_terms: Maximum number of new salient terms a follow-up may
+                           introduce before a full retrieval is done instead
+        """
+        self.delta_top_k = delta_top_k
+        self.max_new_terms = max_new_terms
+        # Query of the last full retrieval (carrying the terms of topped-up follow-ups) and its chunks
+        self.last_query: Optional[str] = None
+        self.documents: List = []
+        # Namespace and top_k the chunks were retrieved with (top_k defaults to their number)
+        self.namespace: Optional[str] = None
+        self.top_k: int = 0
+        self.reuse_count = 0
+
+    def new_terms(self, query: str) -> List[str]:
+        """Salient terms of the query that do not occur in the cached chunks."""
+        context_text = " ".join(doc.page_content for doc in self.documents).lower()
+        return [term for term in extract_salient_terms(query, max_terms=10) if term.lower() not in context_text]
+
+    def is_follow_up(self, query: str) -> bool:
+        """Decide whether a query can be answered from the previous turn's chunks."""
+        if not self.documents or not self.last_query:
+            return False
+        if query.strip().lower() == self.last_query.strip().lower():
+            return True
+
+        if not is_follow_up_question(query):
+            return False
+
+        new_terms = self.new_terms(query)
+        if len(new_terms) > self.max_new_terms:
+            return False
+        return len(query.split()) <= SHORT_FOLLOW_UP_WORDS or not new_terms
+
+    def retrieve(self, query: str, search: Callable[[str], List],
+                 delta_search: Optional[Callable[[str], List]] = None,
+                 search_query: Optional[str] = None, namespace: Optional[str] = None,
+                 top_k: Optional[int] = None) -> List:
+        """
+        Retrieve chunks for a query, reusing the previous turn's chunks where possible.
+
+        Args:
+            query: The user question
+            search: Full retrieval, called with the search query
+            delta_search: Optional small retrieval used to top up reused chunks
+            search_query: Query used for a full retrieval (defaults to the question)
+            namespace: Namespace searched in this turn; chunks of another namespace are not reused
+            top_k: Number of chunks for this turn; a changed top_k (e.g. reduced by the budget) is searched in full
+
+        Returns:
+            List of Document objects
+        """
+        reuse = self.is_follow_up(query)
+        if reuse and (namespace != self.namespace or (top_k is not None and top_k != self.top_k)):
+            logger.info(f"Follow-up '{query}' uses namespace {namespace} with top_k={top_k} instead of "
+                        f"{self.namespace} with top_k={self.top_k}, doing a full retrieval")
+            reuse = False
+        if reuse:
+            documents = list(self.documents)
+            new_terms = self.new_terms(query)
+            if new_terms and delta_search is not None:
+                delta_query = rewrite_query(query, self.last_query)
+                found = delta_search(delta_query)[:self.delta_top_k]
+                if found and not any(shares_topic(doc, documents) for doc in found):
+                    # "Und für Studenten?" after a question on rents may point elsewhere in the programme;
+                    # a few delta chunks next to the stale ones would not cover the new topic
+                    logger.info(f"Follow-up '{query}' switches topic, doing a full retrieval")
+                    reuse = False
+                else:
+                    from efficient_retriever import document_key
+
+                    known_keys = {document_key(doc) for doc in documents}
+                    delta_documents = [doc for doc in found if document_key(doc) not in known_keys]
+                    logger.info(f"Topping up follow-up with {len(delta_documents)} chunks for new terms {new_terms}")
+                    # New chunks replace the lowest-ranked reused ones, so the prompt does not grow with every follow-up
+                    keep = max(self.top_k + self.delta_top_k - len(delta_documents), 0)
+                    documents = documents[:keep] + delta_documents
+                    self.documents = list(documents)
+                    self.last_query = delta_query
+
+        record_cache_lookup("retrieval_context", reuse)
+        if reuse:
+            self.reuse_count += 1
+            logger.info(f"Reusing chunks from previous turn for follow-up: '{query}'")
+            return documents
+
+        documents = search(search_query or query)
+        self.remember(query, documents, namespace=namespace, top_k=top_k)
+        return documents
+
+    def remember(self, query: str, documents: List, namespace: Optional[str] = None, top_k: Optional[int] = None):
+        """Store chunks obtained outside of retrieve(), e.g. from a direct page lookup."""
+        self.last_query = query
+        self.documents = list(documents)
+        self.namespace = namespace
+        self.top_k = len(self.documents) if top_k is None else top_k
+
+    def clear(self):
+        """Forget the cached chunks."""
+        self.last_query = None
+        self.documents = []
+        self.namespace = None
+        self.top_k = 0
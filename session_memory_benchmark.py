@@ -0,0 +1,157 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from chat_resources import ChatResources
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY = "Was plant die Regierung bei den Mieten?"
+MODES = ("shared", "isolated")
+
+
+def create_session(mode: str, resources: ChatResources, vector_store):
+    """
+    The chatbots one browser session holds in the Streamlit app.
+
+    Args:
+        mode: "shared" to use the process-wide resources (as app.py does), "isolated" to give
+              the session its own retrievers, LLM clients and prompts
+        resources: The process-wide resources
+        vector_store: Vector store passed to ChatBot
+
+    Returns:
+        Tuple (chatbot, simple_chatbot)
+    """
+    from chatbot import ChatBot
+    from simple_chatbot import SimpleChatbot
+
+    session_resources = resources if mode == "shared" else ChatResources(settings=resources.settings,
+                                                                         vector_store=vector_store)
+    return (ChatBot(vector_store, use_efficient_retriever=True, resources=session_resources),
+            SimpleChatbot(resources=session_resources))
+
+
+def run_turn(session, query: str):
+    """One fast-mode turn per chatbot and language mode: retrieval and session state, without the LLM."""
+    for bot in session:
+        for simple_language in (False, True):
+            bot.get_response(query, simple_language=simple_language, extractive=True)
+
+
+def measure(mode: str, sessions: int, query: Optional[str] = None, top: int = 10) -> Dict:
+    """
+    Measure the memory allocated per concurrent session with tracemalloc.
+
+    Args:
+        mode: See create_session
+        sessions: Number of sessions kept alive at the same time
+        query: Run one fast-mode turn per session with this question (None: construction only)
+        top: Number of allocation sites to report
+
+    Returns:
+        Dict with bytes per session, total bytes, seconds per session and the largest allocation sites
+    """
+    from pinecone_processor import get_vector_store_instance
+
+    vector_store = get_vector_store_instance()
+    resources = ChatResources(vector_store=vector_store)
+
+    # One unmeasured session loads modules, singletons and the shared resources
+    warmup = create_session(mode, resources, vector_store)
+    if query:
+        run_turn(warmup, query)
+
+    gc.collect()
+    tracemalloc.start(25)
+    before_snapshot = tracemalloc.take_snapshot()
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    alive = []
+    for _ in range(sessions):
+        session = create_session(mode, resources, vector_store)
+        if query:
+            run_turn(session, query)
+        alive.append(session)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    stats = tracemalloc.take_snapshot().compare_to(before_snapshot, "filename")
+    tracemalloc.stop()
+
+    total = after - before
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "bytes_per_session": total / sessions,
+        "total_bytes": total,
+        "peak_bytes": peak - before,
+        "seconds_per_session": elapsed / sessions,
+        "top_allocations": [{"file": str(stat.traceback[0].filename), "bytes": stat.size_diff}
+                            for stat in stats[:top]],
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Measure memory per concurrent chat session with tracemalloc")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent sessions to create")
+    parser.add_argument("--modes", default=",".join(MODES), help=f"Comma-separated modes: {', '.join(MODES)}")
+    parser.add_argument("--query", default=DEFAULT_QUERY, help="Question for one fast-mode turn per session")
+    parser.add_argument("--no-turn", action="store_true", help="Only construct the sessions")
+    parser.add_argument("--top", type=int, default=5, help="Allocation sites to show per mode")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        parser.error(f"Unknown modes: {', '.join(unknown)}. Available: {', '.join(MODES)}")
+
+    results = {}
+    for mode in modes:
+        logger.info(f"Measuring {args.sessions} {mode} sessions")
+        result = results[mode] = measure(mode, args.sessions, None if args.no_turn else args.query, args.top)
+        print(f"\n=== {mode} ===")
+        print(f"Per session: {result['bytes_per_session'] / 1024:.1f} KiB, "
+              f"{result['seconds_per_session'] * 1000:.1f} ms to create"
+              f"{'' if args.no_turn else ' and answer one fast-mode turn'}")
+        print(f"Total for {args.sessions} sessions: {result['total_bytes'] / 1024 / 1024:.2f} MiB "
+              f"(peak {result['peak_bytes'] / 1024 / 1024:.2f} MiB)")
+        for allocation in result["top_allocations"]:
+            print(f"  {allocation['bytes'] / 1024:10.1f} KiB  {allocation['file']}")
+
+    if set(MODES) <= set(results) and results["shared"]["bytes_per_session"] > 0:
+        ratio = results["isolated"]["bytes_per_session"] / results["shared"]["bytes_per_session"]
+        print(f"\nIsolated sessions use {ratio:.1f}x the memory of shared sessions")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "sessions": args.sessions,
+            "query": None if args.no_turn else args.query,
+        },
+        "modes": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"Wrote results to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import logging
+import os
+import sys
+import tomllib
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, Mapping, Optional, get_args, get_origin, get_type_hints
+
+from dotenv import load_dotenv
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Load environment variables (only for local development)
+load_dotenv()
+
+# Streamlit reads the global file first and lets the project file override it
+SECRETS_PATHS = (os.path.expanduser("~/.streamlit/secrets.toml"), os.path.join(".streamlit", "secrets.toml"))
+_secrets = None
+
+TRUE_VALUES = ("true", "1", "yes", "on")
+
+PINECONE_BACKENDS = ("pinecone", "local", "http")
+
+
+def get_secrets():
+    """
+    Streamlit secrets without importing Streamlit in the API and CLI tools.
+
+    Returns:
+        st.secrets if the Streamlit app already imported Streamlit (this also covers Streamlit Cloud),
+        otherwise the merged secrets.toml files
+    """
+    global _secrets
+
+    if _secrets is None:
+        if "streamlit" in sys.modules:
+            _secrets = sys.modules["streamlit"].secrets
+        else:
+            _secrets = {}
+            for path in SECRETS_PATHS:
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        _secrets.update(tomllib.load(f))
+    return _secrets
+
+
+def lookup(key: str, section: Optional[str] = None, env: Optional[Mapping[str, str]] = None,
+           secrets: Optional[Mapping] = None) -> Optional[Any]:
+    """
+    Look a value up in the environment (SECTION_KEY), then in the secrets ([section] key or flat section_key).
+
+    Returns:
+        The raw value, or None if neither source has it
+    """
+    env = os.environ if env is None else env
+    env_key = f"{section.upper()}_{key.upper()}" if section else key.upper()
+    if env.get(env_key):
+        return env[env_key]
+    if section:
+        try:
+            secrets = get_secrets() if secrets is None else secrets
+            if section in secrets:
+                if key in secrets[section]:
+                    return secrets[section][key]
+            elif f"{section}_{key}".lower() in secrets:
+                return secrets[f"{section}_{key}".lower()]
+        except Exception as e:
+            logger.warning(f"Error accessing streamlit secrets: {str(e)}")
+    return None
+
+
+def setting(section: str, key: str, default: Any):
+    """A Settings field read from SECTION_KEY or [section] key, with its default."""
+    return field(default=default, metadata={"section": section, "key": key})
+
+
+def convert(value: Any, target: type) -> Any:
+    """Convert a raw env/secrets value to the annotated type of a field."""
+    if get_origin(target) is not None:
+        # Optional[X]
+        target = next(arg for arg in get_args(target) if arg is not type(None))
+    if isinstance(value, target) and not (target is int and isinstance(value, bool)):
+        return value
+    if target is bool:
+        return str(value).strip().lower() in TRUE_VALUES
+    return target(value)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Tunables of the chatbots, retrievers and caches, resolved once from the environment, the
+    secrets.toml and the defaults below (in that order). Each field is overridable as SECTION_KEY,
+    e.g. RETRIEVAL_STANDARD_TOP_K=8 or OPENAI_TIMEOUT_SECONDS=10. Use dataclasses.replace() to
+    derive a variant, e.g. for an A/B test or in tests.
+    """
+
+    # OpenAI-compatible endpoint; point it to local_openai_server.py for offline tests and load tests
+    openai_api_key: Optional[str] = setting("openai", "api_key", None)
+    openai_base_url: str = setting("openai", "base_url", "https://oai.hconeai.com/v1")
+    model_name: str = setting("openai", "model_name", "gpt-4o-mini-2024-07-18")
+    temperature: float = setting("openai", "temperature", 0.7)
+    standard_max_tokens: int = setting("openai", "standard_max_tokens", 1500)  # Standard mode gets more tokens
+    simple_max_tokens: int = setting("openai", "simple_max_tokens", 1000)      # Simple mode keeps the original amount
+    presimplified_max_tokens: int = setting("openai", "presimplified_max_tokens", 400)  # Context already simplified
+    llm_timeout_seconds: float = setting("openai", "timeout_seconds", 30.0)
+    llm_max_retries: int = setting("openai", "max_retries", 1)
+    llm_max_concurrent_requests: int = setting("openai", "max_concurrent_requests", 8)
+    llm_queue_timeout_seconds: float = setting("openai", "queue_timeout_seconds", 2.0)  # Wait for a free LLM slot
+
+    # Index
+    pinecone_api_key: Optional[str] = setting("pinecone", "api_key", None)
+    pinecone_environment: Optional[str] = setting("pinecone", "environment", None)
+    pinecone_index_name: str = setting("pinecone", "index_name", "koalitionskompass")
+    pinecone_namespace: str = setting("pinecone", "namespace", "default")
+    simple_namespace: str = setting("pinecone", "simple_namespace", "")  # Empty: "<namespace>-einfach"
+    # "pinecone" (hosted), "local" (in-process local_pinecone.py) or "http" (local_pinecone_server.py at pinecone_host)
+    pinecone_backend: str = setting("pinecone", "backend", "pinecone")
+    pinecone_host: str = setting("pinecone", "host", "http://localhost:5081")
+    local_index_path: str = setting("pinecone", "local_index_path", "data/local_index.json")
+    local_index_latency_ms: float = setting("pinecone", "local_latency_ms", 0.0)  # Injected latency per call
+    local_index_error_rate: float = setting("pinecone", "local_error_rate", 0.0)  # Share of calls that fail
+
+    # Retrieval
+    standard_top_k: int = setting("retrieval", "standard_top_k", 5)  # Standard mode retrieves more context chunks
+    simple_top_k: int = setting("retrieval", "simple_top_k", 3)      # Simple mode retrieves fewer chunks
+    multi_query_variants: int = setting("retrieval", "multi_query_variants", 1)
+    multi_query_max_workers: int = setting("retrieval", "multi_query_max_workers", 8)  # Shared search thread pool
+    rrf_k: int = setting("retrieval", "rrf_k", 60)
+    rerank_scorer: str = setting("retrieval", "rerank_scorer", "none")
+    rerank_overfetch: int = setting("retrieval", "rerank_overfetch", 20)
+    rerank_batch_size: int = setting("retrieval", "rerank_batch_size", 16)
+    cross_encoder_model_path: str = setting("retrieval", "cross_encoder_model_path", "models/cross-encoder")
+    topic_filter: bool = setting("retrieval", "topic_filter", False)
+    simple_chunks: bool = setting("retrieval", "simple_chunks", False)
+    session_reuse: bool = setting("retrieval", "session_reuse", True)
+    follow_up_delta_k: int = setting("retrieval", "follow_up_delta_k", 1)
+    follow_up_max_new_terms: int = setting("retrieval", "follow_up_max_new_terms", 1)
+    retrieval_cache_size: int = setting("retrieval", "cache_size", 1000)
+    retrieval_cache_ttl_seconds: float = setting("retrieval", "cache_ttl_seconds", 3600.0)
+
+    # API conversations, one pair of chatbots per client session_id
+    api_max_sessions: int = setting("api", "max_sessions", 1000)
+    api_session_ttl_seconds: float = setting("api", "session_ttl_seconds", 1800.0)
+
+    # Answer generation
+    generation_mode: str = setting("app", "generation_mode", "single_call")
+    single_call_history_messages: int = setting("app", "single_call_history_messages", 4)
+    page_lookup_use_llm: bool = setting("app", "page_lookup_use_llm", False)
+    faq_enabled: bool = setting("app", "faq_enabled", True)
+    faq_match_threshold: float = setting("app", "faq_match_threshold", 0.8)  # Minimum Jaccard overlap of a fuzzy match
+    extractive_fallback: bool = setting("app", "extractive_fallback", True)
+    extractive_max_sentences: int = setting("app", "extractive_max_sentences", 5)
+
+    # Startup warm-up of the caches
+    warmup_enabled: bool = setting("warmup", "enabled", True)
+    warmup_queries_path: str = setting("warmup", "queries_path", "")  # Empty: query log if present, else FAQ list
+    warmup_top_n: int = setting("warmup", "top_n", 50)
+    warmup_time_budget_seconds: float = setting("warmup", "time_budget_seconds", 60.0)
+    warmup_concurrency: int = setting("warmup", "concurrency", 4)
+
+    # Observability
+    metrics_enabled: bool = setting("app", "metrics_enabled", True)
+    tracing_enabled: bool = setting("tracing", "enabled", False)
+    tracing_sample_rate: float = setting("tracing", "sample_rate", 0.1)
+    tracing_slow_seconds: float = setting("tracing", "slow_seconds", 5.0)
+    tracing_exporter: str = setting("tracing", "exporter", "file")
+    tracing_file_path: str = setting("tracing", "file_path", "logs/traces.jsonl")
+    tracing_otlp_endpoint: str = setting("tracing", "otlp_endpoint", "http://localhost:4318/v1/traces")
+    tracing_queue_size: int = setting("tracing", "queue_size", 1000)  # Finished traces waiting for export
+    slow_request_log_enabled: bool = setting("slow_requests", "enabled", True)
+    slow_request_seconds: float = setting("slow_requests", "threshold_seconds", 5.0)
+    slow_request_log_path: str = setting("slow_requests", "log_path", "logs/slow_requests.jsonl")
+    slow_request_log_max_bytes: int = setting("slow_requests", "max_bytes", 5_000_000)
+    slow_request_log_queue_size: int = setting("slow_requests", "queue_size", 1000)  # Entries waiting to be written
+    query_log_enabled: bool = setting("query_log", "enabled", False)  # Stores user questions, so off by default
+    query_log_path: str = setting("query_log", "path", "logs/queries.jsonl")
+    query_log_max_bytes: int = setting("query_log", "max_bytes", 50_000_000)
+    query_log_queue_size: int = setting("query_log", "queue_size", 10000)  # Entries waiting to be written
+
+    # Token usage and budgets in USD (0 disables a budget; 0 prices use the model's list price)
+    usage_log_path: str = setting("usage", "log_path", "logs/usage.jsonl")
+    usage_log_queue_size: int = setting("usage", "log_queue_size", 10000)  # Calls waiting to be written
+    usage_log_max_bytes: int = setting("usage", "log_max_bytes", 50_000_000)
+    usage_input_price_per_million: float = setting("usage", "input_price_per_million", 0.0)
+    usage_output_price_per_million: float = setting("usage", "output_price_per_million", 0.0)
+    usage_session_budget_usd: float = setting("usage", "session_budget_usd", 0.0)
+    usage_daily_budget_usd: float = setting("usage", "daily_budget_usd", 0.0)
+
+    def __post_init__(self):
+        if not self.simple_namespace:
+            object.__setattr__(self, "simple_namespace", f"{self.pinecone_namespace}-einfach")
+        for name in ("standard_top_k", "simple_top_k", "multi_query_variants", "standard_max_tokens",
+                     "simple_max_tokens", "llm_max_concurrent_requests", "multi_query_max_workers",
+                     "rerank_batch_size", "extractive_max_sentences", "warmup_concurrency", "tracing_queue_size",
+                     "query_log_queue_size", "usage_log_queue_size", "slow_request_log_queue_size"):
+            if getattr(self, name) < 1:
+                raise ValueError(f"Setting {name} must be at least 1, got {getattr(self, name)}")
+        if self.pinecone_backend not in PINECONE_BACKENDS:
+            raise ValueError(f"Unknown Pinecone backend: {self.pinecone_backend}. Use 'pinecone', 'local' or 'http'.")
+
+    @classmethod
+    def load(cls, env: Optional[Mapping[str, str]] = None, secrets: Optional[Mapping] = None) -> "Settings":
+        """
+        Resolve all fields from the sources.
+
+        Args:
+            env: Environment variables (default: os.environ)
+            secrets: Secrets mapping (default: get_secrets())
+
+        Returns:
+            The resolved Settings
+        """
+        hints = get_type_hints(cls)
+        values: Dict[str, Any] = {}
+        for f in fields(cls):
+            section, key = f.metadata["section"], f.metadata["key"]
+            value = lookup(key, section, env=env, secrets=secrets)
+            if value is None:
+                continue
+            try:
+                values[f.name] = convert(value, hints[f.name])
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid value for {section.upper()}_{key.upper()}: {value!r}")
+        settings = cls(**values)
+        overridden = sorted(name for name in values if not name.endswith("api_key"))
+        logger.info(f"Settings loaded; overridden: {', '.join(overridden) or 'none'}")
+        return settings
+
+
+# Global settings instance
+_settings_instance = None
+
+
+def get_settings() -> Settings:
+    """Get or load the process-wide settings."""
+    global _settings_instance
+
+    if _settings_instance is None:
+        _settings_instance = Settings.load()
+
+    return _settings_instance
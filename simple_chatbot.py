@@ -3,12 +3,19 @@ import requests
 import json
 import logging
 import re
-import openai
 from langchain_pinecone import PineconeVectorStore
-from config import (OPENAI_API_KEY, SIMPLE_SYSTEM_PROMPT, MODEL_NAME, TEMPERATURE,
-                   SIMPLE_MAX_TOKENS, STANDARD_MAX_TOKENS,
-                   SIMPLE_TOP_K, STANDARD_TOP_K)
-from pinecone_processor import get_vector_store_instance, get_efficient_retriever_instance
+from config import SIMPLE_SYSTEM_PROMPT, PRESIMPLIFIED_SYSTEM_PROMPT
+from settings import Settings, get_settings
+from chat_resources import ChatResources
+from retrieval_context import RetrievalContext
+from query_router import direct_lookup
+from faq_store import lookup_faq
+from extractive_answer import build_extractive_answer
+from llm_guard import llm_slot, LLM_FALLBACK_ERRORS
+from metrics import timed, record_cache_lookup
+from usage_tracker import get_usage_tracker
+from tracing import span, current_span, traceparent_headers
+from slow_request_log import record_inputs, record_documents, HISTORY_MESSAGES
 from typing import List, Dict
 
 # Set up logging
@@ -16,15 +23,28 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SimpleChatbot:
-    def __init__(self):
+    def __init__(self, use_faq_store=None, settings: Settings = None, resources: ChatResources = None):
+        """Initialize the chatbot.
+        
+        Args:
+            use_faq_store: Whether to answer frequent questions from the pre-generated FAQ store
+                           (default: settings.faq_enabled)
+            settings: Model, token, top_k, timeout and retrieval settings
+                      (default: those of resources, else get_settings())
+            resources: Retrievers and the OpenAI client shared across sessions
+                       (default: a private ChatResources for this chatbot)
+        """
+        self.settings = settings = settings or (resources.settings if resources else get_settings())
+        self.resources = resources or ChatResources(settings=settings)
+        
         # Initialize with default top_k (will be overridden in get_context_from_query)
-        self.retriever = get_efficient_retriever_instance(top_k=SIMPLE_TOP_K)
+        self.retriever = self.resources.retriever(settings.simple_top_k)
         
         # Still keep the vector store reference for backward compatibility
-        self.vector_store = get_vector_store_instance()
+        self.vector_store = self.resources.vector_store
         
         # Check if OpenAI API key is available
-        self.api_key = OPENAI_API_KEY
+        self.api_key = settings.openai_api_key
         if not self.api_key:
             logger.error("OpenAI API key is missing! Please check your Streamlit secrets or environment variables.")
             raise ValueError("""
@@ -38,32 +58,49 @@ For local development, either use .streamlit/secrets.toml or set the OPENAI_API_
 """)
         
         # Initialize OpenAI client settings
-        self.base_url = "https://oai.hconeai.com/v1"
+        self.base_url = settings.openai_base_url
         self.history = []
+        self.use_faq_store = settings.faq_enabled if use_faq_store is None else use_faq_store
+        
+        # Chunks of the previous turn, reused for follow-up questions
+        self.retrieval_context = RetrievalContext(delta_top_k=settings.follow_up_delta_k,
+                                                 max_new_terms=settings.follow_up_max_new_terms)
         logger.info("SimpleChatbot initialized successfully with OpenAI API key")
         
     def add_to_history(self, role, content):
         """Add a message to the conversation history."""
         self.history.append({"role": role, "content": content})
         
-    def get_context_from_query(self, query, simple_language=False):
+    @timed("retrieval")
+    @span("retrieval")
+    def get_context_from_query(self, query, simple_language=False, top_k=None):
         """Get relevant context using the efficient Pinecone retriever."""
         # Select appropriate top_k based on language mode
-        top_k = SIMPLE_TOP_K if simple_language else STANDARD_TOP_K
+        if top_k is None:
+            top_k = self.settings.simple_top_k if simple_language else self.settings.standard_top_k
         logger.info(f"Getting context for query with top_k={top_k} for {'simple' if simple_language else 'standard'} language mode")
         
         try:
             # Use the efficient retriever with the appropriate top_k
-            retriever = get_efficient_retriever_instance(top_k=top_k)
-            results = retriever.get_relevant_documents(query)
+            search = self.resources.retriever(top_k, simple_language).get_relevant_documents
+            if self.settings.session_reuse:
+                delta_search = self.resources.retriever(self.settings.follow_up_delta_k, simple_language).get_relevant_documents
+                results = self.retrieval_context.retrieve(query, search, delta_search=delta_search,
+                                                          namespace=self.resources.namespace(simple_language),
+                                                          top_k=top_k)
+            else:
+                results = search(query)
             context = "\n\n".join([doc.page_content for doc in results])
             logger.info(f"Retrieved {len(results)} documents using efficient retriever")
+            current_span().set_attributes(top_k=top_k, hits=len(results))
             # logger.info(f'Used this system prompt: {SIMPLE_SYSTEM_PROMPT}')
             return context, results
         except Exception as e:
             logger.error(f"Error getting context from query: {str(e)}")
             return "", []
     
+    @timed("format_response")
+    @span("format_response")
     def format_response(self, answer, sources):
         """Format the response with answer and sources in proper markdown."""
         # Format the main answer
@@ -89,13 +126,121 @@ For local development, either use .streamlit/secrets.toml or set the OPENAI_API_
                 
         return formatted_response
     
-    def get_response(self, query, simple_language=False):
-        """Get response for user query."""
+    def build_sources(self, source_docs):
+        """Clean retrieved documents into source entries for format_response."""
+        sources = []
+        for doc in source_docs:
+            if hasattr(doc, 'metadata') and doc.metadata:
+                # Clean up the content by replacing Unicode bullet points and formatting
+                # (pre-simplified chunks are cited with their original wording)
+                content = doc.metadata.get('original_text', doc.page_content)
+                # Replace Unicode bullet points with dashes
+                content = content.replace('\uf0b7', '-')
+                # Replace Unicode bullets with normal dash-space
+                content = content.replace('\no', '- ')
+                # Also handle standalone 'o ' bullets
+                content = content.replace('o ', '- ')
+                # Clean up excessive newlines
+                content = ' '.join([line.strip() for line in content.split('\n') if line.strip()])
+                # Remove any page numbers at the beginning of the content
+                content = re.sub(r'^\d+\s+', '', content)
+                
+                # Format page number as integer if possible
+                page = doc.metadata.get('page', None)
+                if page is not None:
+                    try:
+                        page = int(page)
+                    except (ValueError, TypeError):
+                        pass  # Keep as is if not convertible
+                
+                source = {
+                    'page': page,
+                    'source': doc.metadata.get('source', None),
+                    'content': content
+                }
+                sources.append(source)
+        return sources
+    
+    def get_preview(self, query, simple_language=False):
+        """Build an instant extractive answer for a query without calling the LLM.
+        
+        FAQ and page/section questions are answered instantly by get_response, so they
+        get no preview and no vector search. Pass the returned chunks to get_response
+        as documents so the query is not searched twice.
+        
+        Returns:
+            Tuple of (formatted extractive response, source documents), or None if there
+            is no preview for the query or nothing was found
+        """
+        if self.use_faq_store and lookup_faq(query, "simple_chatbot", simple_language) is not None:
+            return None
+        if direct_lookup(query) is not None:
+            return None
+        context, source_docs = self.get_context_from_query(query, simple_language=simple_language)
+        if not context:
+            return None
+        answer = build_extractive_answer(query, source_docs, simple_language=simple_language,
+                                         max_sentences=self.settings.extractive_max_sentences)
+        return self.format_response(answer, self.build_sources(source_docs)), source_docs
+    
+    @span("simple_chatbot.get_response")
+    def get_response(self, query, simple_language=False, extractive=False, documents=None):
+        """Get response for user query.
+        
+        Args:
+            query: The user question
+            simple_language: Whether to answer in simple language
+            extractive: Fast mode; answer with the best matching sentences instead of the LLM
+            documents: Chunks already retrieved for this query by get_preview, used instead of a new search
+        """
         try:
             logger.info(f"Getting response for: {query}")
+            current_span().set_attribute("simple_language", simple_language)
+            record_inputs(chatbot="simple_chatbot", query=query, simple_language=simple_language, extractive=extractive,
+                          history=self.history[-HISTORY_MESSAGES:])
             
-            # Get relevant context from the vector store with appropriate top_k
-            context, source_docs = self.get_context_from_query(query, simple_language=simple_language)
+            # Frequent questions are answered from the pre-generated FAQ store
+            if self.use_faq_store:
+                faq_entry = lookup_faq(query, "simple_chatbot", simple_language)
+                record_cache_lookup("faq", faq_entry is not None)
+                if faq_entry is not None:
+                    logger.info(f"Serving query from FAQ store: '{faq_entry['question']}'")
+                    # FAQ answers carry no chunks; a follow-up must not reuse those of an earlier topic
+                    self.retrieval_context.clear()
+                    self.add_to_history("user", query)
+                    self.add_to_history("assistant", faq_entry["answer"])
+                    return faq_entry["response"]
+            
+            # Answer more cheaply when the session or daily budget is nearly used up
+            budget = get_usage_tracker().plan(
+                self.settings.simple_max_tokens if simple_language else self.settings.standard_max_tokens,
+                self.settings.simple_top_k if simple_language else self.settings.standard_top_k)
+            extractive = extractive or budget["extractive"]
+            current_span().set_attribute("extractive", extractive)
+            
+            # Page and section questions are served from the page index when possible
+            # (get_preview only returns chunks for queries that are not)
+            lookup = direct_lookup(query) if documents is None else None
+            record_cache_lookup("page_index", lookup is not None)
+            if lookup is not None:
+                intro, source_docs = lookup
+                logger.info(f"Serving query by direct page index lookup ({len(source_docs)} chunks)")
+                self.retrieval_context.remember(query, source_docs,
+                                                namespace=self.resources.namespace(simple_language),
+                                                top_k=budget["top_k"])
+                if not source_docs or not self.settings.page_lookup_use_llm:
+                    self.add_to_history("user", query)
+                    self.add_to_history("assistant", intro)
+                    return self.format_response(intro, self.build_sources(source_docs))
+                context = "\n\n".join([doc.page_content for doc in source_docs])
+            elif documents is not None:
+                source_docs = documents[:budget["top_k"]]
+                context = "\n\n".join([doc.page_content for doc in source_docs])
+            else:
+                # Get relevant context from the vector store with appropriate top_k
+                context, source_docs = self.get_context_from_query(query, simple_language=simple_language,
+                                                                   top_k=budget["top_k"])
+            record_documents(source_docs)
             
             if not context:
                 logger.warning("No context found for query")
@@ -104,12 +249,29 @@ For local development, either use .streamlit/secrets.toml or set the OPENAI_API_
             # Add the user's message to history
             self.add_to_history("user", query)
             
-            # Select appropriate max tokens based on language mode
-            tokens_limit = SIMPLE_MAX_TOKENS if simple_language else STANDARD_MAX_TOKENS
+            # Fast mode answers with the best matching sentences, without the LLM
+            if extractive:
+                answer = build_extractive_answer(query, source_docs, simple_language=simple_language,
+                                                 max_sentences=self.settings.extractive_max_sentences)
+                self.add_to_history("assistant", answer)
+                return self.format_response(answer, self.build_sources(source_docs))
+            
+            # Max tokens of the language mode, reduced when the budget is nearly used up
+            tokens_limit = budget["max_tokens"]
             logger.info(f"Using max_tokens={tokens_limit} for {'simple' if simple_language else 'standard'} language mode")
             
             # Build system message with context
-            if simple_language:
+            presimplified = simple_language and any(doc.metadata.get('original_text') for doc in source_docs)
+            if presimplified:
+                # The chunks are already in plain language, so a short prompt and completion suffice
+                tokens_limit = min(tokens_limit, self.settings.presimplified_max_tokens)
+                system_prompt = f"""{PRESIMPLIFIED_SYSTEM_PROMPT}
+
+Nutze die folgenden Informationen, um die Frage des Nutzers zu beantworten:
+
+{context}
+"""
+            elif simple_language:
                 system_prompt = f"""{SIMPLE_SYSTEM_PROMPT}
 
 Verwende einfache Sprache ohne Fremdwörter oder Fachbegriffe. Erkläre komplexe Konzepte in einfachen Worten und verwende kurze Sätze.
@@ -138,54 +300,39 @@ Nutze die folgenden Informationen, um die Frage des Nutzers zu beantworten:
             for message in self.history[-10:]:  # Only include last 10 messages to avoid context overflow
                 messages.append(message)
             
-            # Create OpenAI client and make API call
-            client = openai.OpenAI(api_key=self.api_key, base_url=self.base_url)
+            # Shared OpenAI client (one connection pool per process)
+            client = self.resources.openai_client()
             
-            # Generate response
-            response = client.chat.completions.create(
-                model=MODEL_NAME,
-                messages=messages,
-                temperature=TEMPERATURE,
-                max_tokens=tokens_limit
-            )
-            
-            # Extract the assistant's message
-            answer = response.choices[0].message.content
+            try:
+                # Generate response
+                with llm_slot(self.settings), timed("completion"), span("llm.completion", model=self.settings.model_name, max_tokens=tokens_limit):
+                    response = client.chat.completions.create(
+                        model=self.settings.model_name,
+                        messages=messages,
+                        temperature=self.settings.temperature,
+                        max_tokens=tokens_limit,
+                        extra_headers=traceparent_headers()
+                    )
+                    if response.usage:
+                        get_usage_tracker().record(response.usage.prompt_tokens, response.usage.completion_tokens,
+                                                   mode="simple" if simple_language else "standard",
+                                                   chatbot="simple_chatbot")
+                
+                # Extract the assistant's message
+                answer = response.choices[0].message.content
+            except LLM_FALLBACK_ERRORS as e:
+                if not self.settings.extractive_fallback:
+                    raise
+                # Rate limits, timeouts and overload degrade to an extractive answer instead of an error
+                logger.warning(f"LLM unavailable ({type(e).__name__}: {str(e)}), falling back to extractive answer")
+                answer = build_extractive_answer(query, source_docs, simple_language=simple_language, degraded=True,
+                                                 max_sentences=self.settings.extractive_max_sentences)
             
             # Add the assistant's response to history
             self.add_to_history("assistant", answer)
             
             # Clean and extract source information
-            sources = []
-            for doc in source_docs:
-                if hasattr(doc, 'metadata') and doc.metadata:
-                    # Clean up the content by replacing Unicode bullet points and formatting
-                    content = doc.page_content
-                    # Replace Unicode bullet points with dashes
-                    content = content.replace('\uf0b7', '-')
-                    # Replace Unicode bullets with normal dash-space
-                    content = content.replace('\no', '- ')
-                    # Also handle standalone 'o ' bullets
-                    content = content.replace('o ', '- ')
-                    # Clean up excessive newlines
-                    content = ' '.join([line.strip() for line in content.split('\n') if line.strip()])
-                    # Remove any page numbers at the beginning of the content
-                    content = re.sub(r'^\d+\s+', '', content)
-                    
-                    # Format page number as integer if possible
-                    page = doc.metadata.get('page', None)
-                    if page is not None:
-                        try:
-                            page = int(page)
-                        except (ValueError, TypeError):
-                            pass  # Keep as is if not convertible
-                    
-                    source = {
-                        'page': page,
-                        'source': doc.metadata.get('source', None),
-                        'content': content
-                    }
-                    sources.append(source)
+            sources = self.build_sources(source_docs)
             
             # Instead of returning a dictionary, return a formatted markdown string
             return self.format_response(answer, sources)
@@ -196,4 +343,5 @@ Nutze die folgenden Informationen, um die Frage des Nutzers zu beantworten:
     def clear_history(self):
         """Clear chat history."""
         self.history = []
+        self.retrieval_context.clear()
         logger.info("Chat history cleared") 
\ No newline at end of file
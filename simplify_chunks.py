@@ -0,0 +1,274 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from config import (OPENAI_API_KEY, OPENAI_BASE_URL, MODEL_NAME, PINECONE_INDEX_NAME, PAGE_INDEX_PATH, SIMPLE_NAMESPACE,
+                    SIMPLE_CHUNKS_PATH, SIMPLIFY_BATCH_SIZE, SIMPLIFY_MAX_WORKERS)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Instruction for the offline plain-language rewrite of a single chunk
+SIMPLIFY_PROMPT = """Schreibe den folgenden Abschnitt aus dem österreichischen Regierungsprogramm in Einfacher Sprache um.
+- Kurze Sätze, ein Gedanke pro Satz.
+- Fachbegriffe vermeiden oder in wenigen Worten erklären.
+- Alle Fakten, Zahlen, Jahreszahlen und Namen genau übernehmen.
+- Nichts hinzufügen, nichts weglassen, nichts bewerten.
+Antworte nur mit dem umgeschriebenen Text."""
+
+SIMPLIFY_TEMPERATURE = 0.2
+SIMPLIFY_MAX_TOKENS = 600
+SIMPLIFY_RETRIES = 3
+
+# Maximum batch size for upsert_records is 96 as per Pinecone limitation
+UPSERT_BATCH_SIZE = 96
+# Maximum number of IDs per delete call, as per Pinecone limitation
+DELETE_BATCH_SIZE = 1000
+
+
+def chunk_hash(text: str) -> str:
+    """Fingerprint of a chunk's source text, stored with its rewrite."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def is_current(entry: Dict, chunk: Optional[Dict]) -> bool:
+    """
+    Whether a checkpoint entry is the rewrite of the chunk now stored under its ID.
+
+    After re-ingesting with other chunking parameters a doc_N ID names a different
+    passage; entries without a fingerprint (older checkpoints) cannot be checked
+    and count as outdated.
+    """
+    return chunk is not None and entry.get("source_hash") == chunk_hash(chunk["text"])
+
+
+def load_checkpoint(path: str = SIMPLE_CHUNKS_PATH) -> Dict[str, Dict]:
+    """
+    Read the rewrites finished so far.
+
+    A truncated last line (from an interrupted run) is ignored, so the
+    affected chunk is simply rewritten again.
+
+    Returns:
+        Dictionary mapping record IDs to checkpoint entries
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning("Ignoring incomplete checkpoint line")
+                continue
+            done[entry["id"]] = entry
+    return done
+
+
+def drop_incomplete_tail(path: str = SIMPLE_CHUNKS_PATH):
+    """
+    Cut off a last line without a trailing newline (from an interrupted run).
+
+    Otherwise the next appended record would be glued onto the broken line and
+    lost when the checkpoint is read.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if not data or data.endswith(b"\n"):
+            return
+        f.truncate(data.rfind(b"\n") + 1)
+    logger.warning("Removed incomplete last line from the checkpoint")
+
+
+def make_openai_rewriter() -> Callable[[str], str]:
+    """Create a rewrite function backed by the OpenAI chat completions API."""
+    import openai
+
+    if not OPENAI_API_KEY:
+        raise ValueError("OpenAI API key is missing. Please check your Streamlit secrets or environment variables.")
+    client = openai.OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
+
+    def rewrite(text: str) -> str:
+        response = client.chat.completions.create(
+            model=MODEL_NAME,
+            messages=[
+                {"role": "system", "content": SIMPLIFY_PROMPT},
+                {"role": "user", "content": text},
+            ],
+            temperature=SIMPLIFY_TEMPERATURE,
+            max_tokens=SIMPLIFY_MAX_TOKENS
+        )
+        return response.choices[0].message.content.strip()
+
+    return rewrite
+
+
+def rewrite_with_retries(rewrite: Callable[[str], str], text: str, retries: int = SIMPLIFY_RETRIES) -> str:
+    """Call the rewrite function, backing off exponentially on errors."""
+    for attempt in range(retries):
+        try:
+            return rewrite(text)
+        except Exception as e:
+            if attempt == retries - 1:
+                raise
+            delay = 2 ** attempt
+            logger.warning(f"Rewrite failed ({str(e)}), retrying in {delay} seconds")
+            time.sleep(delay)
+
+
+def simplify_chunks(chunks: Dict[str, Dict], rewrite: Callable[[str], str], checkpoint_path: str = SIMPLE_CHUNKS_PATH,
+                    batch_size: int = SIMPLIFY_BATCH_SIZE, workers: int = SIMPLIFY_MAX_WORKERS,
+                    limit: int = None) -> int:
+    """
+    Rewrite chunks into plain language in checkpointed batches.
+
+    Chunks already in the checkpoint are skipped, so an interrupted run can be
+    resumed by starting it again; chunks whose text changed since their rewrite
+    (see is_current) are rewritten. Each batch is rewritten concurrently and
+    appended to the checkpoint once it is complete.
+
+    Args:
+        chunks: Dictionary mapping record IDs to chunk entries with a "text" field
+        rewrite: Function turning a chunk text into its plain-language version
+        checkpoint_path: JSONL file the rewrites are appended to
+        batch_size: Chunks per checkpointed batch
+        workers: Concurrent rewrite calls within a batch
+        limit: Maximum number of chunks to rewrite in this run
+
+    Returns:
+        Number of chunks rewritten in this run
+    """
+    done = {record_id: entry for record_id, entry in load_checkpoint(checkpoint_path).items()
+            if is_current(entry, chunks.get(record_id))}
+    pending = [record_id for record_id in chunks if record_id not in done]
+    if limit:
+        pending = pending[:limit]
+    logger.info(f"{len(done)} chunks already simplified, {len(pending)} to go")
+
+    os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+    drop_incomplete_tail(checkpoint_path)
+    rewritten = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="simplify") as executor:
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            texts = [chunks[record_id]["text"] for record_id in batch]
+            start_time = time.perf_counter()
+            try:
+                simple_texts = list(executor.map(lambda text: rewrite_with_retries(rewrite, text), texts))
+            except Exception as e:
+                logger.error(f"Stopping after {rewritten} chunks, batch failed: {str(e)}")
+                break
+
+            with open(checkpoint_path, "a", encoding="utf-8") as f:
+                for record_id, text, simple_text in zip(batch, texts, simple_texts):
+                    entry = {"id": record_id, "source_hash": chunk_hash(text), "simple_text": simple_text}
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            rewritten += len(batch)
+            logger.info(f"Simplified batch of {len(batch)} chunks in {time.perf_counter() - start_time:.1f} seconds "
+                        f"({len(done) + rewritten}/{len(chunks)})")
+
+    return rewritten
+
+
+def build_records(chunks: Dict[str, Dict], done: Dict[str, Dict]) -> List[Dict]:
+    """
+    Build Pinecone records for the simplified namespace.
+
+    The plain-language text is embedded; the original text and the chunk
+    metadata are kept so answers can still cite the original wording.
+    Rewrites of chunks that no longer exist or changed are left out.
+    """
+    records = []
+    for record_id, entry in done.items():
+        chunk = chunks.get(record_id)
+        if not is_current(entry, chunk):
+            continue
+        records.append({
+            "_id": record_id,
+            "text": entry["simple_text"],
+            "original_text": chunk["text"],
+            "page": chunk.get("page", 0),
+            "source": chunk.get("source", "unknown"),
+            "chapter": chunk.get("chapter", ""),
+            "section": chunk.get("section", ""),
+            "topic": chunk.get("topic", ""),
+        })
+    return records
+
+
+def upsert_records(records: List[Dict], namespace: str = SIMPLE_NAMESPACE):
+    """Upsert simplified records into their own namespace for integrated embedding."""
+    from local_pinecone import flush_index
+    from pinecone_processor import get_pinecone_instance
+
+    index = get_pinecone_instance().Index(PINECONE_INDEX_NAME)
+    total_batches = (len(records) + UPSERT_BATCH_SIZE - 1) // UPSERT_BATCH_SIZE
+    for batch_idx in range(total_batches):
+        batch = records[batch_idx * UPSERT_BATCH_SIZE:(batch_idx + 1) * UPSERT_BATCH_SIZE]
+        logger.info(f"Upserting batch {batch_idx + 1}/{total_batches} ({len(batch)} records) into namespace {namespace}")
+        index.upsert_records(namespace, batch)
+    flush_index(index)
+
+
+def stale_record_ids(chunks: Dict[str, Dict], done: Dict[str, Dict]) -> List[str]:
+    """IDs rewritten earlier whose chunk no longer exists or changed, so their simplified record is outdated."""
+    return [record_id for record_id, entry in done.items() if not is_current(entry, chunks.get(record_id))]
+
+
+def delete_records(record_ids: List[str], namespace: str = SIMPLE_NAMESPACE):
+    """Delete outdated simplified records, so answers do not cite a passage under the wrong original text."""
+    from local_pinecone import flush_index
+    from pinecone_processor import get_pinecone_instance
+
+    index = get_pinecone_instance().Index(PINECONE_INDEX_NAME)
+    for start in range(0, len(record_ids), DELETE_BATCH_SIZE):
+        index.delete(ids=record_ids[start:start + DELETE_BATCH_SIZE], namespace=namespace)
+    flush_index(index)
+    logger.info(f"Deleted {len(record_ids)} outdated records from namespace {namespace}")
+
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Precompute plain-language versions of all chunks for simple mode")
+    parser.add_argument("--limit", type=int, default=None, help="Maximum number of chunks to rewrite in this run")
+    parser.add_argument("--batch-size", type=int, default=SIMPLIFY_BATCH_SIZE, help="Chunks per checkpointed batch")
+    parser.add_argument("--workers", type=int, default=SIMPLIFY_MAX_WORKERS, help="Concurrent rewrite requests")
+    parser.add_argument("--checkpoint", default=SIMPLE_CHUNKS_PATH, help="JSONL checkpoint of finished rewrites")
+    parser.add_argument("--skip-upsert", action="store_true", help="Only rewrite, do not upload to Pinecone")
+    parser.add_argument("--upsert-only", action="store_true", help="Only upload the rewrites from the checkpoint")
+    args = parser.parse_args()
+
+    # The page index holds the chunks with the same record IDs as the main namespace
+    if not os.path.exists(PAGE_INDEX_PATH):
+        parser.error(f"Page index not found at {PAGE_INDEX_PATH}. Run create_vectorstore.py first.")
+    from page_index import PageIndex
+    chunks = PageIndex.load(PAGE_INDEX_PATH).chunks
+
+    if not args.upsert_only:
+        simplify_chunks(chunks, make_openai_rewriter(), checkpoint_path=args.checkpoint,
+                        batch_size=args.batch_size, workers=args.workers, limit=args.limit)
+
+    done = load_checkpoint(args.checkpoint)
+    current = sum(is_current(entry, chunks.get(record_id)) for record_id, entry in done.items())
+    print(f"{current} of {len(chunks)} chunks simplified")
+    if not args.skip_upsert:
+        records = build_records(chunks, done)
+        upsert_records(records)
+        print(f"Upserted {len(records)} records into namespace {SIMPLE_NAMESPACE}")
+        stale = stale_record_ids(chunks, done)
+        if stale:
+            delete_records(stale)
+            print(f"Deleted {len(stale)} outdated records from namespace {SIMPLE_NAMESPACE}")
+
+
+if __name__ == "__main__":
+    main()
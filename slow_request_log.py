@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import (SLOW_REQUEST_LOG_ENABLED, SLOW_REQUEST_SECONDS, SLOW_REQUEST_LOG_PATH, SLOW_REQUEST_LOG_MAX_BYTES,
+                    SLOW_REQUEST_LOG_QUEUE_SIZE)
+from query_log import JsonlWriter, load_jsonl
+from tracing import current_span
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Messages of the conversation kept with each entry, so follow-up questions replay with their history
+HISTORY_MESSAGES = 4
+
+# Request currently running; filled in by metrics.timed(), record_documents() and the token accounting
+_current_request: ContextVar[Optional["SlowRequest"]] = ContextVar("slow_request", default=None)
+
+
+class SlowRequest:
+    """Inputs and measurements of one request, collected while it runs."""
+
+    def __init__(self, endpoint: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.endpoint = endpoint
+        self.timestamp = datetime.now().isoformat(timespec="seconds")
+        self.trace_id = current_span().trace_id
+        self.inputs: Dict = {}
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.record_ids: List[str] = []
+        self.context_characters = 0
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.error = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @property
+    def duration(self) -> float:
+        return time.perf_counter() - self._start
+
+    def add_stage(self, stage: str, seconds: float):
+        with self._lock:
+            totals = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0})
+            totals["calls"] += 1
+            totals["seconds"] += seconds
+
+    def to_dict(self, duration: float) -> Dict:
+        return {
+            "id": self.id,
+            "timestamp": self.timestamp,
+            "endpoint": self.endpoint,
+            "duration": duration,
+            "trace_id": self.trace_id,
+            "error": self.error,
+            "inputs": self.inputs,
+            "stages": self.stages,
+            "record_ids": self.record_ids,
+            "context_characters": self.context_characters,
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+@contextmanager
+def record_request(endpoint: str):
+    """Collect the measurements of the block into a SlowRequest."""
+    request = SlowRequest(endpoint)
+    token = _current_request.set(request)
+    try:
+        yield request
+    except BaseException as e:
+        request.error = f"{type(e).__name__}: {str(e)}"
+        raise
+    finally:
+        _current_request.reset(token)
+
+
+@contextmanager
+def capture_request(endpoint: str, threshold: float = SLOW_REQUEST_SECONDS):
+    """
+    Log the request if it takes at least `threshold` seconds or fails.
+
+    Args:
+        endpoint: Entry point, e.g. "POST /api/chat" or "streamlit.chat"
+        threshold: Minimum duration in seconds for a request to be logged
+    """
+    if not SLOW_REQUEST_LOG_ENABLED:
+        yield None
+        return
+    if _current_request.get() is not None:
+        yield _current_request.get()
+        return
+
+    request = None
+    try:
+        with record_request(endpoint) as request:
+            yield request
+    finally:
+        duration = request.duration if request else 0.0
+        if request is not None and (duration >= threshold or request.error):
+            try:
+                get_slow_request_log().append(request.to_dict(duration))
+            except Exception as e:
+                logger.warning(f"Could not write slow request log: {str(e)}")
+
+
+def record_inputs(**inputs):
+    """Store what is needed to replay the request (chatbot, query, modes, recent history)."""
+    request = _current_request.get()
+    if request is not None:
+        request.inputs.update(inputs)
+
+
+def record_stage(stage: str, seconds: float):
+    """Add the time of one stage to the running request (called by metrics.timed)."""
+    request = _current_request.get()
+    if request is not None:
+        request.add_stage(stage, seconds)
+
+
+def record_documents(documents):
+    """Store the record IDs and context size of the chunks the answer is based on."""
+    request = _current_request.get()
+    if request is not None:
+        request.record_ids = [str(doc.metadata.get("id", "")) for doc in documents]
+        request.context_characters = sum(len(doc.page_content) for doc in documents)
+
+
+def record_usage(prompt_tokens: int, completion_tokens: int):
+    """Add the tokens of one LLM call to the running request."""
+    request = _current_request.get()
+    if request is not None:
+        request.llm_calls += 1
+        request.prompt_tokens += prompt_tokens or 0
+        request.completion_tokens += completion_tokens or 0
+
+
+class SlowRequestLog(JsonlWriter):
+    """The slow-request log, written off the request path and rotated at max_bytes, keeping one previous file."""
+
+    def __init__(self, path: str = SLOW_REQUEST_LOG_PATH, max_bytes: int = SLOW_REQUEST_LOG_MAX_BYTES,
+                 queue_size: int = SLOW_REQUEST_LOG_QUEUE_SIZE):
+        super().__init__(path, max_bytes=max_bytes, queue_size=queue_size, name="slow-request-log-writer")
+
+    def append(self, entry: Dict):
+        self.submit(entry)
+        logger.info(f"Slow request {entry['id']} logged ({entry['duration']:.2f} s, {entry['endpoint']})")
+
+
+# Global log instance
+_slow_request_log_instance = None
+_slow_request_log_lock = threading.Lock()
+
+
+def get_slow_request_log() -> SlowRequestLog:
+    """Get or create the slow-request log."""
+    global _slow_request_log_instance
+
+    with _slow_request_log_lock:
+        if _slow_request_log_instance is None:
+            _slow_request_log_instance = SlowRequestLog()
+
+    return _slow_request_log_instance
+
+
+def load_slow_requests(path: str = SLOW_REQUEST_LOG_PATH) -> List[Dict]:
+    """Read the logged requests, including the rotated previous file; oldest first."""
+    return load_jsonl(path)
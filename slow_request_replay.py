@@ -0,0 +1,121 @@
+import argparse
+import logging
+from typing import Dict, List, Optional
+
+from config import SLOW_REQUEST_LOG_PATH
+from slow_request_log import load_slow_requests, record_request
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def select_entries(entries: List[Dict], request_id: Optional[str] = None, slowest: int = 5) -> List[Dict]:
+    """One entry by ID, or the slowest entries."""
+    if request_id:
+        return [entry for entry in entries if entry["id"] == request_id]
+    return sorted(entries, key=lambda entry: entry["duration"], reverse=True)[:slowest]
+
+
+def format_entry(entry: Dict) -> List[str]:
+    """Header line plus one line per stage, slowest stage first."""
+    inputs = entry.get("inputs", {})
+    lines = [
+        f"{entry['id']}  {entry['timestamp']}  {entry['duration']:.2f} s  {entry['endpoint']}  "
+        f"{inputs.get('chatbot', '?')} simple={inputs.get('simple_language')} extractive={inputs.get('extractive')}",
+        f"  query: {inputs.get('query', '')!r}",
+        f"  records: {len(entry['record_ids'])} ({entry['context_characters']} chars), "
+        f"LLM calls: {entry['llm_calls']}, tokens: {entry['prompt_tokens']} prompt / {entry['completion_tokens']} completion",
+    ]
+    if entry.get("trace_id"):
+        lines.append(f"  trace: {entry['trace_id']}")
+    if entry.get("error"):
+        lines.append(f"  error: {entry['error']}")
+    for stage, totals in sorted(entry["stages"].items(), key=lambda item: item[1]["seconds"], reverse=True):
+        lines.append(f"  {stage:<18} {totals['seconds'] * 1000:>9.1f} ms  ({totals['calls']}x)")
+    return lines
+
+
+def create_chatbot(inputs: Dict):
+    """Fresh chatbot of the logged kind, primed with the logged conversation history."""
+    if inputs.get("chatbot") == "simple_chatbot":
+        from simple_chatbot import SimpleChatbot
+
+        chatbot = SimpleChatbot()
+        for message in inputs.get("history", []):
+            chatbot.add_to_history(message["role"], message["content"])
+        return chatbot
+
+    from chatbot import ChatBot
+    from pinecone_processor import get_vector_store_instance
+
+    chatbot = ChatBot(get_vector_store_instance(), use_efficient_retriever=inputs.get("use_efficient_retriever", True))
+    history = inputs.get("history", [])
+    for question, answer in zip(history[::2], history[1::2]):
+        chatbot.memory.save_context({"question": question["content"]}, {"answer": answer["content"]})
+    return chatbot
+
+
+def replay(entry: Dict) -> Dict:
+    """
+    Run a logged request again in this process and measure it the same way.
+
+    Which index and LLM are used follows the configuration, e.g. PINECONE_BACKEND=local and
+    OPENAI_BASE_URL pointing to local_openai_server.py for an offline replay.
+
+    Returns:
+        The new entry
+    """
+    inputs = entry["inputs"]
+    chatbot = create_chatbot(inputs)
+    with record_request(f"replay {entry['endpoint']}") as request:
+        request.inputs.update(inputs)
+        chatbot.get_response(inputs["query"], simple_language=inputs.get("simple_language", False),
+                             extractive=inputs.get("extractive", False))
+    return request.to_dict(request.duration)
+
+
+def compare_stages(recorded: Dict, replayed: Dict) -> List[str]:
+    """Recorded and replayed time per stage side by side."""
+    lines = [f"  {'stage':<18} {'recorded':>11} {'replayed':>11}"]
+    stages = sorted(set(recorded["stages"]) | set(replayed["stages"]),
+                    key=lambda stage: recorded["stages"].get(stage, {}).get("seconds", 0.0), reverse=True)
+    for stage in stages + ["total"]:
+        before = recorded["duration"] if stage == "total" else recorded["stages"].get(stage, {}).get("seconds", 0.0)
+        after = replayed["duration"] if stage == "total" else replayed["stages"].get(stage, {}).get("seconds", 0.0)
+        lines.append(f"  {stage:<18} {before * 1000:>8.1f} ms {after * 1000:>8.1f} ms")
+    if recorded["record_ids"] != replayed["record_ids"]:
+        lines.append(f"  retrieved records differ: {len(set(recorded['record_ids']) & set(replayed['record_ids']))} "
+                     f"of {len(recorded['record_ids'])} recorded IDs retrieved again")
+    return lines
+
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Inspect and replay slow chat requests")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("show", "Print logged slow requests with their stage breakdown"),
+                            ("replay", "Run logged requests again and compare the stage timings")):
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.add_argument("--path", default=SLOW_REQUEST_LOG_PATH, help="Slow-request log (JSON lines)")
+        subparser.add_argument("--id", default=None, help="Only this request")
+        subparser.add_argument("--slowest", type=int, default=5, help="Number of slowest requests")
+    args = parser.parse_args()
+
+    entries = select_entries(load_slow_requests(args.path), args.id, args.slowest)
+    if not entries:
+        print(f"No slow requests found in {args.path}")
+        return
+
+    for entry in entries:
+        print("\n".join(format_entry(entry)))
+        if args.command == "replay":
+            try:
+                print("\n".join(compare_stages(entry, replay(entry))))
+            except Exception as e:
+                logger.error(f"Replay of {entry['id']} failed: {str(e)}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from perf_stats import summarize, format_summary
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Heavy modules that belong to the deferred chatbot initialization and must not be imported with the API
+DEFERRED_MODULES = ("streamlit", "langchain_openai", "langchain_pinecone", "pinecone", "spacy",
+                    "langchain_community.document_loaders")
+
+# Startup statistics compared against the baseline
+REGRESSION_METRICS = ("import", "live")
+DEFAULT_TOLERANCE = 0.2
+
+
+def parse_importtime(output: str) -> List[Dict]:
+    """
+    Parse the stderr of `python -X importtime`.
+
+    Args:
+        output: Captured stderr; lines other than import timings (e.g. log output) are ignored
+
+    Returns:
+        Rows with module, depth (0 = imported by the script), self and cumulative seconds, in import order
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self": int(self_us) / 1e6,
+            "cumulative": int(cumulative_us) / 1e6,
+        })
+    return rows
+
+
+def profile_import(module: str) -> Dict:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Args:
+        module: Module to import, e.g. "api"
+
+    Returns:
+        Dict with wall_seconds (interpreter start included), import_seconds, the parsed rows and which of
+        DEFERRED_MODULES were loaded
+    """
+    script = f"import json, sys, {module}; print(json.dumps(sorted(sys.modules)))"
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", script], capture_output=True, text=True)
+    wall_seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed: {result.stderr.strip().splitlines()[-1:]}")
+
+    rows = parse_importtime(result.stderr)
+    loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    top = [row for row in rows if row["depth"] == 0 and row["module"] == module]
+    return {
+        "wall_seconds": wall_seconds,
+        "import_seconds": top[-1]["cumulative"] if top else None,
+        "rows": rows,
+        "deferred_loaded": [name for name in DEFERRED_MODULES if name in loaded],
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_live(app: str = "api:app", timeout: float = 60.0, wait_ready: bool = False) -> Dict[str, Optional[float]]:
+    """
+    Start the API with uvicorn and measure how long /api/live (and optionally /api/ready) take to answer.
+
+    Args:
+        app: uvicorn application path
+        timeout: Seconds to wait for each endpoint
+        wait_ready: Also wait for /api/ready, i.e. chatbot initialization and cache warm-up
+
+    Returns:
+        Dict with live_seconds and ready_seconds (None if not measured or timed out)
+    """
+    import httpx
+
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    timings = {"live_seconds": None, "ready_seconds": None}
+    try:
+        endpoints = [("live_seconds", "/api/live")] + ([("ready_seconds", "/api/ready")] if wait_ready else [])
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            for key, path in endpoints:
+                while time.perf_counter() - start < timeout and server.poll() is None:
+                    try:
+                        if client.get(path).status_code == 200:
+                            timings[key] = time.perf_counter() - start
+                            break
+                    except httpx.TransportError:
+                        pass
+                    time.sleep(0.02)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return timings
+
+
+def compare_to_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict],
+                        tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Find startup regressions against a stored baseline.
+
+    Args:
+        results: Summaries by metric of the current run
+        baseline: Summaries by metric of the baseline run
+        tolerance: Allowed relative slowdown, e.g. 0.2 for 20 %
+
+    Returns:
+        Messages describing the regressions (empty if there are none)
+    """
+    regressions = []
+    for metric in REGRESSION_METRICS:
+        current = results.get(metric, {}).get("p50")
+        previous = baseline.get(metric, {}).get("p50")
+        if current is None or not previous:
+            continue
+        if current > previous * (1 + tolerance):
+            regressions.append(f"{metric} p50: {current * 1000:.0f} ms vs. baseline {previous * 1000:.0f} ms "
+                               f"(+{(current / previous - 1):.0%}, tolerance {tolerance:.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Profile the import time and startup of the API")
+    parser.add_argument("--module", default="api", help="Module whose import is profiled")
+    parser.add_argument("--repetitions", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest direct imports to show")
+    parser.add_argument("--serve", action="store_true", help="Also measure the time until /api/live answers")
+    parser.add_argument("--ready", action="store_true", help="With --serve, also wait for /api/ready")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    profiles = [profile_import(args.module) for _ in range(args.repetitions)]
+    results = {
+        "import": summarize([p["import_seconds"] for p in profiles if p["import_seconds"] is not None]),
+        "interpreter": summarize([p["wall_seconds"] for p in profiles]),
+    }
+    print(f"Import of {args.module}: {format_summary(results['import'], unit='ms', scale=1000)}")
+    print(f"Interpreter incl. import: {format_summary(results['interpreter'], unit='ms', scale=1000)}")
+
+    # Direct imports of the module, slowest first, from the median run
+    median = sorted(profiles, key=lambda p: p["wall_seconds"])[len(profiles) // 2]
+    direct = sorted((row for row in median["rows"] if row["depth"] == 1), key=lambda row: -row["cumulative"])
+    print(f"\nSlowest imports of {args.module}:")
+    for row in direct[:args.top]:
+        print(f"  {row['cumulative'] * 1000:8.1f} ms  {row['module']}")
+    if median["deferred_loaded"]:
+        print(f"\nWARNING: imported at startup although deferred: {', '.join(median['deferred_loaded'])}")
+
+    if args.serve:
+        timings = [time_to_live(wait_ready=args.ready) for _ in range(args.repetitions)]
+        results["live"] = summarize([t["live_seconds"] for t in timings if t["live_seconds"] is not None])
+        print(f"\nTime to /api/live: {format_summary(results['live'], unit='ms', scale=1000)}")
+        if args.ready:
+            results["ready"] = summarize([t["ready_seconds"] for t in timings if t["ready_seconds"] is not None])
+            print(f"Time to /api/ready: {format_summary(results['ready'], unit='ms', scale=1000)}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "module": args.module,
+            "repetitions": args.repetitions,
+        },
+        "startup": results,
+        "slowest_imports": [{"module": row["module"], "seconds": row["cumulative"]} for row in direct[:args.top]],
+        "deferred_loaded": median["deferred_loaded"],
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        logger.info(f"Wrote results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["startup"]
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\n===== REGRESSIONS =====")
+            for message in regressions:
+                print(message)
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import os
+import random
+
+import pytest
+from langchain_core.documents import Document
+
+from config import PDF_PATH, STANDARD_TOP_K
+from local_pinecone import search_response
+from text_processor import TextProcessor
+
+# Used when the PDF is not checked out: page text shaped like PyPDFLoader output of the
+# Regierungsprogramm (hard line breaks, \uf0b7 and "o" bullets, page numbers, umlauts)
+SYNTHETIC_PAGES = 40
+SYNTHETIC_SENTENCES = [
+    "Die Bundesregierung bekennt sich zu einer nachhaltigen Budgetkonsolidierung bis 2029.",
+    "Pflegende Angehörige werden durch einen Angehörigenbonus und mehr Beratung entlastet.",
+    "Die Mietpreisbremse begrenzt die Indexierung der Richtwert- und Kategoriemieten.",
+    "Der Ausbau erneuerbarer Energie wird durch schnellere Genehmigungsverfahren beschleunigt.",
+    "Kinder mit Deutschdefiziten erhalten verpflichtende Deutschförderung ab dem Kindergarten.",
+    "Die Lohnnebenkosten werden schrittweise gesenkt, um den Standort zu stärken.",
+    "Für das Bundesheer wird das Budget für die Landesverteidigung nachhaltig erhöht.",
+    "Österreich setzt sich für eine glaubwürdige Erweiterung der Europäischen Union ein.",
+]
+
+
+def synthetic_pages(count: int = SYNTHETIC_PAGES, seed: int = 7):
+    rng = random.Random(seed)
+    pages = []
+    for number in range(count):
+        lines = [f"{number + 1}", "Wirtschaft & Steuern" if number % 2 else "Soziales & Gesundheit"]
+        for _ in range(rng.randint(14, 22)):
+            sentence = rng.choice(SYNTHETIC_SENTENCES)
+            prefix = rng.choice(["", "", "\uf0b7 ", "o "])
+            # PyPDFLoader keeps the hard line breaks of the PDF layout
+            words = (prefix + sentence).split()
+            cut = rng.randint(4, len(words) - 2)
+            lines.append(" ".join(words[:cut]))
+            lines.append(" ".join(words[cut:]))
+        pages.append(Document(page_content="\n".join(lines), metadata={"source": PDF_PATH, "page": number}))
+    return pages
+
+
+@pytest.fixture(scope="session")
+def raw_pages():
+    """Raw page texts of the Regierungsprogramm, or synthetic pages of the same shape without the PDF."""
+    if os.path.exists(PDF_PATH):
+        from langchain_community.document_loaders import PyPDFLoader
+        return PyPDFLoader(PDF_PATH).load()
+    return synthetic_pages()
+
+
+@pytest.fixture(scope="session")
+def chunks(raw_pages):
+    """The corpus chunked exactly like ingestion does, so sizes follow the real chunk distribution."""
+    copies = [Document(page_content=page.page_content, metadata=dict(page.metadata)) for page in raw_pages]
+    return TextProcessor().process_documents(copies)
+
+
+@pytest.fixture(scope="session")
+def retrieved(chunks):
+    """A typical retrieval result: STANDARD_TOP_K chunks with metadata as the retriever returns it."""
+    picked = random.Random(11).sample(range(len(chunks)), STANDARD_TOP_K)
+    return [Document(page_content=chunks[i].page_content,
+                     metadata={"id": f"doc_{i}", "page": float(chunks[i].metadata["page"]), "source": PDF_PATH})
+            for i in picked]
+
+
+@pytest.fixture(scope="session")
+def hits_response(chunks):
+    """A search_records response with STANDARD_TOP_K hits, as Pinecone returns it."""
+    hits = [{"_id": f"doc_{i}", "_score": 1.0 / (i + 1),
+             "fields": {"text": chunk.page_content, "source": PDF_PATH, "page": chunk.metadata["page"],
+                        "chapter": "Soziales & Gesundheit", "section": "", "topic": "Soziales & Gesundheit"}}
+            for i, chunk in enumerate(chunks[:STANDARD_TOP_K])]
+    return search_response(hits)
+
+
+@pytest.fixture(scope="session")
+def chat_history():
+    """A long session: 50 question/answer pairs where the last rerun inserted every message twice."""
+    history = []
+    for turn in range(50):
+        history.append({"role": "user", "content": f"Frage {turn}: Was plant die Regierung zur Pflege?"})
+        history.append({"role": "assistant", "content": f"Antwort {turn}: " + SYNTHETIC_SENTENCES[turn % 8] * 20})
+    return history + [dict(message) for message in history]
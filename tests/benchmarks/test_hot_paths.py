@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from langchain_core.documents import Document
+
+from chat_history import generate_message_hash, deduplicate_history
+from chatbot import ChatBot
+from efficient_retriever import hit_to_document
+from simple_chatbot import SimpleChatbot
+from text_processor import TextProcessor
+
+# format_response and build_sources use no instance state, so the chatbots are created
+# without __init__ (which needs API keys and an index)
+chatbot = ChatBot.__new__(ChatBot)
+simple_chatbot = SimpleChatbot.__new__(SimpleChatbot)
+
+
+def test_format_response(benchmark, retrieved):
+    """Standard chatbot: answer plus cleaned sources as markdown, once per answer."""
+    sources = [{"page": doc.metadata["page"], "content": doc.page_content, "source": doc.metadata["source"]}
+               for doc in retrieved]
+    result = benchmark(chatbot.format_response, "Die Regierung plant mehrere Maßnahmen.", sources)
+    assert result.count("Seite") == len(sources)
+
+
+def test_build_sources(benchmark, retrieved):
+    """Simple-language chatbot: source cleaning for every retrieved chunk, once per answer."""
+    sources = benchmark(simple_chatbot.build_sources, retrieved)
+    assert len(sources) == len(retrieved)
+
+
+def test_clean_text(benchmark, raw_pages):
+    """Regex cleaning of every PDF page during ingestion."""
+    processor = TextProcessor()
+    cleaned = benchmark(lambda: [processor.clean_text(page.page_content) for page in raw_pages])
+    assert len(cleaned) == len(raw_pages)
+
+
+def test_split_document(benchmark, raw_pages):
+    """Sentence splitting of one cleaned page into chunks."""
+    processor = TextProcessor()
+    raw_page = raw_pages[len(raw_pages) // 2]
+    page = processor.prepare_document(Document(page_content=raw_page.page_content, metadata=dict(raw_page.metadata)))
+    chunks = benchmark(processor.split_document, page)
+    assert chunks
+
+
+def test_hit_parsing(benchmark, hits_response):
+    """Conversion of search_records hits into Documents, once per search call."""
+    documents = benchmark(lambda: [hit_to_document(hit) for hit in hits_response.result.hits])
+    assert len(documents) == len(hits_response.result.hits)
+
+
+def test_message_hash(benchmark, chat_history):
+    """Hashing of one long assistant answer, twice per question."""
+    benchmark(generate_message_hash, chat_history[1]["content"])
+
+
+def test_deduplicate_history(benchmark, chat_history):
+    """Deduplication of a long session, run on every Streamlit rerun."""
+    # Fresh dicts per round so the first call does not pre-compute the hashes for the others
+    deduplicated = benchmark.pedantic(deduplicate_history, rounds=50,
+                                      setup=lambda: (([dict(message) for message in chat_history],), {}))
+    assert len(deduplicated) == len(chat_history) // 2
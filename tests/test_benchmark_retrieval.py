@@ -0,0 +1,54 @@
+import pinecone_processor
+from benchmark_retrieval import BACKENDS, benchmark_backend, compare_to_baseline
+from efficient_retriever import EfficientPineconeRetriever
+from local_pinecone import LocalIndex
+
+QUERIES = ["Was gilt für Mieten?", "Was bekommen pflegende Angehörige?"]
+
+def local_factory(top_k):
+    index = LocalIndex("benchmark")
+    index.upsert_records("default", [
+        {"_id": "doc_0", "text": "Die Mietpreisbremse begrenzt die Indexierung der Mieten.", "page": 3},
+        {"_id": "doc_1", "text": "Pflegende Angehörige erhalten einen Bonus.", "page": 9},
+    ])
+    return EfficientPineconeRetriever(index=index, namespace="default", top_k=top_k).invoke
+
+def test_benchmark_counts_warmup_repetitions_and_errors():
+    """Only measured repetitions enter the statistics; failing queries are counted as errors."""
+    calls = []
+
+    def flaky_factory(top_k):
+        def search(query):
+            calls.append(query)
+            if "Pflege" in query:
+                raise RuntimeError("index unavailable")
+            return ["doc"] * top_k
+        return search
+
+    result = benchmark_backend("flaky", QUERIES[:1] + ["Pflege?"], top_k=2, warmup=1, repetitions=3, factory=flaky_factory)
+    assert len(calls) == 2 * (1 + 3)
+    assert result["latency"]["count"] == 3
+    assert result["errors"] == 3
+    assert result["mean_results"] == 2
+
+def test_local_backend_returns_results():
+    """The local index backend runs the real retriever code without network access."""
+    result = benchmark_backend("local", QUERIES, top_k=1, warmup=0, repetitions=2, factory=local_factory)
+    assert result["latency"]["count"] == 4
+    assert result["empty_results"] == 0
+
+def test_baseline_comparison_flags_slowdowns_beyond_tolerance():
+    """A p95 slowdown above the tolerance is a regression, one within it is not."""
+    baseline = {"efficient": {"latency": {"p50": 0.10, "p95": 0.20}, "errors": 0}}
+    within = {"efficient": {"latency": {"p50": 0.11, "p95": 0.22}, "errors": 0}}
+    slower = {"efficient": {"latency": {"p50": 0.11, "p95": 0.30}, "errors": 0}}
+    assert compare_to_baseline(within, baseline, tolerance=0.2) == []
+    regressions = compare_to_baseline(slower, baseline, tolerance=0.2)
+    assert len(regressions) == 1 and regressions[0].startswith("efficient p95")
+
+def test_pinecone_backends_bypass_the_retrieval_cache(monkeypatch):
+    """Measured repetitions hit the index, not the process-wide retrieval cache."""
+    monkeypatch.setattr(pinecone_processor, "PINECONE_BACKEND", "local")
+    monkeypatch.setattr(pinecone_processor, "_pinecone_instance", None)
+    for name in ("efficient", "hybrid"):
+        assert BACKENDS[name](3).__self__._cache is None
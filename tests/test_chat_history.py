@@ -0,0 +1,12 @@
+from chat_history import generate_message_hash, deduplicate_history
+
+def test_deduplicate_history_keeps_first_occurrence_and_adds_missing_hashes():
+    """Repeated messages are dropped in order; legacy messages without a hash get one."""
+    history = [
+        {"role": "user", "content": "Frage"},
+        {"role": "assistant", "content": "Antwort", "hash": generate_message_hash("Antwort")},
+        {"role": "user", "content": "Frage"},
+    ]
+    deduplicated = deduplicate_history(history)
+    assert [m["content"] for m in deduplicated] == ["Frage", "Antwort"]
+    assert history[0]["hash"] == generate_message_hash("Frage")
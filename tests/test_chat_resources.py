@@ -0,0 +1,148 @@
+from dataclasses import replace
+import pytest
+import pinecone_processor
+from chat_resources import ChatResources
+from chatbot import ChatBot
+from settings import Settings
+from simple_chatbot import SimpleChatbot
+
+@pytest.fixture
+def resources(monkeypatch):
+    monkeypatch.setattr(pinecone_processor, "PINECONE_BACKEND", "local")
+    monkeypatch.setattr(pinecone_processor, "_pinecone_instance", None)
+    settings = replace(Settings.load(env={}, secrets={}), openai_api_key="test", openai_base_url="http://127.0.0.1:9/v1",
+                       simple_chunks=True)
+    return ChatResources(settings=settings, vector_store=object())
+
+def test_components_are_created_once_per_configuration(resources):
+    """Retrievers and LLM clients are reused per top_k, language mode and token limit; traced clients are not."""
+    assert resources.retriever(5) is resources.retriever(5)
+    assert resources.retriever(5) is not resources.retriever(3)
+    assert resources.retriever(5, simple_language=True)._namespace == "default-einfach"
+    assert resources.llm(400) is resources.llm(400)
+    assert resources.llm(400, default_headers={"traceparent": "00-1-2-01"}) is not resources.llm(400)
+    assert resources.openai_client() is resources.openai_client()
+    assert resources.prompts is resources.prompts
+
+def test_sessions_share_resources_but_not_conversation_state(resources):
+    """Two sessions use the same retriever and prompts but keep their own history and retrieval context."""
+    first, second = (ChatBot(resources.vector_store, resources=resources) for _ in range(2))
+    assert first.retriever is second.retriever
+    assert first.regular_prompt is second.regular_prompt
+    assert first.memory is not second.memory and first.retrieval_context is not second.retrieval_context
+    first.memory.save_context({"question": "Was ist mit der Rente?"}, {"answer": "Sie bleibt stabil."})
+    assert second.memory.load_memory_variables({})["chat_history"] == []
+
+    simple_first, simple_second = SimpleChatbot(resources=resources), SimpleChatbot(resources=resources)
+    assert simple_first.retriever is simple_second.retriever is resources.retriever(resources.settings.simple_top_k)
+    assert simple_first.settings is resources.settings
+
+def test_api_keeps_one_conversation_per_session(resources, monkeypatch):
+    """API clients share retrievers but never each other's history; requests without a session start fresh."""
+    import api
+
+    monkeypatch.setattr(api, "_chatbots", api.new_chatbots(resources))
+    monkeypatch.setattr(api, "_sessions", None)
+    first = api.get_session_chatbots("a")
+    assert api.get_session_chatbots("a") is first
+    other = api.get_session_chatbots("b")
+    assert other[1].memory is not first[1].memory and other[1].retrieval_context is not first[1].retrieval_context
+    assert other[1].retriever is first[1].retriever
+    assert api.get_session_chatbots(None)[1].retrieval_context is not api.get_session_chatbots(None)[1].retrieval_context
+
+def test_api_serializes_requests_of_one_session(resources, monkeypatch):
+    """A request holds its session's lock while the chatbot runs; other sessions have their own lock."""
+    import api
+    from fastapi import Response
+
+    monkeypatch.setattr(api, "_chatbots", api.new_chatbots(resources))
+    monkeypatch.setattr(api, "_sessions", None)
+    session = api.get_session_chatbots("a")
+    assert api.get_session_chatbots("a").lock is session.lock
+    assert api.get_session_chatbots("b").lock is not session.lock
+
+    held = []
+    monkeypatch.setattr(session.chatbot, "get_response", lambda *args, **kwargs: held.append(session.lock.locked()) or "ok")
+    assert api.get_chatbot_response(api.QueryRequest(query="Was ist mit der Rente?", session_id="a"), Response()) == "ok"
+    assert held == [True] and not session.lock.locked()
+
+def test_preview_chunks_are_not_searched_again(resources, monkeypatch):
+    """FAQ and page questions get no preview; otherwise get_response answers from the preview's chunks."""
+    import chatbot
+    from langchain_core.documents import Document
+
+    class CountingRetriever:
+        def __init__(self):
+            self.queries = []
+
+        def get_relevant_documents(self, query):
+            self.queries.append(query)
+            return [Document(page_content="Die Mietpreisbremse gilt ab 2027.", metadata={"id": "doc_1", "page": 42})]
+
+    retriever = CountingRetriever()
+    monkeypatch.setattr(resources, "retriever", lambda *args, **kwargs: retriever)
+    monkeypatch.setattr(resources, "settings", replace(resources.settings, session_reuse=False))
+    bot = ChatBot(resources.vector_store, resources=resources)
+
+    monkeypatch.setattr(chatbot, "direct_lookup", lambda query: ("Auf Seite 42 ...", []))
+    assert bot.get_preview("Was steht auf Seite 42?") is None
+    monkeypatch.setattr(chatbot, "direct_lookup", lambda query: None)
+    monkeypatch.setattr(chatbot, "lookup_faq", lambda *args: {"question": "", "answer": "", "response": ""})
+    assert bot.get_preview("Was plant die Regierung zur Mietpreisbremse?") is None
+    assert retriever.queries == []
+
+    monkeypatch.setattr(chatbot, "lookup_faq", lambda *args: None)
+    preview, documents = bot.get_preview("Ab wann gilt die Mietpreisbremse?")
+    response = bot.get_response("Ab wann gilt die Mietpreisbremse?", extractive=True, documents=documents)
+    assert "2027" in preview and "2027" in response
+    assert retriever.queries == ["Ab wann gilt die Mietpreisbremse?"]
+
+    # In condense mode, preview chunks are answered with one call and no condense-question call
+    class CountingLLM:
+        def __init__(self):
+            self.calls = 0
+
+        def invoke(self, messages, **kwargs):
+            from langchain_core.messages import AIMessage
+            self.calls += 1
+            return AIMessage(content="Ab 2027.")
+
+    from usage_tracker import UsageTracker
+
+    llm = CountingLLM()
+    monkeypatch.setattr(resources, "llm", lambda *args, **kwargs: llm)
+    monkeypatch.setattr(chatbot, "get_usage_tracker", lambda: UsageTracker(path=None))
+    condense_bot = ChatBot(resources.vector_store, generation_mode="condense", resources=resources)
+    condense_bot.memory.save_context({"question": "Was plant die Regierung zur Mietpreisbremse?"}, {"answer": "..."})
+    assert "2027" in condense_bot.get_response("Und ab wann gilt sie?", documents=documents)
+    assert llm.calls == 1 and len(retriever.queries) == 1
+
+def test_single_call_mode_makes_one_completion_call_per_turn(resources, monkeypatch):
+    """Single-call mode answers first questions and follow-ups with exactly one LLM call each."""
+    import chatbot
+    from langchain_core.documents import Document
+    from langchain_core.messages import AIMessage
+    from usage_tracker import UsageTracker
+
+    class CountingLLM:
+        def __init__(self):
+            self.calls = 0
+
+        def invoke(self, messages, **kwargs):
+            self.calls += 1
+            return AIMessage(content="Die Mietpreisbremse gilt ab 2027.")
+
+    class StaticRetriever:
+        def get_relevant_documents(self, query):
+            return [Document(page_content="Die Mietpreisbremse gilt ab 2027.", metadata={"id": "doc_1", "page": 42})]
+
+    llm = CountingLLM()
+    monkeypatch.setattr(resources, "llm", lambda *args, **kwargs: llm)
+    monkeypatch.setattr(resources, "retriever", lambda *args, **kwargs: StaticRetriever())
+    monkeypatch.setattr(chatbot, "get_usage_tracker", lambda: UsageTracker(path=None))
+    bot = ChatBot(resources.vector_store, generation_mode="single_call", use_faq_store=False, resources=resources)
+
+    for turn, query in enumerate(["Was plant die Regierung zur Mietpreisbremse?", "Und ab wann gilt das?",
+                                  "Was steht zur Pflege?"], start=1):
+        assert "2027" in bot.get_response(query)
+        assert llm.calls == turn
@@ -0,0 +1,41 @@
+import pytest
+from langchain_core.documents import Document
+from chunk_sweep import run_variant, pareto_front, recommend
+from text_processor import TextProcessor
+
+GOLDEN = {"version": 1, "questions": [
+    {"id": "miete", "question": "Was gilt für die Mietpreisbremse?", "expected_terms": [["mietpreis"]]},
+    {"id": "pflege", "question": "Was bekommen pflegende Angehörige?", "expected_terms": [["pflege", "angehörig"]]},
+]}
+
+def pages():
+    text = ("Die Mietpreisbremse begrenzt die Indexierung der Mieten. " * 5
+            + "Pflegende Angehörige erhalten einen Bonus und mehr Beratung. " * 5)
+    return [Document(page_content=text, metadata={"page": 0, "source": "test.pdf"})]
+
+def test_variant_reports_size_ingestion_recall_and_prompt_tokens():
+    """Each variant is chunked from fresh copies and evaluated on its own local index."""
+    original = pages()
+    small = run_variant(original, [], GOLDEN, 120, 20, "recursive", top_k=2, system_prompt_tokens=50)
+    large = run_variant(original, [], GOLDEN, 400, 0, "recursive", top_k=2, system_prompt_tokens=50)
+    assert original[0].page_content == pages()[0].page_content
+    assert small["chunks"] > large["chunks"]
+    assert small["recall_at_k"] == 1.0
+    assert small["prompt_tokens"] > 50 and small["ingestion_seconds"] >= 0
+
+def test_pareto_front_and_recommendation():
+    """Dominated settings drop out; the cheapest setting within the recall tolerance is recommended."""
+    a = {"recall_at_k": 0.90, "mrr": 0.7, "prompt_tokens": 900, "index_characters": 1000}
+    b = {"recall_at_k": 0.89, "mrr": 0.7, "prompt_tokens": 600, "index_characters": 1000}
+    c = {"recall_at_k": 0.80, "mrr": 0.6, "prompt_tokens": 950, "index_characters": 1200}
+    front = pareto_front([a, b, c])
+    assert a in front and b in front and c not in front
+    assert recommend([a, b, c], tolerance=0.02) is b
+    assert recommend([a, b, c], tolerance=0.0) is a
+
+def test_splitter_arguments_are_validated():
+    """Unknown splitters and overlaps not smaller than the chunk size are configuration errors."""
+    with pytest.raises(ValueError):
+        TextProcessor(splitter="unknown")
+    with pytest.raises(ValueError):
+        TextProcessor(chunk_size=100, chunk_overlap=100)
@@ -0,0 +1,61 @@
+from langchain_core.documents import Document
+from document_structure import parse_toc, resolve_toc_pages, tag_chunks
+from topic_classifier import classify_query
+
+TOC_PAGE = "\n".join([
+    "Inhaltsverzeichnis",
+    "1. Wirtschaft und Standort ........ 3",
+    "1.1 Steuern und Abgaben ........ 3",
+    "1.2 Industrie ........ 4",
+    "2. Klima und Umwelt ........ 5",
+    "2.1 Energie ........ 5",
+])
+
+def make_pages():
+    return [
+        Document(page_content="Regierungsprogramm", metadata={"page": 0}),
+        Document(page_content=TOC_PAGE, metadata={"page": 1}),
+        Document(page_content="Vorwort", metadata={"page": 2}),
+        Document(page_content="Wirtschaft und Standort\nSteuern und Abgaben\nDie Steuerlast sinkt.", metadata={"page": 4}),
+        Document(page_content="Industrie\nExport stärken.", metadata={"page": 5}),
+        Document(page_content="Klima und Umwelt\nEnergie\nAusbau der Photovoltaik.", metadata={"page": 6}),
+    ]
+
+def test_parse_toc_resolves_printed_page_offset():
+    """TOC entries get their level from the numbering and are shifted to PDF page indices."""
+    pages = make_pages()
+    entries, toc_pages = parse_toc(pages)
+    assert toc_pages == [1]
+    assert entries[0] == (1, "Wirtschaft und Standort", 3)
+    assert entries[1] == (2, "Steuern und Abgaben", 3)
+
+    resolved = resolve_toc_pages(entries, pages, toc_pages)
+    # Printed page 3 is the fourth page of the PDF (index 3)
+    assert resolved[0] == (1, "Wirtschaft und Standort", 3)
+    assert resolved[3] == (1, "Klima und Umwelt", 5)
+
+def test_tag_chunks_assigns_chapter_section_and_topic():
+    """Chunks inherit the last chapter/section that started before them."""
+    entries = [(1, "Wirtschaft und Standort", 3), (2, "Steuern und Abgaben", 3),
+               (2, "Industrie", 4), (1, "Klima und Umwelt", 5), (2, "Energie", 5)]
+    chunks = tag_chunks([
+        Document(page_content="Wirtschaft und Standort. Steuern und Abgaben. Die Steuerlast sinkt.", metadata={"page": 3}),
+        Document(page_content="Weitere Entlastungen für Betriebe.", metadata={"page": 3}),
+        Document(page_content="Export stärken.", metadata={"page": 4}),
+        Document(page_content="Klima und Umwelt. Ausbau der Photovoltaik.", metadata={"page": 5}),
+    ], entries)
+
+    assert (chunks[0].metadata["chapter"], chunks[0].metadata["section"]) == ("Wirtschaft und Standort", "Steuern und Abgaben")
+    assert chunks[1].metadata["section"] == "Steuern und Abgaben"
+    # "Industrie" is not in the chunk text, so it applies from the next page only
+    assert chunks[2].metadata["section"] == "Steuern und Abgaben"
+    assert (chunks[3].metadata["chapter"], chunks[3].metadata["section"]) == ("Klima und Umwelt", "")
+    assert chunks[0].metadata["topic"] == "Wirtschaft & Steuern"
+    assert chunks[3].metadata["topic"] == "Umwelt & Klima"
+
+def test_classify_query_only_returns_unambiguous_topics():
+    """Questions spanning several topic areas are not filtered."""
+    assert classify_query("Ab wann gilt die Mietpreisbremse?")[0] == "Wohnen & Infrastruktur"
+    assert classify_query("Was passiert mit der Landesverteidigung?")[0] == "Sicherheit & Migration"
+    assert classify_query("Klimaschutz und Steuern")[0] is None
+    assert classify_query("Hallo")[0] is None
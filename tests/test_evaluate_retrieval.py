@@ -0,0 +1,36 @@
+from langchain_core.documents import Document
+from evaluate_retrieval import load_golden_set, is_relevant, score_ranking, evaluate, compare_quality
+
+QUESTION = {"id": "q", "question": "Was plant die Regierung zur KI?", "expected_terms": [["ki", "verwaltung"], ["künstliche intelligenz"]]}
+
+def doc(text, record_id="doc_0", page=0):
+    return Document(page_content=text, metadata={"id": record_id, "page": page})
+
+def test_golden_set_is_versioned_and_complete():
+    """Every golden question has an ID, a question and at least one way to judge relevance."""
+    golden = load_golden_set()
+    assert golden["version"] >= 1
+    ids = [q["id"] for q in golden["questions"]]
+    assert len(ids) == len(set(ids))
+    assert all(q["expected_terms"] or q["expected_pages"] or q["expected_chunks"] for q in golden["questions"])
+
+def test_relevance_uses_term_groups_with_whole_words_for_short_terms():
+    """Short terms only match whole words; expected pages take precedence over terms."""
+    assert is_relevant(doc("Die Verwaltung setzt KI gezielt ein."), QUESTION)
+    assert not is_relevant(doc("Die Verwaltung baut Kinderbetreuung aus."), QUESTION)
+    assert is_relevant(doc("Beliebiger Text", page=7), {**QUESTION, "expected_pages": [7]})
+
+def test_recall_mrr_and_context_tokens():
+    """The first relevant chunk at rank 2 gives MRR 0.5; a miss counts as recall 0."""
+    ranking = [doc("Pflegegeld steigt.", "doc_1"), doc("Künstliche Intelligenz in Ämtern.", "doc_2")]
+    scores = score_ranking(ranking, QUESTION, k=2)
+    assert scores["recall"] == 1.0 and scores["reciprocal_rank"] == 0.5
+    assert score_ranking(ranking, QUESTION, k=1)["recall"] == 0.0
+
+    golden = {"version": 1, "questions": [QUESTION, {**QUESTION, "id": "miss", "expected_terms": [["mietpreis"]]}]}
+    result = evaluate(lambda query: ranking, golden, k=2)
+    assert result["recall_at_k"] == 0.5 and result["misses"] == ["miss"]
+    assert result["mean_context_tokens"] > 0
+
+    baseline = {"local@2": {**result, "recall_at_k": 0.8}}
+    assert compare_quality({"local@2": result}, baseline)[0].startswith("local@2 recall_at_k")
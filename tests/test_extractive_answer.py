@@ -0,0 +1,50 @@
+from dataclasses import replace
+
+import pytest
+from langchain_core.documents import Document
+from extractive_answer import split_sentences, build_extractive_answer, NO_RESULTS_ANSWER
+from llm_guard import llm_slot, LLMOverloadedError, get_llm_semaphore
+from settings import get_settings
+
+DOCUMENTS = [
+    Document(page_content="Die Mietpreisbremse begrenzt die Indexierung auf maximal 2 % ab 2027. "
+                          "Dies gilt z.B. für Altbauwohnungen und Genossenschaftswohnungen.",
+             metadata={"page": 42.0, "source": "data/Regierungsprogramm_2025.pdf"}),
+    Document(page_content="Die Indexierung wird begrenzt. Die Mietpreisbremse begrenzt die Indexierung auf maximal 2 % ab 2027. "
+                          "Der Ausbau der Photovoltaik auf öffentlichen Gebäuden wird beschleunigt.",
+             metadata={"page": 43, "source": "data/Regierungsprogramm_2025.pdf"}),
+]
+
+def test_split_sentences_keeps_abbreviations():
+    """Abbreviations like "z.B." do not end a sentence."""
+    sentences = split_sentences(DOCUMENTS[0].page_content)
+    assert len(sentences) == 2
+    assert sentences[1].startswith("Dies gilt z.B. für")
+
+def test_extractive_answer_cites_pages_and_skips_duplicates():
+    """The best matching sentence comes first with its page; overlap duplicates appear once."""
+    answer = build_extractive_answer("Was plant die Regierung zur Mietpreisbremse?", DOCUMENTS)
+    lines = [line for line in answer.split("\n") if line.startswith("- ")]
+    assert lines[0] == "- Die Mietpreisbremse begrenzt die Indexierung auf maximal 2 % ab 2027. (Seite 42)"
+    assert sum("Mietpreisbremse begrenzt" in line for line in lines) == 1
+    assert build_extractive_answer("Mietpreisbremse?", []) == NO_RESULTS_ANSWER
+
+def test_extractive_answer_respects_max_sentences():
+    """The sentence limit passed in caps the bullet list."""
+    answer = build_extractive_answer("Was plant die Regierung zur Mietpreisbremse?", DOCUMENTS, max_sentences=1)
+    assert len([line for line in answer.split("\n") if line.startswith("- ")]) == 1
+
+def test_llm_slot_raises_when_all_slots_are_busy():
+    """Requests beyond the configured concurrency limit fail fast so the caller can fall back."""
+    settings = replace(get_settings(), llm_max_concurrent_requests=1, llm_queue_timeout_seconds=0.01)
+    semaphore = get_llm_semaphore(1)
+    assert semaphore.acquire(blocking=False)
+    try:
+        with pytest.raises(LLMOverloadedError):
+            with llm_slot(settings):
+                pass
+    finally:
+        semaphore.release()
+
+    with llm_slot(settings):
+        pass
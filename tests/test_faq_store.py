@@ -0,0 +1,67 @@
+from dataclasses import replace
+from langchain_core.documents import Document
+import chatbot
+import pinecone_processor
+import simple_chatbot
+from chat_resources import ChatResources
+from faq_store import FAQStore, normalize_question, split_response
+from settings import Settings
+
+RESPONSE = "Die Mietpreisbremse gilt ab 2026.\n\n---\n\n### 📚 Quellen\n\n**[1] Seite 42** - *Regierungsprogramm_2025.pdf*\n> Mieten\n\n"
+
+def make_store():
+    store = FAQStore("v1")
+    store.add("chatbot", False, "Was plant die Regierung zur Mietpreisbremse?", RESPONSE, vetted=True)
+    store.add("chatbot", False, "Was plant die Regierung bei den Pensionen?", "Pensionen werden angepasst.\n\n")
+    return store
+
+def test_exact_lookup_ignores_case_and_punctuation():
+    """Questions match after normalization; the answer is split from the sources."""
+    entry = make_store().lookup("was plant die Regierung zur  Mietpreisbremse", "chatbot")
+    assert entry["response"] == RESPONSE
+    assert entry["answer"] == "Die Mietpreisbremse gilt ab 2026."
+    assert normalize_question("Was? plant,  die") == "was plant die"
+    assert split_response(RESPONSE) == "Die Mietpreisbremse gilt ab 2026."
+
+def test_semantic_lookup_matches_rephrased_questions():
+    """Different wording with the same content terms is served from the store."""
+    store = make_store()
+    assert store.lookup("Was plant eigentlich die Regierung bei der Mietpreisbremse?", "chatbot") is not None
+    assert store.lookup("Was plant die Regierung zur Teuerung?", "chatbot") is None
+
+def test_only_vetted_answers_for_the_right_mode_are_served():
+    """Pending answers and other chatbots or language modes are not served."""
+    store = make_store()
+    assert store.lookup("Was plant die Regierung bei den Pensionen?", "chatbot") is None
+    assert store.lookup("Was plant die Regierung zur Mietpreisbremse?", "chatbot", simple_language=True) is None
+    assert store.lookup("Was plant die Regierung zur Mietpreisbremse?", "simple_chatbot") is None
+
+    assert store.approve(["Was plant die Regierung bei den Pensionen?"]) == 1
+    assert store.lookup("Was plant die Regierung bei den Pensionen?", "chatbot") is not None
+
+def test_store_round_trip(tmp_path):
+    """Saved stores load with their corpus version and entries."""
+    path = str(tmp_path / "faq_store.json")
+    make_store().save(path)
+    loaded = FAQStore.load(path)
+    assert loaded.corpus_version == "v1"
+    assert len(loaded) == 2
+    assert loaded.lookup("Was plant eigentlich die Regierung bei der Mietpreisbremse?", "chatbot") is not None
+
+def test_follow_up_after_faq_hit_does_not_reuse_older_chunks(monkeypatch):
+    """A FAQ answer resets the follow-up context, so the next question is searched afresh."""
+    monkeypatch.setattr(pinecone_processor, "PINECONE_BACKEND", "local")
+    monkeypatch.setattr(pinecone_processor, "_pinecone_instance", None)
+    settings = replace(Settings.load(env={}, secrets={}), openai_api_key="test")
+    resources = ChatResources(settings=settings, vector_store=object())
+    entry = {"question": "Was plant die Regierung zur Mietpreisbremse?", "answer": "Die Mietpreisbremse gilt ab 2026.",
+             "response": RESPONSE}
+    monkeypatch.setattr(chatbot, "lookup_faq", lambda *args: entry)
+    monkeypatch.setattr(simple_chatbot, "lookup_faq", lambda *args: entry)
+
+    for bot in (chatbot.ChatBot(resources.vector_store, resources=resources),
+                simple_chatbot.SimpleChatbot(resources=resources)):
+        bot.retrieval_context.remember("Was ist mit der Pension?",
+                                       [Document(page_content="Pensionen werden angepasst.", metadata={"id": "doc_9"})])
+        assert bot.get_response("Was plant die Regierung zur Mietpreisbremse?") == RESPONSE
+        assert not bot.retrieval_context.is_follow_up("Und ab wann gilt das?")
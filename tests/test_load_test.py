@@ -0,0 +1,42 @@
+import asyncio
+import httpx
+from fastapi import FastAPI
+from load_test import LoadTester, build_report, find_saturation
+from perf_stats import percentile, summarize
+
+def make_tester():
+    app = FastAPI()
+
+    @app.post("/api/chat")
+    async def chat(request: dict):
+        await asyncio.sleep(0.01)
+        if "Pflege" in request["query"]:
+            return "Ein Fehler ist aufgetreten: Testfehler"
+        return "Die Mietpreisbremse gilt ab 2027."
+
+    queries = [("Was gilt für Mieten?", 3.0), ("Was gilt für die Pflege?", 1.0)]
+    return LoadTester("http://testserver", queries=queries, seed=7, transport=httpx.ASGITransport(app=app))
+
+def test_percentile_interpolates_between_ranks():
+    """Percentiles interpolate linearly and the summary reports p50/p95/p99."""
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 50) == 2.5
+    assert percentile(values, 100) == 4.0
+    assert set(summarize(values)) >= {"p50", "p95", "p99", "mean", "count"}
+
+def test_closed_loop_reports_latency_errors_and_throughput():
+    """Application errors in HTTP 200 responses count as errors; only successes enter the percentiles."""
+    results, wall_time = asyncio.run(make_tester().run_closed_loop(4, max_requests=20))
+    report = build_report(results, wall_time, "closed", 4)
+    assert report["requests"] == 20
+    assert report["errors"] == report["error_types"]["app_error"] > 0
+    assert report["latency"]["count"] == 20 - report["errors"]
+    assert report["ttft"]["p50"] <= report["latency"]["p50"]
+    assert report["throughput_rps"] > 0
+
+def test_open_loop_and_saturation_point():
+    """Open loop sends the requested number of arrivals; saturation is the first level near peak throughput."""
+    results, _ = asyncio.run(make_tester().run_open_loop(200, max_requests=10))
+    assert len(results) == 10
+    reports = [{"throughput_rps": 10.0}, {"throughput_rps": 19.5}, {"throughput_rps": 20.0}]
+    assert find_saturation(reports) is reports[1]
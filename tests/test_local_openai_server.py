@@ -0,0 +1,48 @@
+import openai
+import pytest
+from fastapi.testclient import TestClient
+from local_openai_server import CompletionSimulator, create_app
+from token_counter import split_tokens, count_tokens
+
+MESSAGES = [
+    {"role": "system", "content": "Beantworte Fragen zum Regierungsprogramm."},
+    {"role": "user", "content": "Was plant die Regierung zur Mietpreisbremse?"},
+]
+
+def make_client(**kwargs):
+    simulator = CompletionSimulator(ttft_ms=0, tokens_per_second=0, jitter=0, seed=1, **kwargs)
+    http_client = TestClient(create_app(simulator))
+    client = openai.OpenAI(api_key="test", base_url="http://testserver/v1", http_client=http_client, max_retries=0)
+    return client, simulator
+
+def test_split_tokens_round_trips_text():
+    """Token pieces concatenate back to the original text."""
+    text = "Die Mietpreisbremse gilt ab 2027, z.B. für Altbauten."
+    assert "".join(split_tokens(text)) == text
+    assert 0 < len(split_tokens(text)) <= count_tokens(text)
+
+def test_completion_respects_max_tokens_and_reports_usage():
+    """Non-streaming answers are cut at max_tokens and the usage is accounted."""
+    client, simulator = make_client(completion_tokens=50)
+    response = client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES, max_tokens=20)
+    assert response.usage.completion_tokens == 20
+    assert response.choices[0].finish_reason == "length"
+    assert response.choices[0].message.content.startswith("Zur Frage „Was plant die Regierung")
+    assert simulator.stats["completion_tokens"] == 20
+
+def test_streaming_yields_token_chunks_and_usage():
+    """Streaming sends one chunk per token and a final usage chunk on request."""
+    client, simulator = make_client(completion_tokens=30)
+    chunks = list(client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES, stream=True,
+                                                 stream_options={"include_usage": True}))
+    pieces = [c.choices[0].delta.content for c in chunks if c.choices and c.choices[0].delta.content]
+    assert len(pieces) == 30
+    assert chunks[-1].usage.completion_tokens == 30
+    assert simulator.stats["stream_requests"] == 1
+
+def test_injected_errors_surface_as_rate_limits():
+    """An error rate of 1 makes every request fail with HTTP 429."""
+    client, simulator = make_client(error_rate=1.0)
+    with pytest.raises(openai.RateLimitError):
+        client.chat.completions.create(model="gpt-4o-mini", messages=MESSAGES)
+    assert simulator.stats["errors"] == 1
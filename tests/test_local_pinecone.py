@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+import pytest
+from local_pinecone import LocalIndex, LocalEmbedder, LocalPineconeError, MAX_UPSERT_BATCH, seed_from_page_index
+from efficient_retriever import EfficientPineconeRetriever
+
+RECORDS = [
+    {"_id": "doc_0", "text": "Die Mietpreisbremse begrenzt die Indexierung der Mieten auf maximal 2 %.", "page": 41, "topic": "wohnen"},
+    {"_id": "doc_1", "text": "Der Ausbau der Photovoltaik auf öffentlichen Gebäuden wird beschleunigt.", "page": 77, "topic": "energie"},
+    {"_id": "doc_2", "text": "Pflegekräfte erhalten bessere Arbeitsbedingungen und ein höheres Pflegegeld.", "page": 102, "topic": "gesundheit"},
+]
+
+def make_index(**kwargs):
+    index = LocalIndex("test", **kwargs)
+    index.upsert_records("default", RECORDS)
+    return index
+
+def test_local_embedder_is_deterministic_and_normalized():
+    """The same text always gets the same unit-length vector."""
+    embedder = LocalEmbedder()
+    vector = embedder.embed_query("Mietpreisbremse für Altbauwohnungen")
+    assert vector == LocalEmbedder().embed_query("Mietpreisbremse für Altbauwohnungen")
+    assert abs(sum(value * value for value in vector) - 1.0) < 1e-9
+
+def test_search_records_ranks_filters_and_counts():
+    """Search returns Pinecone-shaped hits, honours metadata filters and stats count records."""
+    index = make_index()
+    hits = index.search_records("default", {"inputs": {"text": "Was gilt für die Mieten?"}, "top_k": 2},
+                                fields=["text", "page"]).result.hits
+    assert hits[0]._id == "doc_0"
+    assert set(hits[0].fields) == {"text", "page"}
+
+    filtered = index.search_records("default", {"inputs": {"text": "Mieten"}, "top_k": 3,
+                                                "filter": {"topic": {"$eq": "energie"}}}).result.hits
+    assert [hit._id for hit in filtered] == ["doc_1"]
+    assert index.describe_index_stats()["total_vector_count"] == 3
+
+def test_local_index_persists_and_injects_errors(tmp_path):
+    """Records survive a reload, and an error rate of 1 fails every call."""
+    path = str(tmp_path / "local_index.json")
+    make_index(path=path).flush()
+    reloaded = LocalIndex("test", path=path)
+    assert reloaded.describe_index_stats()["namespaces"]["default"]["vector_count"] == 3
+
+    with pytest.raises(LocalPineconeError):
+        reloaded.error_rate = 1.0
+        reloaded.search_records("default", {"inputs": {"text": "Pflege"}, "top_k": 1})
+
+def test_bulk_load_saves_the_index_file_once(tmp_path, monkeypatch):
+    """Upserts only mark the index dirty; a bulk load writes the file once at the end."""
+    path = str(tmp_path / "local_index.json")
+    index = LocalIndex("test", path=path)
+    saves = []
+    monkeypatch.setattr(index, "save", lambda save_path: saves.append(save_path))
+    chunks = {f"doc_{i}": {"text": f"Maßnahme Nummer {i}", "page": i} for i in range(3 * MAX_UPSERT_BATCH)}
+    assert seed_from_page_index(index, SimpleNamespace(chunks=chunks), "default") == len(chunks)
+    assert saves == [path]
+    index.flush()
+    assert saves == [path]
+
+def test_efficient_retriever_runs_against_local_index():
+    """The retriever can target a local index and builds documents from its hits."""
+    retriever = EfficientPineconeRetriever(index=make_index(), namespace="default", top_k=1)
+    documents = retriever.invoke("Pflegegeld")
+    assert documents[0].metadata["id"] == "doc_2"
+    assert documents[0].metadata["page"] == 102
+
+def test_delete_removes_records_and_is_saved_on_flush(tmp_path):
+    """Deleted records disappear from searches and from the saved index file."""
+    path = str(tmp_path / "local_index.json")
+    index = make_index(path=path)
+    index.delete(ids=["doc_0", "doc_missing"], namespace="default")
+    index.flush()
+    reloaded = LocalIndex("test", path=path)
+    assert reloaded.describe_index_stats()["total_vector_count"] == 2
+    hits = reloaded.search_records("default", {"inputs": {"text": "Mieten"}, "top_k": 3}).result.hits
+    assert "doc_0" not in [hit._id for hit in hits]
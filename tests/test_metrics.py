@@ -0,0 +1,38 @@
+import pytest
+from metrics import Counter, Histogram, timed, render_metrics, record_cache_lookup, STAGE_SECONDS, CACHE_LOOKUPS
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    """A value equal to a bucket bound lands in that bucket; +Inf counts every observation."""
+    histogram = Histogram("test_latency_seconds", "Test latency", ["stage"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, stage="search")
+    text = "\n".join(histogram.render())
+    assert 'koalitionskompass_test_latency_seconds_bucket{stage="search",le="0.1"} 2' in text
+    assert 'koalitionskompass_test_latency_seconds_bucket{stage="search",le="1"} 3' in text
+    assert 'koalitionskompass_test_latency_seconds_bucket{stage="search",le="+Inf"} 4' in text
+    assert 'koalitionskompass_test_latency_seconds_count{stage="search"} 4' in text
+
+def test_timed_works_as_decorator_and_context_manager():
+    """Both forms record one observation per call into the stage histogram."""
+    before = STAGE_SECONDS.snapshot(stage="test_stage")["count"]
+
+    @timed("test_stage")
+    def work():
+        return 42
+
+    assert work() == 42
+    with timed("test_stage"):
+        pass
+    assert STAGE_SECONDS.snapshot(stage="test_stage")["count"] == before + 2
+
+def test_counters_reject_wrong_labels_and_render_as_prometheus_text():
+    """Counters need exactly their declared labels and appear with HELP and TYPE lines."""
+    counter = Counter("test_events_total", "Test events", ["kind"])
+    counter.inc(3, kind="a")
+    with pytest.raises(ValueError):
+        counter.inc(kind="a", extra="b")
+    record_cache_lookup("faq", True)
+    text = render_metrics()
+    assert "# TYPE koalitionskompass_test_events_total counter" in text
+    assert 'koalitionskompass_test_events_total{kind="a"} 3' in text
+    assert CACHE_LOOKUPS.value(cache="faq", result="hit") >= 1
@@ -0,0 +1,53 @@
+from langchain_core.documents import Document
+import query_router
+from page_index import PageIndex
+from query_router import route_query, lookup_route, direct_lookup
+
+CHUNKS = [
+    Document(page_content="Leistbares Wohnen ist ein zentrales Ziel.", metadata={"page": 41, "source": "data/rp.pdf", "headings": ["Leistbares Wohnen"]}),
+    Document(page_content="Die Mietpreisbremse gilt ab 2027.", metadata={"page": 42, "source": "data/rp.pdf", "headings": ["Leistbares Wohnen"]}),
+    Document(page_content="Der Wohnbau wird gefördert.", metadata={"page": 42, "source": "data/rp.pdf", "headings": []}),
+    Document(page_content="Die Polizei wird gestärkt.", metadata={"page": 60, "source": "data/rp.pdf", "headings": ["Sicherheit & Migration"]}),
+]
+
+def build_index():
+    return PageIndex.build(CHUNKS, [f"doc_{i}" for i in range(len(CHUNKS))])
+
+def test_route_query_detects_page_and_section_questions():
+    """Page and chapter questions are routed, regular questions are not."""
+    assert route_query("Was steht auf Seite 42?") == ("page", 42)
+    assert route_query("Was steht im Kapitel Sicherheit?") == ("section", "Sicherheit")
+    assert route_query("Welche Maßnahmen gibt es gegen die Teuerung?") is None
+    assert route_query("Welche Seite?") is None
+
+def test_lookup_page_returns_chunks_in_order():
+    """All chunks of a page are returned with their record IDs."""
+    documents = build_index().lookup_page(42)
+    assert [doc.metadata["id"] for doc in documents] == ["doc_1", "doc_2"]
+    assert documents[0].metadata["page"] == 42
+
+def test_find_section_matches_partial_names():
+    """Sections are found by partial or approximate names."""
+    index = build_index()
+    title, documents = index.find_section("Sicherheit")
+    assert title == "Sicherheit & Migration"
+    assert [doc.metadata["id"] for doc in documents] == ["doc_3"]
+    assert index.find_section("Wohnen")[0] == "Leistbares Wohnen"
+    assert index.find_section("Raumfahrt") == (None, [])
+
+def test_lookup_route_and_persistence(tmp_path):
+    """The index survives a save/load round trip and answers routed queries."""
+    path = str(tmp_path / "page_index.json")
+    build_index().save(path)
+    index = PageIndex.load(path)
+    intro, documents = lookup_route(("page", 42), index)
+    assert "Seite 42" in intro
+    assert len(documents) == 2
+    assert lookup_route(("page", 999), index) is None
+
+def test_unknown_pages_and_sections_fall_back_to_retrieval(monkeypatch):
+    """A routed question whose page or section has no chunks goes to regular vector search."""
+    monkeypatch.setattr(query_router, "get_page_index_instance", build_index)
+    assert direct_lookup("Was steht im Kapitel Bildung zur Ganztagsschule?") is None
+    assert direct_lookup("Was steht auf Seite 999?") is None
+    assert direct_lookup("Was steht im Kapitel Sicherheit?")[1][0].metadata["id"] == "doc_3"
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+import query_log
+from query_log import QueryLog, load_query_log, log_query
+from load_test import LoadTester
+from replay_traffic import build_schedule, replay, traffic_profile
+
+def test_queries_are_logged_off_the_request_path(tmp_path, monkeypatch):
+    """Entries carry normalized query, modes, hashed session, latency and status once the writer flushed."""
+    log = QueryLog(path=str(tmp_path / "queries.jsonl"))
+    monkeypatch.setattr(query_log, "QUERY_LOG_ENABLED", True)
+    monkeypatch.setattr(query_log, "_query_log_instance", log)
+    with log_query("api", "  Was gilt für   Mieten? ", simple_language=True, session_id="browser-1"):
+        pass
+    with pytest.raises(RuntimeError):
+        with log_query("api", "Was gilt für die Pflege?"):
+            raise RuntimeError("Testfehler")
+    log.flush()
+
+    ok, failed = load_query_log(log.path)
+    assert ok["query"] == "Was gilt für Mieten?" and ok["simple_language"] and ok["status"] == "ok"
+    assert ok["session"] != "browser-1" and len(ok["session"]) == 12
+    assert failed["status"] == "error" and failed["session"] is None
+
+def test_concurrent_first_requests_start_one_writer(tmp_path, monkeypatch):
+    """Threads racing for the query log get the same instance, so one writer thread owns the file."""
+    created = []
+
+    class SlowQueryLog(QueryLog):
+        def __init__(self):
+            time.sleep(0.05)
+            created.append(self)
+            super().__init__(path=str(tmp_path / "queries.jsonl"))
+
+    monkeypatch.setattr(query_log, "QueryLog", SlowQueryLog)
+    monkeypatch.setattr(query_log, "_query_log_instance", None)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        logs = list(executor.map(lambda _: query_log.get_query_log(), range(8)))
+    assert len(created) == 1 and all(log is created[0] for log in logs)
+
+def test_schedule_scales_rates_and_caps_idle_gaps():
+    """Offsets follow the recorded gaps divided by the speed; long pauses are shortened first."""
+    entries = [{"ts": 100.0}, {"ts": 101.0}, {"ts": 3700.0}, {"ts": 3702.0}]
+    assert build_schedule(entries) == [0.0, 1.0, 3600.0, 3602.0]
+    assert build_schedule(entries, speed=2.0, max_gap=10.0) == [0.0, 0.5, 5.5, 6.5]
+
+def test_replay_reports_throughput_and_cache_hit_rates():
+    """Replaying against a deployment reads the cache counters before and after the run."""
+    app = FastAPI()
+    lookups = {"hit": 0, "miss": 0}
+
+    @app.post("/api/chat")
+    async def chat(request: dict):
+        lookups["hit" if request["query"] in seen else "miss"] += 1
+        seen.add(request["query"])
+        return "Die Mietpreisbremse gilt ab 2027."
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse("".join(f'koalitionskompass_cache_lookups_total{{cache="faq",result="{result}"}} {count}\n'
+                                         for result, count in lookups.items()))
+
+    seen = set()
+    entries = [{"ts": i * 0.01, "query": query, "status": "ok", "latency": 1.0}
+               for i, query in enumerate(["Mieten?", "Pflege?", "Mieten?", "Mieten?"])]
+    tester = LoadTester("http://testserver", queries=[("Mieten?", 1.0)], transport=httpx.ASGITransport(app=app))
+    results, wall_time, cache_rates = asyncio.run(replay(tester, entries, build_schedule(entries, speed=10.0)))
+    assert len(results) == 4 and not any(r["error"] for r in results)
+    assert cache_rates["faq"] == {"hits": 2, "misses": 2, "hit_rate": 0.5}
+    assert traffic_profile(entries)["repeat_share"] == 0.5
@@ -0,0 +1,33 @@
+from query_rewriter import extract_salient_terms, rewrite_query, generate_query_variants
+
+def test_extract_salient_terms_prefers_nouns():
+    """Capitalized content words come first, stopwords are dropped."""
+    terms = extract_salient_terms("Welche Maßnahmen gibt es gegen die steigende Teuerung?")
+    assert terms[:2] == ["Maßnahmen", "Teuerung"]
+    assert "gegen" not in terms
+    assert "Welche" not in terms
+
+def test_rewrite_query_carries_terms_from_previous_turn():
+    """Follow-ups get the salient terms of the previous question appended."""
+    rewritten = rewrite_query("Und ab wann gilt das?", "Was plant die Regierung zur Mietpreisbremse?")
+    assert rewritten.startswith("Und ab wann gilt das?")
+    assert "Mietpreisbremse" in rewritten
+
+def test_rewrite_query_without_history_is_unchanged():
+    """The first question of a conversation is used as is."""
+    assert rewrite_query("Was steht zur Pflege?", None) == "Was steht zur Pflege?"
+    assert rewrite_query("Was steht zur Pflege?", "Was steht zur Pflege?") == "Was steht zur Pflege?"
+
+def test_rewrite_query_leaves_self_contained_questions_unchanged():
+    """A question on a new topic is not mixed with the terms of the previous one."""
+    previous = "Was plant die Regierung zur Mietpreisbremse im Wohnbau?"
+    assert rewrite_query("Was steht zur Pflege?", previous) == "Was steht zur Pflege?"
+    assert "Mietpreisbremse" in rewrite_query("Ab 2027?", previous)
+
+def test_generate_query_variants_uses_synonym_table():
+    """The original query comes first, followed by synonym variants."""
+    variants = generate_query_variants("Welche Maßnahmen gibt es gegen die Teuerung?", max_variants=3)
+    assert variants[0] == "Welche Maßnahmen gibt es gegen die Teuerung?"
+    assert "Welche Maßnahmen gibt es gegen die Inflation?" in variants
+    assert len(variants) == 3
+    assert generate_query_variants("Hallo", max_variants=3) == ["Hallo"]
@@ -0,0 +1,43 @@
+from dataclasses import replace
+
+from langchain_core.documents import Document
+from reranker import LexicalScorer, BM25Scorer, Reranker, get_reranker_instance
+from settings import get_settings
+
+CHUNKS = [
+    "Die Bundesregierung bekennt sich zu einer starken Landesverteidigung.",
+    "Die Mietpreisbremse begrenzt die Indexierung der Mieten auf maximal 2 % ab 2027.",
+    "Pflegende Angehörige sollen durch einen Ausbau des Pflegegelds entlastet werden.",
+]
+
+def make_docs():
+    return [Document(page_content=text, metadata={"id": f"doc_{i}"}) for i, text in enumerate(CHUNKS)]
+
+def test_lexical_scorer_matches_german_compounds():
+    """Query terms also match inside compounds like Pflegegeld."""
+    scores = LexicalScorer().score("Was gibt es für pflegende Angehörige beim Pflegegeld?", CHUNKS)
+    assert scores.index(max(scores)) == 2
+
+def test_bm25_scorer_ranks_matching_chunk_first():
+    """BM25 prefers the chunk containing the rare query term."""
+    scores = BM25Scorer().score("Mietpreisbremse Indexierung", CHUNKS)
+    assert scores.index(max(scores)) == 1
+    assert scores[0] == 0.0
+
+def test_reranker_keeps_top_n_and_annotates_scores():
+    """Only the best top_n documents are returned, with their rerank score."""
+    reranked = Reranker(LexicalScorer()).rerank("Ab wann gilt die Mietpreisbremse?", make_docs(), top_n=2)
+    assert len(reranked) == 2
+    assert reranked[0].metadata["id"] == "doc_1"
+    assert "rerank_score" in reranked[0].metadata
+
+def test_get_reranker_instance_disabled():
+    """The "none" scorer disables reranking."""
+    assert get_reranker_instance("none") is None
+    assert get_reranker_instance("bm25") is get_reranker_instance("bm25")
+
+def test_get_reranker_instance_uses_settings_batch_size():
+    """The batch size comes from the settings the retriever was built with."""
+    settings = replace(get_settings(), rerank_batch_size=4)
+    assert get_reranker_instance("bm25", settings).batch_size == 4
+    assert get_reranker_instance("bm25", settings) is not get_reranker_instance("bm25")
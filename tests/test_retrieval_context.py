@@ -0,0 +1,94 @@
+from langchain_core.documents import Document
+from retrieval_context import RetrievalContext, shares_topic
+
+PREVIOUS_CHUNKS = [
+    Document(page_content="Die Mietpreisbremse begrenzt die Indexierung der Mieten auf maximal 2 % ab 2027.",
+             metadata={"id": "doc_1", "page": 10}),
+    Document(page_content="Ein Sozialtarif für Energie wird für Haushalte mit niedrigem Einkommen eingeführt.",
+             metadata={"id": "doc_2", "page": 11}),
+]
+
+class RecordingSearch:
+    def __init__(self, documents):
+        self.documents = documents
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        return list(self.documents)
+
+def make_context():
+    context = RetrievalContext(delta_top_k=1, max_new_terms=1)
+    search = RecordingSearch(PREVIOUS_CHUNKS)
+    context.retrieve("Welche Maßnahmen gibt es gegen die Teuerung?", search)
+    return context, search
+
+def test_follow_up_reuses_previous_chunks():
+    """Short follow-ups are answered from the last turn's chunks without a search."""
+    context, search = make_context()
+    for follow_up in ["Und ab wann gilt das?", "Welche Seite?"]:
+        assert context.is_follow_up(follow_up)
+        assert context.retrieve(follow_up, search) == PREVIOUS_CHUNKS
+    assert len(search.queries) == 1
+    assert context.reuse_count == 2
+
+def test_new_topic_triggers_full_retrieval():
+    """Questions about a new topic are not treated as follow-ups."""
+    context, search = make_context()
+    assert not context.is_follow_up("Welche Pläne gibt es für das Bundesheer und die Landesverteidigung?")
+    context.retrieve("Welche Pläne gibt es für das Bundesheer und die Landesverteidigung?", search)
+    assert len(search.queries) == 2
+
+def test_follow_up_with_new_term_is_topped_up():
+    """A follow-up introducing one new term gets a small delta search."""
+    context, search = make_context()
+    delta_chunk = Document(page_content="Der Heizkostenzuschuss wird verlängert.", metadata={"id": "doc_9", "page": 12})
+    delta_search = RecordingSearch([delta_chunk])
+    documents = context.retrieve("Und der Heizkostenzuschuss?", search, delta_search=delta_search)
+    assert documents == PREVIOUS_CHUNKS + [delta_chunk]
+    assert "Teuerung" in delta_search.queries[0]
+    assert len(search.queries) == 1
+
+def test_follow_up_switching_topic_falls_back_to_full_retrieval():
+    """If the delta search lands in an unrelated part of the programme, the follow-up is searched in full."""
+    context, search = make_context()
+    delta_chunk = Document(page_content="Studierende erhalten eine höhere Studienbeihilfe.",
+                           metadata={"id": "doc_40", "page": 80})
+    documents = context.retrieve("Und für Studenten?", search, delta_search=RecordingSearch([delta_chunk]),
+                                 search_query="Welche Maßnahmen gibt es gegen die Teuerung für Studenten?")
+    assert documents == PREVIOUS_CHUNKS
+    assert search.queries[-1] == "Welche Maßnahmen gibt es gegen die Teuerung für Studenten?"
+    assert context.reuse_count == 0 and context.last_query == "Und für Studenten?"
+
+def test_shares_topic_ignores_placeholder_pages():
+    """Chunks whose page is "N/A" or whose ID is "Unknown" are compared without raising or matching each other."""
+    unknown_page = Document(page_content="Studierende erhalten eine höhere Studienbeihilfe.",
+                            metadata={"id": "Unknown", "page": "N/A", "topic": "Bildung"})
+    other = Document(page_content="Die Mieten werden begrenzt.", metadata={"id": "Unknown", "page": "N/A"})
+    assert not shares_topic(unknown_page, [other] + PREVIOUS_CHUNKS)
+    assert shares_topic(Document(page_content="Text", metadata={"page": "N/A"}), PREVIOUS_CHUNKS)
+    assert shares_topic(Document(page_content="Text", metadata={"page": "12"}), PREVIOUS_CHUNKS)
+
+def test_follow_up_in_other_namespace_or_top_k_is_searched_in_full():
+    """Chunks are reused only for the language mode's namespace and the top_k they were retrieved with."""
+    context = RetrievalContext(delta_top_k=1, max_new_terms=1)
+    search = RecordingSearch(PREVIOUS_CHUNKS)
+    context.retrieve("Welche Maßnahmen gibt es gegen die Teuerung?", search, namespace="default", top_k=2)
+    assert context.retrieve("Und ab wann gilt das?", search, namespace="default", top_k=2) == PREVIOUS_CHUNKS
+    assert len(search.queries) == 1
+    context.retrieve("Und ab wann gilt das?", search, namespace="default-einfach", top_k=2)
+    assert len(search.queries) == 2
+    context.retrieve("Und ab wann gilt das?", search, namespace="default-einfach", top_k=1)
+    assert len(search.queries) == 3 and context.top_k == 1
+
+def test_repeated_top_ups_stay_within_top_k_plus_delta():
+    """Each top-up replaces reused chunks instead of growing the context, and carries the topic forward."""
+    context = RetrievalContext(delta_top_k=1, max_new_terms=1)
+    search = RecordingSearch(PREVIOUS_CHUNKS)
+    context.retrieve("Welche Maßnahmen gibt es gegen die Teuerung?", search, top_k=2)
+    for i, term in enumerate(["Heizkostenzuschuss", "Pendlerpauschale", "Klimabonus"]):
+        delta_chunk = Document(page_content=f"Der {term} wird angepasst.", metadata={"id": f"doc_{20 + i}", "page": 11})
+        documents = context.retrieve(f"Und der {term}?", search, delta_search=RecordingSearch([delta_chunk]), top_k=2)
+        assert len(documents) <= 3 and documents[-1] is delta_chunk
+    assert len(search.queries) == 1
+    assert "Teuerung" in context.last_query and "Klimabonus" in context.last_query
@@ -0,0 +1,28 @@
+from langchain_core.documents import Document
+from efficient_retriever import reciprocal_rank_fusion
+
+def make_doc(record_id):
+    return Document(page_content=f"Text {record_id}", metadata={"id": record_id})
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """Documents ranked well by several query variants move to the top."""
+    fused = reciprocal_rank_fusion([
+        [make_doc("doc_1"), make_doc("doc_2"), make_doc("doc_3")],
+        [make_doc("doc_2"), make_doc("doc_4")],
+        [make_doc("doc_2"), make_doc("doc_1")],
+    ], k=60)
+    assert [doc.metadata["id"] for doc in fused] == ["doc_2", "doc_1", "doc_4", "doc_3"]
+    assert fused[0].metadata["rrf_score"] > fused[1].metadata["rrf_score"]
+
+def test_reciprocal_rank_fusion_single_list_keeps_order():
+    """A single result list passes through unchanged."""
+    fused = reciprocal_rank_fusion([[make_doc("a"), make_doc("b")]])
+    assert [doc.metadata["id"] for doc in fused] == ["a", "b"]
+
+def test_reciprocal_rank_fusion_keeps_distinct_chunks_without_id():
+    """Chunks lacking a record ID are told apart by their content, and still merge when identical."""
+    first = Document(page_content="Die Mietpreisbremse gilt ab 2027.", metadata={"id": "Unknown", "page": 42})
+    second = Document(page_content="Der Wohnbau wird gefördert.", metadata={"id": "Unknown", "page": 42})
+    same_as_first = Document(page_content="Die Mietpreisbremse gilt ab 2027.", metadata={"id": "Unknown", "page": 42})
+    fused = reciprocal_rank_fusion([[first, second], [same_as_first]], k=60)
+    assert [doc.page_content for doc in fused] == [first.page_content, second.page_content]
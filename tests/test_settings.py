@@ -0,0 +1,49 @@
+from dataclasses import FrozenInstanceError, replace
+import pytest
+from local_pinecone import LocalIndex
+from efficient_retriever import EfficientPineconeRetriever
+from pinecone_processor import get_retrieval_namespace
+from settings import Settings
+
+def test_environment_overrides_secrets_and_defaults():
+    """Values come from SECTION_KEY, then [section] key in the secrets, then the default, with their field type."""
+    settings = Settings.load(env={"RETRIEVAL_STANDARD_TOP_K": "8", "APP_FAQ_ENABLED": "false"},
+                             secrets={"retrieval": {"standard_top_k": 6, "cache_ttl_seconds": 60},
+                                      "openai_timeout_seconds": "12.5"})
+    assert settings.standard_top_k == 8
+    assert settings.faq_enabled is False
+    assert settings.retrieval_cache_ttl_seconds == 60.0
+    assert settings.llm_timeout_seconds == 12.5
+    assert settings.simple_top_k == 3 and settings.simple_namespace == "default-einfach"
+    with pytest.raises(FrozenInstanceError):
+        settings.standard_top_k = 1
+
+def test_invalid_values_name_the_variable():
+    """Unparseable or out-of-range values fail at startup instead of at the first request."""
+    with pytest.raises(ValueError, match="RETRIEVAL_SIMPLE_TOP_K"):
+        Settings.load(env={"RETRIEVAL_SIMPLE_TOP_K": "drei"}, secrets={})
+    with pytest.raises(ValueError, match="standard_top_k"):
+        Settings.load(env={"RETRIEVAL_STANDARD_TOP_K": "0"}, secrets={})
+
+def test_retrievers_use_the_settings_they_are_given():
+    """Namespace selection and retriever defaults follow explicitly passed settings."""
+    settings = replace(Settings.load(env={}, secrets={}), pinecone_namespace="test", simple_chunks=True,
+                       simple_namespace="test-einfach")
+    assert get_retrieval_namespace(True, settings) == "test-einfach"
+    assert get_retrieval_namespace(False, settings) == "test"
+
+    index = LocalIndex("test")
+    index.upsert_records("test", [{"_id": "doc_0", "text": "Die Mietpreisbremse gilt ab 2027.", "page": 41}])
+    retriever = EfficientPineconeRetriever(index=index, top_k=1, settings=settings)
+    assert retriever.invoke("Mietpreisbremse")[0].metadata["id"] == "doc_0"
+
+def test_operational_settings_keep_their_variable_names():
+    """Warm-up, tracing, logs, budgets and the index backend resolve through Settings under their old names."""
+    settings = Settings.load(env={"TRACING_ENABLED": "true", "WARMUP_TOP_N": "20", "USAGE_DAILY_BUDGET_USD": "1.5",
+                                  "PINECONE_BACKEND": "local", "RETRIEVAL_RERANK_BATCH_SIZE": "32"},
+                             secrets={"query_log": {"enabled": True}, "pinecone": {"api_key": "secret"}})
+    assert settings.tracing_enabled is True and settings.query_log_enabled is True
+    assert (settings.warmup_top_n, settings.usage_daily_budget_usd) == (20, 1.5)
+    assert (settings.pinecone_backend, settings.pinecone_api_key, settings.rerank_batch_size) == ("local", "secret", 32)
+    with pytest.raises(ValueError, match="Unknown Pinecone backend"):
+        Settings.load(env={"PINECONE_BACKEND": "chroma"}, secrets={})
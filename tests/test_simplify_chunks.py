@@ -0,0 +1,54 @@
+from simplify_chunks import simplify_chunks, load_checkpoint, build_records, chunk_hash, stale_record_ids
+
+CHUNKS = {
+    f"doc_{i}": {"text": f"Komplizierter Text {i}", "page": i, "source": "programm.pdf", "topic": "Umwelt & Klima"}
+    for i in range(5)
+}
+
+def test_simplify_chunks_resumes_from_checkpoint(tmp_path):
+    """A second run only rewrites the chunks missing from the checkpoint."""
+    checkpoint = str(tmp_path / "simplified.jsonl")
+    calls = []
+
+    def rewrite(text):
+        calls.append(text)
+        return text.replace("Komplizierter", "Einfacher")
+
+    assert simplify_chunks(CHUNKS, rewrite, checkpoint_path=checkpoint, batch_size=2, workers=2, limit=3) == 3
+    # Simulate an interrupted write of the next batch
+    with open(checkpoint, "a", encoding="utf-8") as f:
+        f.write('{"id": "doc_3", "simple_te')
+
+    assert simplify_chunks(CHUNKS, rewrite, checkpoint_path=checkpoint, batch_size=2, workers=2) == 2
+    assert len(calls) == 5
+    done = load_checkpoint(checkpoint)
+    assert sorted(done) == sorted(CHUNKS)
+    # The first record written after the truncated line must not be glued onto it
+    assert done["doc_3"]["simple_text"] == "Einfacher Text 3"
+    assert done["doc_4"]["simple_text"] == "Einfacher Text 4"
+
+def test_build_records_keeps_original_text(tmp_path):
+    """Records embed the simplified text and carry the original for citations."""
+    entry = {"id": "doc_1", "source_hash": chunk_hash("Komplizierter Text 1"), "simple_text": "Einfacher Text 1"}
+    records = build_records(CHUNKS, {"doc_1": entry})
+    assert records == [{
+        "_id": "doc_1", "text": "Einfacher Text 1", "original_text": "Komplizierter Text 1", "page": 1,
+        "source": "programm.pdf", "chapter": "", "section": "", "topic": "Umwelt & Klima",
+    }]
+
+def test_rechunked_ids_are_rewritten_and_outdated_records_deleted(tmp_path):
+    """After re-chunking, IDs pointing to another passage are rewritten and vanished IDs are marked for deletion."""
+    checkpoint = str(tmp_path / "simplified.jsonl")
+    simplify_chunks(CHUNKS, lambda text: text.replace("Komplizierter", "Einfacher"), checkpoint_path=checkpoint)
+
+    rechunked = {record_id: dict(chunk) for record_id, chunk in CHUNKS.items() if record_id != "doc_4"}
+    rechunked["doc_2"]["text"] = "Ganz anderer Text"
+    calls = []
+    assert simplify_chunks(rechunked, lambda text: calls.append(text) or "Neu", checkpoint_path=checkpoint) == 1
+    assert calls == ["Ganz anderer Text"]
+
+    done = load_checkpoint(checkpoint)
+    records = {record["_id"]: record for record in build_records(rechunked, done)}
+    assert records["doc_2"]["text"] == "Neu" and records["doc_2"]["original_text"] == "Ganz anderer Text"
+    assert "doc_4" not in records
+    assert stale_record_ids(rechunked, done) == ["doc_4"]
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+from langchain_core.documents import Document
+import slow_request_log
+from slow_request_log import SlowRequestLog, capture_request, load_slow_requests, record_documents, record_inputs
+from metrics import timed, record_token_usage
+
+@pytest.fixture
+def slow_log(tmp_path, monkeypatch):
+    """Slow-request log in a temporary directory."""
+    log = SlowRequestLog(path=str(tmp_path / "slow.jsonl"), max_bytes=10_000)
+    monkeypatch.setattr(slow_request_log, "_slow_request_log_instance", log)
+    return log
+
+def test_only_slow_or_failed_requests_are_logged(slow_log):
+    """Fast requests are dropped; slow and failed ones keep their inputs, stages, records and tokens."""
+    with capture_request("test", threshold=60):
+        record_inputs(query="schnell")
+    with capture_request("test", threshold=0):
+        record_inputs(chatbot="chatbot", query="langsam")
+        with timed("retrieval"):
+            record_documents([Document(page_content="Mietpreisbremse", metadata={"id": "rec-1"})])
+        with timed("completion"):
+            record_token_usage(1200, 150)
+    with pytest.raises(RuntimeError):
+        with capture_request("test", threshold=60):
+            raise RuntimeError("Index nicht erreichbar")
+
+    slow_log.flush()
+    slow, failed = load_slow_requests(slow_log.path)
+    assert slow["inputs"]["query"] == "langsam"
+    assert set(slow["stages"]) == {"retrieval", "completion"}
+    assert slow["record_ids"] == ["rec-1"] and slow["context_characters"] == len("Mietpreisbremse")
+    assert (slow["llm_calls"], slow["prompt_tokens"], slow["completion_tokens"]) == (1, 1200, 150)
+    assert failed["error"] == "RuntimeError: Index nicht erreichbar"
+
+def test_log_is_rotated_at_the_size_limit(slow_log):
+    """The log never grows beyond two files; the newest entries survive."""
+    for i in range(100):
+        slow_log.append({"id": str(i), "duration": 1.0, "endpoint": "test", "padding": "x" * 500})
+        slow_log.flush()
+    entries = load_slow_requests(slow_log.path)
+    assert entries[-1]["id"] == "99"
+    assert 10 < len(entries) < 40
+
+def test_slow_requests_are_written_off_the_request_thread(slow_log):
+    """A slow disk does not hold up the request that is already slow."""
+    disk_free = threading.Event()
+    write = slow_log._write
+    slow_log._write = lambda batch: (disk_free.wait(5), write(batch))
+    with capture_request("test", threshold=0):
+        record_inputs(query="langsam")
+    assert load_slow_requests(slow_log.path) == []
+    disk_free.set()
+    slow_log.flush()
+    assert [entry["inputs"]["query"] for entry in load_slow_requests(slow_log.path)] == ["langsam"]
@@ -0,0 +1,70 @@
+import asyncio
+import os
+import subprocess
+import sys
+import httpx
+import config
+import settings
+import api
+from startup_profile import DEFERRED_MODULES, parse_importtime
+
+def test_importing_the_api_defers_heavy_modules():
+    """A fresh interpreter imports api without Streamlit, LangChain's OpenAI client, Pinecone or spaCy."""
+    script = f"import sys, api; print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+def test_readiness_waits_for_chatbots_and_warmup(monkeypatch):
+    """/api/live answers right away; /api/ready only once the chatbots exist and the warm-up is done."""
+    warmed = [False]
+    monkeypatch.setattr(api, "_chatbots", None)
+    monkeypatch.setattr(api, "is_ready", lambda: warmed[0])
+
+    async def get(path):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://testserver") as client:
+            response = await client.get(path)
+            return response.status_code, response.json()["status"]
+
+    assert asyncio.run(get("/api/live")) == (200, "ok")
+    assert asyncio.run(get("/api/ready")) == (503, "initializing")
+    monkeypatch.setattr(api, "_chatbots", (object(), object()))
+    assert asyncio.run(get("/api/ready")) == (503, "warming_up")
+    warmed[0] = True
+    assert asyncio.run(get("/api/ready")) == (200, "ready")
+
+def test_secrets_are_read_from_toml_without_streamlit(tmp_path, monkeypatch):
+    """Outside the Streamlit app, config reads secrets.toml itself; the project file wins."""
+    (tmp_path / "global.toml").write_text('[openai]\napi_key = "global"\nmodel_name = "gpt-test"\n')
+    (tmp_path / "project.toml").write_text('[openai]\napi_key = "project"\n')
+    monkeypatch.setattr(settings, "SECRETS_PATHS", (str(tmp_path / "global.toml"), str(tmp_path / "project.toml")))
+    monkeypatch.setattr(settings, "_secrets", None)
+    monkeypatch.delitem(sys.modules, "streamlit", raising=False)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    assert config.get_config("api_key", section="openai") == "project"
+    assert config.get_config("missing", "default", section="openai") == "default"
+
+def test_importtime_output_is_parsed_by_depth():
+    """Log lines are skipped; nesting depth comes from the indentation of the module name."""
+    output = ("import time: self [us] | cumulative | imported package\n"
+              "INFO:config:Accessing config\n"
+              "import time:       120 |        120 |     json.decoder\n"
+              "import time:       300 |        420 |   json\n"
+              "import time:      1000 |       1420 | api\n")
+    rows = parse_importtime(output)
+    assert [(row["module"], row["depth"]) for row in rows] == [("json.decoder", 2), ("json", 1), ("api", 0)]
+    assert rows[-1]["cumulative"] == 0.00142
+
+def test_chat_during_startup_is_rejected_without_blocking(monkeypatch):
+    """While the startup thread holds the lock, /api/chat answers 503 and /api/live still answers."""
+    monkeypatch.setattr(api, "_chatbots", None)
+    monkeypatch.setitem(api._startup, "status", "initializing")
+
+    async def requests():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://testserver") as client:
+            chat = await asyncio.wait_for(client.post("/api/chat", json={"query": "Was ist mit der Rente?"}), 2)
+            live = await asyncio.wait_for(client.get("/api/live"), 2)
+            return chat.status_code, chat.headers.get("retry-after"), live.status_code
+
+    with api._chatbots_lock:
+        assert asyncio.run(requests()) == (503, "5", 200)
@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import tracing
+from tracing import start_trace, span, current_span, propagate_context, traceparent_headers, format_trace
+
+class CapturingExporter(tracing.TraceExporter):
+    def __init__(self):
+        self.payloads = []
+        super().__init__()
+
+    def export(self, payload):
+        self.payloads.append(payload)
+
+@pytest.fixture
+def exporter(monkeypatch):
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing, "TRACING_SAMPLE_RATE", 1.0)
+    capturing = CapturingExporter()
+    monkeypatch.setattr(tracing, "_exporter_instance", capturing)
+    return capturing
+
+def spans_of(payload):
+    return payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+def test_spans_nest_and_follow_worker_threads(exporter):
+    """Child spans get the parent's trace; propagate_context carries the active span into a thread pool."""
+    with start_trace("POST /api/chat", simple_language=False):
+        with span("retriever", top_k=5) as retriever_span:
+            def search(variant):
+                with span("pinecone.search_records", query=variant):
+                    return variant
+
+            search = propagate_context(search)
+            with ThreadPoolExecutor(2) as executor:
+                list(executor.map(search, ["a", "b"]))
+            retriever_span.set_attribute("hits", 2)
+        assert traceparent_headers()["traceparent"].startswith("00-")
+    exporter.flush()
+
+    spans = spans_of(exporter.payloads[0])
+    by_name = {s["name"]: s for s in spans}
+    assert len({s["traceId"] for s in spans}) == 1
+    assert by_name["retriever"]["parentSpanId"] == by_name["POST /api/chat"]["spanId"]
+    assert [s["parentSpanId"] for s in spans if s["name"] == "pinecone.search_records"] == [by_name["retriever"]["spanId"]] * 2
+    assert {"key": "hits", "value": {"intValue": "2"}} in by_name["retriever"]["attributes"]
+    assert "retriever  " in "\n".join(format_trace(exporter.payloads[0]))
+
+def test_unsampled_traces_are_dropped_but_errors_are_kept(exporter, monkeypatch):
+    """Fast successful traces outside the sample are not exported; failed ones always are."""
+    monkeypatch.setattr(tracing, "TRACING_SAMPLE_RATE", 0.0)
+    with start_trace("fast"):
+        pass
+    with pytest.raises(RuntimeError):
+        with start_trace("failing"):
+            with span("llm.completion"):
+                raise RuntimeError("rate limited")
+    exporter.flush()
+
+    assert len(exporter.payloads) == 1
+    spans = spans_of(exporter.payloads[0])
+    assert all(s["status"]["code"] == tracing.STATUS_ERROR for s in spans)
+
+def test_tracing_is_a_no_op_when_disabled_or_outside_a_trace(monkeypatch):
+    """Without an active trace spans cost nothing and outgoing calls get no trace header."""
+    monkeypatch.setattr(tracing, "TRACING_ENABLED", False)
+    with start_trace("POST /api/chat") as root:
+        with span("retriever") as child:
+            child.set_attribute("hits", 3)
+    assert root is tracing.NOOP_SPAN and child is tracing.NOOP_SPAN
+    assert current_span() is tracing.NOOP_SPAN and traceparent_headers() == {}
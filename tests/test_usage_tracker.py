@@ -0,0 +1,75 @@
+import json
+import threading
+from datetime import date
+import pytest
+from usage_tracker import UsageTracker, compute_cost, get_prices, load_usage, summarize_usage, usage_scope
+
+def test_compute_cost_uses_longest_matching_model_prefix():
+    """gpt-4o-mini is priced as the mini model, not as gpt-4o."""
+    assert get_prices("gpt-4o-mini-2024-07-18") == (0.15, 0.60)
+    assert compute_cost(1_000_000, 1_000_000, (0.15, 0.60)) == pytest.approx(0.75)
+
+def test_usage_is_attributed_to_scope_and_summarized(tmp_path):
+    """Calls are logged with session, request and mode and can be grouped by each of them."""
+    path = str(tmp_path / "usage.jsonl")
+    tracker = UsageTracker(path=path, session_budget=0, daily_budget=0, model="gpt-4o-mini")
+    with usage_scope(session_id="s1", request_id="r1"):
+        tracker.record(1000, 200, mode="standard")
+        tracker.record(500, 100, mode="standard")
+    with usage_scope(session_id="s2", request_id="r2"):
+        tracker.record(800, 150, mode="simple")
+
+    tracker.flush()
+    records = load_usage(path)
+    assert [r["session_id"] for r in records] == ["s1", "s1", "s2"]
+    by_mode = summarize_usage(records, "mode")
+    assert by_mode["standard"]["calls"] == 2 and by_mode["standard"]["requests"] == 1
+    assert by_mode["simple"]["prompt_tokens"] == 800
+    assert tracker.session_cost("s1") == pytest.approx(compute_cost(1500, 300, tracker.prices))
+    assert UsageTracker(path=path, daily_budget=1.0, model="gpt-4o-mini").day_cost() == pytest.approx(
+        sum(r["cost_usd"] for r in records))
+
+def test_plan_degrades_as_the_session_budget_is_used_up():
+    """Fewer tokens at 75 %, fewer chunks at 90 % and extractive answers once the budget is spent."""
+    tracker = UsageTracker(path=None, session_budget=1.0, daily_budget=0, model="gpt-4o-mini")
+    tracker.prices = (10_000.0, 0.0)  # one prompt token costs 1 cent
+    levels = []
+    with usage_scope(session_id="s1"):
+        for prompt_tokens in (0, 80, 15, 5):  # 0 %, 80 %, 95 % and 100 % of the budget
+            tracker.record(prompt_tokens, 0)
+            levels.append(tracker.plan(max_tokens=1000, top_k=8))
+    assert [plan["level"] for plan in levels] == ["normal", "reduced", "minimal", "extractive"]
+    assert levels[1]["max_tokens"] == 500 and levels[1]["top_k"] == 8
+    assert levels[2]["top_k"] == 2 and levels[3]["extractive"]
+    assert tracker.plan(max_tokens=1000, top_k=8, session_id="other")["level"] == "normal"
+
+def test_recording_does_not_wait_for_the_log_file(tmp_path):
+    """LLM calls only queue their usage record; a slow disk does not hold up the request."""
+    tracker = UsageTracker(path=str(tmp_path / "usage.jsonl"), session_budget=0, daily_budget=0, model="gpt-4o-mini")
+    disk_free = threading.Event()
+    write = tracker._writer._write
+    tracker._writer._write = lambda batch: (disk_free.wait(5), write(batch))
+
+    for _ in range(3):
+        tracker.record(100, 10)
+    assert load_usage(tracker.path) == [] and tracker.mode_totals()["standard"]["calls"] == 3
+    disk_free.set()
+    tracker.flush()
+    assert len(load_usage(tracker.path)) == 3
+
+def test_day_cost_reads_only_todays_end_of_the_rotated_log(tmp_path):
+    """Today's cost comes from the end of the log; older days and the rotated file are not needed."""
+    from query_log import iter_jsonl_reversed
+
+    path = str(tmp_path / "usage.jsonl")
+    today = date.today().isoformat()
+    with open(path + ".1", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"timestamp": f"{today}T00:00:01", "cost_usd": 0.5}) + "\n")
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(2000):
+            f.write(json.dumps({"timestamp": "2020-01-01T00:00:00", "cost_usd": 1.0, "n": i}) + "\n")
+        for _ in range(3):
+            f.write(json.dumps({"timestamp": f"{today}T12:00:00", "cost_usd": 0.25}) + "\n")
+    assert UsageTracker(path=path, daily_budget=1.0, model="gpt-4o-mini").day_cost() == pytest.approx(0.75)
+    assert [entry.get("n") for entry in iter_jsonl_reversed(path, block_size=64)][3:6] == [1999, 1998, 1997]
+    assert len(load_usage(path)) == 2004
@@ -0,0 +1,48 @@
+import threading
+import time
+from caches import TTLCache
+from warmup import CacheWarmer
+
+def test_ttl_cache_evicts_least_recently_used_and_expired_entries():
+    """The oldest unused entry goes first at the size limit; expired entries count as missing."""
+    cache = TTLCache("test", maxsize=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and len(cache) == 2
+
+    expiring = TTLCache("test", maxsize=2, ttl_seconds=0.01)
+    expiring.put("a", 1)
+    time.sleep(0.02)
+    assert expiring.get("a") is None and len(expiring) == 0
+
+def test_warmer_respects_concurrency_and_counts_errors():
+    """All questions are warmed with at most `concurrency` at a time; failures do not stop the warm-up."""
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def warm(query):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        if query == "kaputt":
+            raise RuntimeError("Index nicht erreichbar")
+
+    warmer = CacheWarmer([f"Frage {i}" for i in range(11)] + ["kaputt"], time_budget=10, concurrency=3, warm=warm)
+    summary = warmer.run()
+    assert summary["status"] == "done" and warmer.ready
+    assert (summary["warmed"], summary["errors"]) == (11, 1)
+    assert peak[0] == 3
+
+def test_warmer_reports_ready_when_the_time_budget_is_used_up():
+    """A slow warm-up stops taking new questions at the deadline and no longer blocks readiness."""
+    warmer = CacheWarmer([f"Frage {i}" for i in range(100)], time_budget=0.05, concurrency=2,
+                         warm=lambda query: time.sleep(0.02))
+    assert not warmer.ready
+    start = time.perf_counter()
+    summary = warmer.run()
+    assert time.perf_counter() - start < 0.5
+    assert warmer.ready and summary["warmed"] < 100
@@ -1,16 +1,45 @@
 from typing import List, Dict
 import re
 from langchain.schema import Document
-from langchain.text_splitter import SpacyTextSplitter
+from langchain.text_splitter import SpacyTextSplitter, RecursiveCharacterTextSplitter
 from config import CHUNK_SIZE, CHUNK_OVERLAP
 
+# Heading detection limits for raw PDF page text
+HEADING_MAX_WORDS = 8
+HEADING_MAX_LENGTH = 80
+BULLET_PREFIXES = ('\uf0b7', '•', '-', 'o ', '–')
+
+# Splitter engines selectable for TextProcessor (compared by chunk_sweep.py)
+SPLITTERS = ("spacy", "recursive")
+
 class TextProcessor:
-    def __init__(self):
-        self.text_splitter = SpacyTextSplitter(
-            chunk_size=CHUNK_SIZE,
-            chunk_overlap=CHUNK_OVERLAP,
-            pipeline="sentencizer"  # Use the sentencizer pipeline which is faster and doesn't require full spaCy models
-        )
+    def __init__(self, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP, splitter: str = "spacy"):
+        """
+        Initialize the text processor.
+
+        Args:
+            chunk_size: Maximum chunk length in characters
+            chunk_overlap: Characters shared by neighbouring chunks
+            splitter: "spacy" splits at sentence boundaries with spaCy's sentencizer,
+                      "recursive" at ". " and then at words (no spaCy needed)
+        """
+        if splitter not in SPLITTERS:
+            raise ValueError(f"Unknown splitter: {splitter}. Expected one of {SPLITTERS}")
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"Chunk overlap ({chunk_overlap}) must be smaller than the chunk size ({chunk_size})")
+        if splitter == "spacy":
+            self.text_splitter = SpacyTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                pipeline="sentencizer"  # Use the sentencizer pipeline which is faster and doesn't require full spaCy models
+            )
+        else:
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                # Cleaned pages are a single line, so split at sentence ends, then words
+                separators=[". ", " ", ""]
+            )
     
     def clean_text(self, text: str) -> str:
         """Clean and normalize text."""
@@ -22,6 +51,33 @@ class TextProcessor:
         text = text.strip()
         return text
     
+    def is_heading(self, line: str, previous_line: str = "") -> bool:
+        """Heuristically decide whether a raw PDF text line is a heading."""
+        if not 3 <= len(line) <= HEADING_MAX_LENGTH or line.startswith(BULLET_PREFIXES):
+            return False
+        words = line.split()
+        if len(words) > HEADING_MAX_WORDS or re.fullmatch(r'[\d\s.]+', line) or '....' in line:
+            return False
+        # Headings start with a capital or a section number and end in a noun, not punctuation
+        if not (line[0].isupper() or re.match(r'^\d+(\.\d+)*\.?\s+\w', line)):
+            return False
+        if line[-1] in '.,;:-' or not (words[-1][0].isupper() or words[-1] == '&'):
+            return False
+        # A heading follows a blank line, a finished sentence or another heading-like line
+        return not previous_line or previous_line[-1] in '.!?:' or len(previous_line.split()) <= HEADING_MAX_WORDS
+    
+    def extract_headings(self, text: str) -> List[str]:
+        """Detect heading lines in raw page text (before whitespace is collapsed)."""
+        headings = []
+        previous_line = ""
+        for raw_line in text.split('\n'):
+            line = raw_line.strip()
+            if line and self.is_heading(line, previous_line):
+                headings.append(line)
+            if line:
+                previous_line = line
+        return headings
+    
     def prepare_document(self, document: Document) -> Document:
         """Prepare a single document."""
         # Clean the text content
@@ -47,6 +103,9 @@ class TextProcessor:
         processed_docs = []
         
         for doc in documents:
+            # Record headings while the page text still has its line structure
+            if 'headings' not in doc.metadata:
+                doc.metadata['headings'] = self.extract_headings(doc.page_content)
             # Clean and prepare the document
             prepared_doc = self.prepare_document(doc)
             # Split into chunks
@@ -0,0 +1,89 @@
+import logging
+import re
+from typing import List, Dict
+
+from config import MODEL_NAME
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fallback without tiktoken data: words and punctuation, long words cut into pieces of
+# this many characters, which is close to the real token count for German text
+APPROX_CHARS_PER_TOKEN = 4
+# Per-message overhead of the chat format (role and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Every reply is primed with the assistant role
+REPLY_PRIMING_TOKENS = 3
+
+_PIECE_PATTERN = re.compile(r"\s*\w+|\s*[^\w\s]|\s+")
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding(model: str = MODEL_NAME):
+    """Load the tiktoken encoding once; None if tiktoken or its data is unavailable (e.g. offline)."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            try:
+                _encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            logger.warning(f"tiktoken not available, using approximate token counts: {str(e)}")
+            _encoding = None
+    return _encoding
+
+
+def split_tokens(text: str) -> List[str]:
+    """
+    Split text into token-sized pieces that concatenate back to the text.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        List of pieces, one per (real or approximated) token
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        pieces = []
+        buffer = b""
+        for token in encoding.encode(text):
+            # Umlauts can span two tokens; emit the piece once the bytes decode
+            buffer += encoding.decode_single_token_bytes(token)
+            try:
+                pieces.append(buffer.decode("utf-8"))
+                buffer = b""
+            except UnicodeDecodeError:
+                continue
+        if buffer:
+            pieces.append(buffer.decode("utf-8", errors="replace"))
+        return pieces
+    pieces = []
+    for piece in _PIECE_PATTERN.findall(text):
+        while len(piece.strip()) > APPROX_CHARS_PER_TOKEN:
+            cut = len(piece) - len(piece.lstrip()) + APPROX_CHARS_PER_TOKEN
+            pieces.append(piece[:cut])
+            piece = piece[cut:]
+        pieces.append(piece)
+    return pieces
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens of a text."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(split_tokens(text))
+
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Number of prompt tokens of chat messages, including the per-message overhead."""
+    return sum(count_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for message in messages) + REPLY_PRIMING_TOKENS
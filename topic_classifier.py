@@ -0,0 +1,112 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Topic areas of the Regierungsprogramm (as listed in the system prompt) with
+# lowercase keyword stems. Stems match as word prefixes; stems of at least
+# SUBSTRING_MATCH_MIN_LENGTH characters also match inside compounds
+# ("verteidigung" in "Landesverteidigung"); a trailing "$" requires an exact word.
+TOPICS: Dict[str, List[str]] = {
+    "Wirtschaft & Steuern": [
+        "wirtschaft", "steuer", "abgabe", "unternehm", "standort", "budget", "finanz", "industrie",
+        "export", "konjunktur", "inflation", "teuerung", "lohnneben", "körperschaft", "betrieb",
+        "wettbewerb", "investition", "bürokratie",
+    ],
+    "Soziales & Gesundheit": [
+        "sozial", "gesundheit", "pflege", "pension", "rente", "familie", "kinderbetreu", "armut",
+        "spital", "ärzt", "arzt", "krankenkasse", "krankenversicherung", "behinder", "senior",
+        "arbeitslos", "arbeitsmarkt", "beschäftigung",
+    ],
+    "Sicherheit & Migration": [
+        "sicherheit", "polizei", "migration", "asyl", "integration", "zuwander", "terror", "extremis",
+        "grenz", "bundesheer", "verteidigung", "fremdenrecht", "abschiebung", "staatsbürgerschaft",
+    ],
+    "Bildung & Digitalisierung": [
+        "bildung", "schule", "schul", "schül", "lehrer", "lehrkr", "universit", "hochschul", "forschung",
+        "digital", "kindergarten", "elementarpäd", "ausbildung", "lehrling", "ki$", "künstliche",
+        "wissenschaft",
+    ],
+    "Umwelt & Klima": [
+        "umwelt", "klima", "energie", "emission", "erneuerbar", "natur", "wasser", "landwirtschaft",
+        "tierschutz", "nachhaltig", "strom", "photovoltaik", "bauern", "biodiversität",
+    ],
+    "Wohnen & Infrastruktur": [
+        "wohn", "miet", "wohnbau", "bauträger", "bauordnung", "infrastruktur", "verkehr", "bahn",
+        "straße", "breitband", "mobilität", "öffi", "eigentum",
+    ],
+    "Europa & Internationale Politik": [
+        "europa", "europäisch", "eu$", "international", "außenpolitik", "entwicklungszusammenarbeit",
+        "nachbar", "vereinte", "neutralität", "diplomat",
+    ],
+    "Justiz & Rechtsstaat": [
+        "justiz", "rechtsstaat", "gericht", "strafrecht", "strafverfahren", "staatsanwalt", "verfassung",
+        "korruption", "transparenz", "informationsfreiheit", "grundrecht", "datenschutz",
+    ],
+}
+
+SUBSTRING_MATCH_MIN_LENGTH = 7
+
+_WORD_PATTERN = re.compile(r"[\wÄÖÜäöüß]+")
+
+
+def _stem_matches(stem: str, token: str) -> bool:
+    if stem.endswith("$"):
+        return token == stem[:-1]
+    if token.startswith(stem):
+        return True
+    return len(stem) >= SUBSTRING_MATCH_MIN_LENGTH and stem in token
+
+
+def score_topics(text: str) -> Dict[str, int]:
+    """Count keyword hits per topic area."""
+    tokens = _WORD_PATTERN.findall(text.lower())
+    scores = {}
+    for topic, stems in TOPICS.items():
+        hits = sum(1 for token in tokens for stem in stems if _stem_matches(stem, token))
+        if hits:
+            scores[topic] = hits
+    return scores
+
+
+def classify_text(text: str, title: str = "") -> Optional[str]:
+    """
+    Assign a chunk to its most likely topic area.
+
+    Args:
+        text: Chunk text
+        title: Chapter/section titles of the chunk; weighted higher than the text
+
+    Returns:
+        The topic name, or None if no keyword matches
+    """
+    scores = score_topics(text)
+    for topic, hits in score_topics(title).items():
+        scores[topic] = scores.get(topic, 0) + 3 * hits
+    if not scores:
+        return None
+    return max(scores, key=scores.get)
+
+
+def classify_query(query: str) -> Tuple[Optional[str], float]:
+    """
+    Classify a user question into a topic area for metadata filtering.
+
+    Only unambiguous questions get a topic: the best topic needs at least
+    twice as many keyword hits as the runner-up.
+
+    Args:
+        query: The user question
+
+    Returns:
+        Tuple of (topic or None, confidence between 0 and 1)
+    """
+    scores = score_topics(query)
+    if not scores:
+        return None, 0.0
+
+    ranked = sorted(scores.values(), reverse=True)
+    best_topic = max(scores, key=scores.get)
+    runner_up = ranked[1] if len(ranked) > 1 else 0
+    confidence = ranked[0] / (ranked[0] + runner_up)
+    if ranked[0] < 2 * runner_up:
+        return None, confidence
+    return best_topic, confidence
@@ -0,0 +1,100 @@
+import argparse
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, Request
+import uvicorn
+
+from config import TRACING_FILE_PATH
+from tracing import format_trace
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_traces(path: str = TRACING_FILE_PATH) -> List[Dict]:
+    """Read exported OTLP/JSON traces, one request per line."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def trace_summary(payload: Dict) -> Dict:
+    """Trace ID, root span name, duration in seconds and error flag of one exported trace."""
+    spans = [s for resource in payload.get("resourceSpans", [])
+             for scope in resource.get("scopeSpans", []) for s in scope.get("spans", [])]
+    root = next((s for s in spans if not s.get("parentSpanId")), spans[0] if spans else None)
+    if root is None:
+        return {"trace_id": None, "name": None, "duration": 0.0, "spans": 0, "error": False}
+    return {
+        "trace_id": root["traceId"],
+        "name": root["name"],
+        "duration": (int(root["endTimeUnixNano"]) - int(root["startTimeUnixNano"])) / 1e9,
+        "spans": len(spans),
+        "error": any(s.get("status", {}).get("code") == 2 for s in spans),
+    }
+
+
+def create_app(path: str = TRACING_FILE_PATH) -> FastAPI:
+    """OTLP/HTTP JSON receiver that appends every export request to a JSON lines file."""
+    app = FastAPI(title="Local trace collector")
+    lock = threading.Lock()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    @app.post("/v1/traces")
+    async def receive(request: Request):
+        payload = await request.json()
+        with lock:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        return {"partialSuccess": {}}
+
+    @app.get("/traces")
+    async def traces(limit: int = 20):
+        return [trace_summary(payload) for payload in load_traces(path)[-limit:]]
+
+    return app
+
+
+def show(path: str, trace_id: Optional[str] = None, slowest: int = 5):
+    """Print the span trees of one trace or of the slowest traces in a file."""
+    payloads = load_traces(path)
+    if trace_id:
+        payloads = [p for p in payloads if trace_summary(p)["trace_id"] == trace_id]
+    else:
+        payloads = sorted(payloads, key=lambda p: trace_summary(p)["duration"], reverse=True)[:slowest]
+    if not payloads:
+        print(f"No traces found in {path}")
+    for payload in payloads:
+        print("\n".join(format_trace(payload)))
+        print()
+
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Collect and inspect request traces locally")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Receive OTLP/HTTP JSON exports")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    serve_parser.add_argument("--port", type=int, default=4318, help="Port to listen on (OTLP/HTTP default)")
+    serve_parser.add_argument("--path", default=TRACING_FILE_PATH, help="JSON lines file to append traces to")
+    show_parser = subparsers.add_parser("show", help="Print span trees from a trace file")
+    show_parser.add_argument("--path", default=TRACING_FILE_PATH, help="JSON lines file with exported traces")
+    show_parser.add_argument("--trace-id", default=None, help="Show only this trace (e.g. from the X-Trace-Id header)")
+    show_parser.add_argument("--slowest", type=int, default=5, help="Number of slowest traces to show")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        logger.info(f"Collecting traces on http://{args.host}:{args.port}/v1/traces into {args.path}")
+        uvicorn.run(create_app(args.path), host=args.host, port=args.port)
+    else:
+        show(args.path, args.trace_id, args.slowest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from config import (TRACING_ENABLED, TRACING_SAMPLE_RATE, TRACING_SLOW_SECONDS, TRACING_EXPORTER,
+                    TRACING_FILE_PATH, TRACING_OTLP_ENDPOINT, TRACING_QUEUE_SIZE, TRACING_SERVICE_NAME)
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXPORTERS = ("file", "otlp")
+OTLP_TIMEOUT_SECONDS = 2.0
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# Span of the code currently running; copied into worker threads by propagate_context()
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class _Trace:
+    """Spans of one request, collected until the root span ends."""
+
+    def __init__(self):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans: List["Span"] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span"):
+        with self._lock:
+            self.spans.append(span)
+
+
+class Span:
+    """One timed operation within a trace, with attributes such as top_k or token counts."""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, trace: _Trace, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.attributes = {key: value for key, value in attributes.items() if value is not None}
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        trace.add(self)
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds (up to now while the span is open)."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {str(error)}"
+
+    def end(self):
+        self.end_ns = time.time_ns()
+
+
+class _NoopSpan:
+    """Stand-in when tracing is off or no trace is active; every call is a no-op."""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def current_span():
+    """The active span, or a no-op span outside of a trace."""
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def start_trace(name: str, **attributes):
+    """
+    Open the root span of a request; nested inside another trace it becomes a child span.
+
+    Every trace is recorded, but only exported when it failed, took at least
+    TRACING_SLOW_SECONDS or was drawn by TRACING_SAMPLE_RATE.
+
+    Args:
+        name: Name of the root span, e.g. "POST /api/chat"
+        **attributes: Span attributes
+    """
+    if not TRACING_ENABLED:
+        yield NOOP_SPAN
+        return
+    if _current_span.get() is not None:
+        with span(name, **attributes) as child:
+            yield child
+        return
+
+    root = Span(name, _Trace(), None, attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        root.end()
+        reason = export_reason(root)
+        if reason:
+            root.attributes["trace.export_reason"] = reason
+            get_exporter().submit(root.trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a block as a child of the active span; a no-op outside of a trace.
+
+    Works as `with span("pinecone.search_records", top_k=5) as s:` and as a decorator.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(name, parent.trace, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def export_reason(root: Span) -> Optional[str]:
+    """Why a finished trace is exported ("error", "slow" or "sampled"), or None to drop it."""
+    if root.error or any(s.error for s in root.trace.spans):
+        return "error"
+    if root.duration >= TRACING_SLOW_SECONDS:
+        return "slow"
+    if random.random() < TRACING_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+def propagate_context(func):
+    """Wrap a function so it runs under the caller's active span when executed in a worker thread."""
+    parent = _current_span.get()
+    if parent is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current_span.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_span.reset(token)
+    return wrapper
+
+
+def traceparent_headers() -> Dict[str, str]:
+    """W3C traceparent header for outgoing calls (e.g. the OpenAI API), empty outside of a trace."""
+    active = _current_span.get()
+    if active is None:
+        return {}
+    return {"traceparent": f"00-{active.trace_id}-{active.span_id}-01"}
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: _Trace) -> Dict[str, Any]:
+    """Encode a trace as an OTLP/JSON ExportTraceServiceRequest."""
+    spans = []
+    for s in trace.spans:
+        entry = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in s.attributes.items()],
+            "status": {"code": STATUS_ERROR, "message": s.error} if s.error else {"code": STATUS_OK},
+        }
+        if s.parent_id:
+            entry["parentSpanId"] = s.parent_id
+        spans.append(entry)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACING_SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": TRACING_SERVICE_NAME}, "spans": spans}],
+    }]}
+
+
+class TraceExporter:
+    """Exports finished traces from a background thread so requests never wait for I/O."""
+
+    def __init__(self, queue_size: int = TRACING_QUEUE_SIZE):
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, trace: _Trace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Block until all submitted traces are exported."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                self.export(to_otlp(trace))
+            except Exception as e:
+                logger.warning(f"Trace export failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def export(self, payload: Dict[str, Any]):
+        raise NotImplementedError
+
+
+class FileTraceExporter(TraceExporter):
+    """Appends one OTLP/JSON request per trace to a JSON lines file."""
+
+    def __init__(self, path: str = TRACING_FILE_PATH, queue_size: int = TRACING_QUEUE_SIZE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        super().__init__(queue_size)
+
+    def export(self, payload: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+
+class OTLPTraceExporter(TraceExporter):
+    """Posts OTLP/HTTP JSON to a collector (e.g. trace_collector.py or an OpenTelemetry Collector)."""
+
+    def __init__(self, endpoint: str = TRACING_OTLP_ENDPOINT, queue_size: int = TRACING_QUEUE_SIZE):
+        import requests
+
+        self.endpoint = endpoint
+        self._session = requests.Session()
+        super().__init__(queue_size)
+
+    def export(self, payload: Dict[str, Any]):
+        response = self._session.post(self.endpoint, json=payload, timeout=OTLP_TIMEOUT_SECONDS)
+        response.raise_for_status()
+
+
+# Global exporter instance
+_exporter_instance = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> TraceExporter:
+    """Get or create the configured trace exporter."""
+    global _exporter_instance
+
+    with _exporter_lock:
+        if _exporter_instance is None:
+            if TRACING_EXPORTER == "file":
+                _exporter_instance = FileTraceExporter()
+            elif TRACING_EXPORTER == "otlp":
+                _exporter_instance = OTLPTraceExporter()
+            else:
+                raise ValueError(f"Unknown trace exporter: {TRACING_EXPORTER}. Use one of {EXPORTERS}.")
+            logger.info(f"Tracing enabled with {TRACING_EXPORTER} exporter (sample rate {TRACING_SAMPLE_RATE})")
+
+    return _exporter_instance
+
+
+def set_exporter(exporter: TraceExporter):
+    """Replace the trace exporter (e.g. in tests or benchmarks)."""
+    global _exporter_instance
+    _exporter_instance = exporter
+
+
+def _attribute_value(value: Dict[str, Any]) -> Any:
+    return next(iter(value.values())) if value else None
+
+
+def format_trace(payload: Dict[str, Any]) -> List[str]:
+    """Render an exported trace as an indented span tree with durations and attributes."""
+    spans = [s for resource in payload.get("resourceSpans", [])
+             for scope in resource.get("scopeSpans", []) for s in scope.get("spans", [])]
+    children: Dict[Optional[str], List[Dict]] = {}
+    for s in spans:
+        children.setdefault(s.get("parentSpanId"), []).append(s)
+
+    lines = []
+
+    def render(s: Dict, depth: int):
+        duration_ms = (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6
+        attributes = " ".join(f"{a['key']}={_attribute_value(a['value'])}" for a in s.get("attributes", []))
+        error = f"  ERROR {s['status'].get('message', '')}" if s.get("status", {}).get("code") == STATUS_ERROR else ""
+        lines.append(f"{'  ' * depth}{s['name']}  {duration_ms:.1f} ms  {attributes}{error}".rstrip())
+        for child in sorted(children.get(s["spanId"], []), key=lambda c: int(c["startTimeUnixNano"])):
+            render(child, depth + 1)
+
+    for root in children.get(None, []):
+        lines.append(f"trace {root['traceId']}")
+        render(root, 0)
+    return lines
@@ -0,0 +1,292 @@
+import argparse
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import (MODEL_NAME, USAGE_LOG_PATH, USAGE_INPUT_PRICE_PER_MILLION, USAGE_OUTPUT_PRICE_PER_MILLION,
+                    USAGE_SESSION_BUDGET_USD, USAGE_DAILY_BUDGET_USD, BUDGET_REDUCE_THRESHOLD,
+                    BUDGET_MINIMAL_THRESHOLD, BUDGET_MAX_TOKENS_FACTOR, BUDGET_MIN_TOP_K, USAGE_MAX_SESSIONS,
+                    USAGE_LOG_QUEUE_SIZE, USAGE_LOG_MAX_BYTES)
+from metrics import record_token_usage, BUDGET_DEGRADATIONS
+from query_log import JsonlWriter, iter_jsonl_reversed, load_jsonl
+from tracing import current_span
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# List prices in USD per million (input, output) tokens; the longest matching prefix of the model name wins
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+SUMMARY_GROUPS = ("mode", "session", "day", "chatbot")
+
+# Session and request of the code currently running, set by api.py and app.py
+_usage_scope: ContextVar[Tuple[Optional[str], Optional[str]]] = ContextVar("usage_scope", default=(None, None))
+
+
+@contextmanager
+def usage_scope(session_id: Optional[str] = None, request_id: Optional[str] = None):
+    """Attribute all LLM usage within the block to a session and request."""
+    token = _usage_scope.set((session_id, request_id))
+    try:
+        yield
+    finally:
+        _usage_scope.reset(token)
+
+
+def get_prices(model: str = MODEL_NAME) -> Tuple[float, float]:
+    """Input and output price in USD per million tokens; configured prices take precedence."""
+    matches = [prefix for prefix in MODEL_PRICES if model.startswith(prefix)]
+    input_price, output_price = MODEL_PRICES[max(matches, key=len)] if matches else (0.0, 0.0)
+    if not matches and not (USAGE_INPUT_PRICE_PER_MILLION and USAGE_OUTPUT_PRICE_PER_MILLION):
+        logger.warning(f"No price known for model {model}, costs are counted as 0")
+    return (USAGE_INPUT_PRICE_PER_MILLION or input_price, USAGE_OUTPUT_PRICE_PER_MILLION or output_price)
+
+
+def compute_cost(prompt_tokens: int, completion_tokens: int, prices: Optional[Tuple[float, float]] = None) -> float:
+    """Cost of one completion call in USD (at the prices of MODEL_NAME unless given)."""
+    input_price, output_price = prices or get_prices()
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+class UsageTracker:
+    """Token and cost totals per session, mode and day, with budget-driven degradation."""
+
+    def __init__(self, path: Optional[str] = USAGE_LOG_PATH, session_budget: float = USAGE_SESSION_BUDGET_USD,
+                 daily_budget: float = USAGE_DAILY_BUDGET_USD, model: str = MODEL_NAME):
+        """
+        Initialize the tracker.
+
+        Args:
+            path: JSON lines file every LLM call is appended to by a background writer
+                  (None keeps usage in memory only)
+            session_budget: Budget per session in USD (0 disables)
+            daily_budget: Budget per day for this process in USD (0 disables)
+            model: Model used to price the calls
+        """
+        self.path = path
+        self.session_budget = session_budget
+        self.daily_budget = daily_budget
+        self.model = model
+        self.prices = get_prices(model)
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, float]" = OrderedDict()
+        self._modes: Dict[str, Dict[str, float]] = {}
+        self._day = date.today().isoformat()
+        self._day_cost = self._load_day_cost() if path else 0.0
+        # Appending happens off the request path, so concurrent LLM calls do not queue for the file
+        self._writer = JsonlWriter(path, max_bytes=USAGE_LOG_MAX_BYTES, queue_size=USAGE_LOG_QUEUE_SIZE,
+                                   name="usage-log-writer") if path else None
+
+    def _load_day_cost(self) -> float:
+        """
+        Today's cost from the usage log, so a restart does not reset the daily budget.
+
+        The log is read from its end and only up to the first record of an earlier day.
+        """
+        total = 0.0
+        for record in iter_jsonl_reversed(self.path):
+            day = record.get("timestamp", "")[:10]
+            if day < self._day:
+                break
+            if day == self._day:
+                total += record.get("cost_usd", 0.0)
+        return total
+
+    def record(self, prompt_tokens: int, completion_tokens: int, mode: str = "standard",
+               chatbot: str = "chatbot") -> float:
+        """
+        Account one completion call to the current session and request.
+
+        Args:
+            prompt_tokens: Prompt tokens reported by the API
+            completion_tokens: Completion tokens reported by the API
+            mode: "standard" or "simple"
+            chatbot: Chatbot that made the call
+
+        Returns:
+            Cost of the call in USD
+        """
+        prompt_tokens = prompt_tokens or 0
+        completion_tokens = completion_tokens or 0
+        cost = compute_cost(prompt_tokens, completion_tokens, self.prices)
+        session_id, request_id = _usage_scope.get()
+        today = date.today().isoformat()
+
+        with self._lock:
+            if today != self._day:
+                self._day, self._day_cost = today, 0.0
+            self._day_cost += cost
+            if session_id:
+                self._sessions[session_id] = self._sessions.get(session_id, 0.0) + cost
+                self._sessions.move_to_end(session_id)
+                while len(self._sessions) > USAGE_MAX_SESSIONS:
+                    self._sessions.popitem(last=False)
+            totals = self._modes.setdefault(mode, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cost_usd"] += cost
+        if self._writer is not None:
+            self._writer.submit({
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "session_id": session_id,
+                "request_id": request_id,
+                "mode": mode,
+                "chatbot": chatbot,
+                "model": self.model,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "cost_usd": cost,
+            })
+
+        record_token_usage(prompt_tokens, completion_tokens, mode=mode, cost_usd=cost)
+        return cost
+
+    def flush(self):
+        """Block until all recorded calls are written to the usage log."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def session_cost(self, session_id: Optional[str]) -> float:
+        with self._lock:
+            return self._sessions.get(session_id, 0.0) if session_id else 0.0
+
+    def day_cost(self) -> float:
+        with self._lock:
+            return self._day_cost if self._day == date.today().isoformat() else 0.0
+
+    def mode_totals(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {mode: dict(totals) for mode, totals in self._modes.items()}
+
+    def budget_share(self, session_id: Optional[str] = None) -> float:
+        """Largest used share of the session and daily budget (0 when no budget is set)."""
+        shares = [0.0]
+        if self.session_budget > 0 and session_id:
+            shares.append(self.session_cost(session_id) / self.session_budget)
+        if self.daily_budget > 0:
+            shares.append(self.day_cost() / self.daily_budget)
+        return max(shares)
+
+    def plan(self, max_tokens: int, top_k: int, session_id: Optional[str] = None) -> Dict:
+        """
+        Cheapen an answer according to the remaining budget of the current session and day.
+
+        Args:
+            max_tokens: Completion limit of the language mode
+            top_k: Retrieved chunks of the language mode
+            session_id: Session to check (defaults to the current usage scope)
+
+        Returns:
+            Dict with level, max_tokens, top_k and extractive
+        """
+        if session_id is None:
+            session_id = _usage_scope.get()[0]
+        share = self.budget_share(session_id)
+        if share >= 1.0:
+            level = "extractive"
+        elif share >= BUDGET_MINIMAL_THRESHOLD:
+            level = "minimal"
+        elif share >= BUDGET_REDUCE_THRESHOLD:
+            level = "reduced"
+        else:
+            level = "normal"
+
+        plan = {"level": level, "max_tokens": max_tokens, "top_k": top_k, "extractive": level == "extractive"}
+        if level != "normal":
+            plan["max_tokens"] = max(1, int(max_tokens * BUDGET_MAX_TOKENS_FACTOR))
+            BUDGET_DEGRADATIONS.inc(level=level)
+            logger.info(f"Budget {share:.0%} used, answering at level '{level}'")
+        if level in ("minimal", "extractive"):
+            plan["top_k"] = min(top_k, BUDGET_MIN_TOP_K)
+        current_span().set_attribute("budget.level", level)
+        return plan
+
+
+# Global tracker instance
+_usage_tracker_instance = None
+_usage_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Get or create the process-wide usage tracker."""
+    global _usage_tracker_instance
+
+    # One tracker per process, or budgets would be split across trackers
+    with _usage_tracker_lock:
+        if _usage_tracker_instance is None:
+            _usage_tracker_instance = UsageTracker()
+
+    return _usage_tracker_instance
+
+
+def load_usage(path: str = USAGE_LOG_PATH) -> List[Dict]:
+    """Read the usage log, including the rotated previous file; unreadable lines are skipped."""
+    return load_jsonl(path)
+
+
+def summarize_usage(records: List[Dict], group_by: str = "mode") -> Dict[str, Dict]:
+    """
+    Aggregate usage records by mode, session, day or chatbot.
+
+    Returns:
+        Per group: calls, requests, prompt/completion tokens, cost and mean cost per request
+    """
+    groups: Dict[str, Dict] = {}
+    for record in records:
+        if group_by == "day":
+            key = record.get("timestamp", "")[:10]
+        else:
+            key = record.get("session_id" if group_by == "session" else group_by) or "unknown"
+        group = groups.setdefault(key, {"calls": 0, "requests": set(), "prompt_tokens": 0,
+                                        "completion_tokens": 0, "cost_usd": 0.0})
+        group["calls"] += 1
+        group["requests"].add(record.get("request_id") or f"call-{group['calls']}")
+        group["prompt_tokens"] += record.get("prompt_tokens", 0)
+        group["completion_tokens"] += record.get("completion_tokens", 0)
+        group["cost_usd"] += record.get("cost_usd", 0.0)
+
+    for group in groups.values():
+        group["requests"] = len(group["requests"])
+        group["cost_per_request_usd"] = group["cost_usd"] / group["requests"]
+    return groups
+
+
+def main():
+    # Parse command-line arguments
+    parser = argparse.ArgumentParser(description="Summarize LLM token usage and cost from the usage log")
+    parser.add_argument("--path", default=USAGE_LOG_PATH, help="Usage log (JSON lines)")
+    parser.add_argument("--by", default="mode", choices=SUMMARY_GROUPS, help="Group the totals by this field")
+    parser.add_argument("--since", default=None, help="Only records from this date on (YYYY-MM-DD)")
+    parser.add_argument("--top", type=int, default=20, help="Show the most expensive groups only")
+    args = parser.parse_args()
+
+    records = load_usage(args.path)
+    if args.since:
+        records = [r for r in records if r.get("timestamp", "") >= args.since]
+    if not records:
+        print(f"No usage recorded in {args.path}")
+        return
+
+    groups = summarize_usage(records, args.by)
+    print(f"\n{args.by:<34} {'requests':>8} {'calls':>6} {'prompt tok':>11} {'compl. tok':>11} {'cost USD':>10} {'USD/req':>9}")
+    for key, group in sorted(groups.items(), key=lambda item: item[1]["cost_usd"], reverse=True)[:args.top]:
+        print(f"{key[:34]:<34} {group['requests']:>8} {group['calls']:>6} {group['prompt_tokens']:>11} "
+              f"{group['completion_tokens']:>11} {group['cost_usd']:>10.4f} {group['cost_per_request_usd']:>9.5f}")
+    total = sum(group["cost_usd"] for group in groups.values())
+    print(f"\nTotal: {len(records)} LLM calls, {total:.4f} USD (prices for {records[-1].get('model', MODEL_NAME)})")
+
+
+if __name__ == "__main__":
+    main()
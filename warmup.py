@@ -0,0 +1,192 @@
+import logging
+import os
+import threading
+import time
+from functools import partial
+from typing import Callable, Dict, List, Optional
+
+from config import (WARMUP_ENABLED, WARMUP_QUERIES_PATH, WARMUP_TOP_N, WARMUP_TIME_BUDGET_SECONDS,
+                    WARMUP_CONCURRENCY, QUERY_LOG_PATH, FAQ_QUESTIONS_PATH)
+from settings import Settings, get_settings
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def resolve_queries_path(path: Optional[str] = WARMUP_QUERIES_PATH) -> Optional[str]:
+    """The configured question source, else the query log if it exists, else the FAQ list."""
+    for candidate in (path, QUERY_LOG_PATH, FAQ_QUESTIONS_PATH):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def load_warmup_queries(path: Optional[str] = WARMUP_QUERIES_PATH, top_n: int = WARMUP_TOP_N) -> List[str]:
+    """
+    The questions to warm up with.
+
+    Args:
+        path: .txt question list or .jsonl query log (ranked by frequency); see resolve_queries_path
+        top_n: Maximum number of questions
+
+    Returns:
+        Distinct questions, most frequent first for query logs
+    """
+    from build_faq import load_questions
+
+    source = resolve_queries_path(path)
+    if source is None:
+        logger.info("No warm-up questions found, skipping warm-up")
+        return []
+    return load_questions(source, limit=top_n)
+
+
+def warm_query(query: str, settings: Settings = None, resources=None):
+    """
+    Retrieve a question in both language modes as the chatbots would, filling the retrieval cache.
+
+    Args:
+        query: The question
+        settings: Retrieval settings (default: those of resources, else get_settings())
+        resources: ChatResources whose retrievers the chatbots use (default: new retrievers per call)
+    """
+    from pinecone_processor import get_efficient_retriever_instance, get_retrieval_namespace
+    from faq_store import lookup_faq
+    from query_router import direct_lookup
+
+    settings = settings or (resources.settings if resources else get_settings())
+    for simple_language in (False, True):
+        # FAQ answers need no retrieval; the lookup loads the store on first use
+        if lookup_faq(query, "chatbot", simple_language) is not None:
+            continue
+        if direct_lookup(query) is not None:
+            continue
+        top_k = settings.simple_top_k if simple_language else settings.standard_top_k
+        if resources is not None:
+            retriever = resources.retriever(top_k, simple_language)
+        else:
+            retriever = get_efficient_retriever_instance(top_k=top_k, settings=settings,
+                                                         namespace=get_retrieval_namespace(simple_language, settings))
+        retriever.invoke(query)
+
+
+class CacheWarmer:
+    """Warms the caches from historical questions with a time and concurrency budget."""
+
+    def __init__(self, queries: Optional[List[str]] = None, time_budget: float = WARMUP_TIME_BUDGET_SECONDS,
+                 concurrency: int = WARMUP_CONCURRENCY, warm: Callable[[str], None] = warm_query):
+        """
+        Initialize the warmer.
+
+        Args:
+            queries: Questions to warm; None loads them with load_warmup_queries() when the run starts
+            time_budget: Seconds after which the warm-up counts as finished, even if questions are left
+            concurrency: Questions warmed at the same time
+            warm: Function warming one question
+        """
+        self.queries = queries
+        self.time_budget = time_budget
+        self.concurrency = max(1, concurrency)
+        self.warm = warm
+        self.status = "pending"
+        self.warmed = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status in ("done", "timed_out", "failed")
+
+    def start(self):
+        """Run the warm-up in a background thread (once)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, name="cache-warmup", daemon=True)
+        self._thread.start()
+
+    def run(self) -> Dict:
+        """Warm up and block until all questions are done or the time budget is used up."""
+        start = time.perf_counter()
+        deadline = start + self.time_budget
+        self.status = "running"
+        try:
+            if self.queries is None:
+                self.queries = load_warmup_queries()
+            pending = iter(self.queries)
+
+            def worker():
+                while time.perf_counter() < deadline:
+                    with self._lock:
+                        query = next(pending, None)
+                    if query is None:
+                        return
+                    try:
+                        self.warm(query)
+                        with self._lock:
+                            self.warmed += 1
+                    except Exception as e:
+                        with self._lock:
+                            self.errors += 1
+                        logger.warning(f"Warm-up of '{query}' failed: {str(e)}")
+
+            workers = [threading.Thread(target=worker, name=f"cache-warmup-{i}", daemon=True)
+                       for i in range(min(self.concurrency, len(self.queries)))]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join(max(0.0, deadline - time.perf_counter()))
+            self.status = "timed_out" if any(thread.is_alive() for thread in workers) else "done"
+        except Exception as e:
+            logger.error(f"Warm-up failed: {str(e)}")
+            self.status = "failed"
+        self.elapsed = time.perf_counter() - start
+        logger.info(f"Warm-up {self.status}: {self.warmed} of {len(self.queries or [])} questions "
+                    f"in {self.elapsed:.1f} s ({self.errors} errors)")
+        return self.summary()
+
+    def summary(self) -> Dict:
+        return {
+            "status": self.status,
+            "queries": len(self.queries or []),
+            "warmed": self.warmed,
+            "errors": self.errors,
+            "elapsed_seconds": round(self.elapsed, 3),
+        }
+
+
+# Global warmer instance
+_cache_warmer_instance = None
+
+
+def get_cache_warmer() -> CacheWarmer:
+    """Get or create the process-wide cache warmer."""
+    global _cache_warmer_instance
+
+    if _cache_warmer_instance is None:
+        _cache_warmer_instance = CacheWarmer()
+
+    return _cache_warmer_instance
+
+
+def start_warmup(resources=None):
+    """
+    Start the background warm-up once per process, if enabled.
+
+    Args:
+        resources: ChatResources of the chatbots, so the warm-up reuses their retrievers
+    """
+    if WARMUP_ENABLED:
+        warmer = get_cache_warmer()
+        if resources is not None and warmer.warm is warm_query:
+            warmer.warm = partial(warm_query, resources=resources)
+        warmer.start()
+
+
+def is_ready() -> bool:
+    """Whether the warm-up is finished (always true when it is disabled)."""
+    return not WARMUP_ENABLED or get_cache_warmer().ready
+